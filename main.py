@@ -8,18 +8,44 @@ FastAPI 앱을 실행합니다.
     uv run uvicorn main:app --reload
 """
 
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from web.admin.router import router as admin_router
-from web.frontend.router import router as frontend_router
+# 라우터 import 시간 측정 (기동 시간 리포트용)
+_IMPORT_TIMES_MS = {}
+
+_t = time.perf_counter()
+from web.admin.router import router as admin_router  # noqa: E402
+_IMPORT_TIMES_MS["admin_router"] = round((time.perf_counter() - _t) * 1000, 1)
+
+_t = time.perf_counter()
+from web.frontend.router import router as frontend_router  # noqa: E402
+_IMPORT_TIMES_MS["frontend_router"] = round((time.perf_counter() - _t) * 1000, 1)
+
+from web import startup  # noqa: E402
+
+
+# ============================================================
+# 기동 워밍업 (클라이언트 생성, 인덱스 로드, 인기 게임 캐시)
+# ============================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup.warm_up(import_times_ms=_IMPORT_TIMES_MS)
+    yield
+
 
 # ============================================================
 # FastAPI 앱 생성
 # ============================================================
-app = FastAPI(title="GMJJ", description="보드게임 룰 안내/TRPG GM 애플리케이션")
+app = FastAPI(
+    title="GMJJ",
+    description="보드게임 룰 안내/TRPG GM 애플리케이션",
+    lifespan=lifespan,
+)
 
 # 이미지 static 파일 서빙 (data/images → /static/images)
 images_dir = Path(__file__).parent / "data" / "images"
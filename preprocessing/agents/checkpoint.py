@@ -0,0 +1,467 @@
+"""
+LangGraph 체크포인터 (로컬 SQLite)
+
+build_graph()에 체크포인터가 없으면 vectorize / save_results에서 예외가 나는 순간
+이미 비용을 낸 수집·파싱·통합·리뷰 결과가 사라지고 다음 실행은 init부터 다시 시작한다.
+rule_id별 스레드("rule-<id>")로 슈퍼스텝마다 상태를 저장해 두고,
+agents.run --resume이면 마지막 체크포인트에서 이어서 실행한다.
+
+- 노드 단위 재개: 병렬 노드 중 성공한 노드의 결과(pending writes)도 저장하므로
+  재개 시 실패한 노드만 다시 돈다.
+- 큰 값은 참조로 저장: CHECKPOINT_INLINE_MAX자를 넘는 문자열(소스 원문, 파싱 결과 등)은
+  sha256으로 payloads 테이블에 1번만 저장하고 체크포인트에는 해시만 남긴다.
+  sources 채널이 버전마다 통째로 다시 쓰여도 원문은 중복 저장되지 않는다.
+  컴포넌트 이미지의 base64 PNG는 extract_images_node 안에서 VLM 분류에만 쓰고 state에 넣지 않는다
+  (component_images에는 저장 경로 + 라벨/설명만). 이미지 본문은 체크포인트에 들어가지 않는다.
+
+사용법:
+    uv run python -m preprocessing.agents.checkpoint --stats
+    uv run python -m preprocessing.agents.checkpoint --clear 12     # rule_id=12 체크포인트 삭제
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from preprocessing.pipeline.config import AGENT_CHECKPOINT_PATH, CHECKPOINT_INLINE_MAX
+
+# 참조로 바꾼 문자열 표식 (state 값은 dict/list/str 조합이므로 dict 키로 구분)
+_REF_KEY = "__gmjj_ref__"
+
+
+def thread_id_for(rule_id: int) -> str:
+    """rule_id → 체크포인트 스레드 ID"""
+    return f"rule-{rule_id}"
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """SQLite(WAL) 체크포인터 - 채널 값은 버전별로, 큰 문자열은 해시 참조로 저장"""
+
+    def __init__(self, path: str = AGENT_CHECKPOINT_PATH, inline_max: int = CHECKPOINT_INLINE_MAX):
+        super().__init__()
+        self.path = path
+        self.inline_max = inline_max
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id     TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_id     TEXT,
+                type          TEXT NOT NULL,
+                checkpoint    BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata      BLOB NOT NULL,
+                created_at    REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id     TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel       TEXT NOT NULL,
+                version       TEXT NOT NULL,
+                type          TEXT NOT NULL,
+                value         BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id     TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id       TEXT NOT NULL,
+                idx           INTEGER NOT NULL,
+                channel       TEXT NOT NULL,
+                type          TEXT NOT NULL,
+                value         BLOB NOT NULL,
+                task_path     TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            CREATE TABLE IF NOT EXISTS payloads (
+                hash TEXT PRIMARY KEY,
+                text TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS payload_refs (
+                thread_id TEXT NOT NULL,
+                hash      TEXT NOT NULL,
+                PRIMARY KEY (thread_id, hash)
+            ) WITHOUT ROWID;
+            """
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ============================================================
+    # 큰 문자열 → 참조
+    # ============================================================
+    def _externalize(self, value: Any, refs: dict[str, str]) -> Any:
+        """inline_max자를 넘는 문자열을 {_REF_KEY: sha256}으로 바꾼다 (refs에 원문 수집)"""
+        if isinstance(value, str):
+            if len(value) <= self.inline_max:
+                return value
+            digest = hashlib.sha256(value.encode("utf-8")).hexdigest()
+            refs[digest] = value
+            return {_REF_KEY: digest}
+        if isinstance(value, dict):
+            return {k: self._externalize(v, refs) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._externalize(v, refs) for v in value]
+        if isinstance(value, tuple):
+            return tuple(self._externalize(v, refs) for v in value)
+        return value
+
+    def _internalize(self, value: Any, conn: sqlite3.Connection, cache: dict[str, str]) -> Any:
+        if isinstance(value, dict):
+            if len(value) == 1 and _REF_KEY in value:
+                digest = value[_REF_KEY]
+                if digest not in cache:
+                    row = conn.execute("SELECT text FROM payloads WHERE hash = ?", (digest,)).fetchone()
+                    cache[digest] = row[0] if row else ""
+                return cache[digest]
+            return {k: self._internalize(v, conn, cache) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._internalize(v, conn, cache) for v in value]
+        if isinstance(value, tuple):
+            return tuple(self._internalize(v, conn, cache) for v in value)
+        return value
+
+    def _dumps(self, value: Any, thread_id: str, conn: sqlite3.Connection) -> tuple[str, bytes]:
+        """직렬화 + 큰 문자열은 payloads에 저장 (호출 측 트랜잭션 안에서)"""
+        refs: dict[str, str] = {}
+        type_, data = self.serde.dumps_typed(self._externalize(value, refs))
+        if refs:
+            conn.executemany("INSERT OR IGNORE INTO payloads (hash, text) VALUES (?, ?)", refs.items())
+            conn.executemany(
+                "INSERT OR IGNORE INTO payload_refs (thread_id, hash) VALUES (?, ?)",
+                [(thread_id, digest) for digest in refs],
+            )
+        return type_, data
+
+    def _loads(self, type_: str, data: bytes, conn: sqlite3.Connection, cache: dict[str, str]) -> Any:
+        return self._internalize(self.serde.loads_typed((type_, data)), conn, cache)
+
+    # ============================================================
+    # 조회
+    # ============================================================
+    def _tuple_from_row(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, checkpoint_data, metadata_type, metadata_data = row
+        cache: dict[str, str] = {}
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, checkpoint_data))
+
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = conn.execute(
+                "SELECT type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if blob is None or blob[0] == "empty":
+                continue
+            channel_values[channel] = self._loads(blob[0], blob[1], conn, cache)
+
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+        def _config(cid: str) -> RunnableConfig:
+            return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": cid}}
+
+        return CheckpointTuple(
+            config=_config(checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata_data)),
+            parent_config=_config(parent_id) if parent_id else None,
+            pending_writes=[
+                (task_id, channel, self._loads(t, v, conn, cache)) for task_id, channel, t, v in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """체크포인트 조회 (checkpoint_id가 없으면 스레드의 최신)"""
+        conn = self._conn()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        row = conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+        return self._tuple_from_row(conn, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """체크포인트 목록 (최신순)"""
+        conn = self._conn()
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints"
+        )
+        where, params = [], []
+        if config is not None:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if "checkpoint_ns" in config["configurable"]:
+                where.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY checkpoint_id DESC"
+
+        count = 0
+        for thread_id, checkpoint_ns, *row in conn.execute(query, params).fetchall():
+            item = self._tuple_from_row(conn, thread_id, checkpoint_ns, row)
+            if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            yield item
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+    # ============================================================
+    # 저장
+    # ============================================================
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """체크포인트 저장 (이번에 바뀐 채널 값만 새 버전으로 기록)"""
+        conn = self._conn()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+
+        with conn:
+            for channel, version in new_versions.items():
+                if channel in values:
+                    type_, data = self._dumps(values[channel], thread_id, conn)
+                else:
+                    type_, data = "empty", b""
+                conn.execute(
+                    "INSERT OR REPLACE INTO blobs (thread_id, checkpoint_ns, channel, version, type, value) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), type_, data),
+                )
+            type_, data = self.serde.dumps_typed(c)
+            metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_id, "
+                "type, checkpoint, metadata_type, metadata, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_, data, metadata_type, metadata_data, time.time(),
+                ),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """노드 1개의 결과(pending writes) 저장 - 재개 시 성공한 노드는 다시 돌지 않는다"""
+        conn = self._conn()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with conn:
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                type_, data = self._dumps(value, thread_id, conn)
+                # 특수 채널(에러/인터럽트 등)은 음수 idx - 같은 키면 교체, 일반 쓰기는 처음 것 유지
+                verb = "INSERT OR REPLACE" if write_idx < 0 else "INSERT OR IGNORE"
+                conn.execute(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                    "channel, type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx,
+                     channel, type_, data, task_path),
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """스레드의 체크포인트/쓰기 삭제 + 더 이상 참조되지 않는 큰 문자열 정리"""
+        conn = self._conn()
+        with conn:
+            for table in ("checkpoints", "blobs", "writes", "payload_refs"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM payloads WHERE hash NOT IN (SELECT hash FROM payload_refs)")
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        """채널 버전: 단조 증가 정수 + 무작위 접미사 (InMemorySaver와 같은 형식)"""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ============================================================
+    # async (SQLite 호출은 스레드로 넘겨 이벤트 루프를 막지 않는다)
+    # ============================================================
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # ============================================================
+    # 관리
+    # ============================================================
+    def stats(self) -> list[dict]:
+        """스레드별 체크포인트 수 / 마지막 저장 시각 / 크기"""
+        rows = self._conn().execute(
+            """
+            SELECT c.thread_id, COUNT(*), MAX(c.created_at),
+                   SUM(LENGTH(c.checkpoint)) +
+                   COALESCE((SELECT SUM(LENGTH(value)) FROM blobs b WHERE b.thread_id = c.thread_id), 0) +
+                   COALESCE((SELECT SUM(LENGTH(value)) FROM writes w WHERE w.thread_id = c.thread_id), 0)
+            FROM checkpoints c GROUP BY c.thread_id ORDER BY MAX(c.created_at) DESC
+            """
+        ).fetchall()
+        return [
+            {"thread_id": t, "checkpoints": n, "updated_at": u, "bytes": b}
+            for t, n, u, b in rows
+        ]
+
+    def payload_bytes(self) -> int:
+        return self._conn().execute("SELECT COALESCE(SUM(LENGTH(text)), 0) FROM payloads").fetchone()[0]
+
+
+_checkpointer: SQLiteCheckpointer | None = None
+_lock = threading.Lock()
+
+
+def get_checkpointer() -> SQLiteCheckpointer:
+    """체크포인터 반환 (싱글톤)"""
+    global _checkpointer
+    if _checkpointer is None:
+        with _lock:
+            if _checkpointer is None:
+                _checkpointer = SQLiteCheckpointer()
+    return _checkpointer
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="LangGraph 체크포인트 관리")
+    parser.add_argument("--stats", action="store_true", help="rule별 저장 현황")
+    parser.add_argument("--clear", type=int, nargs="+", metavar="RULE_ID", help="rule 체크포인트 삭제")
+    args = parser.parse_args()
+
+    saver = get_checkpointer()
+
+    if args.clear:
+        for rule_id in args.clear:
+            saver.delete_thread(thread_id_for(rule_id))
+            print(f"  [checkpoint] rule_id={rule_id} 삭제")
+        return
+
+    print(f"  [checkpoint] {saver.path} (참조 저장 원문 {saver.payload_bytes() / 1024 / 1024:.1f}MB)")
+    for row in saver.stats():
+        updated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["updated_at"]))
+        print(f"    {row['thread_id']}: 체크포인트 {row['checkpoints']}개, "
+              f"{row['bytes'] / 1024:.0f}KB, 마지막 저장 {updated}")
+
+
+if __name__ == "__main__":
+    main()
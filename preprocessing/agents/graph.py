@@ -3,11 +3,24 @@ LangGraph 그래프 빌드
 
 멀티에이전트 파이프라인의 전체 실행 흐름을 정의.
 병렬 수집 → 번역 → 파싱+이미지 추출 → 통합 → 리뷰 → 산출물 → 벡터화
+
+통합/수정/QA는 섹션마다 Send로 워커를 띄우는 map-reduce (merged_sections, qa_pairs 리듀서로 합침).
+수집/파싱 노드, 섹션 워커, 산출물 노드는 async라 이벤트 루프에서 동시에 돌고 (나머지는 작업 스레드),
+config.NODE_TIMEOUTS를 넘으면 취소된다.
+파싱/번역/섹션 워커/리뷰/플레이북은 입력 지문이 같으면 지난 산출물을 재사용한다 (pipeline.fingerprints).
+모든 노드는 실행 1건마다 텔레메트리 스팬(시간/LLM 호출/토큰/예상 비용)을 남긴다 (pipeline.telemetry).
 """
 
+import asyncio
+import functools
+
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import RetryPolicy, Send
 
-from preprocessing.pipeline import db
+from preprocessing.pipeline import db, telemetry
+from preprocessing.pipeline.config import NODE_TIMEOUT_SCALE, NODE_TIMEOUTS, SECTION_MAX_ATTEMPTS
+from preprocessing.pipeline.fingerprints import summarize_reuse
+from preprocessing.pipeline.llm_gateway import is_retryable_error
 from preprocessing.agents.state import PipelineState
 
 # 노드 함수 import
@@ -21,16 +34,72 @@ from preprocessing.agents.nodes.collect_nodes import (
 from preprocessing.agents.nodes.translate_node import translate_node
 from preprocessing.agents.nodes.parse_node import parse_node
 from preprocessing.agents.nodes.image_node import extract_images_node
-from preprocessing.agents.nodes.merge_node import merge_node
+from preprocessing.agents.nodes.merge_node import (
+    merge_node,
+    merge_section_node,
+    route_merge_sections,
+)
 from preprocessing.agents.nodes.review_node import review_node
-from preprocessing.agents.nodes.revise_node import revise_node
+from preprocessing.agents.nodes.revise_node import plan_revisions, revise_section_node
 from preprocessing.agents.nodes.output_nodes import (
     playbook_node,
-    qa_node,
+    plan_qa_sections,
+    qa_section_node,
     finalize_images_node,
 )
 from preprocessing.agents.nodes.vectorize_node import vectorize_node
 
+# 섹션 워커 재시도: 게이트웨이 재시도까지 소진한 일시적 LLM 오류만, 실패한 섹션만 다시 실행
+_SECTION_RETRY = RetryPolicy(max_attempts=SECTION_MAX_ATTEMPTS, retry_on=is_retryable_error)
+
+
+def _with_timeout(name: str, node, soft: bool = False):
+    """
+    async 노드에 타임아웃 적용 (NODE_TIMEOUTS[name] × NODE_TIMEOUT_SCALE초)
+
+    시간이 지나면 노드 코루틴을 취소한다 (진행 중인 HTTP 요청/브라우저도 같이 정리).
+    soft=True(수집 노드)면 실패 대신 빈 소스 + 에러 기록으로 끝내 다른 소스로 계속 진행한다.
+    """
+    seconds = NODE_TIMEOUTS.get(name, 0) * NODE_TIMEOUT_SCALE
+    if seconds <= 0:
+        return node
+
+    @functools.wraps(node)
+    async def _run(state: PipelineState) -> dict:
+        try:
+            async with asyncio.timeout(seconds):
+                return await node(state)
+        except TimeoutError:
+            print(f"  [{name}] {seconds:.0f}초 초과 - 취소")
+            if not soft:
+                raise
+            return {"sources": [], "errors": [f"{name} 시간 초과 ({seconds:.0f}초)"]}
+
+    return _run
+
+
+def _traced(name: str, node):
+    """
+    노드 실행 1건을 텔레메트리 스팬으로 감싼다 (sync/async 노드 모두)
+
+    rule_id/게임 이름은 state에서 (섹션 워커는 SectionTask에서) 가져온다.
+    타임아웃 래퍼 바깥에 씌워서 시간 초과로 취소된 실행도 기록한다.
+    """
+    if asyncio.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def _arun(state: PipelineState) -> dict:
+            with telemetry.span("agent", name, state.get("rule_id"), state.get("game_name", "")):
+                return await node(state)
+
+        return _arun
+
+    @functools.wraps(node)
+    def _run(state: PipelineState) -> dict:
+        with telemetry.span("agent", name, state.get("rule_id"), state.get("game_name", "")):
+            return node(state)
+
+    return _run
+
 
 def _save_results(state: PipelineState) -> dict:
     """
@@ -72,6 +141,7 @@ def _save_results(state: PipelineState) -> dict:
 
     filled = sum(1 for v in merged.values() if v.strip())
     print(f"  [save] 완료: {filled}/12 섹션, 플레이북 {len(playbook)}단계, QA {len(qa_pairs)}쌍")
+    print(f"  [save] 재사용 (입력 변경 없음): {summarize_reuse(state.get('reused', []))}")
 
     return {"status": "done"}
 
@@ -102,61 +172,80 @@ def _route_collectors(state: PipelineState) -> list[str]:
     return routes
 
 
-def _route_after_review(state: PipelineState) -> list[str]:
+def _route_after_review(state: PipelineState) -> list[str | Send]:
     """
     리뷰 결과에 따라 분기.
-    - 통과 또는 이미 1회 리뷰 완료 → 산출물 생성 (3개 병렬)
-    - 미통과 & 첫 리뷰 → 수정
+    - 통과 또는 이미 1회 리뷰 완료 → 산출물 생성 (플레이북/이미지 저장 + 섹션별 QA 워커 병렬)
+    - 미통과 & 첫 리뷰 → 지적된 섹션만 revise_section 워커로 수정
 
     리스트를 반환하면 LangGraph가 병렬 Fan-out으로 처리한다.
     """
     feedback = state.get("review_feedback")
     review_count = state.get("review_count", 0)
 
-    # 통과 또는 이미 1회 리뷰 완료 → 산출물 3개 병렬
-    if feedback and (feedback.get("passed", True) or review_count >= 2):
-        return ["playbook", "qa_gen", "finalize_images"]
+    # 미통과 & 첫 리뷰 → 이슈가 있는 섹션만 수정 (고칠 섹션이 없으면 산출물로)
+    if not (feedback and (feedback.get("passed", True) or review_count >= 2)):
+        revisions = plan_revisions(state)
+        if revisions:
+            return [Send("revise_section", task) for task in revisions]
 
-    # 미통과 & 첫 리뷰 → 수정
-    return ["revise"]
+    # 통과 또는 이미 1회 리뷰 완료 → 산출물 병렬
+    return [
+        "playbook",
+        "finalize_images",
+        *(Send("qa_section", task) for task in plan_qa_sections(state)),
+    ]
 
 
-def build_graph() -> StateGraph:
-    """LangGraph 파이프라인 그래프 빌드 + 컴파일"""
+def build_graph(checkpointer=None) -> StateGraph:
+    """
+    LangGraph 파이프라인 그래프 빌드 + 컴파일
+
+    Args:
+        checkpointer: 지정하면 슈퍼스텝마다 상태 저장 (agents.checkpoint, 실패 시 재개용)
+    """
 
     builder = StateGraph(PipelineState)
 
     # ============================================================
     # 노드 등록
     # ============================================================
-    builder.add_node("init", init_node)
+    builder.add_node("init", _traced("init", init_node))
 
     # 수집 (병렬)
-    builder.add_node("collect_pdf", collect_pdf)
-    builder.add_node("collect_namuwiki", collect_namuwiki)
-    builder.add_node("collect_youtube", collect_youtube)
-    builder.add_node("collect_web", collect_web)
+    builder.add_node("collect_pdf", _traced("collect_pdf", _with_timeout("collect_pdf", collect_pdf, soft=True)))
+    builder.add_node("collect_namuwiki",
+                     _traced("collect_namuwiki", _with_timeout("collect_namuwiki", collect_namuwiki, soft=True)))
+    builder.add_node("collect_youtube",
+                     _traced("collect_youtube", _with_timeout("collect_youtube", collect_youtube, soft=True)))
+    builder.add_node("collect_web", _traced("collect_web", _with_timeout("collect_web", collect_web, soft=True)))
 
     # 번역
-    builder.add_node("translate", translate_node)
+    builder.add_node("translate", _traced("translate", translate_node))
 
     # 파싱 + 이미지 추출 (병렬)
-    builder.add_node("parse", parse_node)
-    builder.add_node("extract_images", extract_images_node)
-
-    # 통합 + 리뷰
-    builder.add_node("merge", merge_node)
-    builder.add_node("review", review_node)
-    builder.add_node("revise", revise_node)
-
-    # 산출물 (병렬)
-    builder.add_node("playbook", playbook_node)
-    builder.add_node("qa_gen", qa_node)
-    builder.add_node("finalize_images", finalize_images_node)
+    builder.add_node("parse", _traced("parse", parse_node))
+    builder.add_node("extract_images", _traced("extract_images", extract_images_node))
+
+    # 통합 (섹션별 워커) + 리뷰 + 수정 (지적된 섹션별 워커)
+    builder.add_node("merge", _traced("merge", merge_node))
+    builder.add_node("merge_section", _traced("merge_section", _with_timeout("merge_section", merge_section_node)),
+                     retry_policy=_SECTION_RETRY)
+    builder.add_node("review", _traced("review", review_node))
+    builder.add_node("revise_section",
+                     _traced("revise_section", _with_timeout("revise_section", revise_section_node)),
+                     retry_policy=_SECTION_RETRY)
+
+    # 산출물 (병렬, QA는 섹션별 워커)
+    builder.add_node("playbook", _traced("playbook", _with_timeout("playbook", playbook_node)))
+    builder.add_node("qa_section", _traced("qa_section", _with_timeout("qa_section", qa_section_node)),
+                     retry_policy=_SECTION_RETRY)
+    builder.add_node("finalize_images",
+                     _traced("finalize_images", _with_timeout("finalize_images", finalize_images_node)))
 
     # 벡터화 + 저장
-    builder.add_node("vectorize", vectorize_node)
-    builder.add_node("save_results", _save_results)
+    builder.add_node("vectorize", _traced("vectorize", vectorize_node))
+    builder.add_node("save_results", _traced("save_results", _save_results))
 
     # ============================================================
     # 엣지 정의
@@ -186,24 +275,29 @@ def build_graph() -> StateGraph:
     builder.add_edge("parse", "merge")
     builder.add_edge("extract_images", "merge")
 
-    # merge → review
-    builder.add_edge("merge", "review")
+    # merge → 섹션별 통합 워커 (Send Fan-out) → review (Join)
+    builder.add_conditional_edges(
+        "merge",
+        route_merge_sections,
+        path_map=["merge_section", "review"],
+    )
+    builder.add_edge("merge_section", "review")
 
     # review → 조건부 분기
-    # 리스트 반환: 통과 시 ["playbook", "qa_gen", "finalize_images"] 병렬
-    #              미통과 시 ["revise"] 단독
+    # 통과 시 ["playbook", "finalize_images", Send("qa_section") × 섹션] 병렬
+    # 미통과 시 Send("revise_section") × 지적된 섹션
     builder.add_conditional_edges(
         "review",
         _route_after_review,
-        path_map=["playbook", "qa_gen", "finalize_images", "revise"],
+        path_map=["playbook", "qa_section", "finalize_images", "revise_section"],
     )
 
-    # revise → review (피드백 1회 루프)
-    builder.add_edge("revise", "review")
+    # revise_section → review (피드백 1회 루프)
+    builder.add_edge("revise_section", "review")
 
     # 산출물 → vectorize (Join)
     builder.add_edge("playbook", "vectorize")
-    builder.add_edge("qa_gen", "vectorize")
+    builder.add_edge("qa_section", "vectorize")
     builder.add_edge("finalize_images", "vectorize")
 
     # vectorize → save → END
@@ -213,4 +307,4 @@ def build_graph() -> StateGraph:
     # ============================================================
     # 컴파일
     # ============================================================
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer)
@@ -4,8 +4,14 @@
 기존 collectors/ 모듈을 래핑하여 LangGraph 노드로 변환.
 각 노드는 sources 리스트에 SourceData를 추가하여 반환한다.
 operator.add 리듀서로 병렬 결과가 자동 합산된다.
+
+노드는 async다. 수집기의 async 버전(acollect / asearch_and_collect)을 쓰므로
+4개 수집이 이벤트 루프 하나에서 실제로 동시에 진행되고, 노드 타임아웃(graph.py)에 걸리면 취소된다.
+Supabase 호출은 짧은 동기 호출이라 작업 스레드(asyncio.to_thread)에서 돌린다.
 """
 
+import asyncio
+
 from preprocessing.pipeline import db
 from preprocessing.pipeline.config import PROJECT_ROOT
 from preprocessing.pipeline.collectors import SOURCE_PRIORITY
@@ -19,7 +25,7 @@ from preprocessing.pipeline.collectors import (
 from preprocessing.agents.state import PipelineState, SourceData
 
 
-def collect_pdf(state: PipelineState) -> dict:
+async def collect_pdf(state: PipelineState) -> dict:
     """PDF 소스 수집 (Upstage OCR)"""
     rule_id = state["rule_id"]
     game_name = state["game_name"]
@@ -27,7 +33,7 @@ def collect_pdf(state: PipelineState) -> dict:
     print(f"  [collect_pdf] {game_name}")
 
     # DB에서 PDF 소스 조회
-    pdf_sources = db.get_rule_sources_by_type(rule_id, "pdf")
+    pdf_sources = await asyncio.to_thread(db.get_rule_sources_by_type, rule_id, "pdf")
     if not pdf_sources:
         print(f"  [collect_pdf] PDF 소스 없음 (skip)")
         return {"sources": [], "errors": []}
@@ -45,14 +51,13 @@ def collect_pdf(state: PipelineState) -> dict:
                 "raw_content": src["raw_content"],
                 "language": src.get("language", "ko"),
                 "metadata": src.get("metadata") or {},
-                "parsed_sections": {},
             })
             continue
 
         try:
-            result = pdf_collector.collect(src)
+            result = await pdf_collector.acollect(src)
             # DB에 저장
-            db.update_rule_source(src["id"], {
+            await asyncio.to_thread(db.update_rule_source, src["id"], {
                 "raw_content": result["raw_content"],
                 "status": "processed",
                 "metadata": result.get("metadata"),
@@ -61,7 +66,7 @@ def collect_pdf(state: PipelineState) -> dict:
             rule_update = {"raw_text": result["raw_content"]}
             if "page_count" in result:
                 rule_update["page_count"] = result["page_count"]
-            db.update_rule(rule_id, rule_update)
+            await asyncio.to_thread(db.update_rule, rule_id, rule_update)
 
             results.append({
                 "source_type": "pdf",
@@ -69,7 +74,6 @@ def collect_pdf(state: PipelineState) -> dict:
                 "raw_content": result["raw_content"],
                 "language": src.get("language", "en"),
                 "metadata": result.get("metadata") or {},
-                "parsed_sections": {},
             })
             print(f"  [collect_pdf] {len(result['raw_content'])}자 수집 완료")
         except Exception as e:
@@ -79,14 +83,14 @@ def collect_pdf(state: PipelineState) -> dict:
     return {"sources": results, "errors": errors}
 
 
-def collect_namuwiki(state: PipelineState) -> dict:
+async def collect_namuwiki(state: PipelineState) -> dict:
     """나무위키 소스 수집 (Playwright 크롤링)"""
     rule_id = state["rule_id"]
     game_name = state["game_name"]
 
     print(f"  [collect_namuwiki] {game_name}")
 
-    namu_sources = db.get_rule_sources_by_type(rule_id, "namuwiki")
+    namu_sources = await asyncio.to_thread(db.get_rule_sources_by_type, rule_id, "namuwiki")
     if not namu_sources:
         print(f"  [collect_namuwiki] 나무위키 소스 없음 (skip)")
         return {"sources": [], "errors": []}
@@ -103,13 +107,12 @@ def collect_namuwiki(state: PipelineState) -> dict:
                 "raw_content": src["raw_content"],
                 "language": "ko",
                 "metadata": src.get("metadata") or {},
-                "parsed_sections": {},
             })
             continue
 
         try:
-            result = namuwiki_collector.collect(src)
-            db.update_rule_source(src["id"], {
+            result = await namuwiki_collector.acollect(src)
+            await asyncio.to_thread(db.update_rule_source, src["id"], {
                 "raw_content": result["raw_content"],
                 "status": "processed",
             })
@@ -119,7 +122,6 @@ def collect_namuwiki(state: PipelineState) -> dict:
                 "raw_content": result["raw_content"],
                 "language": "ko",
                 "metadata": {},
-                "parsed_sections": {},
             })
             print(f"  [collect_namuwiki] {len(result['raw_content'])}자 수집 완료")
         except Exception as e:
@@ -129,7 +131,7 @@ def collect_namuwiki(state: PipelineState) -> dict:
     return {"sources": results, "errors": errors}
 
 
-def collect_youtube(state: PipelineState) -> dict:
+async def collect_youtube(state: PipelineState) -> dict:
     """
     유튜브 소스 수집
     - URL 등록됨: youtube_collector.collect()
@@ -140,7 +142,7 @@ def collect_youtube(state: PipelineState) -> dict:
 
     print(f"  [collect_youtube] {game_name}")
 
-    yt_sources = db.get_rule_sources_by_type(rule_id, "youtube")
+    yt_sources = await asyncio.to_thread(db.get_rule_sources_by_type, rule_id, "youtube")
 
     # 등록된 유튜브 소스가 있으면 URL 기반 수집
     if yt_sources:
@@ -156,13 +158,12 @@ def collect_youtube(state: PipelineState) -> dict:
                     "raw_content": src["raw_content"],
                     "language": src.get("language", "ko"),
                     "metadata": src.get("metadata") or {},
-                    "parsed_sections": {},
                 })
                 continue
 
             try:
-                result = youtube_collector.collect(src)
-                db.update_rule_source(src["id"], {
+                result = await youtube_collector.acollect(src)
+                await asyncio.to_thread(db.update_rule_source, src["id"], {
                     "raw_content": result["raw_content"],
                     "status": "processed",
                     "language": result.get("language", "ko"),
@@ -174,7 +175,6 @@ def collect_youtube(state: PipelineState) -> dict:
                     "raw_content": result["raw_content"],
                     "language": result.get("language", "ko"),
                     "metadata": result.get("metadata") or {},
-                    "parsed_sections": {},
                 })
                 print(f"  [collect_youtube] {len(result['raw_content'])}자 수집 완료")
             except Exception as e:
@@ -186,20 +186,21 @@ def collect_youtube(state: PipelineState) -> dict:
     # 등록된 소스 없으면 자동검색
     print(f"  [collect_youtube] 등록된 소스 없음 → 자동검색")
     try:
-        result = youtube_search.search_and_collect(game_name)
+        result = await youtube_search.asearch_and_collect(game_name)
         if not result:
             print(f"  [collect_youtube] 자동검색 결과 없음")
             return {"sources": [], "errors": []}
 
         # DB에 소스 등록
-        source = db.add_rule_source(
+        source = await asyncio.to_thread(
+            db.add_rule_source,
             rule_id=rule_id,
             source_type="youtube",
             priority=SOURCE_PRIORITY["youtube"],
             source_url=result["metadata"].get("source_url", ""),
             language=result.get("language", "ko"),
         )
-        db.update_rule_source(source["id"], {
+        await asyncio.to_thread(db.update_rule_source, source["id"], {
             "raw_content": result["raw_content"],
             "status": "processed",
             "metadata": result.get("metadata"),
@@ -213,7 +214,6 @@ def collect_youtube(state: PipelineState) -> dict:
                 "raw_content": result["raw_content"],
                 "language": result.get("language", "ko"),
                 "metadata": result.get("metadata") or {},
-                "parsed_sections": {},
             }],
             "errors": [],
         }
@@ -222,7 +222,7 @@ def collect_youtube(state: PipelineState) -> dict:
         return {"sources": [], "errors": [f"유튜브 자동검색 실패: {e}"]}
 
 
-def collect_web(state: PipelineState) -> dict:
+async def collect_web(state: PipelineState) -> dict:
     """
     웹 소스 수집 (Tavily API 자동검색)
     항상 자동검색으로 동작.
@@ -233,7 +233,7 @@ def collect_web(state: PipelineState) -> dict:
     print(f"  [collect_web] {game_name}")
 
     # 이미 등록된 웹 소스가 있으면 재사용
-    web_sources = db.get_rule_sources_by_type(rule_id, "web")
+    web_sources = await asyncio.to_thread(db.get_rule_sources_by_type, rule_id, "web")
     if web_sources:
         for src in web_sources:
             if src.get("status") == "processed" and src.get("raw_content"):
@@ -245,14 +245,13 @@ def collect_web(state: PipelineState) -> dict:
                         "raw_content": src["raw_content"],
                         "language": "ko",
                         "metadata": src.get("metadata") or {},
-                        "parsed_sections": {},
                     }],
                     "errors": [],
                 }
 
     # 자동검색
     try:
-        result = web_search.search_and_collect(game_name)
+        result = await web_search.asearch_and_collect(game_name)
         if not result:
             print(f"  [collect_web] 검색 결과 없음")
             return {"sources": [], "errors": []}
@@ -262,14 +261,15 @@ def collect_web(state: PipelineState) -> dict:
         source_url = web_sources_meta[0]["url"] if web_sources_meta else ""
 
         # DB에 소스 등록
-        source = db.add_rule_source(
+        source = await asyncio.to_thread(
+            db.add_rule_source,
             rule_id=rule_id,
             source_type="web",
             priority=SOURCE_PRIORITY.get("web", 4),
             source_url=source_url,
             language="ko",
         )
-        db.update_rule_source(source["id"], {
+        await asyncio.to_thread(db.update_rule_source, source["id"], {
             "raw_content": result["raw_content"],
             "status": "processed",
             "metadata": result.get("metadata"),
@@ -283,7 +283,6 @@ def collect_web(state: PipelineState) -> dict:
                 "raw_content": result["raw_content"],
                 "language": "ko",
                 "metadata": result.get("metadata") or {},
-                "parsed_sections": {},
             }],
             "errors": [],
         }
@@ -8,6 +8,7 @@ VLM으로 분류/라벨링한다.
 2. 크기 필터링 (50x50px 이상)
 3. data/images/components/game_{id}/ 에 PNG 저장
 4. VLM 배치 분류 → ComponentImage 리스트 반환
+   (분류용 base64 PNG는 이 노드 안에서만 쓰고 state에는 경로 + 라벨만 넘긴다 - 체크포인트 크기)
 """
 
 import base64
@@ -17,7 +18,6 @@ from pathlib import Path
 
 import fitz  # PyMuPDF
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from preprocessing.pipeline.config import (
     IMAGE_CLASSIFY_MODEL,
@@ -26,6 +26,7 @@ from preprocessing.pipeline.config import (
     COMPONENT_IMAGE_BATCH_SIZE,
     AGENT_PROMPTS_DIR,
 )
+from preprocessing.pipeline.llm_gateway import chat
 from preprocessing.agents.state import PipelineState, ComponentImage
 
 load_dotenv()
@@ -97,7 +98,6 @@ def _extract_images_from_pdf(pdf_path: str, game_id: int) -> list[dict]:
 
 
 def _classify_images_batch(
-    client: OpenAI,
     game_name: str,
     images: list[dict],
 ) -> list[dict]:
@@ -122,7 +122,8 @@ def _classify_images_batch(
             "image_url": {"url": f"data:image/png;base64,{img['b64']}", "detail": "low"},
         })
 
-    response = client.chat.completions.create(
+    response = chat(
+        label="image_classify",
         model=IMAGE_CLASSIFY_MODEL,
         messages=[{"role": "user", "content": content}],
         response_format={"type": "json_object"},
@@ -164,7 +165,6 @@ def extract_images_node(state: PipelineState) -> dict:
     print(f"  [images] {len(extracted)}개 이미지 추출, VLM 분류 중...")
 
     # 2. VLM 배치 분류
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     all_classifications = []
 
     for batch_start in range(0, len(extracted), COMPONENT_IMAGE_BATCH_SIZE):
@@ -172,7 +172,7 @@ def extract_images_node(state: PipelineState) -> dict:
         print(f"    배치 {batch_start // COMPONENT_IMAGE_BATCH_SIZE + 1}...", end=" ", flush=True)
 
         try:
-            classifications = _classify_images_batch(client, game_name, batch)
+            classifications = _classify_images_batch(game_name, batch)
             all_classifications.extend([
                 (batch[c.get("index", i)], c) if c.get("index", i) < len(batch) else (batch[i], c)
                 for i, c in enumerate(classifications)
@@ -4,18 +4,26 @@
 여러 소스의 12섹션 파싱 결과를 하나로 통합.
 리뷰 피드백이 있으면 반영하여 재작성.
 컴포넌트 이미지 정보도 components 섹션에 반영.
+
+섹션별 map-reduce:
+- merge_node: 파싱 + 이미지 추출의 Join. LLM이 필요 없는 섹션(빈 섹션, 기존 결과 유지)만 기록
+- route_merge_sections: LLM 통합이 필요한 섹션마다 Send("merge_section")
+- merge_section_node: 섹션 1개 통합 → merged_sections 리듀서가 섹션 단위로 합친다
+느린 섹션 하나가 나머지를 막지 않고, 실패한 섹션만 재시도/재개된다.
+입력 지문이 같은 섹션은 워커가 지난 통합 결과를 재사용한다 (rule_artifacts, stage="merge").
 """
 
-import os
-import time
+import asyncio
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from langgraph.types import Send
 
 from preprocessing.pipeline.config import MERGE_MODEL
-from preprocessing.pipeline import SECTIONS
+from preprocessing.pipeline import SECTIONS, db
+from preprocessing.pipeline.fingerprints import request_fingerprint, reusable
 from preprocessing.pipeline.collectors import SOURCE_PRIORITY
-from preprocessing.agents.state import PipelineState
+from preprocessing.pipeline.llm_gateway import achat
+from preprocessing.agents.state import PipelineState, SectionTask, source_key
 
 load_dotenv()
 
@@ -28,30 +36,29 @@ SOURCE_LABELS = {
 }
 
 
-def _merge_section(
-    client: OpenAI,
+def _merge_request(
     game_name: str,
     section_name: str,
     source_texts: list[tuple[str, str]],
     feedback_for_section: dict | None = None,
-) -> str:
+) -> dict | None:
     """
-    하나의 섹션에 대해 여러 소스를 통합.
+    하나의 섹션 통합 요청 (achat 인자).
 
     Args:
         source_texts: [(소스라벨, 텍스트), ...] 우선순위 순
         feedback_for_section: 리뷰 피드백 (있으면 반영)
     Returns:
-        통합된 섹션 텍스트
+        achat 인자, LLM이 필요 없으면 (빈 섹션, 피드백 없는 단일 소스) None
     """
     # 비어있지 않은 소스만
     valid = [(label, text) for label, text in source_texts if text.strip()]
     if not valid:
-        return ""
+        return None
 
-    # 소스 1개면 그대로 반환 (피드백 없으면)
+    # 소스 1개면 그대로 사용 (피드백 없으면)
     if len(valid) == 1 and not feedback_for_section:
-        return valid[0][1]
+        return None
 
     # 소스 텍스트 구성
     sources_text = ""
@@ -83,29 +90,26 @@ def _merge_section(
 
     prompt += sources_text
 
-    response = client.chat.completions.create(
-        model=MERGE_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-    )
-
-    return response.choices[0].message.content.strip()
+    return {
+        "label": "merge",
+        "model": MERGE_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.2,
+    }
 
 
-def merge_node(state: PipelineState) -> dict:
+def _plan_merge(state: PipelineState) -> tuple[dict[str, str], list[SectionTask]]:
     """
-    모든 소스의 parsed_sections를 12섹션별로 통합.
-    리뷰 피드백(revise 후 재진입)이 있으면 해당 섹션만 재작성.
+    12섹션을 바로 확정할 섹션과 LLM 통합이 필요한 섹션으로 나눈다.
+
+    Returns:
+        (확정된 섹션 {섹션: 텍스트}, 섹션 워커 입력 리스트 - SECTIONS 순)
     """
     sources = state.get("sources", [])
-    if not sources:
-        print("  [merge] 소스 없음 (skip)")
-        return {"merged_sections": {}}
-
+    parsed_by_source = state.get("parsed_sections", {})
     game_name = state["game_name"]
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-    # 리뷰 피드백 확인 (revise_node에서 재진입한 경우)
+    # 리뷰 피드백 확인 (리뷰 후 재진입한 경우)
     review_feedback = state.get("review_feedback")
     feedback_by_section = {}
     if review_feedback and not review_feedback.get("passed", True):
@@ -132,15 +136,14 @@ def merge_node(state: PipelineState) -> dict:
             )
         image_text = "\n".join(image_lines)
 
-    print(f"  [merge] {game_name} - {len(sorted_sources)}소스 통합")
-
-    merged_sections = {}
+    settled: dict[str, str] = {}
+    tasks: list[SectionTask] = []  # LLM 호출이 필요한 섹션만
 
     for section_name in SECTIONS:
         # 각 소스에서 해당 섹션 텍스트 수집
         source_texts = []
         for src in sorted_sources:
-            parsed = src.get("parsed_sections", {})
+            parsed = parsed_by_source.get(source_key(src), {})
             text = parsed.get(section_name, "")
             if text.strip():
                 label = SOURCE_LABELS.get(src["source_type"], src["source_type"])
@@ -151,7 +154,7 @@ def merge_node(state: PipelineState) -> dict:
             source_texts.append(("컴포넌트 이미지 분석", image_text))
 
         if not source_texts:
-            merged_sections[section_name] = ""
+            settled[section_name] = ""
             continue
 
         # 리뷰 피드백이 있는 섹션만 재작성, 없으면 기존 결과 유지
@@ -160,20 +163,74 @@ def merge_node(state: PipelineState) -> dict:
 
         if existing and not feedback:
             # 이미 머지 완료 + 피드백 없음 → 기존 결과 유지
-            merged_sections[section_name] = existing
+            settled[section_name] = existing
             continue
 
-        print(f"    {section_name} ({len(source_texts)}소스)...", end=" ", flush=True)
-        merged = _merge_section(
-            client, game_name, section_name, source_texts,
-            feedback_for_section=feedback,
-        )
-        merged_sections[section_name] = merged
-        print(f"{len(merged)}자 [OK]")
-        time.sleep(0.3)
+        tasks.append({
+            "rule_id": state["rule_id"],
+            "game_name": game_name,
+            "section_name": section_name,
+            "source_texts": source_texts,
+            "feedback": feedback,
+        })
+
+    return settled, tasks
+
+
+def merge_node(state: PipelineState) -> dict:
+    """
+    파싱 + 이미지 추출 Join. LLM 통합이 필요 없는 섹션만 바로 기록하고
+    나머지는 route_merge_sections가 섹션 워커로 나눠 보낸다.
+    """
+    sources = state.get("sources", [])
+    if not sources:
+        print("  [merge] 소스 없음 (skip)")
+        return {"merged_sections": {name: "" for name in SECTIONS}}
+
+    settled, tasks = _plan_merge(state)
+    print(f"  [merge] {state['game_name']} - {len(sources)}소스 통합, "
+          f"LLM 통합 {len(tasks)}개 섹션 (섹션별 병렬)")
 
-    filled = sum(1 for v in merged_sections.values() if v.strip())
-    total_chars = sum(len(v) for v in merged_sections.values())
-    print(f"  [merge] 완료: {filled}/12 섹션, {total_chars}자")
+    return {"merged_sections": settled}
+
+
+def route_merge_sections(state: PipelineState) -> list[Send] | str:
+    """LLM 통합이 필요한 섹션마다 merge_section 워커로 Fan-out (없으면 바로 review)"""
+    if not state.get("sources"):
+        return "review"
+    _, tasks = _plan_merge(state)
+    return [Send("merge_section", task) for task in tasks] or "review"
+
+
+async def merge_section_node(task: SectionTask) -> dict:
+    """
+    섹션 1개 통합 (Send 워커) → merged_sections에 해당 섹션만 반영.
+    입력(소스 텍스트/피드백/모델/프롬프트) 지문이 같으면 지난 통합 결과를 재사용한다.
+    """
+    section_name = task["section_name"]
+    source_texts = task["source_texts"]
+    request = _merge_request(
+        task["game_name"], section_name, source_texts,
+        feedback_for_section=task.get("feedback"),
+    )
 
-    return {"merged_sections": merged_sections}
+    # LLM이 필요 없는 섹션 (단일 소스)
+    if request is None:
+        valid = [text for _, text in source_texts if text.strip()]
+        merged = valid[0] if valid else ""
+        print(f"    {section_name} ({len(source_texts)}소스): {len(merged)}자 [OK]")
+        return {"merged_sections": {section_name: merged}}
+
+    fp = request_fingerprint(request)
+    artifact = await asyncio.to_thread(db.get_artifact, task["rule_id"], "merge", section_name)
+    merged = reusable(artifact, fp)
+    if merged is not None:
+        print(f"    {section_name}: 입력 변경 없음 (재사용)")
+        return {"merged_sections": {section_name: merged}, "reused": [f"merge:{section_name}"]}
+
+    response = await achat(**request)
+    merged = response.choices[0].message.content.strip()
+    await asyncio.to_thread(db.save_artifacts, task["rule_id"], "merge", {section_name: (fp, merged)})
+
+    print(f"    {section_name} ({len(source_texts)}소스): {len(merged)}자 [OK]")
+    return {"merged_sections": {section_name: merged}}
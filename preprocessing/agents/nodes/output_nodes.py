@@ -2,44 +2,51 @@
 산출물 생성 노드 3개 (병렬 실행)
 
 1. playbook_node: 플레이북 생성 (기존 step4 재사용)
-2. qa_node: QA 쌍 생성 (기존 step5 재사용)
+2. qa_section_node: 섹션별 QA 쌍 생성 (기존 step5 재사용, 섹션마다 Send 워커)
 3. finalize_images_node: 이미지 메타데이터 DB 저장
+
+모두 async다 (LLM은 llm_gateway.achat, DB는 작업 스레드).
+같은 슈퍼스텝에서 이벤트 루프 하나로 동시에 돌고, 노드 타임아웃(graph.py)에 걸리면 취소된다.
+플레이북/섹션 QA는 입력 지문이 같으면 지난 결과를 재사용한다 (rule_artifacts).
 """
 
-import os
-import time
+import asyncio
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
-from preprocessing.pipeline.config import PREPROCESS_MODEL
 from preprocessing.pipeline import SECTIONS
-from preprocessing.pipeline.step4_llm_preprocess import (
-    generate_playbook,
-    preprocess_section,
-)
-from preprocessing.pipeline.step5_llm_qa import generate_qa_for_section
+from preprocessing.pipeline.fingerprints import reusable
+from preprocessing.pipeline.step4_llm_preprocess import agenerate_playbook, playbook_fingerprint
+from preprocessing.pipeline.step5_llm_qa import agenerate_qa_for_section, qa_fingerprint
 from preprocessing.pipeline import db
-from preprocessing.agents.state import PipelineState
+from preprocessing.agents.state import PipelineState, SectionTask
 
 load_dotenv()
 
 
-def playbook_node(state: PipelineState) -> dict:
+async def playbook_node(state: PipelineState) -> dict:
     """
     정리된 섹션 기반 플레이북 생성.
-    기존 step4의 generate_playbook() 재사용.
+    기존 step4의 generate_playbook() 재사용 (async 버전).
     """
     merged = state.get("merged_sections", {})
     game_name = state["game_name"]
     player_range = state.get("player_range", "2~4인")
 
+    # 섹션/인원/모델/프롬프트가 그대로면 지난 플레이북 재사용
+    fp = playbook_fingerprint(game_name, player_range, merged)
+    artifact = await asyncio.to_thread(db.get_artifact, state["rule_id"], "playbook", "all")
+    playbook = reusable(artifact, fp)
+    if playbook is not None:
+        print(f"  [playbook] {game_name} - 입력 변경 없음 (재사용, {len(playbook)}단계)")
+        return {"playbook": playbook, "reused": ["playbook:all"]}
+
     print(f"  [playbook] {game_name} - 플레이북 생성 중...")
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    playbook = generate_playbook(client, game_name, player_range, merged)
+    playbook = await agenerate_playbook(game_name, player_range, merged)
 
     if playbook:
+        await asyncio.to_thread(db.save_artifacts, state["rule_id"], "playbook", {"all": (fp, playbook)})
         print(f"  [playbook] {len(playbook)}단계 생성 완료")
     else:
         print(f"  [playbook] 생성 실패 (빈 결과)")
@@ -47,41 +54,50 @@ def playbook_node(state: PipelineState) -> dict:
     return {"playbook": playbook or []}
 
 
-def qa_node(state: PipelineState) -> dict:
+def plan_qa_sections(state: PipelineState) -> list[SectionTask]:
     """
-    각 섹션별 QA 쌍 생성.
-    기존 step5의 generate_qa_for_section() 재사용.
+    QA를 만들 섹션(내용 있는 섹션)마다 qa_section 워커 입력 생성.
+    결과는 qa_pairs 리듀서(operator.add)가 SECTIONS 순서로 합친다.
     """
     merged = state.get("merged_sections", {})
     game_name = state["game_name"]
 
-    print(f"  [qa] {game_name} - QA 쌍 생성 중...")
+    todo = [name for name in SECTIONS if merged.get(name, "").strip()]
+    print(f"  [qa] {game_name} - {len(todo)}개 섹션 QA 쌍 생성 (섹션별 병렬)")
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    all_qa_pairs = []
+    return [
+        {"rule_id": state["rule_id"], "game_name": game_name, "section_name": name, "section_text": merged[name]}
+        for name in todo
+    ]
 
-    for section_name in SECTIONS:
-        text = merged.get(section_name, "")
-        if not text.strip():
-            continue
 
-        print(f"    {section_name}...", end=" ", flush=True)
-        qa_pairs = generate_qa_for_section(client, game_name, section_name, text)
+async def qa_section_node(task: SectionTask) -> dict:
+    """
+    섹션 1개 QA 쌍 생성 (Send 워커).
+    기존 step5의 generate_qa_for_section() 재사용 (async 버전).
+    """
+    section_name = task["section_name"]
 
-        # 각 QA에 섹션 정보 추가
-        for qa in qa_pairs:
-            qa["section"] = section_name
+    # 섹션 텍스트/모델/프롬프트가 그대로면 지난 QA 재사용
+    fp = qa_fingerprint(task["game_name"], section_name, task["section_text"])
+    artifact = await asyncio.to_thread(db.get_artifact, task["rule_id"], "qa", section_name)
+    qa_pairs = reusable(artifact, fp)
+    if qa_pairs is not None:
+        print(f"    {section_name}: 입력 변경 없음 (재사용, {len(qa_pairs)}개)")
+        return {"qa_pairs": qa_pairs, "reused": [f"qa:{section_name}"]}
 
-        all_qa_pairs.extend(qa_pairs)
-        print(f"{len(qa_pairs)}개 [OK]")
-        time.sleep(0.5)
+    qa_pairs = await agenerate_qa_for_section(task["game_name"], section_name, task["section_text"])
 
-    print(f"  [qa] 총 {len(all_qa_pairs)}개 QA 쌍 생성 완료")
+    # 각 QA에 섹션 정보 추가
+    for qa in qa_pairs:
+        qa["section"] = section_name
 
-    return {"qa_pairs": all_qa_pairs}
+    await asyncio.to_thread(db.save_artifacts, task["rule_id"], "qa", {section_name: (fp, qa_pairs)})
+    print(f"    {section_name}: {len(qa_pairs)}개 [OK]")
+    return {"qa_pairs": qa_pairs}
 
 
-def finalize_images_node(state: PipelineState) -> dict:
+async def finalize_images_node(state: PipelineState) -> dict:
     """
     컴포넌트 이미지 메타데이터를 DB에 저장.
     extra_sections.component_images에 저장한다.
@@ -95,15 +111,10 @@ def finalize_images_node(state: PipelineState) -> dict:
 
     print(f"  [images_save] {len(component_images)}개 이미지 메타데이터 저장")
 
-    # b64 필드 제거 (DB에 저장할 필요 없음)
-    clean_images = []
-    for img in component_images:
-        clean_img = {k: v for k, v in img.items() if k != "b64"}
-        clean_images.append(clean_img)
-
-    rule = db.get_rule(rule_id)
+    # component_images에는 base64 본문이 없다 (extract_images_node가 분류 후 경로 + 라벨만 넘김)
+    rule = await asyncio.to_thread(db.get_rule, rule_id)
     extra = rule.get("extra_sections") or {}
-    extra["component_images"] = clean_images
-    db.update_rule(rule_id, {"extra_sections": extra})
+    extra["component_images"] = list(component_images)
+    await asyncio.to_thread(db.update_rule, rule_id, {"extra_sections": extra})
 
     return {}
@@ -3,31 +3,39 @@
 
 각 소스를 12섹션으로 파싱.
 PDF는 VLM(이미지+텍스트), 텍스트 소스는 텍스트만.
-기존 step3_parse.py의 파싱 함수 재사용.
+기존 step3_parse.py의 파싱 함수 재사용 (async 버전).
+
+소스들은 공용 속도 제한(RPM/TPM 버킷, LLM_CONCURRENCY) 아래에서 동시에 파싱하고,
+소스마다 타임아웃(config.PARSE_SOURCE_TIMEOUTS)을 둔다 - 느린 PDF VLM이 텍스트 소스를 막지 않는다.
+비한국어 소스는 translate 노드의 번역문(translated)을 파싱한다.
+결과는 sources를 고치지 않고 parsed_sections({source_key: 12섹션})로 반환한다.
+입력 지문(원문 + 모델 + 프롬프트, PDF는 파일 해시)이 같은 소스는 지난 파싱 결과를 재사용한다.
 """
 
-import os
+import asyncio
 import time
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
-from preprocessing.pipeline.config import PROJECT_ROOT
+from preprocessing.pipeline import db
+from preprocessing.pipeline.config import NODE_TIMEOUT_SCALE, PARSE_SOURCE_TIMEOUTS
+from preprocessing.pipeline.fingerprints import reusable
 from preprocessing.pipeline.step3_parse import (
-    parse_source_text,
-    parse_source_vlm,
+    aparse_source_text,
+    aparse_source_vlm,
+    parse_fingerprint,
     pdf_pages_to_images,
 )
-from preprocessing.pipeline import db
-from preprocessing.agents.state import PipelineState
+from preprocessing.pipeline.rate_limit import amap_ordered
+from preprocessing.agents.state import PipelineState, SourceData, source_key, source_text
 
 load_dotenv()
 
 
-def parse_node(state: PipelineState) -> dict:
+async def parse_node(state: PipelineState) -> dict:
     """
     모든 소스를 12섹션으로 개별 파싱.
-    결과는 각 소스의 parsed_sections에 저장 (in-place 수정).
+    실패/시간 초과한 소스는 빈 결과 + errors에 기록하고 나머지로 계속 진행한다.
     """
     sources = state.get("sources", [])
     if not sources:
@@ -35,37 +43,61 @@ def parse_node(state: PipelineState) -> dict:
         return {}
 
     game_name = state["game_name"]
-    rule_id = state["rule_id"]
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    pdf_path = state.get("pdf_file_path")
 
     print(f"  [parse] {game_name} - {len(sources)}개 소스 파싱")
 
-    for src in sources:
+    rule_id = state["rule_id"]
+    translated = state.get("translated", {})
+    artifacts = await asyncio.to_thread(db.get_artifacts, rule_id, "parse")
+    reused: list[str] = []
+
+    async def _parse(src: SourceData) -> tuple[dict[str, str], str | None]:
         stype = src["source_type"]
-        raw_content = src.get("raw_content", "")
+        raw_content = source_text(src, translated)
 
         if not raw_content.strip():
             print(f"    {stype}: 내용 없음 (skip)")
-            continue
-
-        print(f"    {stype} ({len(raw_content)}자)...", end=" ", flush=True)
-
+            return {}, None
+
+        key = source_key(src)
+        page_file = pdf_path if stype == "pdf" and pdf_path else None
+        fp = await asyncio.to_thread(parse_fingerprint, game_name, raw_content, page_file)
+        parsed = reusable(artifacts.get(key), fp)
+        if parsed is not None:
+            print(f"    {stype}: 입력 변경 없음 (재사용)")
+            reused.append(f"parse:{key}")
+            return parsed, None
+
+        timeout = PARSE_SOURCE_TIMEOUTS.get(stype, PARSE_SOURCE_TIMEOUTS["default"]) * NODE_TIMEOUT_SCALE
         try:
-            # PDF는 VLM 파싱 (이미지 포함)
-            if stype == "pdf" and state.get("pdf_file_path"):
-                pdf_path = state["pdf_file_path"]
-                page_images = pdf_pages_to_images(pdf_path)
-                parsed = parse_source_vlm(client, game_name, raw_content, page_images)
-            else:
-                parsed = parse_source_text(client, game_name, raw_content)
-
-            src["parsed_sections"] = parsed
-            filled = sum(1 for v in parsed.values() if v.strip())
-            print(f"{filled}/12 [OK]")
+            async with asyncio.timeout(timeout or None):
+                # PDF는 VLM 파싱 (이미지 포함)
+                if stype == "pdf" and pdf_path:
+                    # 페이지 렌더링은 CPU 작업이라 작업 스레드에서
+                    page_images = await asyncio.to_thread(pdf_pages_to_images, pdf_path)
+                    parsed = await aparse_source_vlm(game_name, raw_content, page_images)
+                else:
+                    parsed = await aparse_source_text(game_name, raw_content)
+        except TimeoutError:
+            print(f"    {stype}: [TIMEOUT] {timeout:.0f}초 초과")
+            return {}, f"{stype} 파싱 시간 초과 ({timeout:.0f}초)"
         except Exception as e:
-            print(f"[ERROR] {e}")
-            src["parsed_sections"] = {}
-
-        time.sleep(0.5)  # API rate limit 방지
-
-    return {}
+            print(f"    {stype}: [ERROR] {e}")
+            return {}, f"{stype} 파싱 실패: {e}"
+
+        await asyncio.to_thread(db.save_artifacts, rule_id, "parse", {key: (fp, parsed)})
+        filled = sum(1 for v in parsed.values() if v.strip())
+        print(f"    {stype} ({len(raw_content)}자): {filled}/12 [OK]")
+        return parsed, None
+
+    # 소스별 동시 파싱 (RPM/TPM 제한 경유), 결과는 소스 순서대로
+    start = time.perf_counter()
+    results = await amap_ordered(_parse, sources)
+    print(f"  [parse] 완료 ({time.perf_counter() - start:.1f}s)")
+
+    return {
+        "parsed_sections": {source_key(src): parsed for src, (parsed, _) in zip(sources, results)},
+        "errors": [error for _, error in results if error],
+        "reused": reused,
+    }
@@ -4,16 +4,17 @@
 통합된 12섹션 룰북의 품질을 검증.
 완전성, 일관성, 명확성, 실용성을 평가하고
 이슈 목록과 점수를 반환한다.
+같은 회차에 입력이 지난 실행과 같으면 그 리뷰 결과를 재사용한다 (rule_artifacts, stage="review").
 """
 
 import json
-import os
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from preprocessing.pipeline.config import REVIEW_MODEL, AGENT_PROMPTS_DIR
-from preprocessing.pipeline import SECTIONS
+from preprocessing.pipeline import SECTIONS, db
+from preprocessing.pipeline.fingerprints import request_fingerprint, reusable
+from preprocessing.pipeline.llm_gateway import chat
 from preprocessing.agents.state import PipelineState
 
 load_dotenv()
@@ -47,15 +48,27 @@ def review_node(state: PipelineState) -> dict:
         .replace("{sections_text}", sections_text)
     )
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model=REVIEW_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        response_format={"type": "json_object"},
-        temperature=0.3,
-    )
+    request = {
+        "label": "review",
+        "model": REVIEW_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.3,
+    }
 
-    result = json.loads(response.choices[0].message.content)
+    # 섹션/모델/프롬프트가 지난 실행의 같은 회차와 같으면 그 리뷰 결과 재사용
+    rule_id = state["rule_id"]
+    round_key = f"round{review_count + 1}"
+    fp = request_fingerprint(request)
+    result = reusable(db.get_artifact(rule_id, "review", round_key), fp)
+    reused = []
+    if result is not None:
+        print("  [review] 입력 변경 없음 (재사용)")
+        reused.append(f"review:{round_key}")
+    else:
+        response = chat(**request)
+        result = json.loads(response.choices[0].message.content)
+        db.save_artifacts(rule_id, "review", {round_key: (fp, result)})
 
     # ReviewFeedback 구성
     feedback = {
@@ -77,4 +90,5 @@ def review_node(state: PipelineState) -> dict:
     return {
         "review_feedback": feedback,
         "review_count": review_count + 1,
+        "reused": reused,
     }
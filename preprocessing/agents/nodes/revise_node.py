@@ -4,90 +4,121 @@
 리뷰어 피드백을 반영하여 문제 있는 섹션만 재작성.
 revise 후 merge_node로 복귀하지 않고,
 merged_sections를 직접 수정하여 다음 단계로 진행한다.
+
+리뷰 미통과 시 이슈가 있는 섹션마다 Send("revise_section")로 워커를 띄운다 (plan_revisions).
+지적된 섹션만 다시 실행되고, 나머지 섹션은 건드리지 않는다.
 """
 
-import os
+import asyncio
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
+from preprocessing.pipeline import db
 from preprocessing.pipeline.config import REVISE_MODEL, AGENT_PROMPTS_DIR
-from preprocessing.agents.state import PipelineState
+from preprocessing.pipeline.fingerprints import request_fingerprint, reusable
+from preprocessing.pipeline.llm_gateway import achat
+from preprocessing.agents.state import PipelineState, SectionTask
 
 load_dotenv()
 
 
-def revise_node(state: PipelineState) -> dict:
+def plan_revisions(state: PipelineState) -> list[SectionTask]:
     """
-    review_feedback의 issues를 반영하여 해당 섹션만 LLM으로 재작성.
+    review_feedback의 issues를 섹션별로 묶어 revise_section 워커 입력으로 만든다.
+    (피드백이 없거나 통과, 고칠 섹션이 없으면 빈 리스트)
     """
     feedback = state.get("review_feedback")
     merged = state.get("merged_sections", {})
     game_name = state["game_name"]
 
     if not feedback or feedback.get("passed", True):
-        print("  [revise] 피드백 없음 또는 통과 (skip)")
-        return {}
-
-    issues = feedback.get("issues", [])
-    if not issues:
-        print("  [revise] 이슈 없음 (skip)")
-        return {}
-
-    print(f"  [revise] {game_name} - {len(issues)}건 이슈 수정")
-
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    template = (AGENT_PROMPTS_DIR / "revise_section.txt").read_text(encoding="utf-8")
+        return []
 
     # 같은 섹션에 여러 이슈가 있으면 합쳐서 한 번에 수정
     # (개별 수정하면 이전 수정이 덮어써지는 문제 방지)
     issues_by_section: dict[str, list[dict]] = {}
-    for issue in issues:
+    for issue in feedback.get("issues", []):
         section_name = issue.get("section", "")
-        if section_name and section_name in merged:
+        if section_name and merged.get(section_name, "").strip():
             issues_by_section.setdefault(section_name, []).append(issue)
 
-    updated_sections = {**merged}
-
-    for section_name, section_issues in issues_by_section.items():
-        current_text = updated_sections.get(section_name, "")
-        if not current_text.strip():
-            continue
-
-        # 이슈 목록을 하나의 피드백 텍스트로 합침
-        feedback_lines = []
-        for i, issue in enumerate(section_issues, 1):
-            severity = issue.get("severity", "minor")
-            issue_text = issue.get("issue", "")
-            suggestion = issue.get("suggestion", "")
-            feedback_lines.append(
-                f"{i}. [{severity}] {issue_text}\n   제안: {suggestion}"
-            )
-        combined_feedback = "\n".join(feedback_lines)
-
-        severity_summary = ", ".join(
-            f"{iss.get('severity', 'minor')}" for iss in section_issues
-        )
-        print(f"    {section_name} [{severity_summary}]...", end=" ", flush=True)
-
-        prompt = (
-            template
-            .replace("{game_name}", game_name)
-            .replace("{section_name}", section_name)
-            .replace("{severity}", severity_summary)
-            .replace("{issue}", combined_feedback)
-            .replace("{suggestion}", "위 모든 피드백을 종합적으로 반영하세요.")
-            .replace("{section_text}", current_text)
-        )
+    if issues_by_section:
+        issue_count = sum(len(v) for v in issues_by_section.values())
+        print(f"  [revise] {game_name} - {len(issues_by_section)}개 섹션, {issue_count}건 이슈 수정")
+
+    return [
+        {
+            "rule_id": state["rule_id"],
+            "game_name": game_name,
+            "section_name": section_name,
+            "section_text": merged[section_name],
+            "issues": section_issues,
+        }
+        for section_name, section_issues in issues_by_section.items()
+    ]
+
 
-        response = client.chat.completions.create(
-            model=REVISE_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
+def _revise_request(task: SectionTask) -> dict:
+    """섹션 1개 재작성 요청 (achat 인자)"""
+    section_issues = task["issues"]
+
+    template = (AGENT_PROMPTS_DIR / "revise_section.txt").read_text(encoding="utf-8")
+
+    # 이슈 목록을 하나의 피드백 텍스트로 합침
+    feedback_lines = []
+    for i, issue in enumerate(section_issues, 1):
+        severity = issue.get("severity", "minor")
+        issue_text = issue.get("issue", "")
+        suggestion = issue.get("suggestion", "")
+        feedback_lines.append(
+            f"{i}. [{severity}] {issue_text}\n   제안: {suggestion}"
         )
+    combined_feedback = "\n".join(feedback_lines)
+
+    prompt = (
+        template
+        .replace("{game_name}", task["game_name"])
+        .replace("{section_name}", task["section_name"])
+        .replace("{severity}", _severity_summary(section_issues))
+        .replace("{issue}", combined_feedback)
+        .replace("{suggestion}", "위 모든 피드백을 종합적으로 반영하세요.")
+        .replace("{section_text}", task["section_text"])
+    )
+
+    return {
+        "label": "revise",
+        "model": REVISE_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.2,
+    }
 
-        revised = response.choices[0].message.content.strip()
-        updated_sections[section_name] = revised
-        print(f"{len(revised)}자 [OK]")
 
-    return {"merged_sections": updated_sections}
+def _severity_summary(section_issues: list[dict]) -> str:
+    return ", ".join(
+        f"{iss.get('severity', 'minor')}" for iss in section_issues
+    )
+
+
+async def revise_section_node(task: SectionTask) -> dict:
+    """
+    섹션 1개를 이슈 목록에 맞춰 LLM으로 재작성 (Send 워커).
+    merged_sections에 해당 섹션만 반영한다.
+    섹션 텍스트/이슈/모델/프롬프트 지문이 같으면 지난 재작성 결과를 재사용한다.
+    """
+    section_name = task["section_name"]
+    severity_summary = _severity_summary(task["issues"])
+
+    request = _revise_request(task)
+    fp = request_fingerprint(request)
+    artifact = await asyncio.to_thread(db.get_artifact, task["rule_id"], "revise", section_name)
+    revised = reusable(artifact, fp)
+    if revised is not None:
+        print(f"    {section_name}: 입력 변경 없음 (재사용)")
+        return {"merged_sections": {section_name: revised}, "reused": [f"revise:{section_name}"]}
+
+    response = await achat(**request)
+
+    revised = response.choices[0].message.content.strip()
+    await asyncio.to_thread(db.save_artifacts, task["rule_id"], "revise", {section_name: (fp, revised)})
+    print(f"    {section_name} [{severity_summary}]: {len(revised)}자 [OK]")
+    return {"merged_sections": {section_name: revised}}
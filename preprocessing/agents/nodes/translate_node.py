@@ -3,16 +3,20 @@
 
 수집된 소스 중 language != "ko"인 것만 한국어로 번역.
 기존 step2_translate.py의 translate_text() 재사용.
+원문/모델/프롬프트가 그대로인 소스는 지난 번역을 재사용한다 (rule_artifacts, stage="translate").
 """
 
-from preprocessing.pipeline.step2_translate import translate_text
-from preprocessing.agents.state import PipelineState
+from preprocessing.pipeline import db
+from preprocessing.pipeline.fingerprints import reusable
+from preprocessing.pipeline.step2_translate import translate_fingerprint, translate_text
+from preprocessing.agents.state import PipelineState, source_key
 
 
 def translate_node(state: PipelineState) -> dict:
     """
     sources를 순회하며 비한국어 소스 번역.
-    sources는 불변이므로 새 리스트를 만들어 반환한다.
+    sources는 수집 원문 그대로 두고 번역문을 translated({source_key: 번역문})로 반환한다.
+    (state를 직접 고치면 체크포인트에 남지 않아 --resume 후 parse가 원문을 파싱한다)
     """
     sources = state.get("sources", [])
     if not sources:
@@ -20,48 +24,31 @@ def translate_node(state: PipelineState) -> dict:
         return {}
 
     # 번역 필요한 소스 확인
-    need_translate = [s for s in sources if s.get("language", "ko") != "ko"]
+    need_translate = [s for s in sources if s.get("language", "ko") != "ko" and s.get("raw_content")]
     if not need_translate:
         print("  [translate] 모든 소스가 한국어 (skip)")
         return {}
 
-    # 번역 실행 - sources를 새 리스트로 재구성
-    updated_sources = []
-    for src in sources:
-        if src.get("language", "ko") != "ko" and src.get("raw_content"):
-            lang = src["language"]
-            content = src["raw_content"]
-            print(f"  [translate] {src['source_type']} ({lang} -> ko, {len(content)}자)")
+    artifacts = db.get_artifacts(state["rule_id"], "translate")
+    reused = []
+    translated_by_key: dict[str, str] = {}
 
-            translated = translate_text(content, lang)
+    for src in need_translate:
+        lang = src["language"]
+        content = src["raw_content"]
+        key = source_key(src)
+        fp = translate_fingerprint(content, lang)
 
-            # 새 SourceData 생성 (원본 보존)
-            new_src = {**src}
-            new_src["raw_content"] = translated
-            new_src["language"] = "ko"
-            new_src["metadata"] = {
-                **src.get("metadata", {}),
-                "original_language": lang,
-                "original_length": len(content),
-            }
-            updated_sources.append(new_src)
-            print(f"  [translate] 번역 완료 ({len(translated)}자)")
+        translated = reusable(artifacts.get(key), fp)
+        if translated is not None:
+            print(f"  [translate] {src['source_type']} 원문 변경 없음 (재사용)")
+            reused.append(f"translate:{key}")
         else:
-            updated_sources.append(src)
-
-    # sources를 완전히 교체해야 하므로, 기존 것을 빼고 새 것을 넣는다
-    # Annotated[list, operator.add] 때문에 직접 교체 불가
-    # 대신 전체 sources를 덮어쓰는 방식 사용
-    # LangGraph에서는 리듀서가 아닌 필드로 변경하거나,
-    # 노드에서 반환 시 __replace__ 패턴 사용
+            print(f"  [translate] {src['source_type']} ({lang} -> ko, {len(content)}자)")
+            translated = translate_text(content, lang)
+            db.save_artifacts(state["rule_id"], "translate", {key: (fp, translated)})
 
-    # 주의: operator.add 리듀서는 "추가"만 가능하므로,
-    # 번역 결과는 sources를 직접 수정하는 대신
-    # 각 소스의 raw_content를 in-place로 갱신한다
-    for i, src in enumerate(sources):
-        if src.get("language", "ko") != "ko" and src.get("raw_content"):
-            sources[i]["raw_content"] = updated_sources[i]["raw_content"]
-            sources[i]["language"] = "ko"
-            sources[i]["metadata"] = updated_sources[i]["metadata"]
+        translated_by_key[key] = translated
+        print(f"  [translate] 번역 완료 ({len(translated)}자)")
 
-    return {}
+    return {"translated": translated_by_key, "reused": reused}
@@ -9,7 +9,7 @@ from preprocessing.pipeline import SECTIONS, db
 from preprocessing.pipeline.step6_vectorize import (
     get_chroma_collection,
     build_qa_chunks,
-    batch_add_to_collection,
+    sync_chunks,
 )
 from preprocessing.agents.state import PipelineState
 
@@ -90,26 +90,18 @@ def vectorize_node(state: PipelineState) -> dict:
 
     collection = get_chroma_collection()
 
-    # 기존 해당 game_id 청크 삭제 (중복 방지)
-    try:
-        existing = collection.get(where={"game_id": game_id})
-        if existing["ids"]:
-            collection.delete(ids=existing["ids"])
-            print(f"    기존 청크 {len(existing['ids'])}개 삭제")
-    except Exception:
-        pass
-
     # 섹션 청크 생성 (긴 섹션 자동 분할)
     section_chunks = _build_section_chunks_from_merged(game_id, game_name, merged)
 
     # QA 청크 생성
     qa_chunks = build_qa_chunks(game_id, game_name, qa_pairs)
 
-    # ChromaDB에 추가
-    batch_add_to_collection(collection, section_chunks, "섹션")
-    batch_add_to_collection(collection, qa_chunks, "QA")
+    # ChromaDB 반영 (내용 해시가 바뀐 청크만 upsert, 없어진 청크 삭제)
+    counts = sync_chunks(collection, game_id, section_chunks + qa_chunks)
 
     total = len(section_chunks) + len(qa_chunks)
-    print(f"  [vectorize] 완료: 섹션 {len(section_chunks)} + QA {len(qa_chunks)} = 총 {total}청크")
+    print(f"  [vectorize] 완료: 섹션 {len(section_chunks)} + QA {len(qa_chunks)} = 총 {total}청크 "
+          f"(추가 {counts['added']} / 변경 {counts['updated']} / "
+          f"삭제 {counts['removed']} / 유지 {counts['unchanged']})")
 
     return {}
@@ -2,24 +2,64 @@
 LangGraph 기반 룰 전처리 파이프라인 CLI
 
 사용법:
-    uv run python -m preprocessing.agents.run                          # 전체 실행
+    uv run python -m preprocessing.agents.run                          # 전체 실행 (게임 BATCH_CONCURRENCY개씩 동시)
+    uv run python -m preprocessing.agents.run --concurrency 8          # 게임 8개씩 동시 실행
     uv run python -m preprocessing.agents.run --rule-id 1              # 특정 룰만
     uv run python -m preprocessing.agents.run --rule-id 1 --verbose    # 상세 출력
+    uv run python -m preprocessing.agents.run --rule-id 1 --resume     # 실패한 노드부터 이어서 실행
     uv run python -m preprocessing.agents.run --visualize              # 그래프 시각화
     uv run python -m preprocessing.agents.run --list                   # 대상 목록
+    uv run python -m preprocessing.agents.run --rule-id 1 --llm-cache off  # LLM 응답 캐시 끄기
+    uv run python -m preprocessing.agents.run --report                 # 노드별 시간/토큰/비용 백분위 (텔레메트리)
 """
 
 import argparse
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
+from preprocessing.agents.checkpoint import get_checkpointer, thread_id_for
 from preprocessing.agents.graph import build_graph
 from preprocessing.agents.state import PipelineState
-from preprocessing.pipeline import db
+from preprocessing.pipeline import db, telemetry
+from preprocessing.pipeline.batch_progress import BatchProgress
+from preprocessing.pipeline.config import BATCH_CONCURRENCY
+from preprocessing.pipeline.fingerprints import summarize_reuse
+from preprocessing.pipeline.llm_cache import CACHE_MODES, set_mode
+from preprocessing.pipeline.llm_gateway import print_usage_summary
 
 
-async def run_pipeline(rule_id: int, verbose: bool = False):
-    """단일 rule에 대해 LangGraph 파이프라인 실행"""
-    graph = build_graph()
+# 게임 1개가 동시에 쓰는 작업 스레드 수 (동기 노드 + async 노드의 DB/자막 호출)
+_NODE_THREADS_PER_GAME = 6
+
+_graph = None
+
+
+def get_graph():
+    """컴파일된 파이프라인 그래프 (프로세스당 1번만 컴파일, 체크포인터 포함)"""
+    global _graph
+    if _graph is None:
+        _graph = build_graph(checkpointer=get_checkpointer())
+    return _graph
+
+
+async def run_pipeline(
+    rule_id: int, verbose: bool = False, progress: BatchProgress | None = None, resume: bool = False
+) -> dict:
+    """
+    단일 rule에 대해 LangGraph 파이프라인 실행
+
+    슈퍼스텝마다 체크포인트를 남기고, 끝까지 성공하면 지운다.
+    실패하면 체크포인트가 남아 있으므로 resume=True로 실패한 노드부터 이어서 실행할 수 있다.
+
+    Args:
+        progress: 배치 실행 시 노드 시작/완료를 기록할 진행 현황
+        resume: 저장된 체크포인트가 있으면 이어서 실행 (없으면 처음부터)
+    Returns:
+        최종 state
+    """
+    graph = get_graph()
+    checkpointer = get_checkpointer()
+    thread_id = thread_id_for(rule_id)
 
     # 초기 state
     initial_state: PipelineState = {
@@ -31,26 +71,59 @@ async def run_pipeline(rule_id: int, verbose: bool = False):
         "sources": [],
         "errors": [],
         "component_images": [],
+        "translated": {},
+        "parsed_sections": {},
         "merged_sections": {},
         "review_feedback": None,
         "review_count": 0,
         "playbook": [],
         "qa_pairs": [],
+        "reused": [],
         "status": "running",
     }
 
-    config = {"recursion_limit": 30}
+    config = {"recursion_limit": 30, "configurable": {"thread_id": thread_id}}
 
     print(f"\n{'='*60}")
     print(f"LangGraph 파이프라인 시작 (rule_id={rule_id})")
     print(f"{'='*60}")
 
-    if verbose:
-        # 스트리밍 모드: 각 노드 완료 시 출력
-        async for event in graph.astream(initial_state, config=config):
-            for node_name, node_output in event.items():
-                if node_name == "__end__":
-                    continue
+    # 재개: 마지막 체크포인트에 남은 노드가 있으면 입력 없이(None) 이어서 실행
+    graph_input: dict | None = initial_state
+    result: dict = initial_state
+    if resume:
+        snapshot = await graph.aget_state(config)
+        if snapshot.next:
+            graph_input = None
+            result = snapshot.values
+            print(f"  [resume] 체크포인트에서 이어서 실행: {', '.join(snapshot.next)}")
+        else:
+            print("  [resume] 이어서 실행할 체크포인트 없음 - 처음부터 실행")
+    if graph_input is not None:
+        # 새로 시작하면 이전 실행의 체크포인트는 버린다
+        await checkpointer.adelete_thread(thread_id)
+
+    # tasks: 노드 시작/완료 이벤트 (진행 현황, verbose 출력), values: 매 단계 후 전체 state
+    # 노드 스팬은 telemetry.run 범위의 run_id로 묶인다 (재개하면 새 run_id)
+    with telemetry.run(rule_id):
+        async for mode, event in graph.astream(graph_input, config=config, stream_mode=["tasks", "values"]):
+            if mode == "values":
+                result = event
+                if progress is not None:
+                    progress.set_name(rule_id, event.get("game_name", ""))
+                continue
+
+            node_name = event["name"]
+            if "result" not in event and "error" not in event:
+                if progress is not None:
+                    progress.node_started(rule_id, node_name)
+                continue
+            if progress is not None:
+                progress.node_finished(rule_id, node_name)
+
+            if verbose:
+                # 각 노드 완료 시 출력
+                node_output = event.get("result")
                 status_info = ""
                 if isinstance(node_output, dict):
                     if "sources" in node_output:
@@ -60,9 +133,9 @@ async def run_pipeline(rule_id: int, verbose: bool = False):
                         if errs:
                             status_info += f" ({len(errs)} 에러)"
                 print(f"  >>> [{node_name}] 완료{status_info}")
-    else:
+
+    if not verbose:
         # 일반 모드: 최종 결과만
-        result = await graph.ainvoke(initial_state, config=config)
         errors = result.get("errors", [])
         sources = result.get("sources", [])
         merged = result.get("merged_sections", {})
@@ -75,12 +148,58 @@ async def run_pipeline(rule_id: int, verbose: bool = False):
         print(f"  플레이북: {len(result.get('playbook', []))}단계")
         print(f"  QA: {len(result.get('qa_pairs', []))}쌍")
         print(f"  이미지: {len(result.get('component_images', []))}개")
+        print(f"  재사용: {summarize_reuse(result.get('reused', []))}")
         if errors:
             print(f"  에러: {len(errors)}건")
             for e in errors:
                 print(f"    - {e}")
         print(f"{'='*60}")
 
+    # 끝까지 성공했으면 체크포인트는 더 필요 없다 (실패한 rule만 남겨 둔다)
+    if result.get("status") == "done":
+        await checkpointer.adelete_thread(thread_id)
+    return result
+
+
+async def run_batch(
+    rule_ids: list[int], concurrency: int = BATCH_CONCURRENCY, verbose: bool = False, resume: bool = False
+) -> BatchProgress:
+    """
+    여러 rule을 게임 concurrency개씩 동시에 실행
+
+    그래프는 1번만 컴파일해서 공유하고, LLM 호출은 모든 게임이 공용 풀 + RPM/TPM 버킷을 같이 쓴다.
+    게임 하나가 실패해도 나머지는 계속 진행한다 (실패는 마지막 요약에 모아서 출력).
+    """
+    # 동기 노드와 asyncio.to_thread 호출은 기본 실행기 스레드에서 돈다 - 동시 게임 수에 맞춰 넉넉하게
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(
+        max_workers=concurrency * _NODE_THREADS_PER_GAME, thread_name_prefix="gmjj-node",
+    ))
+    get_graph()
+
+    progress = BatchProgress(total=len(rule_ids))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run_one(rule_id: int):
+        async with semaphore:
+            progress.start(rule_id)
+            try:
+                result = await run_pipeline(rule_id, verbose=verbose, progress=progress, resume=resume)
+            except Exception as e:
+                print(f"  [batch] [ERROR] rule_id={rule_id} 실패: {e} (--resume으로 이어서 실행 가능)")
+                progress.finish(rule_id, ok=False, error=f"{type(e).__name__}: {e}")
+                return
+            status = result.get("status", "?")
+            progress.finish(rule_id, ok=status == "done", error=None if status == "done" else f"status={status}")
+
+    print(f"배치 실행: {len(rule_ids)}건, 게임 {concurrency}개씩 동시")
+    progress.start_reporter()
+    try:
+        await asyncio.gather(*(_run_one(rule_id) for rule_id in rule_ids))
+    finally:
+        progress.stop_reporter()
+    progress.print_summary()
+    return progress
+
 
 def main():
     parser = argparse.ArgumentParser(description="LangGraph 룰 전처리 파이프라인")
@@ -88,8 +207,24 @@ def main():
     parser.add_argument("--verbose", action="store_true", help="상세 출력 (노드별)")
     parser.add_argument("--visualize", action="store_true", help="그래프 시각화 (Mermaid)")
     parser.add_argument("--list", action="store_true", help="대상 rule 목록")
+    parser.add_argument("--resume", action="store_true",
+                        help="실패한 rule을 마지막 체크포인트(실패한 노드)부터 이어서 실행")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help=f"동시에 처리할 게임 수 (기본 {BATCH_CONCURRENCY})")
+    parser.add_argument("--llm-cache", choices=CACHE_MODES,
+                        help="LLM 응답 캐시 모드 (rw: 기본, ro: 재생 전용, off: 사용 안 함)")
+    parser.add_argument("--report", action="store_true",
+                        help="텔레메트리 스팬 로그 → 노드별 게임당 시간/토큰/비용 백분위 (--rule-id로 한 게임만)")
     args = parser.parse_args()
 
+    if args.llm_cache:
+        set_mode(args.llm_cache)
+
+    # 텔레메트리 리포트 (실행 없음)
+    if args.report:
+        telemetry.print_report(telemetry.load_spans(), runner="agent", rule_id=args.rule_id)
+        return
+
     # 그래프 시각화
     if args.visualize:
         graph = build_graph()
@@ -110,12 +245,14 @@ def main():
 
     # 파이프라인 실행
     if args.rule_id:
-        asyncio.run(run_pipeline(args.rule_id, verbose=args.verbose))
+        asyncio.run(run_pipeline(args.rule_id, verbose=args.verbose, resume=args.resume))
     else:
         rules = db.get_all_rules()
-        print(f"전체 {len(rules)}건 실행")
-        for r in rules:
-            asyncio.run(run_pipeline(r["id"], verbose=args.verbose))
+        asyncio.run(run_batch(
+            [r["id"] for r in rules], concurrency=max(1, args.concurrency),
+            verbose=args.verbose, resume=args.resume,
+        ))
+    print_usage_summary()
 
 
 if __name__ == "__main__":
@@ -2,8 +2,9 @@
 LangGraph 파이프라인 State 정의
 
 모든 노드가 공유하는 상태 객체.
-sources, errors는 Annotated[list, operator.add]로
-병렬 노드 결과를 자동 합산한다.
+sources, errors, qa_pairs, reused는 Annotated[list, operator.add]로,
+translated, parsed_sections, merged_sections는 키 단위 덮어쓰기(update_dict)로 병렬 노드 결과를 자동 합산한다.
+노드는 받은 state를 고치지 않고 바뀐 부분만 반환한다 (체크포인트에 그대로 남도록).
 """
 
 from __future__ import annotations
@@ -19,7 +20,6 @@ class SourceData(TypedDict, total=False):
     raw_content: str                    # 수집된 텍스트
     language: str                       # "ko" | "en"
     metadata: dict                      # 소스별 메타데이터
-    parsed_sections: dict[str, str]     # 12섹션 파싱 결과
 
 
 class ComponentImage(TypedDict, total=False):
@@ -41,6 +41,32 @@ class ReviewFeedback(TypedDict, total=False):
     issues: list[dict]                  # [{"section": "...", "severity": "critical|minor", "issue": "...", "suggestion": "..."}]
 
 
+class SectionTask(TypedDict, total=False):
+    """섹션 워커 1개의 입력 (Send로 전달 - 섹션마다 따로 실행/재시도/재개)"""
+    rule_id: int                        # 산출물 재사용 조회/저장 (rule_artifacts)
+    game_name: str
+    section_name: str
+    source_texts: list[tuple[str, str]]  # merge: [(소스라벨, 텍스트), ...] 우선순위 순
+    feedback: dict | None               # merge: 리뷰 피드백 (있으면 반영)
+    section_text: str                   # revise/qa: 현재 섹션 텍스트
+    issues: list[dict]                  # revise: 이 섹션의 리뷰 이슈
+
+
+def source_key(src: SourceData) -> str:
+    """parsed_sections 키 - 소스 타입 + game_rule_sources.id"""
+    return f"{src['source_type']}:{src.get('source_id')}"
+
+
+def source_text(src: SourceData, translated: dict[str, str] | None) -> str:
+    """소스의 한국어 본문 - 번역됐으면 translated의 번역문, 아니면 수집된 raw_content"""
+    return (translated or {}).get(source_key(src), src.get("raw_content", ""))
+
+
+def update_dict(current: dict, update: dict) -> dict:
+    """dict 리듀서 - 노드/워커가 보낸 키만 덮어쓴다 (translated, parsed_sections, merged_sections)"""
+    return {**(current or {}), **(update or {})}
+
+
 class PipelineState(TypedDict, total=False):
     """LangGraph 전체 State"""
 
@@ -55,17 +81,24 @@ class PipelineState(TypedDict, total=False):
     sources: Annotated[list[SourceData], operator.add]
     errors: Annotated[list[str], operator.add]
 
+    # ---- 번역 (sources는 수집 원문 그대로 두고 번역문만 따로) ----
+    translated: Annotated[dict[str, str], update_dict]  # {source_key: 한국어 번역문} - 비한국어 소스만
+
     # ---- 이미지 추출 결과 ----
     component_images: list[ComponentImage]
 
     # ---- 파싱/병합/리뷰 ----
-    merged_sections: dict[str, str]     # 12섹션 통합 결과
+    parsed_sections: Annotated[dict[str, dict[str, str]], update_dict]  # {source_key: 12섹션 파싱 결과}
+    merged_sections: Annotated[dict[str, str], update_dict]  # 12섹션 통합 결과 (섹션 워커별 갱신)
     review_feedback: ReviewFeedback | None
     review_count: int                   # 리뷰 횟수 (최대 1)
 
     # ---- 산출물 ----
     playbook: list[dict]                # 플레이북 단계별
-    qa_pairs: list[dict]                # QA 쌍
+    qa_pairs: Annotated[list[dict], operator.add]  # QA 쌍 (섹션 워커 결과 합산, SECTIONS 순)
+
+    # ---- 증분 재계산 ----
+    reused: Annotated[list[str], operator.add]  # 입력 지문이 같아 재사용한 단위 ("parse:pdf:3", "merge:setup", ...)
 
     # ---- 파이프라인 상태 ----
     status: str                         # "running" | "done" | "error"
@@ -0,0 +1,141 @@
+"""
+멀티 게임 배치 실행 진행 현황
+
+agents.run / run_pipeline이 게임 여러 개를 동시에 돌릴 때
+진행 중인 게임, 게임별 현재 단계(노드/스텝), 분당 토큰 처리량을 주기적으로 표로 출력하고
+끝나면 성공/실패 요약을 남긴다. 게임 하나가 실패해도 나머지는 계속 진행한다.
+
+사용법:
+    progress = BatchProgress(total=len(rule_ids))
+    progress.start_reporter()
+    progress.start(rule_id)
+    progress.node_started(rule_id, "parse")
+    progress.node_finished(rule_id, "parse")
+    progress.finish(rule_id, ok=True)
+    progress.stop_reporter()
+    progress.print_summary()
+"""
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from preprocessing.pipeline.config import BATCH_PROGRESS_INTERVAL
+from preprocessing.pipeline.llm_gateway import tokens_per_minute
+
+
+def _fmt_elapsed(seconds: float) -> str:
+    minutes, sec = divmod(int(seconds), 60)
+    return f"{minutes}m{sec:02d}s" if minutes else f"{sec}s"
+
+
+@dataclass
+class _GameProgress:
+    rule_id: int
+    name: str = ""
+    started: float = field(default_factory=time.monotonic)
+    running: list[str] = field(default_factory=list)  # 실행 중인 노드/스텝 (시작 순)
+    last_done: str = ""
+    finished: float | None = None
+    ok: bool | None = None
+    error: str | None = None
+
+
+class BatchProgress:
+    """게임별 진행 상태 (스레드 안전 - 노드는 워커 스레드에서 실행된다)"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.started = time.monotonic()
+        self._games: dict[int, _GameProgress] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reporter: threading.Thread | None = None
+
+    # ---- 상태 갱신 ----
+    def start(self, rule_id: int, name: str = ""):
+        with self._lock:
+            self._games[rule_id] = _GameProgress(rule_id, name)
+
+    def set_name(self, rule_id: int, name: str):
+        with self._lock:
+            if rule_id in self._games and name:
+                self._games[rule_id].name = name
+
+    def node_started(self, rule_id: int, node: str):
+        with self._lock:
+            game = self._games.get(rule_id)
+            if game is not None:
+                game.running.append(node)
+
+    def node_finished(self, rule_id: int, node: str):
+        with self._lock:
+            game = self._games.get(rule_id)
+            if game is not None:
+                if node in game.running:
+                    game.running.remove(node)
+                game.last_done = node
+
+    def finish(self, rule_id: int, ok: bool, error: str | None = None):
+        with self._lock:
+            game = self._games.get(rule_id)
+            if game is not None:
+                game.finished = time.monotonic()
+                game.ok = ok
+                game.error = error
+                game.running.clear()
+
+    # ---- 출력 ----
+    def render(self) -> str:
+        """진행 표 (진행 중인 게임만 행으로)"""
+        with self._lock:
+            games = list(self._games.values())
+        now = time.monotonic()
+        in_flight = [g for g in games if g.finished is None]
+        done = sum(1 for g in games if g.ok)
+        failed = sum(1 for g in games if g.ok is False)
+
+        lines = [
+            f"  [batch] 진행 {len(in_flight)} | 완료 {done} | 실패 {failed} | "
+            f"대기 {self.total - len(games)} / 전체 {self.total} | "
+            f"{tokens_per_minute():,} tok/min | 경과 {_fmt_elapsed(now - self.started)}"
+        ]
+        for g in sorted(in_flight, key=lambda g: g.started):
+            # 섹션 워커(Send)는 같은 이름으로 여러 개 돌므로 묶어서 표시 (qa_section×12)
+            running = Counter(g.running)
+            stage = ", ".join(f"{n}×{c}" if c > 1 else n for n, c in running.items()) or (
+                f"{g.last_done} 완료" if g.last_done else "시작"
+            )
+            lines.append(
+                f"    rule_id={g.rule_id:<6} {(g.name or '?')[:20]:<20} "
+                f"{stage[:40]:<40} {_fmt_elapsed(now - g.started):>7}"
+            )
+        return "\n".join(lines)
+
+    def print_summary(self):
+        """끝난 뒤 성공/실패 요약"""
+        with self._lock:
+            games = list(self._games.values())
+        failed = [g for g in games if g.ok is False]
+        print(f"\n{'='*60}")
+        print(f"배치 완료: {len(games) - len(failed)}/{self.total}건 성공, "
+              f"{len(failed)}건 실패 ({_fmt_elapsed(time.monotonic() - self.started)})")
+        for g in failed:
+            print(f"  - rule_id={g.rule_id} {g.name}: {g.error or '실패'}")
+        print(f"{'='*60}")
+
+    # ---- 주기 출력 ----
+    def start_reporter(self, interval: float = BATCH_PROGRESS_INTERVAL):
+        """interval초마다 진행 표 출력 (백그라운드 스레드)"""
+        def _loop():
+            while not self._stop.wait(interval):
+                print(self.render(), flush=True)
+
+        self._reporter = threading.Thread(target=_loop, name="gmjj-progress", daemon=True)
+        self._reporter.start()
+
+    def stop_reporter(self):
+        self._stop.set()
+        if self._reporter is not None:
+            self._reporter.join()
@@ -0,0 +1,245 @@
+"""
+HNSW 파라미터 벤치마크 (색인 시간 / 인덱스 크기 / p95 지연 / recall)
+
+M × construction_ef 조합마다 임시 디렉토리에 컬렉션을 새로 만들고,
+search_ef를 바꿔 가며 쿼리해서 brute-force(NumPy 전체 코사인) 정답 대비 recall@k를 잰다.
+결과를 보고 config.HNSW_SETTINGS를 정한 뒤 hnsw_index --rebuild로 반영한다.
+
+벡터 출처:
+- --collection game_rules : 로컬 ChromaDB에 저장된 실제 벡터 (임베딩 API 호출 없음)
+- --synthetic 10000       : 군집형 합성 벡터 (인덱스가 없을 때)
+
+쿼리는 데이터 벡터에 잡음을 섞어 만든다.
+--filter-game 을 주면 룰 검색처럼 game_id 필터를 건 상태로 잰다.
+
+사용법:
+    uv run python -m preprocessing.pipeline.bench_hnsw --collection game_rules --filter-game
+    uv run python -m preprocessing.pipeline.bench_hnsw --collection game_search
+    uv run python -m preprocessing.pipeline.bench_hnsw --synthetic 10000 --M 16 32 \\
+        --construction-ef 100 200 --search-ef 10 50 100 200 --output hnsw.json
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from preprocessing.pipeline.config import LOCAL_EMBEDDING_DIMENSIONS
+
+# ============================================================
+# 벤치마크 기본값
+# ============================================================
+DEFAULT_M = (16, 32)
+DEFAULT_CONSTRUCTION_EF = (100, 200)
+DEFAULT_SEARCH_EF = (10, 50, 100, 200)
+DEFAULT_QUERIES = 200
+QUERY_NOISE = 0.05
+ADD_BATCH = 5000
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.where(norms == 0, 1, norms)
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    return float(np.percentile(samples, pct)) if samples else 0.0
+
+
+# ============================================================
+# 데이터
+# ============================================================
+def load_collection_vectors(alias: str, limit: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """로컬 ChromaDB 컬렉션의 벡터 + game_id"""
+    from preprocessing.pipeline.chroma_store import get_collection
+
+    col = get_collection(alias)
+    total = col.count() if not limit else min(limit, col.count())
+    vectors, game_ids = [], []
+    for offset in range(0, total, 1000):
+        batch = col.get(limit=min(1000, total - offset), offset=offset,
+                        include=["embeddings", "metadatas"])
+        vectors.append(np.asarray(batch["embeddings"], dtype=np.float32))
+        game_ids.extend(int((m or {}).get("game_id") or 0) for m in batch["metadatas"])
+    return _normalize(np.concatenate(vectors)), np.array(game_ids, dtype=np.int64)
+
+
+def synthetic_vectors(n: int, dims: int, clusters: int = 100, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """군집형 합성 벡터 (군집 = game_id). 균일 난수보다 실제 임베딩 분포에 가깝다."""
+    rng = np.random.default_rng(seed)
+    centers = _normalize(rng.standard_normal((clusters, dims)).astype(np.float32))
+    labels = rng.integers(0, clusters, n)
+    vectors = centers[labels] + 0.5 * rng.standard_normal((n, dims)).astype(np.float32) / np.sqrt(dims) * 4
+    return _normalize(vectors.astype(np.float32)), labels.astype(np.int64) + 1
+
+
+def make_queries(x: np.ndarray, game_ids: np.ndarray, n: int, seed: int = 1):
+    """데이터 벡터 + 잡음 → 쿼리 (쿼리별 game_id 포함)"""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(x), size=min(n, len(x)), replace=False)
+    noise = rng.standard_normal((len(picks), x.shape[1])).astype(np.float32)
+    queries = _normalize(x[picks] + QUERY_NOISE * noise * np.sqrt(1 / x.shape[1]) * 10)
+    return queries, game_ids[picks]
+
+
+def ground_truth(x, game_ids, queries, query_games, k: int, filter_game: bool) -> list[set[int]]:
+    """brute-force 정답 top-k (행 인덱스)"""
+    truth = []
+    for q, g in zip(queries, query_games):
+        rows = np.flatnonzero(game_ids == g) if filter_game else np.arange(len(x))
+        scores = x[rows] @ q
+        top = rows[np.argsort(-scores)[:k]]
+        truth.append(set(int(i) for i in top))
+    return truth
+
+
+# ============================================================
+# 측정
+# ============================================================
+def _open(path: str, name: str):
+    import chromadb
+    from chromadb.api.client import SharedSystemClient
+
+    # 같은 경로의 클라이언트는 프로세스 안에서 공유되므로 캐시를 비워야 설정 변경이 반영된다
+    SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(path=path).get_collection(name)
+
+
+def build_index(x, game_ids, m: int, construction_ef: int, path: str) -> float:
+    """임시 컬렉션 생성 + 전체 벡터 추가 → 색인 시간(초)"""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=path)
+    col = client.create_collection(
+        "bench",
+        metadata={"hnsw:space": "cosine", "hnsw:M": m, "hnsw:construction_ef": construction_ef},
+    )
+    start = time.perf_counter()
+    for i in range(0, len(x), ADD_BATCH):
+        col.add(
+            ids=[str(j) for j in range(i, min(i + ADD_BATCH, len(x)))],
+            embeddings=x[i:i + ADD_BATCH],
+            metadatas=[{"game_id": int(g)} for g in game_ids[i:i + ADD_BATCH]],
+        )
+    return time.perf_counter() - start
+
+
+def measure(path: str, search_ef: int, queries, query_games, truth, k: int, filter_game: bool) -> dict:
+    """search_ef 적용 후 쿼리별 지연시간 + recall@k"""
+    col = _open(path, "bench")
+    col.modify(configuration={"hnsw": {"ef_search": search_ef}})
+    col = _open(path, "bench")
+
+    # 첫 쿼리는 인덱스 로드 시간이 섞이므로 제외
+    col.query(query_embeddings=[queries[0]], n_results=k)
+
+    latencies, recalls = [], []
+    for q, g, expected in zip(queries, query_games, truth):
+        kwargs = {"query_embeddings": [q], "n_results": k}
+        if filter_game:
+            kwargs["where"] = {"game_id": int(g)}
+        start = time.perf_counter()
+        raw = col.query(**kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {int(i) for i in raw["ids"][0]}
+        recalls.append(len(found & expected) / max(1, len(expected)))
+
+    return {
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+    }
+
+
+def run_bench(x, game_ids, ms, construction_efs, search_efs, n_queries: int, k: int,
+              filter_game: bool) -> list[dict]:
+    queries, query_games = make_queries(x, game_ids, n_queries)
+    start = time.perf_counter()
+    truth = ground_truth(x, game_ids, queries, query_games, k, filter_game)
+    print(f"  [bench] 정답(brute-force) {len(queries)}쿼리: {time.perf_counter() - start:.1f}s")
+
+    rows = []
+    for m in ms:
+        for construction_ef in construction_efs:
+            path = tempfile.mkdtemp(prefix="gmjj_hnsw_")
+            try:
+                build_s = build_index(x, game_ids, m, construction_ef, path)
+                size = sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+                for search_ef in search_efs:
+                    row = {
+                        "M": m,
+                        "construction_ef": construction_ef,
+                        "search_ef": search_ef,
+                        "build_s": round(build_s, 2),
+                        "index_mb": round(size / 1024 / 1024, 1),
+                        **measure(path, search_ef, queries, query_games, truth, k, filter_game),
+                    }
+                    rows.append(row)
+                    print(f"  [bench] M={m} cef={construction_ef} sef={search_ef}: "
+                          f"recall@{k} {row[f'recall@{k}']:.3f}, p95 {row['p95_ms']}ms")
+            finally:
+                shutil.rmtree(path, ignore_errors=True)
+    return rows
+
+
+def print_table(rows: list[dict], k: int, current: dict | None):
+    print(f"\n  {'M':>4}{'c_ef':>6}{'s_ef':>6}{'build_s':>9}{'size_MB':>9}"
+          f"{'p50_ms':>8}{'p95_ms':>8}{'R@' + str(k):>8}")
+    for r in rows:
+        mark = ""
+        if current and all(r[key] == current[key] for key in ("M", "construction_ef", "search_ef")):
+            mark = "  ← config"
+        print(f"  {r['M']:>4}{r['construction_ef']:>6}{r['search_ef']:>6}{r['build_s']:>9}"
+              f"{r['index_mb']:>9}{r['p50_ms']:>8}{r['p95_ms']:>8}{r[f'recall@{k}']:>8.3f}{mark}")
+
+
+def main():
+    from preprocessing.pipeline.chroma_store import hnsw_settings
+
+    parser = argparse.ArgumentParser(description="HNSW 파라미터 벤치마크")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--collection", help="로컬 ChromaDB 컬렉션 별칭 (저장된 벡터 사용)")
+    source.add_argument("--synthetic", type=int, help="합성 벡터 수")
+    parser.add_argument("--dims", type=int, default=LOCAL_EMBEDDING_DIMENSIONS, help="합성 벡터 차원")
+    parser.add_argument("--limit", type=int, default=0, help="컬렉션에서 읽을 최대 벡터 수")
+    parser.add_argument("--M", type=int, nargs="+", default=list(DEFAULT_M))
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=list(DEFAULT_CONSTRUCTION_EF))
+    parser.add_argument("--search-ef", type=int, nargs="+", default=list(DEFAULT_SEARCH_EF))
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--filter-game", action="store_true", help="game_id 필터 검색으로 측정")
+    parser.add_argument("--output", type=str, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.collection:
+        x, game_ids = load_collection_vectors(args.collection, args.limit)
+        label = args.collection
+    else:
+        x, game_ids = synthetic_vectors(args.synthetic, args.dims)
+        label = f"synthetic-{args.synthetic}x{args.dims}"
+    print(f"  [bench] {label}: {len(x)}개 × {x.shape[1]}차원"
+          f"{' (game_id 필터)' if args.filter_game else ''}")
+
+    rows = run_bench(x, game_ids, args.M, args.construction_ef, args.search_ef,
+                     args.queries, args.k, args.filter_game)
+    print_table(rows, args.k, hnsw_settings(args.collection) if args.collection else None)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "source": label,
+                "vectors": len(x),
+                "dims": int(x.shape[1]),
+                "filter_game": args.filter_game,
+                "k": args.k,
+                "results": rows,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n  결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+ChromaDB 클라이언트 / 컬렉션 별칭(alias)
+
+컬렉션을 지우고 다시 만드는 동안에는 검색이 깨진다.
+그래서 읽는 쪽은 논리 이름(game_rules, game_search ...)만 알고,
+실제 컬렉션 이름은 CHROMA_DIR/aliases.json 에서 찾는다.
+
+전체 재구축(blue/green):
+    1. 새 물리 컬렉션(game_rules__20260101120000)을 만들어 채운다
+    2. switch_aliases()로 별칭 파일을 os.replace → 원자적으로 교체
+    3. 이전 물리 컬렉션 삭제
+
+별칭이 없는 이름은 그대로 물리 이름으로 쓴다 (기존 컬렉션 호환).
+
+사용법:
+    from preprocessing.pipeline.chroma_store import get_collection
+    col = get_collection("game_rules", embedding_function=ef)
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import chromadb
+
+from preprocessing.pipeline.config import CHROMA_DIR, HNSW_SETTINGS
+
+ALIAS_PATH = Path(CHROMA_DIR) / "aliases.json"
+
+_client: chromadb.ClientAPI | None = None
+_lock = threading.Lock()
+
+# 별칭 파일 캐시: (mtime_ns, 별칭 맵). 읽을 때마다 stat만 하고 바뀌었을 때만 다시 읽는다.
+_aliases: tuple[int, dict[str, str]] = (-1, {})
+
+
+def get_chroma_client() -> chromadb.ClientAPI:
+    """ChromaDB 클라이언트 반환 (싱글톤)"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = chromadb.PersistentClient(path=CHROMA_DIR)
+    return _client
+
+
+# ============================================================
+# 별칭
+# ============================================================
+def load_aliases() -> dict[str, str]:
+    """별칭 → 물리 컬렉션 이름 맵"""
+    global _aliases
+    try:
+        mtime = ALIAS_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if mtime != _aliases[0]:
+        with open(ALIAS_PATH, "r", encoding="utf-8") as f:
+            _aliases = (mtime, json.load(f))
+    return dict(_aliases[1])
+
+
+def resolve_collection_name(alias: str) -> str:
+    """논리 이름 → 현재 물리 컬렉션 이름 (별칭이 없으면 그대로)"""
+    return load_aliases().get(alias, alias)
+
+
+def logical_name(name: str) -> str:
+    """물리 컬렉션 이름 → 별칭 (별칭이 가리키지 않으면 그대로)"""
+    for alias, physical in load_aliases().items():
+        if physical == name:
+            return alias
+    return name
+
+
+def switch_aliases(mapping: dict[str, str]) -> dict[str, str]:
+    """
+    별칭 여러 개를 한 번에 교체 (임시 파일 작성 후 os.replace → 원자적)
+
+    Returns:
+        교체 전 {별칭: 물리 이름} (이전 컬렉션 정리용)
+    """
+    with _lock:
+        aliases = load_aliases()
+        previous = {alias: aliases.get(alias, alias) for alias in mapping}
+        aliases.update(mapping)
+
+        ALIAS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ALIAS_PATH.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(aliases, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, ALIAS_PATH)
+    return previous
+
+
+def new_physical_name(alias: str) -> str:
+    """재구축용 새 물리 컬렉션 이름"""
+    return f"{alias}__{time.strftime('%Y%m%d%H%M%S')}"
+
+
+# ============================================================
+# 컬렉션
+# ============================================================
+def get_collection(alias: str, embedding_function=None):
+    """별칭이 가리키는 컬렉션 열기 (없으면 NotFoundError)"""
+    return get_chroma_client().get_collection(
+        resolve_collection_name(alias), embedding_function=embedding_function
+    )
+
+
+def hnsw_settings(alias: str) -> dict:
+    """별칭의 HNSW 파라미터 (config HNSW_SETTINGS, 없으면 default)"""
+    return {**HNSW_SETTINGS["default"], **HNSW_SETTINGS.get(alias, {})}
+
+
+def collection_metadata(dimensions: int | None = None, alias: str | None = None) -> dict:
+    """
+    새 컬렉션 메타데이터
+
+    거리 함수 + HNSW 파라미터 + 색인한 임베딩 공간(검색 시 설정 불일치 감지용)
+    """
+    from preprocessing.pipeline.embeddings import embedding_model_id
+
+    hnsw = hnsw_settings(alias or "default")
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:construction_ef": hnsw["construction_ef"],
+        "hnsw:search_ef": hnsw["search_ef"],
+        "hnsw:M": hnsw["M"],
+        "embedding_model": embedding_model_id(dimensions=dimensions),
+    }
+
+
+def get_or_create_collection(alias: str, embedding_function=None, metadata: dict | None = None):
+    """별칭이 가리키는 컬렉션 열기 (없으면 생성)"""
+    return get_chroma_client().get_or_create_collection(
+        name=resolve_collection_name(alias),
+        embedding_function=embedding_function,
+        metadata=metadata or collection_metadata(alias=alias),
+    )
+
+
+def copy_collection(source, target, batch_size: int = 1000, transform=None, label: str = "") -> int:
+    """
+    저장된 벡터째로 컬렉션 복사 (재임베딩 없음)
+
+    Args:
+        transform: 배치 dict(ids/documents/metadatas/embeddings)를 받아 바꾼 dict 반환 (선택)
+    Returns:
+        복사한 청크 수
+    """
+    total = source.count()
+    copied = 0
+    for offset in range(0, total, batch_size):
+        batch = source.get(
+            limit=batch_size, offset=offset, include=["documents", "metadatas", "embeddings"]
+        )
+        if not batch["ids"]:
+            break
+        if transform:
+            batch = transform(batch)
+        target.add(
+            ids=batch["ids"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+            embeddings=batch["embeddings"],
+        )
+        copied += len(batch["ids"])
+        print(f"\r  [chroma] {label or target.name}: {copied}/{total}", end="", flush=True)
+    print()
+    return copied
+
+
+def collection_exists(alias: str) -> bool:
+    name = resolve_collection_name(alias)
+    return name in {c.name for c in get_chroma_client().list_collections()}
+
+
+def drop_collection(name: str) -> bool:
+    """물리 컬렉션 삭제 (별칭이 가리키는 중이면 삭제하지 않음)"""
+    if name in load_aliases().values():
+        return False
+    try:
+        get_chroma_client().delete_collection(name)
+    except Exception:
+        return False
+    return True
@@ -3,12 +3,17 @@
 
 나무위키는 클라이언트 사이드 렌더링이라 Playwright로 페이지를 로드한 뒤
 렌더링된 HTML에서 본문 텍스트를 추출한다.
+acollect()는 에이전트 그래프용 async 버전 (async Playwright - 취소되면 브라우저를 닫는다).
 """
 
 import re
 
+from playwright.async_api import async_playwright
 from playwright.sync_api import sync_playwright
 
+# 본문 셀렉터 (앞에서부터 시도, 100자 넘으면 채택 / 없으면 body 전체)
+_CONTENT_SELECTORS = [".wiki-inner-content", "article", ".content"]
+
 
 def _clean_text(text: str) -> str:
     """추출된 텍스트 정리"""
@@ -19,6 +24,24 @@ def _clean_text(text: str) -> str:
     return text.strip()
 
 
+def _source_url(source_row: dict) -> str:
+    source_url = source_row.get("source_url", "")
+    if not source_url:
+        raise ValueError("source_url이 비어있음")
+    return source_url
+
+
+def _to_result(raw_text: str) -> dict:
+    raw_content = _clean_text(raw_text)
+
+    if not raw_content.strip() or len(raw_content) < 50:
+        raise ValueError("나무위키에서 유의미한 텍스트 추출 실패")
+
+    print(f"    [나무위키] {len(raw_content)}자 추출")
+
+    return {"raw_content": raw_content}
+
+
 def collect(source_row: dict) -> dict:
     """
     나무위키에서 게임 문서 수집 (Playwright 사용)
@@ -30,9 +53,7 @@ def collect(source_row: dict) -> dict:
     Returns:
         {"raw_content": str}
     """
-    source_url = source_row.get("source_url", "")
-    if not source_url:
-        raise ValueError("source_url이 비어있음")
+    source_url = _source_url(source_row)
 
     print(f"    [나무위키] {source_url} 크롤링 중 (Playwright)...")
 
@@ -46,7 +67,7 @@ def collect(source_row: dict) -> dict:
 
         # 본문 추출 (여러 셀렉터 시도)
         raw_text = ""
-        for selector in [".wiki-inner-content", "article", ".content"]:
+        for selector in _CONTENT_SELECTORS:
             el = page.query_selector(selector)
             if el:
                 raw_text = el.inner_text()
@@ -59,11 +80,35 @@ def collect(source_row: dict) -> dict:
 
         browser.close()
 
-    raw_content = _clean_text(raw_text)
+    return _to_result(raw_text)
 
-    if not raw_content.strip() or len(raw_content) < 50:
-        raise ValueError("나무위키에서 유의미한 텍스트 추출 실패")
 
-    print(f"    [나무위키] {len(raw_content)}자 추출")
+async def acollect(source_row: dict) -> dict:
+    """collect의 async 버전"""
+    source_url = _source_url(source_row)
 
-    return {"raw_content": raw_content}
+    print(f"    [나무위키] {source_url} 크롤링 중 (Playwright)...")
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            page = await browser.new_page()
+
+            await page.goto(source_url, wait_until="domcontentloaded", timeout=30000)
+            await page.wait_for_timeout(5000)  # 나무위키 JS 렌더링 대기
+
+            raw_text = ""
+            for selector in _CONTENT_SELECTORS:
+                el = await page.query_selector(selector)
+                if el:
+                    raw_text = await el.inner_text()
+                    if len(raw_text) > 100:
+                        break
+
+            if len(raw_text) < 100:
+                raw_text = await page.inner_text("body")
+        finally:
+            # 노드 타임아웃/취소 시에도 브라우저 프로세스를 남기지 않는다
+            await browser.close()
+
+    return _to_result(raw_text)
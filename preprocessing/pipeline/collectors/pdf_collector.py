@@ -3,10 +3,14 @@ PDF 수집기 - Upstage Document Parse API
 
 기존 step1_ocr.py 로직을 collector 모듈로 이동.
 PDF/이미지 파일을 Upstage API로 OCR 처리하여 마크다운 텍스트 반환.
+acollect()는 에이전트 그래프용 async 버전 (httpx.AsyncClient, 취소 가능).
 """
 
+import asyncio
 import os
+from pathlib import Path
 
+import httpx
 import requests
 from dotenv import load_dotenv
 
@@ -20,6 +24,21 @@ from preprocessing.pipeline.config import (
 load_dotenv()
 
 
+def _upstage_headers() -> dict:
+    api_key = os.getenv("UPSTAGE_API_KEY", "")
+    if not api_key:
+        raise RuntimeError("UPSTAGE_API_KEY가 .env에 없습니다.")
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+_UPSTAGE_FORM = {
+    "ocr": UPSTAGE_OCR_MODE,
+    "output_formats": "['text', 'markdown']",
+    "model": UPSTAGE_MODEL,
+}
+_UPSTAGE_TIMEOUT = 300
+
+
 def call_upstage_api(file_path: str) -> dict:
     """
     Upstage Document Parse API 호출
@@ -30,25 +49,16 @@ def call_upstage_api(file_path: str) -> dict:
     Returns:
         API 응답 JSON
     """
-    api_key = os.getenv("UPSTAGE_API_KEY", "")
-    if not api_key:
-        raise RuntimeError("UPSTAGE_API_KEY가 .env에 없습니다.")
-
-    headers = {"Authorization": f"Bearer {api_key}"}
+    headers = _upstage_headers()
 
     with open(file_path, "rb") as f:
         files = {"document": f}
-        data = {
-            "ocr": UPSTAGE_OCR_MODE,
-            "output_formats": "['text', 'markdown']",
-            "model": UPSTAGE_MODEL,
-        }
         response = requests.post(
             UPSTAGE_API_URL,
             headers=headers,
             files=files,
-            data=data,
-            timeout=300,
+            data=_UPSTAGE_FORM,
+            timeout=_UPSTAGE_TIMEOUT,
         )
 
     if response.status_code != 200:
@@ -59,16 +69,28 @@ def call_upstage_api(file_path: str) -> dict:
     return response.json()
 
 
-def collect(source_row: dict) -> dict:
-    """
-    PDF/이미지 파일에서 텍스트 추출
+async def acall_upstage_api(file_path: str) -> dict:
+    """call_upstage_api의 async 버전"""
+    headers = _upstage_headers()
+    content = await asyncio.to_thread(Path(file_path).read_bytes)
 
-    Args:
-        source_row: game_rule_sources 테이블의 1행
+    async with httpx.AsyncClient(timeout=_UPSTAGE_TIMEOUT) as client:
+        response = await client.post(
+            UPSTAGE_API_URL,
+            headers=headers,
+            files={"document": (Path(file_path).name, content)},
+            data=_UPSTAGE_FORM,
+        )
 
-    Returns:
-        {"raw_content": str, "page_count": int, "elements": list}
-    """
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"Upstage API 에러 {response.status_code}: {response.text}"
+        )
+
+    return response.json()
+
+
+def _source_path(source_row: dict) -> Path:
     source_file = source_row.get("source_file", "")
     if not source_file:
         raise ValueError("source_file이 비어있음")
@@ -76,11 +98,11 @@ def collect(source_row: dict) -> dict:
     file_path = PROJECT_ROOT / source_file
     if not file_path.exists():
         raise FileNotFoundError(f"파일 없음: {file_path}")
+    return file_path
 
-    print(f"    [PDF] {file_path.name} -> Upstage API 호출 중...")
-
-    result = call_upstage_api(str(file_path))
 
+def _to_result(result: dict) -> dict:
+    """Upstage 응답 → {"raw_content", "page_count", "elements"}"""
     content = result.get("content", {})
     markdown_text = content.get("markdown", "")
     plain_text = content.get("text", "")
@@ -99,3 +121,25 @@ def collect(source_row: dict) -> dict:
         "page_count": page_count,
         "elements": elements,
     }
+
+
+def collect(source_row: dict) -> dict:
+    """
+    PDF/이미지 파일에서 텍스트 추출
+
+    Args:
+        source_row: game_rule_sources 테이블의 1행
+
+    Returns:
+        {"raw_content": str, "page_count": int, "elements": list}
+    """
+    file_path = _source_path(source_row)
+    print(f"    [PDF] {file_path.name} -> Upstage API 호출 중...")
+    return _to_result(call_upstage_api(str(file_path)))
+
+
+async def acollect(source_row: dict) -> dict:
+    """collect의 async 버전"""
+    file_path = _source_path(source_row)
+    print(f"    [PDF] {file_path.name} -> Upstage API 호출 중...")
+    return _to_result(await acall_upstage_api(str(file_path)))
@@ -3,6 +3,7 @@
 
 게임 이름으로 웹 검색 → 룰 설명 페이지 찾기 → 본문 텍스트 추출.
 Tavily는 검색 + 본문 추출을 한번에 해준다.
+asearch_and_collect()는 에이전트 그래프용 async 버전 (AsyncTavilyClient).
 """
 
 import os
@@ -13,6 +14,41 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _tavily_api_key() -> str:
+    api_key = os.getenv("TAVILY_API_KEY", "")
+    if not api_key:
+        raise RuntimeError("TAVILY_API_KEY가 .env에 없습니다.")
+    return api_key
+
+
+def _import_tavily():
+    try:
+        import tavily
+    except ImportError:
+        raise RuntimeError(
+            "tavily-python 패키지가 필요합니다. "
+            "uv add tavily-python 로 설치하세요."
+        )
+    return tavily
+
+
+def _search_kwargs(game_name: str, max_results: int) -> dict:
+    return {
+        # 검색어: 게임 이름 + 룰 키워드
+        "query": f"{game_name} 보드게임 룰 규칙",
+        "max_results": max_results,
+        "search_depth": "advanced",      # 본문 전체 추출
+        "include_raw_content": True,      # raw_content 포함
+        "include_domains": [],            # 모든 도메인
+        "exclude_domains": [              # 쇼핑/판매 사이트 제외
+            "coupang.com",
+            "gmarket.co.kr",
+            "11st.co.kr",
+            "auction.co.kr",
+        ],
+    }
+
+
 def search_and_collect(game_name: str, max_results: int = 5) -> dict | None:
     """
     게임 이름으로 웹 검색 → 룰 관련 페이지 본문 수집
@@ -27,43 +63,44 @@ def search_and_collect(game_name: str, max_results: int = 5) -> dict | None:
     Returns:
         {"raw_content": str, "metadata": dict} 또는 None
     """
-    api_key = os.getenv("TAVILY_API_KEY", "")
-    if not api_key:
-        raise RuntimeError("TAVILY_API_KEY가 .env에 없습니다.")
+    api_key = _tavily_api_key()
+    tavily = _import_tavily()
+
+    print(f"    [웹검색] '{game_name}' 검색 중...")
+
+    client = tavily.TavilyClient(api_key=api_key)
+    kwargs = _search_kwargs(game_name, max_results)
 
     try:
-        from tavily import TavilyClient
-    except ImportError:
-        raise RuntimeError(
-            "tavily-python 패키지가 필요합니다. "
-            "uv add tavily-python 로 설치하세요."
-        )
+        response = client.search(**kwargs)
+    except Exception as e:
+        print(f"    [웹검색] API 호출 실패: {e}")
+        return None
 
-    print(f"    [웹검색] '{game_name}' 검색 중...")
+    return _collect_results(response, kwargs["query"])
 
-    client = TavilyClient(api_key=api_key)
 
-    # 검색어: 게임 이름 + 룰 키워드
-    query = f"{game_name} 보드게임 룰 규칙"
+async def asearch_and_collect(game_name: str, max_results: int = 5) -> dict | None:
+    """search_and_collect의 async 버전"""
+    api_key = _tavily_api_key()
+    tavily = _import_tavily()
+
+    print(f"    [웹검색] '{game_name}' 검색 중...")
+
+    client = tavily.AsyncTavilyClient(api_key=api_key)
+    kwargs = _search_kwargs(game_name, max_results)
 
     try:
-        response = client.search(
-            query=query,
-            max_results=max_results,
-            search_depth="advanced",      # 본문 전체 추출
-            include_raw_content=True,      # raw_content 포함
-            include_domains=[],            # 모든 도메인
-            exclude_domains=[              # 쇼핑/판매 사이트 제외
-                "coupang.com",
-                "gmarket.co.kr",
-                "11st.co.kr",
-                "auction.co.kr",
-            ],
-        )
+        response = await client.search(**kwargs)
     except Exception as e:
         print(f"    [웹검색] API 호출 실패: {e}")
         return None
 
+    return _collect_results(response, kwargs["query"])
+
+
+def _collect_results(response: dict, query: str) -> dict | None:
+    """Tavily 검색 응답 → 룰 관련 페이지 본문을 합친 결과"""
     results = response.get("results", [])
 
     if not results:
@@ -6,6 +6,7 @@ source_url이 이미 등록된 경우에 사용한다.
 (자동검색은 youtube_search.py 참고)
 """
 
+import asyncio
 import re
 
 from preprocessing.pipeline.config import YOUTUBE_WHITELIST_CHANNELS
@@ -97,6 +98,16 @@ def collect(source_row: dict) -> dict:
     }
 
 
+async def acollect(source_row: dict) -> dict:
+    """
+    collect의 async 버전
+
+    youtube-transcript-api는 동기 전용이라 작업 스레드에서 돌린다
+    (취소되면 기다리기만 멈추고, 진행 중인 자막 요청은 끝까지 간다).
+    """
+    return await asyncio.to_thread(collect, source_row)
+
+
 def _extract_video_id(url: str) -> str:
     """유튜브 URL에서 video ID 추출"""
     patterns = [
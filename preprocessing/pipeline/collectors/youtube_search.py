@@ -4,8 +4,10 @@
 게임 이름으로 YouTube Data API v3 검색 → 룰 설명 영상 찾기 → 자막 추출.
 기존 youtube_collector.py는 URL이 있어야 동작하지만,
 이 모듈은 게임 이름만으로 자동 검색한다.
+asearch_and_collect()는 에이전트 그래프용 async 버전 (검색은 httpx.AsyncClient).
 """
 
+import asyncio
 import os
 import re
 
@@ -17,17 +19,10 @@ from preprocessing.pipeline.config import YOUTUBE_WHITELIST_CHANNELS
 load_dotenv()
 
 
-def search_videos(game_name: str, max_results: int = 5) -> list[dict]:
-    """
-    YouTube Data API v3으로 게임 룰 설명 영상 검색
+_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
 
-    Args:
-        game_name: 게임 이름 (한국어)
-        max_results: 최대 검색 결과 수
 
-    Returns:
-        [{"video_id": str, "title": str, "channel": str, "url": str}, ...]
-    """
+def _search_params(game_name: str, max_results: int) -> dict:
     api_key = os.getenv("YOUTUBE_API_KEY", "")
     if not api_key:
         raise RuntimeError("YOUTUBE_API_KEY가 .env에 없습니다.")
@@ -35,8 +30,7 @@ def search_videos(game_name: str, max_results: int = 5) -> list[dict]:
     # 검색어: 게임 이름 + 룰/규칙 키워드
     query = f"{game_name} 보드게임 룰 설명"
 
-    url = "https://www.googleapis.com/youtube/v3/search"
-    params = {
+    return {
         "part": "snippet",
         "q": query,
         "type": "video",
@@ -45,8 +39,8 @@ def search_videos(game_name: str, max_results: int = 5) -> list[dict]:
         "key": api_key,
     }
 
-    response = httpx.get(url, params=params, timeout=15)
 
+def _parse_search(response: httpx.Response) -> list[dict]:
     if response.status_code != 200:
         raise RuntimeError(
             f"YouTube API 검색 실패 {response.status_code}: {response.text[:200]}"
@@ -68,6 +62,28 @@ def search_videos(game_name: str, max_results: int = 5) -> list[dict]:
     return results
 
 
+def search_videos(game_name: str, max_results: int = 5) -> list[dict]:
+    """
+    YouTube Data API v3으로 게임 룰 설명 영상 검색
+
+    Args:
+        game_name: 게임 이름 (한국어)
+        max_results: 최대 검색 결과 수
+
+    Returns:
+        [{"video_id": str, "title": str, "channel": str, "url": str}, ...]
+    """
+    params = _search_params(game_name, max_results)
+    return _parse_search(httpx.get(_SEARCH_URL, params=params, timeout=15))
+
+
+async def asearch_videos(game_name: str, max_results: int = 5) -> list[dict]:
+    """search_videos의 async 버전"""
+    params = _search_params(game_name, max_results)
+    async with httpx.AsyncClient(timeout=15) as client:
+        return _parse_search(await client.get(_SEARCH_URL, params=params))
+
+
 def _is_rule_video(title: str, channel: str) -> bool:
     """룰 설명 영상인지 판별 (제목/채널 기반)"""
     # 화이트리스트 채널이면 바로 통과
@@ -137,6 +153,37 @@ def _extract_transcript(video_id: str) -> dict | None:
     return {"text": raw_text.strip(), "language": lang}
 
 
+def _candidates(videos: list[dict]) -> list[dict]:
+    """룰 관련 영상 필터링 + 화이트리스트 채널 우선 (없으면 전체 결과)"""
+    rule_videos = [v for v in videos if _is_rule_video(v["title"], v["channel"])]
+
+    # 화이트리스트 채널 먼저, 나머지는 원래 순서
+    def priority(v):
+        for i, wl in enumerate(YOUTUBE_WHITELIST_CHANNELS):
+            if wl in v["channel"]:
+                return i
+        return 100
+
+    rule_videos.sort(key=priority)
+
+    # 룰 영상이 없으면 전체 결과에서 시도
+    return rule_videos if rule_videos else videos
+
+
+def _to_result(video: dict, result: dict) -> dict:
+    print(f"    [유튜브검색] {len(result['text'])}자 추출 ({result['language']})")
+    return {
+        "raw_content": result["text"],
+        "language": result["language"],
+        "metadata": {
+            "video_id": video["video_id"],
+            "video_title": video["title"],
+            "channel": video["channel"],
+            "source_url": video["url"],
+        },
+    }
+
+
 def search_and_collect(game_name: str, max_results: int = 5) -> dict | None:
     """
     게임 이름으로 유튜브 검색 → 최적 영상 선택 → 자막 수집
@@ -156,38 +203,38 @@ def search_and_collect(game_name: str, max_results: int = 5) -> dict | None:
         print("    [유튜브검색] 검색 결과 없음")
         return None
 
-    # 룰 관련 영상 필터링 + 화이트리스트 채널 우선
-    rule_videos = [v for v in videos if _is_rule_video(v["title"], v["channel"])]
+    # 자막 있는 첫 번째 영상 선택
+    for video in _candidates(videos):
+        print(f"    [유튜브검색] 시도: {video['title']} ({video['channel']})")
+        result = _extract_transcript(video["video_id"])
 
-    # 화이트리스트 채널 먼저, 나머지는 원래 순서
-    def priority(v):
-        for i, wl in enumerate(YOUTUBE_WHITELIST_CHANNELS):
-            if wl in v["channel"]:
-                return i
-        return 100
+        if result and len(result["text"]) > 100:
+            return _to_result(video, result)
 
-    rule_videos.sort(key=priority)
+    print("    [유튜브검색] 자막 있는 영상을 찾지 못함")
+    return None
 
-    # 룰 영상이 없으면 전체 결과에서 시도
-    candidates = rule_videos if rule_videos else videos
 
-    # 자막 있는 첫 번째 영상 선택
-    for video in candidates:
+async def asearch_and_collect(game_name: str, max_results: int = 5) -> dict | None:
+    """
+    search_and_collect의 async 버전
+
+    자막 추출(youtube-transcript-api)은 동기 전용이라 영상마다 작업 스레드에서 돌린다.
+    """
+    print(f"    [유튜브검색] '{game_name}' 검색 중...")
+
+    videos = await asearch_videos(game_name, max_results=max_results)
+
+    if not videos:
+        print("    [유튜브검색] 검색 결과 없음")
+        return None
+
+    for video in _candidates(videos):
         print(f"    [유튜브검색] 시도: {video['title']} ({video['channel']})")
-        result = _extract_transcript(video["video_id"])
+        result = await asyncio.to_thread(_extract_transcript, video["video_id"])
 
         if result and len(result["text"]) > 100:
-            print(f"    [유튜브검색] {len(result['text'])}자 추출 ({result['language']})")
-            return {
-                "raw_content": result["text"],
-                "language": result["language"],
-                "metadata": {
-                    "video_id": video["video_id"],
-                    "video_title": video["title"],
-                    "channel": video["channel"],
-                    "source_url": video["url"],
-                },
-            }
+            return _to_result(video, result)
 
     print("    [유튜브검색] 자막 있는 영상을 찾지 못함")
     return None
@@ -4,6 +4,8 @@
 모델명, 경로, 배치 크기 등 설정을 한곳에서 관리한다.
 """
 
+import json
+import os
 from pathlib import Path
 
 # ============================================================
@@ -15,8 +17,8 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 # 룰북 파일이 저장된 디렉토리
 RULES_DIR = PROJECT_ROOT / "preprocessing" / "rulebooks"
 
-# ChromaDB 저장 경로
-CHROMA_DIR = str(PROJECT_ROOT / "chroma_db")
+# ChromaDB 저장 경로 (GMJJ_CHROMA_DIR로 덮어쓰기 가능 - CI/부하 테스트용 별도 인덱스)
+CHROMA_DIR = os.getenv("GMJJ_CHROMA_DIR", str(PROJECT_ROOT / "chroma_db"))
 
 # LLM 프롬프트 템플릿 디렉토리
 PROMPTS_DIR = Path(__file__).parent / "prompts"
@@ -38,11 +40,116 @@ PARSE_VLM_MODEL = "gpt-5.4-mini"     # VLM 파싱 (이미지+텍스트)
 PREPROCESS_MODEL = "gpt-5.4-mini"    # 섹션 정리 + 플레이북 생성
 QA_MODEL = "gpt-5.4-mini"            # QA 쌍 생성
 
+# LLM 호출 동시성 / 속도 제한 (rate_limit)
+# 섹션별 호출을 공용 풀에서 LLM_CONCURRENCY개까지 동시에 보내고,
+# 모델별 RPM/TPM 토큰 버킷으로 계정 한도를 지킨다 (고정 sleep 대신).
+LLM_CONCURRENCY = int(os.getenv("GMJJ_LLM_CONCURRENCY", "8"))
+LLM_RATE_LIMITS = {
+    # 모델 이름으로 항목을 추가하면 그 모델만 따로 제한한다 (없으면 default)
+    "default": {
+        "rpm": int(os.getenv("GMJJ_LLM_RPM", "500")),
+        "tpm": int(os.getenv("GMJJ_LLM_TPM", "200000")),
+    },
+}
+LLM_OUTPUT_TOKENS_ESTIMATE = 2000  # 요청 전 출력 토큰 예약량 (응답 후 실제 usage로 정산)
+
+# LLM 게이트웨이 (llm_gateway): 일시적 오류 재시도 횟수 / 요청 타임아웃(초) / 호출별 사용량 로그
+LLM_MAX_RETRIES = int(os.getenv("GMJJ_LLM_MAX_RETRIES", "6"))
+LLM_TIMEOUT = float(os.getenv("GMJJ_LLM_TIMEOUT", "600"))  # VLM 파싱은 수 분 걸리기도 한다
+# JSONL 한 줄 = 호출 1건 (모델, 입력/출력 토큰, 지연시간, 시도 횟수). ""이면 기록 안 함
+LLM_USAGE_LOG = os.getenv(
+    "GMJJ_LLM_USAGE_LOG", str(PROJECT_ROOT / "data" / "logs" / "llm_usage.jsonl")
+)
+
+# 예상 비용 계산용 단가 (USD / 1M 토큰): 입력 / 캐시된 입력(prompt caching) / 출력
+# 가격표가 바뀌면 여기만 고친다. GMJJ_LLM_PRICING(JSON)으로 모델별 덮어쓰기 가능. 없는 모델은 default
+LLM_PRICING = {
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+    "gpt-5.4-mini": {"input": 0.25, "cached_input": 0.025, "output": 2.00},
+    "default": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+}
+LLM_PRICING.update(json.loads(os.getenv("GMJJ_LLM_PRICING", "{}")))
+
+# 파이프라인 텔레메트리 (telemetry): JSONL 한 줄 = 노드/스텝 실행 1건
+# (벽시계 시간, LLM 호출 수, 입력/출력/캐시 토큰, 예상 비용). ""이면 기록 안 함
+TELEMETRY_LOG = os.getenv(
+    "GMJJ_TELEMETRY_LOG", str(PROJECT_ROOT / "data" / "logs" / "pipeline_spans.jsonl")
+)
+
+# LLM 응답 캐시 (llm_cache): sha256(모델, messages, 요청 파라미터) → 응답. 입력이 같은 재실행은 API 호출 0건
+# 모드: rw(읽기+쓰기) | ro(재생 전용, 캐시에 없으면 오류) | off
+LLM_CACHE_MODE = os.getenv("GMJJ_LLM_CACHE", "rw")
+LLM_CACHE_PATH = os.getenv(
+    "GMJJ_LLM_CACHE_PATH", str(PROJECT_ROOT / "data" / "cache" / "llm_responses.sqlite3")
+)
+LLM_CACHE_MAX_MB = int(os.getenv("GMJJ_LLM_CACHE_MAX_MB", "1024"))  # 넘으면 오래 안 쓴 응답부터 삭제
+
 # ============================================================
 # 임베딩 설정 (ChromaDB)
 # ============================================================
+# 임베딩 제공자: openai(운영) | local(문자 n-gram 해싱, 네트워크 불필요)
+EMBEDDING_PROVIDER = os.getenv("GMJJ_EMBEDDING_PROVIDER", "openai")
 EMBEDDING_MODEL = "text-embedding-3-small"
-BATCH_SIZE = 100  # ChromaDB 배치 추가 단위
+# 출력 차원 (None이면 모델 기본값, text-embedding-3-small = 1536)
+EMBEDDING_DIMENSIONS = int(os.getenv("GMJJ_EMBEDDING_DIMENSIONS", "0")) or None
+LOCAL_EMBEDDING_DIMENSIONS = 1536  # local 제공자 기본 차원 (운영 컬렉션과 같은 크기)
+# 임베딩 요청 1회당 입력 수 / 추정 토큰 상한. OpenAI 한도는 요청당 2048개 / 30만 토큰이다.
+# 룰 청크는 최대 3500자라 개수만으로 자르면 256개 배치가 토큰 한도를 넘을 수 있으므로
+# 배치는 입력 수와 추정 토큰(rate_limit.estimate_text_tokens) 중 먼저 차는 쪽에서 자른다.
+# 추정은 2글자 = 1토큰이라 한국어는 실제보다 적게 나올 수 있어서 한도의 절반을 기본으로 둔다.
+EMBEDDING_MAX_BATCH = 2048
+EMBEDDING_BATCH_SIZE = min(
+    int(os.getenv("GMJJ_EMBEDDING_BATCH_SIZE", "256")), EMBEDDING_MAX_BATCH
+)
+EMBEDDING_MAX_BATCH_TOKENS = min(
+    int(os.getenv("GMJJ_EMBEDDING_MAX_BATCH_TOKENS", "150000")), 300_000
+)
+# 임베딩 API 속도 제한 - LLM 게이트웨이와 같은 모델별 RPM/TPM 버킷 (rate_limit.get_rate_limiter)
+LLM_RATE_LIMITS[EMBEDDING_MODEL] = {
+    "rpm": int(os.getenv("GMJJ_EMBEDDING_RPM", "3000")),
+    "tpm": int(os.getenv("GMJJ_EMBEDDING_TPM", "1000000")),
+}
+BATCH_SIZE = EMBEDDING_BATCH_SIZE  # ChromaDB 배치 추가 단위
+# 임베딩 파이프라인 (embed_pipeline): 동시 임베딩 요청 수 / 처리 중 배치 상한(백프레셔)
+EMBEDDING_CONCURRENCY = int(os.getenv("GMJJ_EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_QUEUE_DEPTH = int(
+    os.getenv("GMJJ_EMBEDDING_QUEUE_DEPTH", str(EMBEDDING_CONCURRENCY * 2))
+)
+
+# 임베딩 캐시 (sha256(모델, 차원, 텍스트) → 벡터). 재색인 시 바뀐 텍스트만 API 호출
+EMBEDDING_CACHE_PATH = os.getenv(
+    "GMJJ_EMBEDDING_CACHE", str(PROJECT_ROOT / "data" / "cache" / "embeddings.sqlite3")
+)
+
+# game_rules 어휘(BM25) 인덱스 - ChromaDB와 같은 디렉토리에 둔다
+LEXICAL_INDEX_PATH = str(Path(CHROMA_DIR) / "lexical_game_rules.sqlite3")
+
+# HNSW 인덱스 파라미터 (컬렉션 별칭별, 없으면 default)
+# - construction_ef / M: 컬렉션 생성 시 고정 → 바꾸면 hnsw_index --rebuild 필요
+# - search_ef: 기존 컬렉션에 바로 적용 가능 (hnsw_index --apply-search-ef, 프로세스 재시작 후 반영)
+# 값은 ChromaDB 기본값에서 시작. bench_hnsw로 recall/p95를 재고 조정한다.
+HNSW_SETTINGS = {
+    "default":     {"construction_ef": 100, "search_ef": 100, "M": 16},
+    "game_search": {"construction_ef": 100, "search_ef": 100, "M": 16},   # ~1만 게임, 필터 없는 추천 검색
+    "game_rules":  {"construction_ef": 200, "search_ef": 100, "M": 16},   # 계속 늘어나는 룰 청크
+    "boardgames":  {"construction_ef": 100, "search_ef": 100, "M": 16},   # BGG API 게임 (fetch_bgg_api)
+}
+
+# 양자화 벡터 미러 (quantized_index): ""(끔) | float16 | int8
+# 켜면 벡터 검색 1차 후보를 memmap 미러에서 뽑고 원본 float32로 재정렬한다.
+VECTOR_MIRROR = os.getenv("GMJJ_VECTOR_MIRROR", "")
+VECTOR_MIRROR_DIR = str(Path(CHROMA_DIR) / "mirror")
+MIRROR_RERANK_FACTOR = 4  # 1차 후보 수 = n_results × 이 값
+# 검색 쪽에서 미러가 컬렉션과 같은지(청크 수, 청크 변경 시각, 미러 파일) 다시 확인하는 간격(초)
+VECTOR_MIRROR_CHECK_SECONDS = float(os.getenv("GMJJ_VECTOR_MIRROR_CHECK_SECONDS", "30"))
+
+# 게임별 정확 벡터 인덱스 (game_vector_index): game_id 필터 검색을 HNSW 대신 NumPy 내적으로
+# "0"이면 끄고 항상 HNSW + where 필터를 쓴다.
+GAME_VECTOR_INDEX = os.getenv("GMJJ_GAME_VECTOR_INDEX", "1") != "0"
+GAME_VECTOR_INDEX_MAX_GAMES = int(os.getenv("GMJJ_GAME_VECTOR_INDEX_MAX_GAMES", "256"))  # LRU 상한
+GAME_VECTOR_INDEX_MAX_CHUNKS = 5000  # 이보다 청크가 많은 게임은 HNSW 사용
+# 게임별 세대 번호 (청크 변경 시 +1) - 파이프라인과 웹 워커가 공유
+GAME_VECTOR_GENERATION_PATH = str(Path(CHROMA_DIR) / "game_generations.sqlite3")
 
 # ============================================================
 # 번역 설정
@@ -88,3 +195,37 @@ COMPONENT_IMAGE_BATCH_SIZE = 10          # VLM 분류 배치 크기
 
 # 에이전트 프롬프트 디렉토리
 AGENT_PROMPTS_DIR = Path(__file__).parent.parent / "agents" / "prompts"
+
+# 멀티 게임 배치 실행 (agents.run / run_pipeline --concurrency): 동시에 처리할 게임 수
+# LLM 호출은 게임 수와 관계없이 공용 풀(LLM_CONCURRENCY) + 모델별 RPM/TPM 버킷을 같이 쓴다.
+BATCH_CONCURRENCY = int(os.getenv("GMJJ_BATCH_CONCURRENCY", "4"))
+BATCH_PROGRESS_INTERVAL = 15  # 진행 표 출력 주기 (초)
+
+# async 노드 타임아웃 (초). 넘으면 노드를 취소한다.
+# 수집 노드는 해당 소스만 빠진 채 계속 진행하고, 산출물 노드는 실패로 끝난다 (--resume으로 재개)
+NODE_TIMEOUT_SCALE = float(os.getenv("GMJJ_NODE_TIMEOUT_SCALE", "1"))  # 전체 배율 (0이면 타임아웃 없음)
+NODE_TIMEOUTS = {
+    "collect_pdf": 900,          # Upstage OCR (두꺼운 룰북은 수 분)
+    "collect_namuwiki": 120,     # Playwright 렌더링
+    "collect_youtube": 300,      # 검색 + 영상별 자막 시도
+    "collect_web": 180,          # Tavily advanced 검색
+    "playbook": 900,
+    "finalize_images": 60,
+    # 섹션 워커 (Send) - 섹션 1개 기준 (버킷 대기 포함)
+    "merge_section": 600,
+    "revise_section": 600,
+    "qa_section": 600,
+}
+# parse 노드의 소스 1개 파싱 타임아웃 (초, NODE_TIMEOUT_SCALE 적용). 넘은 소스만 빠지고 나머지로 계속 진행
+PARSE_SOURCE_TIMEOUTS = {
+    "pdf": 900,       # VLM (페이지 이미지 20장 + OCR 텍스트)
+    "default": 300,
+}
+# 섹션 워커가 일시적 LLM 오류(게이트웨이 재시도 소진 후)로 실패했을 때 그 섹션만 다시 실행하는 횟수
+SECTION_MAX_ATTEMPTS = int(os.getenv("GMJJ_SECTION_MAX_ATTEMPTS", "2"))
+
+# LangGraph 체크포인트 (agents/checkpoint): rule별로 슈퍼스텝마다 저장, 실패 시 --resume으로 이어서 실행
+AGENT_CHECKPOINT_PATH = os.getenv(
+    "GMJJ_AGENT_CHECKPOINT", str(PROJECT_ROOT / "data" / "cache" / "agent_checkpoints.sqlite3")
+)
+CHECKPOINT_INLINE_MAX = 2048  # 이보다 긴 문자열(소스 원문 등)은 해시 참조로 한 번만 저장
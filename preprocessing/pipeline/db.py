@@ -187,6 +187,87 @@ def skip_step(rule_id: int, step: str, reason: str = ""):
     }).eq("game_rule_id", rule_id).eq("step", step).execute()
 
 
+def get_step_fingerprint(rule_id: int, step: str) -> str | None:
+    """스텝이 마지막으로 끝났을 때의 입력 지문 (기록 없으면 None)"""
+    sb = get_client()
+    result = (
+        sb.table("rule_pipeline")
+        .select("input_fingerprint")
+        .eq("game_rule_id", rule_id)
+        .eq("step", step)
+        .execute()
+    )
+    if not result.data:
+        return None
+    return result.data[0].get("input_fingerprint")
+
+
+def set_step_fingerprint(rule_id: int, step: str, fingerprint: str):
+    """스텝 입력 지문 기록 (스텝 완료 후)"""
+    sb = get_client()
+    sb.table("rule_pipeline").update({
+        "input_fingerprint": fingerprint,
+    }).eq("game_rule_id", rule_id).eq("step", step).execute()
+
+
+# ============================================================
+# rule_artifacts: 단위 산출물 + 입력 지문 (증분 재계산)
+# ============================================================
+def get_artifacts(rule_id: int, stage: str) -> dict[str, dict]:
+    """
+    특정 rule의 스테이지 산출물 전체 조회
+
+    Returns:
+        {unit_key: {"fingerprint": "...", "output": ...}}
+    """
+    sb = get_client()
+    result = (
+        sb.table("rule_artifacts")
+        .select("unit_key, fingerprint, output")
+        .eq("game_rule_id", rule_id)
+        .eq("stage", stage)
+        .execute()
+    )
+    return {r["unit_key"]: r for r in result.data}
+
+
+def get_artifact(rule_id: int, stage: str, unit_key: str) -> dict | None:
+    """산출물 1건 조회 (없으면 None)"""
+    sb = get_client()
+    result = (
+        sb.table("rule_artifacts")
+        .select("unit_key, fingerprint, output")
+        .eq("game_rule_id", rule_id)
+        .eq("stage", stage)
+        .eq("unit_key", unit_key)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+def save_artifacts(rule_id: int, stage: str, artifacts: dict[str, tuple[str, object]]):
+    """
+    산출물 저장 (같은 rule/stage/unit_key면 덮어쓰기)
+
+    artifacts 형식: {unit_key: (지문, 산출물)}
+    """
+    if not artifacts:
+        return
+    sb = get_client()
+    rows = [
+        {
+            "game_rule_id": rule_id,
+            "stage": stage,
+            "unit_key": unit_key,
+            "fingerprint": fp,
+            "output": output,
+            "updated_at": _now(),
+        }
+        for unit_key, (fp, output) in artifacts.items()
+    ]
+    sb.table("rule_artifacts").upsert(rows, on_conflict="game_rule_id,stage,unit_key").execute()
+
+
 # ============================================================
 # game_playbooks 저장
 # ============================================================
@@ -0,0 +1,169 @@
+"""
+임베딩 파이프라인 (생산자 → 동시 임베딩 → 단일 writer)
+
+기존 배치 루프는 "문서 만들기 → 임베딩 API → collection.add"를 한 배치씩 차례로 돌아서
+임베딩 응답을 기다리는 동안 HNSW 삽입이, 삽입하는 동안 네트워크가 논다.
+세 단계를 겹쳐서 돌린다.
+
+    생산자 (호출 스레드) : 청크를 EMBEDDING_BATCH_SIZE개 / EMBEDDING_MAX_BATCH_TOKENS 단위로 묶어 제출
+    임베딩 워커 N개      : 캐시 경유 임베딩 (EMBEDDING_CONCURRENCY개 동시 요청)
+    writer 1개          : collection.upsert(embeddings=...) + 후처리(어휘 인덱스 등)
+
+ChromaDB 쓰기는 writer 한 곳에서만 하므로 순서/잠금 문제가 없다.
+처리 중인 배치 수는 EMBEDDING_QUEUE_DEPTH로 묶는다 (백프레셔):
+writer나 임베딩이 밀리면 생산자가 기다리고, 임베딩 결과가 메모리에 쌓이지 않는다.
+
+사용법:
+    from preprocessing.pipeline.embed_pipeline import run_embed_pipeline
+    stats = run_embed_pipeline(collection, chunks, label="game_rules")
+    print(stats.summary())
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable
+
+from preprocessing.pipeline.config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CONCURRENCY,
+    EMBEDDING_QUEUE_DEPTH,
+)
+from preprocessing.pipeline.embeddings import token_batches
+
+Chunk = tuple[str, str, dict]  # (id, document, metadata)
+
+_STOP = object()
+
+
+@dataclass
+class PipelineStats:
+    """파이프라인 처리량 지표"""
+
+    label: str
+    docs: int = 0
+    batches: int = 0
+    wall_s: float = 0.0
+    embed_s: float = 0.0    # 임베딩 워커 시간 합 (동시 실행분 포함)
+    write_s: float = 0.0    # writer 쓰기 시간 합
+    wait_s: float = 0.0     # 생산자가 백프레셔로 기다린 시간
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.docs / self.wall_s if self.wall_s else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "docs_per_sec": round(self.docs_per_sec, 1)}
+
+    def summary(self) -> str:
+        return (
+            f"[embed-pipeline] {self.label}: {self.docs}개 / {self.batches}배치, "
+            f"{self.wall_s:.1f}s ({self.docs_per_sec:.0f} docs/s) | "
+            f"임베딩 {self.embed_s:.1f}s, 쓰기 {self.write_s:.1f}s, 대기 {self.wait_s:.1f}s | "
+            f"캐시 적중 {self.cache_hits} / 신규 {self.cache_misses}"
+        )
+
+
+def run_embed_pipeline(
+    collection,
+    chunks: Iterable[Chunk],
+    label: str,
+    embed=None,
+    on_write: Callable[[list[str], list[str], list[dict]], None] | None = None,
+    progress: Callable[[int], None] | None = None,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    concurrency: int = EMBEDDING_CONCURRENCY,
+    queue_depth: int = EMBEDDING_QUEUE_DEPTH,
+) -> PipelineStats:
+    """
+    청크를 임베딩해서 컬렉션에 upsert
+
+    Args:
+        collection: ChromaDB 컬렉션 (writer 스레드에서만 쓴다)
+        chunks: (id, document, metadata) 이터러블. 제너레이터면 문서 생성도 겹쳐서 돈다
+        embed: 임베딩 함수 (기본: 캐시 경유 config 제공자)
+        on_write: 배치 쓰기 직후 writer 스레드에서 호출 (ids, documents, metadatas)
+        progress: 배치 쓰기마다 누적 문서 수로 호출
+    Returns:
+        PipelineStats
+    Raises:
+        임베딩/쓰기 중 첫 번째 예외 (남은 배치는 제출하지 않음)
+    """
+    if embed is None:
+        from preprocessing.pipeline.embedding_cache import get_cached_embedding_function
+        embed = get_cached_embedding_function()
+
+    stats = PipelineStats(label=label)
+    hits_before = getattr(embed, "hits", 0)
+    misses_before = getattr(embed, "misses", 0)
+    stats_lock = threading.Lock()
+    errors: list[BaseException] = []
+
+    # 제출~쓰기 완료까지 처리 중인 배치 수 상한
+    slots = threading.BoundedSemaphore(max(queue_depth, concurrency))
+    finished: queue.Queue = queue.Queue()
+
+    def embed_batch(batch: list[Chunk]):
+        t0 = time.perf_counter()
+        vectors = embed([c[1] for c in batch])
+        with stats_lock:
+            stats.embed_s += time.perf_counter() - t0
+        return batch, vectors
+
+    def writer():
+        while True:
+            future = finished.get()
+            if future is _STOP:
+                return
+            try:
+                if errors:
+                    continue  # 실패 후 남은 배치는 버림
+                batch, vectors = future.result()
+                ids = [c[0] for c in batch]
+                documents = [c[1] for c in batch]
+                metadatas = [c[2] for c in batch]
+                t0 = time.perf_counter()
+                collection.upsert(
+                    ids=ids, documents=documents, metadatas=metadatas, embeddings=vectors
+                )
+                if on_write:
+                    on_write(ids, documents, metadatas)
+                stats.write_s += time.perf_counter() - t0
+                stats.docs += len(batch)
+                stats.batches += 1
+                if progress:
+                    progress(stats.docs)
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                slots.release()
+
+    start = time.perf_counter()
+    writer_thread = threading.Thread(target=writer, name=f"embed-writer-{label}", daemon=True)
+    writer_thread.start()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed") as pool:
+        for batch in token_batches(chunks, text_of=lambda c: c[1], max_items=batch_size):
+            t0 = time.perf_counter()
+            slots.acquire()
+            stats.wait_s += time.perf_counter() - t0
+            if errors:
+                slots.release()
+                break
+            future: Future = pool.submit(embed_batch, batch)
+            future.add_done_callback(finished.put)
+
+    finished.put(_STOP)
+    writer_thread.join()
+
+    stats.wall_s = time.perf_counter() - start
+    stats.cache_hits = getattr(embed, "hits", 0) - hits_before
+    stats.cache_misses = getattr(embed, "misses", 0) - misses_before
+
+    if errors:
+        raise errors[0]
+    return stats
@@ -0,0 +1,280 @@
+"""
+임베딩 캐시 (content-hash 기반 로컬 저장소)
+
+벡터화 경로(step6 process_vectorize, vectorize_node, load_to_chroma_v2,
+fetch_bgg_api)는 매번 모든 문서를 처음부터 임베딩한다.
+문서 텍스트가 대부분 그대로여도 API를 다시 호출하므로,
+sha256(모델, 차원, 텍스트)를 키로 float32 벡터를 SQLite에 보관하고
+임베딩 제공자 앞단에서 재사용한다. ChromaDB에는 embeddings=로 직접 넘긴다.
+
+사용법:
+    from preprocessing.pipeline.embedding_cache import get_cached_embedding_function
+    embed = get_cached_embedding_function()
+    collection.add(ids=ids, documents=docs, metadatas=metas, embeddings=embed(docs))
+
+    uv run python -m preprocessing.pipeline.embedding_cache --stats
+    uv run python -m preprocessing.pipeline.embedding_cache --compact --older-than 90
+    uv run python -m preprocessing.pipeline.embedding_cache --compact --drop-other-models
+"""
+
+import argparse
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from preprocessing.pipeline.config import EMBEDDING_CACHE_PATH, EMBEDDING_DIMENSIONS
+from preprocessing.pipeline.embeddings import embedding_model_id, get_embedding_function, token_batches
+
+# SQLite IN (...) 파라미터 한도 대비 조회 단위
+_LOOKUP_CHUNK = 500
+
+
+def content_key(model_id: str, dimensions: int | None, text: str) -> bytes:
+    """캐시 키: sha256(모델, 차원, 텍스트)"""
+    h = hashlib.sha256()
+    h.update(model_id.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(str(dimensions or "").encode("ascii"))
+    h.update(b"\x00")
+    h.update(text.encode("utf-8"))
+    return h.digest()
+
+
+# ============================================================
+# 저장소
+# ============================================================
+class EmbeddingStore:
+    """SQLite(WAL) 임베딩 저장소 - 키 → float32 벡터"""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key        BLOB PRIMARY KEY,
+                model      TEXT NOT NULL,
+                dims       INTEGER NOT NULL,
+                vector     BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_used  REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn().commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        """키 목록 조회 (있는 것만 반환) + 사용 시각 갱신"""
+        conn = self._conn()
+        found: dict[bytes, np.ndarray] = {}
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            batch = keys[i:i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(batch))
+            for key, vector in conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch
+            ):
+                found[key] = np.frombuffer(vector, dtype=np.float32)
+        if found:
+            now = time.time()
+            with conn:
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+        return found
+
+    def put_many(self, model_id: str, items: list[tuple[bytes, np.ndarray]]):
+        """벡터 저장 (같은 키면 교체)"""
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dims, vector, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (key, model_id, len(vec), np.asarray(vec, dtype=np.float32).tobytes(), now, now)
+                    for key, vec in items
+                ],
+            )
+
+    def stats(self) -> list[dict]:
+        """모델별 저장 현황"""
+        rows = self._conn().execute(
+            "SELECT model, dims, COUNT(*), SUM(LENGTH(vector)), MIN(last_used) "
+            "FROM embeddings GROUP BY model, dims ORDER BY model"
+        ).fetchall()
+        return [
+            {"model": m, "dims": d, "entries": n, "bytes": b, "oldest_used": lu}
+            for m, d, n, b, lu in rows
+        ]
+
+    def compact(self, keep_models: list[str] | None = None, older_than_days: float | None = None) -> int:
+        """
+        오래된/안 쓰는 모델의 벡터 삭제 후 VACUUM
+
+        Args:
+            keep_models: 지정하면 이 모델들 외의 벡터 삭제
+            older_than_days: 지정하면 이 기간 동안 안 쓴 벡터 삭제
+        Returns:
+            삭제된 벡터 수
+        """
+        conn = self._conn()
+        removed = 0
+        with conn:
+            if keep_models:
+                marks = ",".join("?" * len(keep_models))
+                removed += conn.execute(
+                    f"DELETE FROM embeddings WHERE model NOT IN ({marks})", keep_models
+                ).rowcount
+            if older_than_days:
+                cutoff = time.time() - older_than_days * 86400
+                removed += conn.execute(
+                    "DELETE FROM embeddings WHERE last_used < ?", (cutoff,)
+                ).rowcount
+        conn.execute("VACUUM")
+        return removed
+
+    def file_bytes(self) -> int:
+        return sum(
+            p.stat().st_size
+            for p in Path(self.path).parent.glob(Path(self.path).name + "*")
+            if p.is_file()
+        )
+
+
+# ============================================================
+# 캐시 래퍼
+# ============================================================
+class CachedEmbeddingFunction:
+    """
+    임베딩 제공자 앞단 캐시
+
+    캐시에 없는 텍스트만 요청 단위(embeddings.token_batches - 입력 수 / 추정 토큰 한도)로 제공자에 보내고,
+    결과는 입력 순서대로 돌려준다. 같은 배치 안의 중복 텍스트도 1번만 임베딩한다.
+    """
+
+    def __init__(self, inner, model_id: str, dimensions: int | None, store: EmbeddingStore):
+        self.inner = inner
+        self.model_id = model_id
+        self.dimensions = dimensions
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()  # embed_pipeline 워커가 동시에 호출
+
+    def __call__(self, input: list[str]) -> list[np.ndarray]:
+        keys = [content_key(self.model_id, self.dimensions, text) for text in input]
+        found = self.store.get_many(list(dict.fromkeys(keys)))
+
+        # 캐시에 없는 텍스트 (중복 제거, 입력 순서 유지)
+        missing: dict[bytes, str] = {}
+        for key, text in zip(keys, input):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        hit_count = sum(1 for key in keys if key in found)
+        with self._stats_lock:
+            self.hits += hit_count
+            self.misses += len(keys) - hit_count
+
+        for batch in token_batches(missing.items(), text_of=lambda item: item[1]):
+            vectors = self.inner([text for _, text in batch])
+            new = [(key, np.asarray(vec, dtype=np.float32)) for (key, _), vec in zip(batch, vectors)]
+            self.store.put_many(self.model_id, new)
+            found.update(new)
+
+        return [found[key] for key in keys]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "model": self.model_id,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+_store: EmbeddingStore | None = None
+_cached: dict[str, CachedEmbeddingFunction] = {}
+_lock = threading.Lock()
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """임베딩 저장소 반환 (싱글톤)"""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = EmbeddingStore()
+    return _store
+
+
+def get_cached_embedding_function(
+    provider: str | None = None, dimensions: int | None = None
+) -> CachedEmbeddingFunction:
+    """config 제공자(또는 지정 제공자/차원) 임베딩 + 캐시 (임베딩 공간별 싱글톤)"""
+    dimensions = dimensions or EMBEDDING_DIMENSIONS
+    model_id = embedding_model_id(provider, dimensions=dimensions)
+    cached = _cached.get(model_id)
+    if cached is None:
+        store = get_embedding_store()
+        with _lock:
+            cached = _cached.get(model_id)
+            if cached is None:
+                cached = CachedEmbeddingFunction(
+                    get_embedding_function(provider, dimensions=dimensions),
+                    model_id, dimensions, store,
+                )
+                _cached[model_id] = cached
+    return cached
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 캐시 관리")
+    parser.add_argument("--stats", action="store_true", help="모델별 저장 현황")
+    parser.add_argument("--compact", action="store_true", help="정리 후 VACUUM")
+    parser.add_argument("--older-than", type=float, help="N일 동안 안 쓴 벡터 삭제 (--compact와 함께)")
+    parser.add_argument("--drop-other-models", action="store_true",
+                        help="현재 설정 모델 외의 벡터 삭제 (--compact와 함께)")
+    args = parser.parse_args()
+
+    store = get_embedding_store()
+
+    if args.compact:
+        before = store.file_bytes()
+        removed = store.compact(
+            keep_models=[embedding_model_id()] if args.drop_other_models else None,
+            older_than_days=args.older_than,
+        )
+        after = store.file_bytes()
+        print(f"  [embedding-cache] {removed}개 삭제, "
+              f"{before / 1024 / 1024:.1f}MB → {after / 1024 / 1024:.1f}MB")
+
+    if args.stats or not args.compact:
+        print(f"  [embedding-cache] {store.path}")
+        for row in store.stats():
+            print(f"    {row['model']} (dims={row['dims']}): {row['entries']}개, "
+                  f"{row['bytes'] / 1024 / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
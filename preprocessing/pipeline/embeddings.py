@@ -0,0 +1,222 @@
+"""
+임베딩 제공자 레지스트리
+
+ChromaDB 색인/검색에 쓰는 임베딩 함수를 한곳에서 만든다.
+설정은 config.py (EMBEDDING_PROVIDER / EMBEDDING_MODEL / EMBEDDING_DIMENSIONS /
+EMBEDDING_BATCH_SIZE / EMBEDDING_MAX_BATCH_TOKENS)에서 읽는다.
+
+제공자:
+- openai: OpenAI 임베딩 API (운영 기본값)
+          요청을 입력 수 / 추정 토큰 한도로 나누고, LLM 게이트웨이와 같은
+          RPM/TPM 버킷 + 429 재시도를 거친다.
+- local:  문자 n-gram 해싱 투영 (NumPy, 네트워크 불필요)
+          의미 유사도는 없지만 결정적이고 빠르므로
+          CI / 부하 테스트에서 실제 크기 컬렉션을 만들고 검색하는 데 쓴다.
+
+사용법:
+    from preprocessing.pipeline.embeddings import get_embedding_function
+    ef = get_embedding_function()            # config 기본값
+    ef = get_embedding_function("local")     # 로컬 해싱
+"""
+
+import os
+import time
+import zlib
+from typing import Callable, Iterable, Iterator, TypeVar
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions import (
+    OpenAIEmbeddingFunction,
+    register_embedding_function,
+)
+
+from preprocessing.pipeline.config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_DIMENSIONS,
+    EMBEDDING_MAX_BATCH_TOKENS,
+    EMBEDDING_MODEL,
+    EMBEDDING_PROVIDER,
+    LOCAL_EMBEDDING_DIMENSIONS,
+)
+from preprocessing.pipeline.llm_gateway import backoff_delay
+from preprocessing.pipeline.rate_limit import estimate_text_tokens, get_rate_limiter
+
+T = TypeVar("T")
+
+
+# ============================================================
+# 요청 배치 분할
+# ============================================================
+def token_batches(
+    items: Iterable[T],
+    text_of: Callable[[T], str] = lambda item: item,
+    max_items: int = EMBEDDING_BATCH_SIZE,
+    max_tokens: int = EMBEDDING_MAX_BATCH_TOKENS,
+) -> Iterator[list[T]]:
+    """
+    임베딩 요청 단위로 묶기 - 입력 수(max_items)와 추정 토큰(max_tokens) 중 먼저 차는 쪽에서 자른다
+
+    한 건이 max_tokens를 넘으면 그 한 건만 따로 보낸다.
+    """
+    batch: list[T] = []
+    tokens = 0
+    for item in items:
+        cost = estimate_text_tokens(text_of(item))
+        if batch and (len(batch) >= max_items or tokens + cost > max_tokens):
+            yield batch
+            batch, tokens = [], 0
+        batch.append(item)
+        tokens += cost
+    if batch:
+        yield batch
+
+
+# ============================================================
+# 로컬 해싱 임베딩
+# ============================================================
+@register_embedding_function
+class HashingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    문자 n-gram 해싱 임베딩 (signed feature hashing + L2 정규화)
+
+    토큰화는 어휘 인덱스(lexical_index)와 같은 규칙을 쓴다.
+    같은 입력이면 언제나 같은 벡터가 나온다.
+    """
+
+    def __init__(self, dimensions: int = LOCAL_EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def __call__(self, input: Documents) -> Embeddings:
+        from preprocessing.pipeline.lexical_index import tokenize
+
+        vectors = np.zeros((len(input), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(input):
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            hashes = np.fromiter(
+                (zlib.crc32(t.encode("utf-8")) for t in tokens),
+                dtype=np.uint32,
+                count=len(tokens),
+            )
+            signs = np.where((hashes >> 16) & 1, 1.0, -1.0).astype(np.float32)
+            vectors[row] = np.bincount(
+                hashes % self.dimensions, weights=signs, minlength=self.dimensions
+            )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        return list(vectors)
+
+    @staticmethod
+    def name() -> str:
+        return "gmjj-hashing"
+
+    def default_space(self) -> str:
+        return "cosine"
+
+    def get_config(self) -> dict:
+        return {"dimensions": self.dimensions}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "HashingEmbeddingFunction":
+        return HashingEmbeddingFunction(dimensions=config["dimensions"])
+
+
+# ============================================================
+# OpenAI 임베딩 (속도 제한 + 재시도)
+# ============================================================
+class RateLimitedOpenAIEmbeddingFunction(OpenAIEmbeddingFunction):
+    """
+    OpenAI 임베딩 - token_batches 단위 요청 + 모델별 RPM/TPM 버킷 + 일시적 오류 재시도
+
+    재시도 규칙(retry-after, full jitter 백오프, 429면 버킷 일시정지)은 llm_gateway와 같다.
+    name()은 "openai" 그대로라 컬렉션 설정에는 chromadb 기본 OpenAI 임베딩 함수로 저장된다.
+    """
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors: Embeddings = []
+        for batch in token_batches(input):
+            vectors.extend(self._embed_batch(batch))
+        return vectors
+
+    def _embed_batch(self, batch: list[str]) -> Embeddings:
+        limiter = get_rate_limiter(self.model_name)
+        estimate = sum(estimate_text_tokens(text) for text in batch)
+        attempt = 0
+        while True:
+            attempt += 1
+            reserved = limiter.acquire(estimate)
+            try:
+                # chromadb 함수는 usage를 돌려주지 않으므로 성공하면 추정치를 그대로 사용량으로 둔다
+                return OpenAIEmbeddingFunction.__call__(self, batch)
+            except Exception as e:
+                limiter.settle(reserved, 0)
+                delay = backoff_delay(self.model_name, attempt, e)
+                if delay is None:
+                    raise
+                print(f"  [embed] {self.model_name} {type(e).__name__}, "
+                      f"{delay:.1f}s 후 재시도 ({attempt}번째 실패, {len(batch)}건)")
+                time.sleep(delay)
+
+
+# ============================================================
+# 제공자 레지스트리
+# ============================================================
+def _openai_provider(model: str, dimensions: int | None) -> EmbeddingFunction:
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY가 .env에 없습니다.")
+    return RateLimitedOpenAIEmbeddingFunction(
+        api_key=api_key,
+        model_name=model,
+        dimensions=dimensions,
+    )
+
+
+def _local_provider(model: str, dimensions: int | None) -> EmbeddingFunction:
+    return HashingEmbeddingFunction(dimensions=dimensions or LOCAL_EMBEDDING_DIMENSIONS)
+
+
+EMBEDDING_PROVIDERS = {
+    "openai": _openai_provider,
+    "local": _local_provider,
+}
+
+
+def register_provider(name: str, factory):
+    """제공자 추가 (factory(model, dimensions) → EmbeddingFunction)"""
+    EMBEDDING_PROVIDERS[name] = factory
+
+
+def get_embedding_function(
+    provider: str | None = None,
+    model: str | None = None,
+    dimensions: int | None = None,
+) -> EmbeddingFunction:
+    """설정된 제공자의 임베딩 함수 생성 (인자 생략 시 config 기본값)"""
+    provider = provider or EMBEDDING_PROVIDER
+    if provider not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"알 수 없는 임베딩 제공자: {provider}")
+    return EMBEDDING_PROVIDERS[provider](
+        model or EMBEDDING_MODEL,
+        dimensions or EMBEDDING_DIMENSIONS,
+    )
+
+
+def embedding_model_id(
+    provider: str | None = None,
+    model: str | None = None,
+    dimensions: int | None = None,
+) -> str:
+    """
+    임베딩 공간 식별자 (캐시 키 / 리포트용)
+
+    제공자·모델·차원 중 하나라도 다르면 벡터를 섞어 쓰면 안 되므로 모두 포함한다.
+    """
+    provider = provider or EMBEDDING_PROVIDER
+    dimensions = dimensions or EMBEDDING_DIMENSIONS
+    if provider == "local":
+        return f"local-hashing-{dimensions or LOCAL_EMBEDDING_DIMENSIONS}"
+    model = model or EMBEDDING_MODEL
+    return f"{model}@{dimensions}" if dimensions else model
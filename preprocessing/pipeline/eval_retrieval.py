@@ -0,0 +1,496 @@
+"""
+룰 검색 오프라인 평가 (recall@k / MRR / 지연시간)
+
+청킹/임베딩/검색 방식을 바꿨을 때 좋아졌는지 확인하기 위한 하네스.
+파이프라인이 만든 QA 쌍(extra_sections.qa_pairs, section 포함)의 질문을
+search_chromadb에 그대로 다시 던져서 정답 청크를 찾는지 측정한다.
+
+정답 기준 (질문이 속한 게임 + section 안에서):
+- section 청크: 같은 section의 섹션 청크
+- qa 청크: 같은 section의 다른 QA 청크
+- all: 둘 중 하나
+
+질문을 뽑은 QA 청크 자체는 "Q: <질문>"을 그대로 담고 있어 항상 1등으로 잡힌다 (자기 검색).
+recall/MRR이 부풀려지지 않게 검색 결과에서 그 청크를 빼고 순위를 매긴다.
+section이 없는 질문은 정답 청크가 정해지지 않으므로 평가에서 뺀다.
+
+기본값은 네트워크 없이 돌아가도록
+임시 디렉토리에 인덱스를 새로 만들고 로컬 해싱 임베딩을 쓴다.
+
+사용법:
+    uv run python -m preprocessing.pipeline.eval_retrieval                        # 로컬 ChromaDB 청크 + 해싱 임베딩
+    uv run python -m preprocessing.pipeline.eval_retrieval --source supabase      # Supabase game_rules에서 청크 생성
+    uv run python -m preprocessing.pipeline.eval_retrieval --embedding openai     # 실제 임베딩 모델
+    uv run python -m preprocessing.pipeline.eval_retrieval --mode all --output eval.json
+    uv run python -m preprocessing.pipeline.eval_retrieval --compare eval.json    # 이전 결과와 비교
+
+    # 임베딩 차원 × 양자화 미러 조합 비교 (품질 / 지연시간 / RSS / 인덱스 크기)
+    uv run python -m preprocessing.pipeline.eval_retrieval --mode vector --dims 1536 512 256 --quantize none int8
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from preprocessing.pipeline.config import BATCH_SIZE, GAME_VECTOR_INDEX
+from preprocessing.pipeline.embedding_cache import get_cached_embedding_function
+from preprocessing.pipeline.embeddings import (
+    EMBEDDING_PROVIDERS,
+    embedding_model_id,
+    get_embedding_function,
+)
+
+# ============================================================
+# 평가 설정
+# ============================================================
+DEFAULT_K = (1, 3, 5, 10)
+TARGET_CHUNK_TYPES = ("section", "qa", "all")
+QUANTIZE_CHOICES = ("none", "float16", "int8")
+
+_QUESTION_RE = re.compile(r"^Q:\s*(.+)$", re.MULTILINE)
+
+
+# ============================================================
+# 평가 데이터 (청크 + 질문)
+# ============================================================
+def load_chunks_from_chroma() -> list[tuple[str, str, dict]]:
+    """로컬 ChromaDB game_rules 컬렉션의 청크 (네트워크 불필요)"""
+    from preprocessing.pipeline.chroma_store import get_collection
+
+    col = get_collection("game_rules")
+    chunks = []
+    total = col.count()
+    for offset in range(0, total, 1000):
+        batch = col.get(limit=1000, offset=offset, include=["documents", "metadatas"])
+        chunks.extend(zip(batch["ids"], batch["documents"], batch["metadatas"]))
+    return chunks
+
+
+def load_chunks_from_supabase() -> list[tuple[str, str, dict]]:
+    """Supabase game_rules에서 step6과 같은 방식으로 청크 생성"""
+    from preprocessing.pipeline import db
+    from preprocessing.pipeline.step6_vectorize import build_qa_chunks, build_section_chunks
+
+    sb = db.get_client()
+    chunks = []
+    for rule in db.get_all_rules():
+        qa_pairs = (rule.get("extra_sections") or {}).get("qa_pairs", [])
+        if not qa_pairs:
+            continue
+        game_id = rule["game_id"]
+        game = sb.table("games").select("name_ko").eq("id", game_id).execute()
+        game_name = game.data[0]["name_ko"] if game.data else f"game_{game_id}"
+        chunks.extend(build_section_chunks(game_id, game_name, rule))
+        chunks.extend(build_qa_chunks(game_id, game_name, qa_pairs))
+    return chunks
+
+
+def build_questions(chunks: list[tuple[str, str, dict]]) -> list[dict]:
+    """QA 청크에서 질문 + 정답 기준 추출 (section이 없는 질문은 제외)"""
+    questions = []
+    for chunk_id, document, meta in chunks:
+        if meta.get("chunk_type") != "qa" or not meta.get("section"):
+            continue
+        match = _QUESTION_RE.search(document)
+        if not match:
+            continue
+        questions.append({
+            "question": match.group(1).strip(),
+            "game_id": meta.get("game_id"),
+            "game_name": meta.get("game_name", ""),
+            "section": meta["section"],
+            "qa_chunk_id": chunk_id,
+        })
+    return questions
+
+
+# ============================================================
+# 임시 인덱스
+# ============================================================
+def build_eval_index(chunks, embedding_function, index_dir: str):
+    """임시 디렉토리에 ChromaDB 컬렉션 + 어휘 인덱스 생성"""
+    import chromadb
+
+    from preprocessing.pipeline.lexical_index import LexicalIndex
+
+    client = chromadb.PersistentClient(path=index_dir)
+    col = client.create_collection("game_rules", metadata={"hnsw:space": "cosine"})
+    lexical = LexicalIndex(str(Path(index_dir) / "lexical_game_rules.sqlite3"))
+
+    start = time.perf_counter()
+    for i in range(0, len(chunks), BATCH_SIZE):
+        batch = chunks[i:i + BATCH_SIZE]
+        ids = [c[0] for c in batch]
+        documents = [c[1] for c in batch]
+        metadatas = [c[2] for c in batch]
+        col.add(
+            ids=ids,
+            documents=documents,
+            metadatas=metadatas,
+            embeddings=embedding_function(documents),
+        )
+        lexical.upsert(ids, documents, metadatas)
+        print(f"\r  [eval] 색인 {min(i + BATCH_SIZE, len(chunks))}/{len(chunks)}", end="", flush=True)
+    print()
+    return col, lexical, round(time.perf_counter() - start, 2)
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def _rss_bytes() -> int:
+    """현재 프로세스 RSS (리눅스 /proc, 그 외에는 최대 RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# ============================================================
+# 지표 계산
+# ============================================================
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _is_relevant(result, q: dict, target: str) -> bool:
+    """같은 게임 + 같은 section 청크면 정답 (질문 자신의 QA 청크는 evaluate_mode에서 이미 제외)"""
+    if result.game_name != q["game_name"] or result.section != q["section"]:
+        return False
+    if target == "all":
+        return result.chunk_type in ("section", "qa")
+    return result.chunk_type == target
+
+
+class _Bucket:
+    """recall@k / MRR 누적"""
+
+    def __init__(self, ks):
+        self.ks = ks
+        self.n = 0
+        self.hits = {k: 0 for k in ks}
+        self.rr = 0.0
+
+    def add(self, rank: int | None):
+        self.n += 1
+        if rank is None:
+            return
+        for k in self.ks:
+            if rank <= k:
+                self.hits[k] += 1
+        self.rr += 1 / rank
+
+    def to_dict(self) -> dict:
+        if self.n == 0:
+            return {"n": 0}
+        out = {"n": self.n}
+        for k in self.ks:
+            out[f"recall@{k}"] = round(self.hits[k] / self.n, 4)
+        out["mrr"] = round(self.rr / self.n, 4)
+        return out
+
+
+def evaluate_mode(questions: list[dict], mode: str, ks, per_game: bool) -> dict:
+    """검색 방식 1개 평가"""
+    from web.admin.search_service import search_chromadb
+
+    top_k = max(ks)
+    overall = {t: _Bucket(ks) for t in TARGET_CHUNK_TYPES}
+    by_section: dict[str, _Bucket] = defaultdict(lambda: _Bucket(ks))
+    latencies: list[float] = []
+    stages: dict[str, list[float]] = defaultdict(list)
+
+    for i, q in enumerate(questions, 1):
+        for target in TARGET_CHUNK_TYPES:
+            timings = {}
+            start = time.perf_counter()
+            # 자기 QA 청크를 빼도 top_k개가 남도록 1개 더 받는다
+            results = search_chromadb(
+                q["question"],
+                n_results=top_k + 1,
+                chunk_type=None if target == "all" else target,
+                game_id=q["game_id"] if per_game else None,
+                timings=timings,
+                mode=mode,
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            for stage in ("embed_ms", "ann_ms", "rerank_ms", "lexical_ms", "post_ms"):
+                if stage in timings:
+                    stages[stage].append(timings[stage])
+
+            results = [res for res in results if res.chunk_id != q["qa_chunk_id"]][:top_k]
+            rank = next(
+                (r for r, res in enumerate(results, 1) if _is_relevant(res, q, target)),
+                None,
+            )
+            overall[target].add(rank)
+            if target == "all":
+                by_section[q["section"]].add(rank)
+
+        if i % 20 == 0 or i == len(questions):
+            print(f"\r  [eval] {mode}: {i}/{len(questions)}", end="", flush=True)
+    print()
+
+    return {
+        "by_chunk_type": {t: b.to_dict() for t, b in overall.items()},
+        "by_section": {s: b.to_dict() for s, b in sorted(by_section.items())},
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 2),
+            "p95": round(_percentile(latencies, 95), 2),
+            "p99": round(_percentile(latencies, 99), 2),
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "queries": len(latencies),
+        },
+        "stages_ms": {
+            stage: round(sum(v) / len(v), 3) for stage, v in stages.items() if v
+        },
+    }
+
+
+# ============================================================
+# 출력 / 비교
+# ============================================================
+def print_report(report: dict):
+    ks = report["config"]["k"]
+    idx = report["index"]
+    print(f"\n  인덱스: 청크 {idx['chunks']}개 (section {idx['section_chunks']} / qa {idx['qa_chunks']}), "
+          f"{idx['bytes'] / 1024 / 1024:.1f}MB, 색인 {idx['build_seconds']}s")
+    print(f"  질문: {report['config']['questions']}개, 임베딩: {report['config']['embedding']}"
+          f" ({idx.get('dims', '?')}차원, 미러: {report['config'].get('quantize', 'none')})")
+    mem = report.get("memory")
+    if mem:
+        print(f"  메모리: RSS {mem['rss_mb']}MB (이 설정에서 +{mem['rss_delta_mb']}MB), "
+              f"float32 벡터 {mem['vectors_mb']}MB, 미러 {mem['mirror_mb']}MB")
+
+    for mode, result in report["modes"].items():
+        lat = result["latency_ms"]
+        print(f"\n  == {mode} == p50 {lat['p50']}ms / p95 {lat['p95']}ms / p99 {lat['p99']}ms")
+        header = "  " + f"{'대상':<18}{'n':>6}" + "".join(f"{'R@' + str(k):>8}" for k in ks) + f"{'MRR':>8}"
+        print(header)
+        rows = [(f"[{t}]", m) for t, m in result["by_chunk_type"].items()]
+        rows += [(s, m) for s, m in result["by_section"].items()]
+        for name, m in rows:
+            if not m.get("n"):
+                continue
+            line = f"  {name:<18}{m['n']:>6}"
+            line += "".join(f"{m[f'recall@{k}']:>8.3f}" for k in ks)
+            line += f"{m['mrr']:>8.3f}"
+            print(line)
+
+
+def setting_label(report: dict) -> str:
+    cfg = report["config"]
+    return f"{cfg['embedding']}/{cfg.get('quantize', 'none')}"
+
+
+def print_settings_table(reports: list[dict]):
+    """설정(차원 × 양자화)별 품질 / 지연시간 / 메모리 한눈에 비교"""
+    k = max(reports[0]["config"]["k"])
+    print(f"\n  == 설정 비교 ==")
+    print(f"  {'설정':<34}{'모드':<8}{'R@' + str(k):>8}{'MRR':>8}{'p50':>9}{'p95':>9}"
+          f"{'RSS':>9}{'인덱스':>9}{'미러':>8}")
+    for report in reports:
+        mem = report.get("memory", {})
+        for mode, result in report["modes"].items():
+            m = result["by_chunk_type"]["all"]
+            lat = result["latency_ms"]
+            print(f"  {setting_label(report):<34}{mode:<8}"
+                  f"{m.get(f'recall@{k}', 0):>8.3f}{m.get('mrr', 0):>8.3f}"
+                  f"{lat['p50']:>7.1f}ms{lat['p95']:>7.1f}ms"
+                  f"{mem.get('rss_mb', 0):>7.0f}MB"
+                  f"{report['index']['bytes'] / 1024 / 1024:>7.1f}MB"
+                  f"{mem.get('mirror_mb', 0):>6.1f}MB")
+
+
+def print_comparison(report: dict, baseline: dict):
+    """이전 결과 대비 변화량 (recall@k / MRR / 지연시간)"""
+    print(f"\n  == 비교: {baseline.get('created_at', '?')} 대비 ==")
+    for mode, result in report["modes"].items():
+        base = baseline.get("modes", {}).get(mode)
+        if not base:
+            print(f"  {mode}: 기준 결과 없음")
+            continue
+        parts = []
+        for target, m in result["by_chunk_type"].items():
+            b = base["by_chunk_type"].get(target, {})
+            if not m.get("n") or not b.get("n"):
+                continue
+            for key in (f"recall@{max(report['config']['k'])}", "mrr"):
+                if key in b:
+                    parts.append(f"{target}.{key} {m[key] - b[key]:+.3f}")
+        for p in ("p50", "p95", "p99"):
+            parts.append(f"{p} {result['latency_ms'][p] - base['latency_ms'][p]:+.1f}ms")
+        print(f"  {mode}: " + ", ".join(parts))
+
+
+# ============================================================
+# 메인
+# ============================================================
+def load_eval_data(source: str, limit: int = 0) -> tuple[list, list[dict]]:
+    """평가 청크 + 질문"""
+    chunks = load_chunks_from_chroma() if source == "chroma" else load_chunks_from_supabase()
+    questions = build_questions(chunks)
+    if limit:
+        questions = questions[:limit]
+    if not questions:
+        raise RuntimeError("평가할 QA 질문이 없습니다. (qa 청크 없음)")
+    return chunks, questions
+
+
+def run_eval(source: str, embedding: str, modes: list[str], ks, per_game: bool,
+             limit: int = 0, dims: int | None = None, quantize: str = "none",
+             data: tuple[list, list[dict]] | None = None) -> dict:
+    """
+    설정 1개(임베딩 제공자 × 차원 × 양자화 미러) 평가
+
+    RSS는 같은 프로세스에서 설정을 차례로 돌리므로 이전 설정의 잔여분이 섞인다.
+    설정 간 비교는 rss_delta_mb(이 설정 동안 늘어난 양)와 벡터/미러 크기를 함께 본다.
+    """
+    from preprocessing.pipeline.lexical_index import set_lexical_index
+    from preprocessing.pipeline.quantized_index import QuantizedMirror
+    from web.admin import search_service
+
+    chunks, questions = data or load_eval_data(source, limit)
+
+    gc.collect()
+    rss_before = _rss_bytes()
+
+    ef = get_embedding_function(embedding, dimensions=dims)
+    model_id = embedding_model_id(embedding, dimensions=dims)
+    index_dir = tempfile.mkdtemp(prefix="gmjj_eval_")
+    try:
+        # 문서 임베딩은 캐시 경유 (반복 평가 시 API 재호출 없음), 쿼리는 매번 계산
+        col, lexical, build_seconds = build_eval_index(
+            chunks, get_cached_embedding_function(embedding, dimensions=dims), index_dir
+        )
+        index_bytes = _dir_bytes(index_dir)
+        sample = col.get(limit=1, include=["embeddings"])["embeddings"]
+        actual_dims = len(sample[0]) if len(sample) else 0
+
+        mirror = None
+        if quantize != "none":
+            mirror = QuantizedMirror.build(
+                col, QuantizedMirror.base_path(str(Path(index_dir) / "mirror"), "game_rules", quantize),
+                quantize,
+            )
+        # 양자화 미러를 잴 때는 게임별 정확 인덱스가 게임 필터 검색을 가로채지 않게 끈다
+        search_service.override_backend(col, ef, model_id, cache_queries=False, mirror=mirror,
+                                        game_index=GAME_VECTOR_INDEX and mirror is None)
+        set_lexical_index(lexical)
+
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "config": {
+                "source": source,
+                "embedding": model_id,
+                "quantize": quantize,
+                "k": list(ks),
+                "per_game": per_game,
+                "questions": len(questions),
+            },
+            "index": {
+                "chunks": len(chunks),
+                "section_chunks": sum(1 for c in chunks if c[2].get("chunk_type") == "section"),
+                "qa_chunks": sum(1 for c in chunks if c[2].get("chunk_type") == "qa"),
+                "dims": actual_dims,
+                "bytes": index_bytes,
+                "build_seconds": build_seconds,
+            },
+            "modes": {mode: evaluate_mode(questions, mode, ks, per_game) for mode in modes},
+        }
+        rss_after = _rss_bytes()
+        report["memory"] = {
+            "rss_mb": round(rss_after / 1024 / 1024, 1),
+            "rss_delta_mb": round(max(0, rss_after - rss_before) / 1024 / 1024, 1),
+            "vectors_mb": round(len(chunks) * actual_dims * 4 / 1024 / 1024, 2),
+            "mirror_mb": round(mirror.nbytes() / 1024 / 1024, 2) if mirror else 0.0,
+        }
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+    return report
+
+
+def main():
+    from web.admin.search_service import SEARCH_MODES
+
+    parser = argparse.ArgumentParser(description="룰 검색 오프라인 평가")
+    parser.add_argument("--source", choices=["chroma", "supabase"], default="chroma",
+                        help="청크/질문 출처 (기본: 로컬 ChromaDB)")
+    parser.add_argument("--embedding", choices=list(EMBEDDING_PROVIDERS), default="local",
+                        help="임베딩 제공자 (기본: 로컬 해싱, 네트워크 불필요)")
+    parser.add_argument("--dims", type=int, nargs="+", default=[0],
+                        help="임베딩 차원 (여러 개면 차원별 비교, 0 = 설정 기본값)")
+    parser.add_argument("--quantize", choices=QUANTIZE_CHOICES, nargs="+", default=["none"],
+                        help="양자화 미러 (여러 개면 조합별 비교)")
+    parser.add_argument("--mode", choices=[*SEARCH_MODES, "all"], default="all")
+    parser.add_argument("--k", type=int, nargs="+", default=list(DEFAULT_K))
+    parser.add_argument("--global-search", action="store_true",
+                        help="게임 필터 없이 전체 청크에서 검색")
+    parser.add_argument("--limit", type=int, default=0, help="질문 수 제한")
+    parser.add_argument("--output", type=str, help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", type=str, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    modes = list(SEARCH_MODES) if args.mode == "all" else [args.mode]
+    data = load_eval_data(args.source, args.limit)
+    reports = []
+    for dims in args.dims:
+        for quantize in args.quantize:
+            report = run_eval(
+                source=args.source,
+                embedding=args.embedding,
+                modes=modes,
+                ks=sorted(set(args.k)),
+                per_game=not args.global_search,
+                limit=args.limit,
+                dims=dims or None,
+                quantize=quantize,
+                data=data,
+            )
+            print_report(report)
+            reports.append(report)
+
+    if len(reports) > 1:
+        print_settings_table(reports)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        baselines = {setting_label(b): b for b in baseline.get("settings", [baseline])}
+        for report in reports:
+            base = baselines.get(setting_label(report))
+            if base is None and len(baselines) == 1:
+                base = next(iter(baselines.values()))
+            if base is None:
+                print(f"\n  {setting_label(report)}: 기준 결과 없음")
+                continue
+            print_comparison(report, base)
+
+    if args.output:
+        output = reports[0] if len(reports) == 1 else {
+            "created_at": reports[0]["created_at"],
+            "settings": reports,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"\n  결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+증분 재계산용 입력 지문 (fingerprint)
+
+스텝/노드 산출물이 어떤 입력에서 나왔는지 기록해 두고, 입력이 그대로면 다시 만들지 않는다.
+소스 하나를 추가해도 바뀐 소스/섹션만 LLM을 다시 부른다.
+
+- 단위 지문: 소스 파싱, 섹션 통합/수정/전처리/QA, 플레이북, 리뷰 1건마다
+  실제 LLM 요청(모델 + 프롬프트 템플릿 + 입력 텍스트)의 해시 → rule_artifacts에 산출물과 함께 저장
+- 스텝 지문: 순차 파이프라인(run_pipeline) 스텝별 입력 상태(소스 raw_content 해시, 섹션 해시,
+  프롬프트 템플릿 해시, 모델 이름) → rule_pipeline.input_fingerprint.
+  완료된 스텝도 지문이 바뀌었으면 다시 실행하고, 그 안에서 단위 지문이 같은 것은 재사용한다.
+
+재사용한 단위는 "스테이지:키" 문자열로 모아 summarize_reuse()로 요약 출력한다.
+"""
+
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+
+from preprocessing.pipeline import SECTIONS, SECTION_TO_COLUMN, db
+from preprocessing.pipeline.llm_cache import request_key
+
+
+# ============================================================
+# 지문 계산
+# ============================================================
+def fingerprint(*parts) -> str:
+    """임의 값(JSON 직렬화 가능) 묶음의 sha256 - dict 키 순서와 무관"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def text_hash(text: str | None) -> str:
+    """텍스트 1개 sha256"""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def file_hash(path: str | Path | None) -> str:
+    """파일 내용 sha256 (없으면 빈 문자열) - PDF 페이지 이미지를 렌더링하지 않고 지문만"""
+    if not path or not Path(path).is_file():
+        return ""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def request_fingerprint(request: dict) -> str:
+    """
+    chat/achat 요청 인자의 지문 (label 제외) - llm_cache 키와 같은 방식
+
+    모델 이름, 프롬프트 템플릿, 입력 텍스트가 모두 요청에 들어 있으므로 셋 중 하나라도 바뀌면 달라진다.
+    """
+    params = {k: v for k, v in request.items() if k not in ("label", "model", "messages")}
+    return request_key(request["model"], request["messages"], params).hex()
+
+
+def reusable(artifact: dict | None, fp: str):
+    """저장된 산출물의 지문이 fp와 같으면 산출물, 아니면 None"""
+    if artifact and artifact.get("fingerprint") == fp:
+        return artifact.get("output")
+    return None
+
+
+def summarize_reuse(reused: list[str]) -> str:
+    """["parse:pdf:3", "merge:setup", ...] → "parse 1, merge 1" (스테이지별 재사용 개수)"""
+    counts = Counter(item.split(":", 1)[0] for item in reused)
+    return ", ".join(f"{stage} {n}" for stage, n in counts.items()) or "없음"
+
+
+# ============================================================
+# 순차 파이프라인 스텝 지문 (rule_pipeline.input_fingerprint)
+# ============================================================
+def rule_sections(rule: dict) -> dict[str, str]:
+    """game_rules 1건의 12섹션 텍스트 (칼럼 9개 + extra_sections 3개)"""
+    extra = rule.get("extra_sections") or {}
+    return {
+        name: (rule.get(SECTION_TO_COLUMN[name]) if name in SECTION_TO_COLUMN else extra.get(name)) or ""
+        for name in SECTIONS
+    }
+
+
+def _prompt_hash(name: str) -> str:
+    from preprocessing.pipeline.config import PROMPTS_DIR
+    path = PROMPTS_DIR / name
+    return text_hash(path.read_text(encoding="utf-8")) if path.exists() else ""
+
+
+def step_fingerprint(rule_id: int, step: str) -> str:
+    """
+    스텝 입력 상태의 지문 - 스텝이 읽는 DB 상태 + 모델 이름 + 프롬프트 템플릿
+
+    스텝이 끝난 직후의 값을 기록해 두고, 다음 실행 때 다르면 그 스텝을 다시 돈다.
+    (llm_preprocess는 자기 출력으로 섹션을 덮어쓰므로, 끝난 뒤 값 = 다음 실행의 "변경 없음" 기준)
+    """
+    from preprocessing.pipeline import config
+
+    sources = db.get_rule_sources(rule_id)
+    processed = [s for s in sources if s.get("status") == "processed" and s.get("raw_content")]
+
+    if step == "collect":
+        return fingerprint([
+            (s["id"], s["source_type"], s.get("source_url"), s.get("source_file"), s.get("status"))
+            for s in sources
+        ])
+    if step == "translate":
+        from preprocessing.pipeline.step2_translate import translate_prompt_hash
+        return fingerprint(config.TRANSLATE_MODEL, translate_prompt_hash(), [
+            (s["id"], s.get("language", "ko"), text_hash(s["raw_content"])) for s in processed
+        ])
+    if step == "parse":
+        from preprocessing.pipeline.step3_parse import _get_section_prompt
+        return fingerprint(
+            config.PARSE_MODEL, config.PARSE_VLM_MODEL, text_hash(_get_section_prompt()),
+            [(s["id"], s["source_type"], s.get("source_file"), text_hash(s["raw_content"])) for s in processed],
+        )
+
+    rule = db.get_rule(rule_id)
+    section_hashes = {name: text_hash(text) for name, text in rule_sections(rule).items()}
+
+    if step == "llm_preprocess":
+        game = db.get_client().table("games").select("min_players, max_players").eq(
+            "id", rule["game_id"]).execute()
+        return fingerprint(
+            config.PREPROCESS_MODEL, section_hashes, game.data,
+            _prompt_hash("preprocess_section.txt"), _prompt_hash("generate_playbook.txt"),
+        )
+    if step == "llm_qa":
+        return fingerprint(config.QA_MODEL, section_hashes, _prompt_hash("generate_qa.txt"))
+    if step == "vectorize":
+        from preprocessing.pipeline.embeddings import embedding_model_id
+        extra = rule.get("extra_sections") or {}
+        return fingerprint(
+            embedding_model_id(), section_hashes,
+            extra.get("preprocessed_items"), extra.get("qa_pairs"),
+        )
+    raise ValueError(f"알 수 없는 스텝: {step}")
@@ -0,0 +1,224 @@
+"""
+게임별 정확(brute-force) 벡터 인덱스
+
+채팅 룰 검색은 항상 game_id 하나로 필터링하고, 게임 1개의 청크는 수십~수백 개뿐이다.
+그런데도 매 쿼리가 ChromaDB 전체 HNSW + 메타데이터 where 필터를 탄다.
+이 모듈은 게임별 청크 벡터를 처음 검색할 때 ChromaDB에서 한 번 읽어 NumPy 행렬로 들고 있다가,
+쿼리마다 내적 1번 + argpartition으로 top-k를 구한다 (근사 없음, 1ms 미만).
+
+- ChromaDB가 원본이고, 이 모듈은 읽기 캐시일 뿐이다
+- 무효화: 게임의 청크가 바뀌면(step6 sync_chunks, load_to_chroma_v2 동기화) 세대 번호를 올린다.
+  세대 번호는 CHROMA_DIR의 SQLite 파일에 있어서 파이프라인 프로세스가 올린 값을
+  웹 워커가 다음 검색 때 보고 다시 읽는다.
+- 캐시 키에 물리 컬렉션 ID가 들어가므로 별칭 교체(blue/green, reproject) 후에는 자연히 새로 읽는다.
+- 게임 수 상한(LRU)을 넘으면 오래 안 쓴 게임부터 버린다.
+
+사용법:
+    from preprocessing.pipeline.game_vector_index import get_game_vector_index
+    raw = get_game_vector_index().query(collection, embedding, n_results=5, game_id=12)
+    # raw: collection.query()와 같은 모양, 청크가 너무 많은 게임이면 None (HNSW 사용)
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from preprocessing.pipeline.config import (
+    GAME_VECTOR_GENERATION_PATH,
+    GAME_VECTOR_INDEX_MAX_CHUNKS,
+    GAME_VECTOR_INDEX_MAX_GAMES,
+)
+
+
+# ============================================================
+# 세대 번호 (프로세스 간 무효화)
+# ============================================================
+class GenerationStore:
+    """game_id → 세대 번호 (SQLite WAL, 여러 프로세스 공유)"""
+
+    def __init__(self, path: str = GAME_VECTOR_GENERATION_PATH):
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS generations ("
+            " game_id INTEGER PRIMARY KEY, generation INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, game_id: int) -> int:
+        row = self._conn().execute(
+            "SELECT generation FROM generations WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def last_updated(self) -> float:
+        """어느 게임이든 청크가 마지막으로 바뀐 시각 (없으면 0) - 양자화 미러 신선도 확인용"""
+        row = self._conn().execute("SELECT MAX(updated_at) FROM generations").fetchone()
+        return row[0] or 0.0
+
+    def bump(self, game_ids) -> None:
+        """게임들의 세대 번호 +1 (청크 변경 후 호출)"""
+        now = time.time()
+        self._conn().executemany(
+            "INSERT INTO generations (game_id, generation, updated_at) VALUES (?, 1, ?)"
+            " ON CONFLICT(game_id) DO UPDATE SET generation = generation + 1, updated_at = excluded.updated_at",
+            [(int(g), now) for g in game_ids],
+        )
+
+
+# ============================================================
+# 게임별 행렬 캐시
+# ============================================================
+@dataclass
+class _GameVectors:
+    ids: list[str]
+    documents: list[str]
+    metadatas: list[dict]
+    matrix: np.ndarray           # (청크 수, 차원), L2 정규화
+    chunk_types: np.ndarray      # 청크별 chunk_type (필터용)
+
+
+class GameVectorIndex:
+    """(컬렉션, game_id) 단위 NumPy 벡터 캐시 + 정확 top-k"""
+
+    def __init__(self, generations: GenerationStore | None = None,
+                 max_games: int = GAME_VECTOR_INDEX_MAX_GAMES,
+                 max_chunks: int = GAME_VECTOR_INDEX_MAX_CHUNKS):
+        self.generations = generations or GenerationStore()
+        self.max_games = max_games
+        self.max_chunks = max_chunks
+        # (컬렉션 ID, game_id) → (세대 번호, 행렬 또는 None=청크가 너무 많은 게임)
+        self._games: OrderedDict[tuple[str, int], tuple[int, _GameVectors | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def _load(self, collection, game_id: int) -> _GameVectors | None:
+        """ChromaDB에서 게임 청크 전체를 읽어 행렬 생성 (너무 크면 None)"""
+        got = collection.get(
+            where={"game_id": game_id}, include=["embeddings", "documents", "metadatas"]
+        )
+        if len(got["ids"]) > self.max_chunks:
+            return None
+        dims = len(got["embeddings"][0]) if len(got["ids"]) else 0
+        matrix = np.asarray(got["embeddings"], dtype=np.float32).reshape(len(got["ids"]), dims)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        metadatas = [m or {} for m in got["metadatas"]]
+        return _GameVectors(
+            ids=list(got["ids"]),
+            documents=list(got["documents"]),
+            metadatas=metadatas,
+            matrix=matrix / np.where(norms == 0, 1, norms),
+            chunk_types=np.array([m.get("chunk_type", "") for m in metadatas]),
+        )
+
+    def _get(self, collection, game_id: int) -> _GameVectors | None:
+        key = (str(collection.id), int(game_id))
+        generation = self.generations.get(game_id)
+        with self._lock:
+            cached = self._games.get(key)
+            if cached is not None and cached[0] == generation:
+                self._games.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+
+        # 락 밖에서 로드 (같은 게임을 동시에 읽으면 중복 로드될 수 있지만 결과는 같다)
+        entry = self._load(collection, game_id)
+        with self._lock:
+            self.loads += 1
+            self._games[key] = (generation, entry)
+            self._games.move_to_end(key)
+            while len(self._games) > self.max_games:
+                self._games.popitem(last=False)
+        return entry
+
+    def query(self, collection, query_embedding, n_results: int, game_id: int,
+              chunk_type: str | None = None) -> dict | None:
+        """
+        게임 1개 안에서 정확한 코사인 top-k
+
+        Returns:
+            collection.query()와 같은 모양 ({"ids", "distances", "documents", "metadatas"}: [[...]])
+            청크가 max_chunks보다 많은 게임이면 None (호출자가 HNSW로)
+        """
+        entry = self._get(collection, game_id)
+        if entry is None:
+            return None
+
+        rows = np.arange(len(entry.ids))
+        if chunk_type:
+            rows = rows[entry.chunk_types == chunk_type]
+        if not len(rows) or n_results <= 0:
+            return {"ids": [[]], "distances": [[]], "documents": [[]], "metadatas": [[]]}
+
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        scores = entry.matrix[rows] @ q
+        k = min(n_results, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        picked = rows[top]
+        return {
+            "ids": [[entry.ids[i] for i in picked]],
+            "distances": [[float(1 - s) for s in scores[top]]],
+            "documents": [[entry.documents[i] for i in picked]],
+            "metadatas": [[entry.metadatas[i] for i in picked]],
+        }
+
+    def invalidate(self, game_ids) -> None:
+        """게임 청크 변경 알림 (다른 프로세스의 캐시도 다음 검색 때 다시 읽음)"""
+        game_ids = list(game_ids)
+        if game_ids:
+            self.generations.bump(game_ids)
+
+    def clear(self):
+        with self._lock:
+            self._games.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            cached = [e for _, e in self._games.values() if e is not None]
+            return {
+                "games": len(self._games),
+                "chunks": sum(len(e.ids) for e in cached),
+                "bytes": sum(e.matrix.nbytes for e in cached),
+                "hits": self.hits,
+                "loads": self.loads,
+            }
+
+
+# ============================================================
+# 싱글톤
+# ============================================================
+_index: GameVectorIndex | None = None
+_lock = threading.Lock()
+
+
+def get_game_vector_index() -> GameVectorIndex:
+    """게임별 벡터 인덱스 반환 (싱글톤)"""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = GameVectorIndex()
+    return _index
+
+
+def invalidate_games(game_ids) -> None:
+    """청크가 바뀐 게임들의 캐시 무효화 (파이프라인 쪽에서 호출)"""
+    get_game_vector_index().invalidate(game_ids)
@@ -0,0 +1,120 @@
+"""
+ChromaDB HNSW 파라미터 관리
+
+config.HNSW_SETTINGS(컬렉션 별칭별 construction_ef / search_ef / M)를
+실제 컬렉션에 반영한다.
+
+- construction_ef / M 은 인덱스를 만들 때 정해지므로 새 컬렉션으로 다시 만든다.
+  저장된 벡터를 그대로 옮기므로 임베딩 API는 부르지 않고,
+  별칭 교체(blue/green)라 재구축 중에도 검색은 이전 컬렉션으로 동작한다.
+- search_ef 는 기존 컬렉션 설정만 바꾸면 된다 (이미 떠 있는 프로세스는 재시작 후 반영).
+
+사용법:
+    uv run python -m preprocessing.pipeline.hnsw_index                          # 현재 값 vs config
+    uv run python -m preprocessing.pipeline.hnsw_index --apply-search-ef
+    uv run python -m preprocessing.pipeline.hnsw_index --rebuild game_rules     # M / construction_ef 반영
+"""
+
+import argparse
+import time
+
+# collection.configuration을 읽으려면 로컬 임베딩 함수가 Chroma에 등록되어 있어야 한다
+import preprocessing.pipeline.embeddings  # noqa: F401
+from preprocessing.pipeline.chroma_store import (
+    collection_exists,
+    collection_metadata,
+    copy_collection,
+    drop_collection,
+    get_chroma_client,
+    get_collection,
+    hnsw_settings,
+    new_physical_name,
+    resolve_collection_name,
+    switch_aliases,
+)
+from preprocessing.pipeline.config import HNSW_SETTINGS
+
+# config 키 → ChromaDB collection.configuration["hnsw"] 키
+_CONFIG_KEYS = {"construction_ef": "ef_construction", "search_ef": "ef_search", "M": "max_neighbors"}
+
+
+def current_settings(alias: str) -> dict:
+    """컬렉션에 실제로 적용된 HNSW 파라미터 (config와 같은 키)"""
+    hnsw = (get_collection(alias).configuration or {}).get("hnsw") or {}
+    return {key: hnsw.get(chroma_key) for key, chroma_key in _CONFIG_KEYS.items()}
+
+
+def apply_search_ef(alias: str) -> int:
+    """config의 search_ef를 기존 컬렉션에 적용 (재구축 없음)"""
+    search_ef = hnsw_settings(alias)["search_ef"]
+    get_collection(alias).modify(configuration={"hnsw": {"ef_search": search_ef}})
+    return search_ef
+
+
+def rebuild_collection(alias: str, keep_old: bool = False) -> str:
+    """
+    config의 HNSW 파라미터로 새 물리 컬렉션을 만들어 벡터를 옮기고 별칭 교체
+
+    Returns:
+        새 물리 컬렉션 이름
+    """
+    source = get_collection(alias)
+    target_name = new_physical_name(alias)
+    metadata = {
+        **collection_metadata(alias=alias),
+        # 원본의 임베딩 공간 표시는 그대로 유지 (벡터를 옮기기만 하므로)
+        **{k: v for k, v in (source.metadata or {}).items() if k == "embedding_model"},
+    }
+    target = get_chroma_client().create_collection(
+        name=target_name,
+        embedding_function=(source.configuration or {}).get("embedding_function"),
+        metadata=metadata,
+    )
+
+    start = time.perf_counter()
+    copied = copy_collection(source, target, label=f"rebuild {alias}")
+    previous = switch_aliases({alias: target_name})
+    print(f"  [hnsw] {alias} → {target_name}: {copied}청크, {time.perf_counter() - start:.1f}s")
+
+    if not keep_old and drop_collection(previous[alias]):
+        print(f"  [hnsw] 이전 컬렉션 삭제: {previous[alias]}")
+    return target_name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChromaDB HNSW 파라미터 관리")
+    parser.add_argument("--rebuild", nargs="*", metavar="ALIAS",
+                        help="config 값으로 재구축 (별칭 생략 시 HNSW_SETTINGS의 전체 컬렉션)")
+    parser.add_argument("--apply-search-ef", action="store_true", help="search_ef만 바로 적용")
+    parser.add_argument("--keep-old", action="store_true", help="이전 컬렉션 남겨두기 (롤백용)")
+    args = parser.parse_args()
+
+    aliases = [a for a in HNSW_SETTINGS if a != "default"]
+
+    if args.rebuild is not None:
+        for alias in args.rebuild or aliases:
+            if not collection_exists(alias):
+                print(f"  [hnsw] {alias}: 컬렉션 없음 (건너뜀)")
+                continue
+            rebuild_collection(alias, keep_old=args.keep_old)
+
+    if args.apply_search_ef:
+        for alias in aliases:
+            if collection_exists(alias):
+                print(f"  [hnsw] {alias}: search_ef={apply_search_ef(alias)} 적용 (프로세스 재시작 후 반영)")
+
+    for alias in aliases:
+        if not collection_exists(alias):
+            continue
+        current = current_settings(alias)
+        wanted = hnsw_settings(alias)
+        diff = [k for k in wanted if current.get(k) != wanted[k]]
+        state = "OK" if not diff else f"다름 ({', '.join(diff)})"
+        print(f"  [hnsw] {alias} ({resolve_collection_name(alias)}): "
+              + ", ".join(f"{k}={current[k]}" for k in wanted)
+              + " | config: " + ", ".join(f"{k}={wanted[k]}" for k in wanted)
+              + f" → {state}")
+
+
+if __name__ == "__main__":
+    main()
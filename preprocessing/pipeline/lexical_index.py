@@ -0,0 +1,315 @@
+"""
+룰 청크 어휘(lexical) 인덱스 - 문자 n-gram BM25
+
+벡터 검색은 "석탄 토큰", "운하 시대"처럼 정확한 카드/용어 이름이
+핵심인 질문을 자주 놓친다. 같은 game_rules 청크를 문자 n-gram BM25로
+한 번 더 색인해서 키워드 일치를 보완한다.
+
+한국어는 형태소 분석 없이도 조사/어미 변화에 강하도록
+어절 단위가 아니라 문자 2~3-gram으로 쪼갠다.
+(예: "석탄토큰을" → 석탄, 탄토, 토큰, 큰을, 석탄토, 탄토큰, 토큰을)
+
+저장소는 SQLite 파일 1개 (docs + postings 테이블).
+step6의 batch_add_to_collection이 ChromaDB에 넣을 때 같이 갱신한다.
+
+사용법:
+    uv run python -m preprocessing.pipeline.lexical_index --rebuild   # ChromaDB에서 전체 재색인
+    uv run python -m preprocessing.pipeline.lexical_index --query "석탄 토큰" --game 12
+"""
+
+import argparse
+import json
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+from preprocessing.pipeline.config import LEXICAL_INDEX_PATH
+
+# ============================================================
+# BM25 / 토크나이저 설정
+# ============================================================
+BM25_K1 = 1.2
+BM25_B = 0.75
+NGRAM_SIZES = (2, 3)
+
+# 한글/영문/숫자 연속 구간만 토큰 대상으로 본다
+_WORD_RE = re.compile(r"[0-9a-z가-힣]+")
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    문자 n-gram 토큰화
+
+    - 한글 어절: 2~3-gram (1글자 어절은 그대로)
+    - 영문/숫자 단어: 단어 그대로 (카드 이름, 숫자 등)
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        if not _HANGUL_RE.search(word):
+            tokens.append(word)
+            continue
+        if len(word) < NGRAM_SIZES[0]:
+            tokens.append(word)
+            continue
+        for n in NGRAM_SIZES:
+            tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+# ============================================================
+# 인덱스
+# ============================================================
+class LexicalIndex:
+    """SQLite 기반 BM25 역색인"""
+
+    def __init__(self, path: str = LEXICAL_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                id          TEXT PRIMARY KEY,
+                game_id     INTEGER,
+                chunk_type  TEXT,
+                document    TEXT NOT NULL,
+                metadata    TEXT NOT NULL,
+                length      INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_docs_game ON docs(game_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                term    TEXT NOT NULL,
+                doc_id  TEXT NOT NULL,
+                tf      INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+            """
+        )
+        conn.commit()
+
+    # --------------------------------------------------------
+    # 쓰기
+    # --------------------------------------------------------
+    def upsert(self, ids: list[str], documents: list[str], metadatas: list[dict]):
+        """청크 추가/교체 (ChromaDB add/upsert와 같은 인자)"""
+        conn = self._conn()
+        with conn:
+            self._delete_ids(conn, ids)
+            for chunk_id, document, meta in zip(ids, documents, metadatas):
+                terms = Counter(tokenize(document))
+                conn.execute(
+                    "INSERT INTO docs (id, game_id, chunk_type, document, metadata, length) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        chunk_id,
+                        meta.get("game_id"),
+                        meta.get("chunk_type", ""),
+                        document,
+                        json.dumps(meta, ensure_ascii=False),
+                        sum(terms.values()),
+                    ),
+                )
+                conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, chunk_id, tf) for term, tf in terms.items()],
+                )
+
+    def delete(self, ids: list[str]):
+        """청크 삭제"""
+        conn = self._conn()
+        with conn:
+            self._delete_ids(conn, ids)
+
+    def delete_game(self, game_id: int):
+        """게임 1개의 청크 전체 삭제"""
+        conn = self._conn()
+        ids = [r[0] for r in conn.execute("SELECT id FROM docs WHERE game_id = ?", (game_id,))]
+        if ids:
+            self.delete(ids)
+
+    def ids_for_game(self, game_id: int) -> set[str]:
+        """게임 1개의 색인된 청크 ID"""
+        return {
+            r[0] for r in self._conn().execute("SELECT id FROM docs WHERE game_id = ?", (game_id,))
+        }
+
+    def clear(self):
+        """인덱스 비우기 (재색인용)"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM docs")
+
+    @staticmethod
+    def _delete_ids(conn: sqlite3.Connection, ids: list[str]):
+        for i in range(0, len(ids), 500):
+            batch = ids[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            conn.execute(f"DELETE FROM postings WHERE doc_id IN ({marks})", batch)
+            conn.execute(f"DELETE FROM docs WHERE id IN ({marks})", batch)
+
+    # --------------------------------------------------------
+    # 검색
+    # --------------------------------------------------------
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        game_id: int | None = None,
+        chunk_type: str | None = None,
+    ) -> list[dict]:
+        """
+        BM25 검색
+
+        Returns:
+            [{"id", "score", "document", "metadata"}, ...] (점수 높은 순)
+        """
+        terms = Counter(tokenize(query))
+        if not terms:
+            return []
+
+        conn = self._conn()
+        n_docs, avg_len = conn.execute(
+            "SELECT COUNT(*), COALESCE(AVG(length), 0) FROM docs"
+        ).fetchone()
+        if n_docs == 0:
+            return []
+
+        # 필터 조건 (게임 / 청크 종류)
+        filters, params = [], []
+        if game_id:
+            filters.append("d.game_id = ?")
+            params.append(game_id)
+        if chunk_type:
+            filters.append("d.chunk_type = ?")
+            params.append(chunk_type)
+        where = (" AND " + " AND ".join(filters)) if filters else ""
+
+        scores: dict[str, float] = {}
+        for term, qtf in terms.items():
+            df = conn.execute(
+                "SELECT COUNT(*) FROM postings WHERE term = ?", (term,)
+            ).fetchone()[0]
+            if df == 0:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            rows = conn.execute(
+                "SELECT p.doc_id, p.tf, d.length FROM postings p "
+                "JOIN docs d ON d.id = p.doc_id "
+                f"WHERE p.term = ?{where}",
+                (term, *params),
+            )
+            for doc_id, tf, length in rows:
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / (avg_len or 1))
+                scores[doc_id] = scores.get(doc_id, 0.0) + qtf * idf * tf * (BM25_K1 + 1) / norm
+
+        top = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:n_results]
+        if not top:
+            return []
+
+        marks = ",".join("?" * len(top))
+        docs = {
+            row[0]: row
+            for row in conn.execute(
+                f"SELECT id, document, metadata FROM docs WHERE id IN ({marks})",
+                [doc_id for doc_id, _ in top],
+            )
+        }
+        return [
+            {
+                "id": doc_id,
+                "score": round(score, 4),
+                "document": docs[doc_id][1],
+                "metadata": json.loads(docs[doc_id][2]),
+            }
+            for doc_id, score in top
+            if doc_id in docs
+        ]
+
+
+_index: LexicalIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """game_rules 어휘 인덱스 반환 (싱글톤)"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LexicalIndex()
+    return _index
+
+
+def set_lexical_index(index: LexicalIndex):
+    """검색에 쓸 어휘 인덱스 교체 (오프라인 평가용)"""
+    global _index
+    with _index_lock:
+        _index = index
+
+
+# ============================================================
+# 재색인 (ChromaDB → 어휘 인덱스)
+# ============================================================
+def rebuild_from_chroma(batch_size: int = 500) -> int:
+    """ChromaDB game_rules 컬렉션 전체를 읽어 어휘 인덱스를 다시 만든다."""
+    from preprocessing.pipeline.chroma_store import get_collection
+
+    col = get_collection("game_rules")
+    index = get_lexical_index()
+    index.clear()
+
+    total = col.count()
+    for offset in range(0, total, batch_size):
+        batch = col.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+        index.upsert(batch["ids"], batch["documents"], batch["metadatas"])
+        print(f"\r  [lexical] {min(offset + batch_size, total)}/{total}", end="", flush=True)
+    print()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="game_rules 어휘(BM25) 인덱스")
+    parser.add_argument("--rebuild", action="store_true", help="ChromaDB에서 전체 재색인")
+    parser.add_argument("--query", type=str, help="검색 테스트 쿼리")
+    parser.add_argument("--game", type=int, help="게임 ID 필터")
+    parser.add_argument("-n", type=int, default=5, help="결과 수")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        total = rebuild_from_chroma()
+        print(f"  [lexical] 재색인 완료: {total}청크")
+
+    if args.query:
+        for rank, hit in enumerate(
+            get_lexical_index().search(args.query, args.n, game_id=args.game), 1
+        ):
+            first_line = hit["document"].splitlines()[0]
+            print(f"  {rank}. [{hit['score']:.3f}] {hit['id']} | {first_line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+LLM 응답 캐시 (요청 내용 해시 기반 로컬 저장소)
+
+크래시 후 재실행, run_pipeline --step 재실행, review→revise 루프는
+이미 받은 응답도 매번 다시 요청한다 (parse_source_vlm은 고해상도 페이지 20장).
+sha256(모델, messages, 나머지 요청 파라미터)를 키로 응답 JSON을 SQLite에 보관하고
+llm_gateway.chat() 앞단에서 재사용한다. 입력이 그대로인 게임은 API 호출 없이 끝난다.
+
+모드 (GMJJ_LLM_CACHE 또는 run --llm-cache):
+- rw: 캐시에 있으면 재사용, 없으면 호출 후 저장 (기본)
+- ro: 재생 전용. 캐시에 없으면 LLMCacheMiss (벤치마크 fixture - 네트워크 호출 0건 보장)
+- off: 캐시를 보지도 쓰지도 않는다
+
+사용법:
+    uv run python -m preprocessing.pipeline.llm_cache --stats
+    uv run python -m preprocessing.pipeline.llm_cache --compact --older-than 30
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from preprocessing.pipeline.config import LLM_CACHE_MAX_MB, LLM_CACHE_MODE, LLM_CACHE_PATH
+
+CACHE_MODES = ("rw", "ro", "off")
+
+# 용량 초과 시 상한의 이 비율까지 오래 안 쓴 응답부터 지운다 (매 저장마다 지우지 않도록)
+_EVICT_TARGET = 0.9
+
+
+class LLMCacheMiss(RuntimeError):
+    """ro(재생 전용) 모드에서 캐시에 없는 요청"""
+
+
+def request_key(model: str, messages: list[dict], params: dict) -> bytes:
+    """캐시 키: sha256(모델, messages, 요청 파라미터) - 키 순서와 무관하게 같은 값"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).digest()
+
+
+# ============================================================
+# 저장소
+# ============================================================
+class LLMResponseStore:
+    """SQLite(WAL) 응답 저장소 - 키 → ChatCompletion JSON (용량 상한, LRU 정리)"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._size_lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key        BLOB PRIMARY KEY,
+                model      TEXT NOT NULL,
+                label      TEXT NOT NULL,
+                response   TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used  REAL NOT NULL,
+                hits       INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        conn.commit()
+        self._bytes = conn.execute("SELECT COALESCE(SUM(LENGTH(response)), 0) FROM responses").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: bytes) -> str | None:
+        """응답 JSON 조회 + 사용 시각/횟수 갱신"""
+        conn = self._conn()
+        row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+        return row[0]
+
+    def put(self, key: bytes, model: str, label: str, response: str):
+        """응답 저장 (같은 키면 교체). 상한을 넘으면 오래 안 쓴 것부터 정리"""
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, label, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, label, response, now, now),
+            )
+        with self._size_lock:
+            self._bytes += len(response)
+            if self.max_bytes and self._bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * _EVICT_TARGET))
+
+    def _evict(self, target_bytes: int):
+        """전체 크기가 target_bytes 이하가 될 때까지 last_used 오래된 순으로 삭제"""
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(LENGTH(response)), 0) FROM responses").fetchone()[0]
+        victims = []
+        for key, size in conn.execute("SELECT key, LENGTH(response) FROM responses ORDER BY last_used"):
+            if total <= target_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        with conn:
+            conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._bytes = total
+        print(f"  [llm-cache] 용량 상한 초과 → {len(victims)}개 정리")
+
+    def stats(self) -> list[dict]:
+        """모델/호출 구분별 저장 현황"""
+        rows = self._conn().execute(
+            "SELECT model, label, COUNT(*), SUM(LENGTH(response)), SUM(hits) "
+            "FROM responses GROUP BY model, label ORDER BY model, label"
+        ).fetchall()
+        return [
+            {"model": m, "label": lb, "entries": n, "bytes": b, "hits": h}
+            for m, lb, n, b, h in rows
+        ]
+
+    def compact(self, older_than_days: float | None = None) -> int:
+        """
+        오래 안 쓴 응답 삭제 후 VACUUM
+
+        Args:
+            older_than_days: 지정하면 이 기간 동안 안 쓴 응답 삭제 (없으면 VACUUM만)
+        Returns:
+            삭제된 응답 수
+        """
+        conn = self._conn()
+        removed = 0
+        if older_than_days:
+            cutoff = time.time() - older_than_days * 86400
+            with conn:
+                removed = conn.execute("DELETE FROM responses WHERE last_used < ?", (cutoff,)).rowcount
+        conn.execute("VACUUM")
+        with self._size_lock:
+            self._bytes = conn.execute("SELECT COALESCE(SUM(LENGTH(response)), 0) FROM responses").fetchone()[0]
+        return removed
+
+    def file_bytes(self) -> int:
+        return sum(
+            p.stat().st_size
+            for p in Path(self.path).parent.glob(Path(self.path).name + "*")
+            if p.is_file()
+        )
+
+
+# ============================================================
+# 모드 / 싱글톤
+# ============================================================
+_mode = LLM_CACHE_MODE if LLM_CACHE_MODE in CACHE_MODES else "rw"
+_store: LLMResponseStore | None = None
+_lock = threading.Lock()
+
+
+def get_mode() -> str:
+    return _mode
+
+
+def set_mode(mode: str):
+    """캐시 모드 변경 (run --llm-cache)"""
+    global _mode
+    if mode not in CACHE_MODES:
+        raise ValueError(f"알 수 없는 LLM 캐시 모드: {mode} (rw | ro | off)")
+    _mode = mode
+
+
+def get_llm_cache() -> LLMResponseStore:
+    """응답 저장소 반환 (싱글톤)"""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = LLMResponseStore()
+    return _store
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="LLM 응답 캐시 관리")
+    parser.add_argument("--stats", action="store_true", help="모델/호출 구분별 저장 현황")
+    parser.add_argument("--compact", action="store_true", help="정리 후 VACUUM")
+    parser.add_argument("--older-than", type=float, help="N일 동안 안 쓴 응답 삭제 (--compact와 함께)")
+    args = parser.parse_args()
+
+    store = get_llm_cache()
+
+    if args.compact:
+        before = store.file_bytes()
+        removed = store.compact(older_than_days=args.older_than)
+        after = store.file_bytes()
+        print(f"  [llm-cache] {removed}개 삭제, "
+              f"{before / 1024 / 1024:.1f}MB → {after / 1024 / 1024:.1f}MB")
+
+    if args.stats or not args.compact:
+        print(f"  [llm-cache] {store.path} (모드 {get_mode()}, 상한 {LLM_CACHE_MAX_MB}MB)")
+        for row in store.stats():
+            print(f"    {row['model']} / {row['label'] or '-'}: {row['entries']}개, "
+                  f"{row['bytes'] / 1024 / 1024:.1f}MB, 재사용 {row['hits']}회")
+
+
+if __name__ == "__main__":
+    main()
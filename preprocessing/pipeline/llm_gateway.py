@@ -0,0 +1,436 @@
+"""
+전처리 파이프라인 LLM 게이트웨이
+
+step2~5, 에이전트 노드가 각자 OpenAI 클라이언트를 만들고 재시도 없이 호출하면
+429 한 번에 게임 1개 처리가 통째로 실패하고, 실제 사용량도 남지 않는다.
+모든 chat.completions 호출을 여기 한 곳으로 모은다.
+
+- 클라이언트 1개 (커넥션 풀 공유, SDK 자체 재시도는 끄고 여기서 처리)
+- 모델별 RPM/TPM 버킷 (rate_limit) + 응답의 x-ratelimit-* 헤더로 버킷 보정
+  (서버가 알려준 한도/잔량을 그대로 반영 → 계정 tier가 바뀌어도 따라간다)
+- 일시적 오류(429, 5xx, 타임아웃, 연결 끊김)는 지수 백오프 + jitter로 재시도.
+  429면 같은 모델 호출 전체를 retry-after만큼 멈춘다.
+- 호출마다 모델 / 입력·출력·캐시 토큰 / 예상 비용 / 지연시간 / 시도 횟수를 JSONL로 기록
+  (진행 중인 노드/스텝 스팬에도 합산 - telemetry)
+- 같은 요청은 응답 캐시(llm_cache)에서 바로 돌려준다 (버킷/재시도 거치지 않음)
+- async 노드용 achat(): AsyncOpenAI로 같은 캐시/버킷/재시도/기록을 거친다
+
+사용법:
+    from preprocessing.pipeline.llm_gateway import chat
+    response = chat(model=QA_MODEL, messages=[...], label="qa", temperature=0.4)
+    response = await achat(model=QA_MODEL, messages=[...], label="qa", temperature=0.4)
+    text = response.choices[0].message.content
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from pathlib import Path
+
+import httpx
+import openai
+from dotenv import load_dotenv
+from openai.types.chat import ChatCompletion
+
+from preprocessing.pipeline.config import (
+    LLM_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT,
+    LLM_USAGE_LOG,
+)
+from preprocessing.pipeline.llm_cache import LLMCacheMiss, get_llm_cache, get_mode, request_key
+from preprocessing.pipeline.rate_limit import estimate_tokens, get_rate_limiter
+from preprocessing.pipeline.telemetry import estimate_cost, record_llm
+
+load_dotenv()
+
+# 재시도 대기: min(상한, 기본 × 2^시도) 안에서 무작위 (full jitter)
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 60.0
+
+_RETRYABLE = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+# ============================================================
+# 클라이언트
+# ============================================================
+_client: openai.OpenAI | None = None
+_lock = threading.Lock()
+
+
+def get_client() -> openai.OpenAI:
+    """OpenAI 클라이언트 반환 (싱글톤, 스레드 간 커넥션 풀 공유)"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                api_key = os.getenv("OPENAI_API_KEY", "")
+                if not api_key:
+                    raise RuntimeError("OPENAI_API_KEY가 .env에 없습니다.")
+                _client = openai.OpenAI(
+                    api_key=api_key,
+                    max_retries=0,  # 재시도는 chat()에서 (버킷/로그와 같이 처리)
+                    timeout=LLM_TIMEOUT,
+                    http_client=openai.DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=LLM_CONCURRENCY * 2,
+                            max_keepalive_connections=LLM_CONCURRENCY,
+                        )
+                    ),
+                )
+    return _client
+
+
+# 이벤트 루프마다 따로 (httpx 비동기 커넥션 풀은 만든 루프에서만 쓸 수 있다)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """현재 이벤트 루프용 AsyncOpenAI 클라이언트 (루프당 1개)"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        api_key = os.getenv("OPENAI_API_KEY", "")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY가 .env에 없습니다.")
+        client = openai.AsyncOpenAI(
+            api_key=api_key,
+            max_retries=0,
+            timeout=LLM_TIMEOUT,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_CONCURRENCY * 2,
+                    max_keepalive_connections=LLM_CONCURRENCY,
+                )
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+_async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _async_slot() -> asyncio.Semaphore:
+    """루프 전체에서 동시에 보내는 async 요청 수 상한 (LLM_CONCURRENCY, 스레드 풀과 같은 값)"""
+    loop = asyncio.get_running_loop()
+    slot = _async_slots.get(loop)
+    if slot is None:
+        slot = _async_slots[loop] = asyncio.Semaphore(LLM_CONCURRENCY)
+    return slot
+
+
+# ============================================================
+# x-ratelimit-* 헤더
+# ============================================================
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value: str | None) -> float | None:
+    """'6m0s', '1.5s', '20ms' 같은 리셋 시간 → 초"""
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _header_int(headers, name: str) -> int | None:
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _observe_headers(model: str, headers):
+    """응답 헤더의 한도/잔량으로 모델 버킷 보정"""
+    get_rate_limiter(model).observe(
+        limit_requests=_header_int(headers, "x-ratelimit-limit-requests"),
+        limit_tokens=_header_int(headers, "x-ratelimit-limit-tokens"),
+        remaining_requests=_header_int(headers, "x-ratelimit-remaining-requests"),
+        remaining_tokens=_header_int(headers, "x-ratelimit-remaining-tokens"),
+    )
+
+
+def _retry_after(error: Exception) -> float | None:
+    """오류 응답의 retry-after(-ms) / x-ratelimit-reset-* 헤더 → 대기 초"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if headers.get("retry-after"):
+        seconds = parse_duration(headers["retry-after"])
+        if seconds is not None:
+            return seconds
+    resets = [
+        parse_duration(headers.get("x-ratelimit-reset-requests")),
+        parse_duration(headers.get("x-ratelimit-reset-tokens")),
+    ]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """일시적 오류인지 (429/5xx/타임아웃/연결 끊김 - 결제 한도 초과 제외)"""
+    if not isinstance(error, _RETRYABLE):
+        return False
+    # 결제 한도 초과(insufficient_quota)는 기다려도 풀리지 않는다
+    return not (isinstance(error, openai.RateLimitError) and getattr(error, "code", None) == "insufficient_quota")
+
+
+# ============================================================
+# 사용량 기록
+# ============================================================
+_usage_lock = threading.Lock()
+_totals: dict[str, dict] = {}
+_recent: deque[tuple[float, int]] = deque()  # (시각, 토큰) - 최근 1분 처리량
+
+
+def _record_usage(entry: dict):
+    """호출 1건 기록 (JSONL 추가 + 프로세스 누적 + 현재 텔레메트리 스팬)"""
+    record_llm(entry)
+    with _usage_lock:
+        totals = _totals.setdefault(entry["model"], {
+            "calls": 0, "errors": 0, "retries": 0, "cache_hits": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+            "cost_usd": 0.0, "latency_ms": 0.0,
+        })
+        if entry["status"] == "cache":
+            totals["cache_hits"] += 1
+        else:
+            totals["calls"] += 1
+            totals["errors"] += entry["status"] != "ok"
+            totals["retries"] += entry["attempts"] - 1
+            totals["prompt_tokens"] += entry["prompt_tokens"]
+            totals["completion_tokens"] += entry["completion_tokens"]
+            totals["cached_tokens"] += entry["cached_tokens"]
+            totals["cost_usd"] += entry["cost_usd"]
+            totals["latency_ms"] += entry["latency_ms"]
+            _recent.append((time.monotonic(), entry["prompt_tokens"] + entry["completion_tokens"]))
+
+        if not LLM_USAGE_LOG:
+            return
+        try:
+            Path(LLM_USAGE_LOG).parent.mkdir(parents=True, exist_ok=True)
+            with open(LLM_USAGE_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"  [llm] 사용량 로그 기록 실패: {e}")
+
+
+def usage_totals() -> dict[str, dict]:
+    """이 프로세스의 모델별 누적 사용량"""
+    with _usage_lock:
+        return {model: dict(t) for model, t in _totals.items()}
+
+
+def tokens_per_minute() -> int:
+    """최근 60초 동안 API로 쓴 토큰 수 (캐시 적중 제외)"""
+    with _usage_lock:
+        cutoff = time.monotonic() - 60
+        while _recent and _recent[0][0] < cutoff:
+            _recent.popleft()
+        return sum(tokens for _, tokens in _recent)
+
+
+def print_usage_summary():
+    """모델별 누적 사용량 출력 (실행 끝에)"""
+    totals = usage_totals()
+    if not totals:
+        return
+    print("\n  [llm] 사용량")
+    for model, t in totals.items():
+        avg = t["latency_ms"] / t["calls"] if t["calls"] else 0
+        print(f"    {model}: {t['calls']}회 (재시도 {t['retries']}, 실패 {t['errors']}, 캐시 {t['cache_hits']}), "
+              f"입력 {t['prompt_tokens']:,} (캐시 {t['cached_tokens']:,}) / 출력 {t['completion_tokens']:,} 토큰, "
+              f"예상 ${t['cost_usd']:.4f}, 평균 {avg / 1000:.1f}s")
+
+
+# ============================================================
+# 호출
+# ============================================================
+def _cache_lookup(model: str, messages: list[dict], label: str, kwargs: dict, start: float):
+    """
+    응답 캐시 조회
+
+    Returns:
+        (모드, 캐시 키, 캐시된 응답 또는 None)
+    """
+    mode = get_mode()
+    if mode == "off":
+        return mode, None, None
+    key = request_key(model, messages, kwargs)
+    cached = get_llm_cache().get(key)
+    if cached is not None:
+        _record_usage(_usage_entry(model, label, start, 0, None, None, status="cache"))
+        return mode, key, ChatCompletion.model_validate_json(cached)
+    if mode == "ro":
+        raise LLMCacheMiss(f"{model}{f' ({label})' if label else ''} 응답이 캐시에 없습니다 (ro 모드)")
+    return mode, key, None
+
+
+def backoff_delay(model: str, attempt: int, error: Exception) -> float | None:
+    """
+    실패한 요청(attempt번째)의 재시도 대기 시간 (재시도하지 않을 오류면 None)
+
+    retry-after 헤더 + full jitter 백오프. 429면 같은 모델을 쓰는 다른 호출도 같이 멈춘다.
+    임베딩 제공자(embeddings)도 같은 규칙으로 재시도한다.
+    """
+    if not is_retryable_error(error) or attempt > LLM_MAX_RETRIES:
+        return None
+    wait = _retry_after(error)
+    if isinstance(error, openai.RateLimitError):
+        get_rate_limiter(model).pause(wait if wait is not None else _BACKOFF_BASE)
+    backoff = random.uniform(0, min(_BACKOFF_CAP, _BACKOFF_BASE * 2 ** (attempt - 1)))
+    return (wait or 0) + backoff
+
+
+def _retry_delay(model: str, label: str, start: float, attempt: int, error: Exception) -> float | None:
+    """실패한 요청의 재시도 대기 시간 (재시도하지 않을 오류면 기록 후 None)"""
+    delay = backoff_delay(model, attempt, error)
+    if delay is None:
+        _record_usage(_usage_entry(model, label, start, attempt, None, error))
+        return None
+    print(f"  [llm] {model}{f' ({label})' if label else ''} {type(error).__name__}, "
+          f"{delay:.1f}s 후 재시도 ({attempt}/{LLM_MAX_RETRIES})")
+    return delay
+
+
+def _finish(model: str, label: str, start: float, attempt: int, mode: str, key, reserved: int, raw):
+    """성공 응답 처리: 버킷 정산/보정, 사용량 기록, 캐시 저장"""
+    response = raw.parse()
+    usage = getattr(response, "usage", None)
+    get_rate_limiter(model).settle(reserved, usage.total_tokens if usage else reserved)
+    _observe_headers(model, raw.headers)
+    _record_usage(_usage_entry(model, label, start, attempt, usage, None))
+    # 잘린 응답(length)·필터링된 응답은 재생하면 같은 실패가 반복되므로 저장하지 않는다
+    if mode == "rw" and all(c.finish_reason == "stop" for c in response.choices):
+        get_llm_cache().put(key, model, label, response.model_dump_json())
+    return response
+
+
+def chat(*, model: str, messages: list[dict], label: str = "", **kwargs):
+    """
+    chat.completions.create (응답 캐시 + 속도 제한 + 재시도 + 사용량 기록)
+
+    Args:
+        label: 사용량 로그에 남길 호출 구분 (예: "qa", "merge")
+        kwargs: chat.completions.create에 그대로 전달
+    Returns:
+        ChatCompletion
+    Raises:
+        LLMCacheMiss: 캐시 ro 모드인데 캐시에 없는 요청
+    """
+    start = time.perf_counter()
+    mode, key, cached = _cache_lookup(model, messages, label, kwargs, start)
+    if cached is not None:
+        return cached
+
+    limiter = get_rate_limiter(model)
+    estimate = estimate_tokens(messages, kwargs.get("max_completion_tokens"))
+    attempt = 0
+
+    while True:
+        attempt += 1
+        reserved = limiter.acquire(estimate)
+        try:
+            raw = get_client().chat.completions.with_raw_response.create(
+                model=model, messages=messages, **kwargs
+            )
+        except Exception as e:
+            # 실패한 요청은 토큰을 쓰지 않았다고 보고 돌려준다 (요청 수는 그대로 소모)
+            limiter.settle(reserved, 0)
+            delay = _retry_delay(model, label, start, attempt, e)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            continue
+        return _finish(model, label, start, attempt, mode, key, reserved, raw)
+
+
+async def achat(*, model: str, messages: list[dict], label: str = "", **kwargs):
+    """
+    chat()의 async 버전 (AsyncOpenAI) - 캐시/버킷/재시도/기록은 chat()과 공유
+
+    동시 요청은 이벤트 루프당 LLM_CONCURRENCY개까지 (Send 워커가 몇 개든).
+    대기(버킷, 백오프)와 요청 모두 취소 가능하다. 요청 중에 취소되면 예약 토큰을 돌려준다.
+    """
+    start = time.perf_counter()
+    mode, key, cached = _cache_lookup(model, messages, label, kwargs, start)
+    if cached is not None:
+        return cached
+
+    limiter = get_rate_limiter(model)
+    estimate = estimate_tokens(messages, kwargs.get("max_completion_tokens"))
+    attempt = 0
+
+    while True:
+        attempt += 1
+        async with _async_slot():
+            reserved = await limiter.aacquire(estimate)
+            try:
+                raw = await get_async_client().chat.completions.with_raw_response.create(
+                    model=model, messages=messages, **kwargs
+                )
+            except asyncio.CancelledError:
+                limiter.settle(reserved, 0)
+                raise
+            except Exception as e:
+                limiter.settle(reserved, 0)
+                error = e
+            else:
+                error = None
+        if error is not None:
+            delay = _retry_delay(model, label, start, attempt, error)
+            if delay is None:
+                raise error
+            await asyncio.sleep(delay)
+            continue
+        return _finish(model, label, start, attempt, mode, key, reserved, raw)
+
+
+def _usage_entry(
+    model: str, label: str, start: float, attempts: int, usage, error, status: str | None = None
+) -> dict:
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    # 제공자 prompt caching으로 할인된 입력 토큰 (prompt_tokens에 포함)
+    cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+    return {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "model": model,
+        "label": label,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,
+        "cost_usd": round(estimate_cost(model, prompt_tokens, cached_tokens, completion_tokens), 6),
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "attempts": attempts,
+        "status": status or ("ok" if error is None else "error"),
+        "error": f"{type(error).__name__}: {error}"[:300] if error is not None else None,
+    }
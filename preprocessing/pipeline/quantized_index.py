@@ -0,0 +1,287 @@
+"""
+양자화 벡터 미러 (float16 / int8, NumPy memmap)
+
+ChromaDB 컬렉션의 벡터를 양자화해서 .npy 파일로 따로 둔다.
+벡터 검색은 미러에서 1차 후보(n_results × MIRROR_RERANK_FACTOR)를 뽑고,
+후보의 원본 float32 벡터를 ChromaDB에서 꺼내 정확한 코사인으로 다시 정렬한다.
+
+- float16: 1536차원 기준 벡터당 3KB (float32의 1/2), 순위 변화 거의 없음
+- int8:    벡터당 1.5KB (1/4), 행별 스케일 1개. 재정렬로 품질 손실을 메운다
+- memmap으로 열기 때문에 실제로 읽은 페이지만 메모리에 올라간다
+  (게임 필터가 걸리면 해당 게임 행만 읽음)
+
+미러는 만든 시점의 스냅샷이다. 컬렉션 청크 수가 달라지거나 미러를 만든 뒤에 청크가 바뀌면
+(game_vector_index 세대 번호 갱신 시각) 검색 쪽에서 쓰지 않고 HNSW로 돌아가므로,
+벡터화 후에는 --build로 다시 만든다.
+
+사용법:
+    uv run python -m preprocessing.pipeline.quantized_index --build --dtype int8
+    uv run python -m preprocessing.pipeline.quantized_index --info
+    GMJJ_VECTOR_MIRROR=int8 uv run uvicorn web.main:app   # 검색에 사용
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from preprocessing.pipeline.config import VECTOR_MIRROR_DIR
+
+QUANTIZE_DTYPES = {"float16": np.float16, "int8": np.int8}
+
+# 1차 점수 계산 단위 (int8 → float32 변환 시 메모리 상한)
+_SCORE_BLOCK = 8192
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    L2 정규화된 벡터 양자화
+
+    Returns:
+        (양자화 벡터, int8이면 행별 스케일 / float16이면 None)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype != "int8":
+        raise ValueError(f"알 수 없는 양자화 형식: {dtype}")
+    scale = np.abs(vectors).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scale[:, None]), -127, 127).astype(np.int8)
+    return quantized, scale.astype(np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _atomic_save(path: str, array: np.ndarray):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+# ============================================================
+# 미러
+# ============================================================
+class QuantizedMirror:
+    """양자화 벡터 + 청크 ID / game_id / chunk_type (필터용)"""
+
+    def __init__(self, base: str, vectors: np.ndarray, scale: np.ndarray | None,
+                 game_ids: np.ndarray, chunk_codes: np.ndarray, meta: dict):
+        self.base = base
+        self.vectors = vectors
+        self.scale = scale
+        self.game_ids = game_ids
+        self.chunk_codes = chunk_codes
+        self.ids: list[str] = meta["ids"]
+        self.chunk_types: list[str] = meta["chunk_types"]
+        self.collection: str = meta["collection"]
+        self.dtype: str = meta["dtype"]
+        self.built_at: str = meta.get("built_at", "")
+        self.built_ts: float = meta.get("built_ts", 0.0)  # 읽기 시작 시각 (이후 청크 변경이 있으면 오래된 미러)
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dims(self) -> int:
+        return int(self.vectors.shape[1]) if self.count else 0
+
+    @staticmethod
+    def base_path(directory: str, alias: str, dtype: str) -> str:
+        return str(Path(directory) / f"{alias}.{dtype}")
+
+    def nbytes(self) -> int:
+        """미러 파일 크기 합"""
+        return sum(
+            p.stat().st_size for p in Path(self.base).parent.glob(Path(self.base).name + ".*")
+            if p.is_file()
+        )
+
+    # --------------------------------------------------------
+    # 생성 / 로드
+    # --------------------------------------------------------
+    @classmethod
+    def build(cls, collection, base: str, dtype: str, batch_size: int = 1000) -> "QuantizedMirror":
+        """컬렉션 전체를 읽어 미러 파일 생성 (임시 파일 → os.replace)"""
+        if dtype not in QUANTIZE_DTYPES:
+            raise ValueError(f"알 수 없는 양자화 형식: {dtype}")
+        Path(base).parent.mkdir(parents=True, exist_ok=True)
+        started = time.time()
+
+        ids: list[str] = []
+        game_ids: list[int] = []
+        chunk_types: list[str] = []
+        parts: list[np.ndarray] = []
+        scales: list[np.ndarray] = []
+
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                limit=batch_size, offset=offset, include=["embeddings", "metadatas"]
+            )
+            if not batch["ids"]:
+                break
+            quantized, scale = quantize(_normalize(np.asarray(batch["embeddings"], dtype=np.float32)), dtype)
+            parts.append(quantized)
+            if scale is not None:
+                scales.append(scale)
+            ids.extend(batch["ids"])
+            for meta in batch["metadatas"]:
+                meta = meta or {}
+                game_ids.append(int(meta.get("game_id") or 0))
+                chunk_types.append(meta.get("chunk_type", ""))
+            print(f"\r  [mirror] {len(ids)}/{total}", end="", flush=True)
+        print()
+
+        vocab = sorted(set(chunk_types))
+        codes = np.array([vocab.index(t) for t in chunk_types], dtype=np.int16)
+        vectors = np.concatenate(parts) if parts else np.zeros((0, 0), dtype=QUANTIZE_DTYPES[dtype])
+
+        _atomic_save(f"{base}.vectors.npy", vectors)
+        _atomic_save(f"{base}.game_ids.npy", np.array(game_ids, dtype=np.int64))
+        _atomic_save(f"{base}.chunk_types.npy", codes)
+        if dtype == "int8":
+            _atomic_save(f"{base}.scale.npy", np.concatenate(scales) if scales else np.zeros(0, np.float32))
+
+        # 메타 파일을 마지막에 교체 → 읽는 쪽은 메타 기준으로 행 수를 검증
+        meta = {
+            "collection": collection.name,
+            "dtype": dtype,
+            "ids": ids,
+            "chunk_types": vocab,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "built_ts": started,
+        }
+        tmp = f"{base}.meta.json.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, f"{base}.meta.json")
+        return cls.load(base)
+
+    @classmethod
+    def load(cls, base: str) -> "QuantizedMirror":
+        """미러 열기 (벡터는 memmap, 없으면 FileNotFoundError)"""
+        with open(f"{base}.meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        vectors = np.load(f"{base}.vectors.npy", mmap_mode="r")
+        scale = np.load(f"{base}.scale.npy") if meta["dtype"] == "int8" else None
+        game_ids = np.load(f"{base}.game_ids.npy")
+        chunk_codes = np.load(f"{base}.chunk_types.npy")
+        if len(vectors) != len(meta["ids"]):
+            raise ValueError(f"미러 파일 행 수 불일치: {base}")
+        return cls(base, vectors, scale, game_ids, chunk_codes, meta)
+
+    # --------------------------------------------------------
+    # 검색
+    # --------------------------------------------------------
+    def search(self, query: list[float], n: int, game_id: int | None = None,
+               chunk_type: str | None = None) -> list[tuple[str, float]]:
+        """
+        양자화 벡터로 1차 후보 검색
+
+        Returns:
+            [(청크 ID, 근사 코사인 유사도), ...] (높은 순)
+        """
+        if not self.count:
+            return []
+        q = _normalize(np.asarray(query, dtype=np.float32))
+
+        rows = None
+        if game_id:
+            rows = np.flatnonzero(self.game_ids == game_id)
+        if chunk_type:
+            if chunk_type not in self.chunk_types:
+                return []
+            code = self.chunk_types.index(chunk_type)
+            if rows is None:
+                rows = np.flatnonzero(self.chunk_codes == code)
+            else:
+                rows = rows[self.chunk_codes[rows] == code]
+        if rows is None:
+            rows = np.arange(self.count)
+        if not len(rows):
+            return []
+
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), _SCORE_BLOCK):
+            sel = rows[start:start + _SCORE_BLOCK]
+            block = np.asarray(self.vectors[sel], dtype=np.float32)
+            scores[start:start + len(sel)] = block @ q
+        if self.scale is not None:
+            scores *= self.scale[rows]
+
+        k = min(n, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+
+def rerank_exact(collection, query: list[float], candidate_ids: list[str], n: int) -> dict:
+    """
+    후보의 원본 float32 벡터로 정확한 코사인 재정렬
+
+    Returns:
+        collection.query()와 같은 모양 ({"ids", "distances", "documents", "metadatas"}: [[...]])
+    """
+    empty = {"ids": [[]], "distances": [[]], "documents": [[]], "metadatas": [[]]}
+    if not candidate_ids:
+        return empty
+    got = collection.get(ids=candidate_ids, include=["embeddings", "documents", "metadatas"])
+    if not got["ids"]:
+        return empty
+    q = _normalize(np.asarray(query, dtype=np.float32))
+    sims = _normalize(np.asarray(got["embeddings"], dtype=np.float32)) @ q
+    order = np.argsort(-sims)[:n]
+    return {
+        "ids": [[got["ids"][i] for i in order]],
+        "distances": [[float(1 - sims[i]) for i in order]],
+        "documents": [[got["documents"][i] for i in order]],
+        "metadatas": [[got["metadatas"][i] for i in order]],
+    }
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    from preprocessing.pipeline.chroma_store import get_collection
+
+    parser = argparse.ArgumentParser(description="양자화 벡터 미러")
+    parser.add_argument("--build", action="store_true", help="컬렉션에서 미러 생성")
+    parser.add_argument("--info", action="store_true", help="미러 현황")
+    parser.add_argument("--dtype", choices=list(QUANTIZE_DTYPES), default="int8")
+    parser.add_argument("--collection", default="game_rules", help="컬렉션 별칭")
+    args = parser.parse_args()
+
+    base = QuantizedMirror.base_path(VECTOR_MIRROR_DIR, args.collection, args.dtype)
+
+    if args.build:
+        col = get_collection(args.collection)
+        start = time.perf_counter()
+        mirror = QuantizedMirror.build(col, base, args.dtype)
+        float_bytes = mirror.count * mirror.dims * 4
+        print(f"  [mirror] {args.collection} ({mirror.collection}) {args.dtype}: "
+              f"{mirror.count}개 × {mirror.dims}차원, {mirror.nbytes() / 1024 / 1024:.1f}MB "
+              f"(float32 {float_bytes / 1024 / 1024:.1f}MB), {time.perf_counter() - start:.1f}s")
+
+    if args.info or not args.build:
+        try:
+            mirror = QuantizedMirror.load(base)
+        except FileNotFoundError:
+            print(f"  [mirror] 없음: {base}")
+            return
+        print(f"  [mirror] {base}: {mirror.collection}, {mirror.dtype}, "
+              f"{mirror.count}개 × {mirror.dims}차원, {mirror.nbytes() / 1024 / 1024:.1f}MB, "
+              f"생성 {mirror.built_at}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+LLM 호출 속도 제한 + 동시 실행
+
+섹션 12개를 한 번에 하나씩 부르고 사이사이 sleep(0.5)로 쉬면
+게임 1개 처리에 (섹션 수 × 응답 시간)이 걸린다.
+이 모듈은 섹션별 호출을 공용 스레드 풀에서 동시에 돌리고,
+고정 sleep 대신 모델별 RPM/TPM 토큰 버킷으로 제공자 한도를 지킨다.
+
+- RateLimiter: 분당 요청 수(RPM) + 분당 토큰 수(TPM) 버킷 2개.
+  요청 전 (입력 추정 + 출력 예약) 토큰을 잡아두고, 응답의 usage로 정산한다.
+  응답의 x-ratelimit-* 헤더(observe)와 429(pause)로 버킷을 보정한다 (llm_gateway).
+- map_ordered(): 공용 풀에서 동시 실행, 결과는 입력 순서 그대로
+  (풀 안에서 다시 부르면 교착을 피하려고 순차 실행)
+- amap_ordered(): async 노드용. 이벤트 루프에서 최대 LLM_CONCURRENCY개씩 동시 실행
+
+사용법:
+    from preprocessing.pipeline.rate_limit import map_ordered
+    results = map_ordered(lambda s: work(s), sections)
+    results = await amap_ordered(awork, sections)
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+from preprocessing.pipeline.config import (
+    LLM_CONCURRENCY,
+    LLM_OUTPUT_TOKENS_ESTIMATE,
+    LLM_RATE_LIMITS,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_THREAD_PREFIX = "gmjj-llm"
+
+# 이미지 1장 토큰 추정 (detail=high 기준 상한에 가깝게)
+_IMAGE_TOKENS = 800
+
+
+# ============================================================
+# 토큰 버킷
+# ============================================================
+class RateLimiter:
+    """RPM + TPM 토큰 버킷 (스레드 안전)"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._configured = (rpm, tpm)
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waited_s = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _try_acquire(self, tokens: int, start: float) -> float:
+        """예약 시도 1회. 성공하면 0, 아니면 다시 시도할 때까지 기다릴 초"""
+        with self._lock:
+            self._refill()
+            paused = self._paused_until - time.monotonic()
+            if paused > 0:
+                wait = paused
+            elif self._requests >= 1 and self._tokens >= tokens:
+                self._requests -= 1
+                self._tokens -= tokens
+                self.waited_s += time.monotonic() - start
+                return 0.0
+            else:
+                wait = max(
+                    (1 - self._requests) * 60 / self.rpm,
+                    (tokens - self._tokens) * 60 / self.tpm,
+                )
+        return min(max(wait, 0.01), 5.0)
+
+    def acquire(self, tokens: int) -> int:
+        """
+        요청 1건 + 토큰 예약 (한도가 찰 때까지 대기)
+
+        Returns:
+            실제로 예약한 토큰 수 (settle에 넘긴다)
+        """
+        tokens = min(tokens, self.tpm)
+        start = time.monotonic()
+        while wait := self._try_acquire(tokens, start):
+            time.sleep(wait)
+        return tokens
+
+    async def aacquire(self, tokens: int) -> int:
+        """acquire의 async 버전 (이벤트 루프를 막지 않고 대기, 버킷은 스레드 호출과 공유)"""
+        tokens = min(tokens, self.tpm)
+        start = time.monotonic()
+        while wait := self._try_acquire(tokens, start):
+            await asyncio.sleep(wait)
+        return tokens
+
+    def settle(self, reserved: int, used: int):
+        """예약량과 실제 사용량 차이 정산 (남으면 돌려주고 넘치면 더 뺀다)"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.tpm, self._tokens + reserved - used)
+
+    def observe(
+        self,
+        limit_requests: int | None = None,
+        limit_tokens: int | None = None,
+        remaining_requests: int | None = None,
+        remaining_tokens: int | None = None,
+    ):
+        """
+        제공자가 응답 헤더로 알려준 한도/잔량 반영
+
+        한도는 설정값과 서버 값 중 작은 쪽 (계정 tier가 설정보다 낮으면 따라 내려간다),
+        잔량은 버킷보다 적을 때만 줄인다 (다른 프로세스가 같은 키를 쓰는 경우).
+        """
+        with self._lock:
+            self._refill()
+            if limit_requests:
+                self.rpm = min(self._configured[0], limit_requests)
+            if limit_tokens:
+                self.tpm = min(self._configured[1], limit_tokens)
+            if remaining_requests is not None:
+                self._requests = min(self._requests, float(remaining_requests))
+            if remaining_tokens is not None:
+                self._tokens = min(self._tokens, float(remaining_tokens))
+
+    def pause(self, seconds: float):
+        """seconds 동안 새 요청을 막는다 (429 응답 시 모든 스레드가 같이 물러나도록)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """모델별 속도 제한기 (싱글톤, 한도는 config.LLM_RATE_LIMITS)"""
+    if model not in _limiters:
+        with _limiters_lock:
+            if model not in _limiters:
+                limits = LLM_RATE_LIMITS.get(model, LLM_RATE_LIMITS["default"])
+                _limiters[model] = RateLimiter(limits["rpm"], limits["tpm"])
+    return _limiters[model]
+
+
+def estimate_tokens(messages: list[dict], max_output: int | None = None) -> int:
+    """
+    요청 토큰 추정 (입력 + 출력 예약)
+
+    한국어는 글자당 토큰이 영어보다 많아서 2글자 = 1토큰으로 넉넉하게 잡는다.
+    """
+    chars = 0
+    images = 0
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            chars += len(content)
+            continue
+        for part in content:
+            if part.get("type") == "image_url":
+                images += 1
+            else:
+                chars += len(part.get("text", ""))
+    return chars // 2 + images * _IMAGE_TOKENS + (max_output or LLM_OUTPUT_TOKENS_ESTIMATE)
+
+
+def estimate_text_tokens(text: str) -> int:
+    """텍스트 1건 입력 토큰 추정 (estimate_tokens와 같은 2글자 = 1토큰, 출력 예약 없음 - 임베딩용)"""
+    return len(text) // 2 + 1
+
+
+# ============================================================
+# 공용 실행기
+# ============================================================
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_llm_executor() -> ThreadPoolExecutor:
+    """LLM 호출용 공용 스레드 풀 (싱글톤, LLM_CONCURRENCY개)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=LLM_CONCURRENCY, thread_name_prefix=_THREAD_PREFIX
+                )
+    return _executor
+
+
+def map_ordered(fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+    """
+    items를 공용 풀에서 동시에 처리, 결과는 입력 순서대로
+
+    하나라도 실패하면 아직 시작 안 한 작업은 취소하고 (입력 순서상) 첫 예외를 올린다.
+    """
+    items = list(items)
+    # 풀 스레드 안에서 다시 풀에 넣고 기다리면 워커가 모자라 교착될 수 있다
+    if len(items) <= 1 or threading.current_thread().name.startswith(_THREAD_PREFIX):
+        return [fn(item) for item in items]
+
+    # 호출한 쪽 컨텍스트(텔레메트리 스팬 등)를 작업마다 복사해서 풀 스레드로 넘긴다
+    futures = [get_llm_executor().submit(contextvars.copy_context().run, fn, item) for item in items]
+    try:
+        return [f.result() for f in futures]
+    except BaseException:
+        for f in futures:
+            f.cancel()
+        raise
+
+
+async def amap_ordered(fn: Callable[[T], Awaitable[R]], items: Iterable[T]) -> list[R]:
+    """
+    map_ordered의 async 버전 - 코루틴을 최대 LLM_CONCURRENCY개씩 동시에 실행, 결과는 입력 순서대로
+
+    하나라도 실패하면 나머지는 취소하고 첫 예외를 올린다.
+    """
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def _run(item: T) -> R:
+        async with semaphore:
+            return await fn(item)
+
+    tasks = [asyncio.ensure_future(_run(item)) for item in items]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
@@ -0,0 +1,151 @@
+"""
+임베딩 차원 변경 마이그레이션 (기존 컬렉션 재투영)
+
+text-embedding-3 계열은 앞쪽 차원에 정보가 몰리도록 학습되어 있어서
+벡터를 앞에서 d개만 자르고 L2 재정규화하면 dimensions=d로 요청한 것과 같은 공간이 된다.
+그래서 API를 다시 부르지 않고 저장된 벡터만으로 차원을 줄일 수 있다.
+
+- 새 물리 컬렉션에 잘린 벡터를 쓰고 별칭을 한 번에 교체 (blue/green, chroma_store)
+- 잘린 벡터는 임베딩 캐시에도 "모델@d" 키로 넣어 이후 색인 때 API 호출 없이 재사용
+- step6 content_hash도 새 임베딩 공간 기준으로 다시 계산
+  (안 하면 다음 벡터화 때 모든 청크가 "변경"으로 잡힌다)
+- local(해싱) 제공자는 자른 벡터가 같은 공간이 아니므로 문서를 다시 임베딩한다
+
+마이그레이션 후에는 GMJJ_EMBEDDING_DIMENSIONS=d 로 설정해야 쿼리 임베딩 차원이 맞는다.
+
+사용법:
+    uv run python -m preprocessing.pipeline.reproject --dims 512
+    uv run python -m preprocessing.pipeline.reproject --dims 256 --collections game_rules --keep-old
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from preprocessing.pipeline.chroma_store import (
+    collection_exists,
+    collection_metadata,
+    copy_collection,
+    drop_collection,
+    get_chroma_client,
+    get_collection,
+    new_physical_name,
+    switch_aliases,
+)
+from preprocessing.pipeline.config import (
+    EMBEDDING_PROVIDER,
+    VECTOR_MIRROR,
+    VECTOR_MIRROR_DIR,
+)
+from preprocessing.pipeline.embedding_cache import (
+    content_key,
+    get_cached_embedding_function,
+    get_embedding_store,
+)
+from preprocessing.pipeline.embeddings import embedding_model_id, get_embedding_function
+
+REPROJECT_COLLECTIONS = ("game_rules", "game_search")
+
+
+def truncate_normalize(vectors, dims: int) -> np.ndarray:
+    """앞 dims개 차원만 남기고 L2 재정규화"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.shape[1] < dims:
+        raise ValueError(f"현재 차원({vectors.shape[1]})보다 큰 차원({dims})으로는 줄일 수 없습니다.")
+    cut = vectors[:, :dims]
+    norms = np.linalg.norm(cut, axis=1, keepdims=True)
+    return cut / np.where(norms == 0, 1, norms)
+
+
+def _rehash(document: str, meta: dict, model_id: str) -> dict:
+    """step6 upsert-by-diff용 content_hash를 새 임베딩 공간 기준으로 갱신"""
+    if not meta or "content_hash" not in meta:
+        return meta
+    from preprocessing.pipeline.step6_vectorize import chunk_content_hash
+
+    return {**meta, "content_hash": chunk_content_hash(document, meta, model_id)}
+
+
+def reproject_collection(alias: str, dims: int, batch_size: int = 1000) -> tuple[str, int]:
+    """
+    별칭이 가리키는 컬렉션을 dims 차원으로 옮긴 새 물리 컬렉션 생성 (별칭 교체는 호출자가)
+
+    Returns:
+        (새 물리 컬렉션 이름, 옮긴 청크 수)
+    """
+    source = get_collection(alias)
+    target_name = new_physical_name(alias)
+    model_id = embedding_model_id(dimensions=dims)
+    target = get_chroma_client().create_collection(
+        name=target_name,
+        embedding_function=get_embedding_function(dimensions=dims),
+        metadata=collection_metadata(dims, alias=alias),
+    )
+
+    reembed = EMBEDDING_PROVIDER == "local"
+    embed = get_cached_embedding_function(dimensions=dims) if reembed else None
+    store = get_embedding_store()
+
+    def transform(batch: dict) -> dict:
+        documents = batch["documents"]
+        if reembed:
+            vectors = np.asarray(embed(documents), dtype=np.float32)
+        else:
+            vectors = truncate_normalize(batch["embeddings"], dims)
+            store.put_many(
+                model_id,
+                [(content_key(model_id, dims, doc), vec) for doc, vec in zip(documents, vectors)],
+            )
+        return {
+            **batch,
+            "embeddings": vectors,
+            "metadatas": [
+                _rehash(doc, meta, model_id) for doc, meta in zip(documents, batch["metadatas"])
+            ],
+        }
+
+    moved = copy_collection(source, target, batch_size, transform=transform, label=f"reproject {alias}")
+    return target_name, moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 차원 변경 (기존 컬렉션 재투영)")
+    parser.add_argument("--dims", type=int, required=True, help="새 임베딩 차원 (예: 512)")
+    parser.add_argument("--collections", nargs="+", default=list(REPROJECT_COLLECTIONS),
+                        help="대상 컬렉션 별칭")
+    parser.add_argument("--keep-old", action="store_true", help="이전 컬렉션 남겨두기 (롤백용)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    targets = {}
+    for alias in args.collections:
+        if not collection_exists(alias):
+            print(f"  [reproject] {alias}: 컬렉션 없음 (건너뜀)")
+            continue
+        name, moved = reproject_collection(alias, args.dims)
+        targets[alias] = name
+        print(f"  [reproject] {alias} → {name}: {moved}청크")
+
+    if not targets:
+        return
+
+    previous = switch_aliases(targets)
+    print(f"  [reproject] 별칭 교체 완료 ({time.perf_counter() - start:.1f}s)")
+    if not args.keep_old:
+        for name in previous.values():
+            if drop_collection(name):
+                print(f"  [reproject] 이전 컬렉션 삭제: {name}")
+
+    if VECTOR_MIRROR and "game_rules" in targets:
+        from preprocessing.pipeline.quantized_index import QuantizedMirror
+
+        base = QuantizedMirror.base_path(VECTOR_MIRROR_DIR, "game_rules", VECTOR_MIRROR)
+        QuantizedMirror.build(get_collection("game_rules"), base, VECTOR_MIRROR)
+
+    print(f"\n  검색/색인 설정: GMJJ_EMBEDDING_DIMENSIONS={args.dims} "
+          f"(임베딩 공간: {embedding_model_id(dimensions=args.dims)})")
+
+
+if __name__ == "__main__":
+    main()
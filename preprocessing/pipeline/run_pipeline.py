@@ -6,15 +6,23 @@
 사용법:
     uv run python -m preprocessing.pipeline.run_pipeline --init              # 파이프라인 레코드 초기화
     uv run python -m preprocessing.pipeline.run_pipeline                     # 전체 실행
+    uv run python -m preprocessing.pipeline.run_pipeline --concurrency 8     # 게임 8개씩 동시 실행
     uv run python -m preprocessing.pipeline.run_pipeline --rule-id 1         # 특정 룰만
     uv run python -m preprocessing.pipeline.run_pipeline --step ocr          # 특정 스텝만
     uv run python -m preprocessing.pipeline.run_pipeline --rule-id 1 --step parse  # 특정 룰의 특정 스텝
+    uv run python -m preprocessing.pipeline.run_pipeline --rule-id 1 --llm-cache ro  # 캐시된 응답만으로 재생
+    uv run python -m preprocessing.pipeline.run_pipeline --report            # 스텝별 시간/토큰/비용 백분위
 """
 
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-from preprocessing.pipeline import STEPS, db
+from preprocessing.pipeline import STEPS, db, fingerprints, telemetry
+from preprocessing.pipeline.batch_progress import BatchProgress
+from preprocessing.pipeline.config import BATCH_CONCURRENCY
+from preprocessing.pipeline.llm_cache import CACHE_MODES, set_mode
+from preprocessing.pipeline.llm_gateway import print_usage_summary
 from preprocessing.pipeline.step1_collect import process_collect
 from preprocessing.pipeline.step2_translate import process_translate
 from preprocessing.pipeline.step3_parse import process_parse
@@ -45,37 +53,63 @@ def init_all_pipelines():
     print("초기화 완료!")
 
 
+def _inputs_unchanged(rule_id: int, step: str, upstream_ran: bool = False) -> bool:
+    """
+    완료/스킵된 스텝의 입력 지문이 마지막 실행 때와 같은지
+
+    지문 기록이 없는 (이 기능 이전에 끝난) 스텝은 앞 스텝이 이번에 다시 돌지 않았으면
+    지금 입력을 기준으로 기록만 하고 그대로 둔다 (기존 완료 룰 전체가 재실행되지 않도록).
+    """
+    current = fingerprints.step_fingerprint(rule_id, step)
+    stored = db.get_step_fingerprint(rule_id, step)
+    if stored is None and not upstream_ran:
+        db.set_step_fingerprint(rule_id, step, current)
+        return True
+    return stored == current
+
+
 def run_step_for_rule(rule_id: int, step: str):
-    """특정 rule의 특정 step 실행"""
+    """특정 rule의 특정 step 실행 (완료된 스텝은 입력이 바뀐 경우에만 다시 실행)"""
     # 이미 완료된 스텝인지 확인
     status = db.get_step_status(rule_id, step)
-    if status == "done":
-        print(f"  [{step}] 이미 완료 (skip)")
-        return True
-    if status == "skipped":
-        print(f"  [{step}] 이미 스킵됨")
-        return True
+    if status in ("done", "skipped"):
+        if _inputs_unchanged(rule_id, step):
+            print(f"  [{step}] {'이미 완료' if status == 'done' else '이미 스킵됨'} - 입력 변경 없음 (skip)")
+            return True
+        print(f"  [{step}] 입력 변경 → 증분 재실행")
 
-    # 실행
+    return _run_step(rule_id, step)
+
+
+def _run_step(rule_id: int, step: str) -> bool:
+    """스텝 실행 (텔레메트리 스팬) + 끝난 뒤 입력 지문 기록"""
     runner = STEP_RUNNERS.get(step)
     if not runner:
         print(f"  [ERROR] 알 수 없는 스텝: {step}")
         return False
 
     try:
-        runner(rule_id)
+        with telemetry.span("pipeline", step, rule_id):
+            runner(rule_id)
+        db.set_step_fingerprint(rule_id, step, fingerprints.step_fingerprint(rule_id, step))
         return True
     except Exception as e:
         print(f"  [ERROR] {step} 실패: {e}")
         return False
 
 
-def run_pipeline_for_rule(rule_id: int, target_step: str | None = None):
+def run_pipeline_for_rule(
+    rule_id: int, target_step: str | None = None, progress: BatchProgress | None = None
+) -> bool:
     """
     rule 1건에 대해 파이프라인 실행
 
     target_step이 지정되면 해당 스텝만 실행.
-    지정하지 않으면 pending/error 상태인 스텝을 순서대로 실행.
+    지정하지 않으면 pending/error 상태인 스텝과, 완료됐지만 입력 지문이 바뀐 스텝을 순서대로 실행.
+    다시 도는 스텝도 소스/섹션 단위 지문이 같은 산출물은 재사용한다 (fingerprints).
+
+    Returns:
+        실행한 스텝이 모두 성공했으면 True
     """
     rule = db.get_rule(rule_id)
     game_id = rule["game_id"]
@@ -88,26 +122,86 @@ def run_pipeline_for_rule(rule_id: int, target_step: str | None = None):
     print(f"\n{'='*50}")
     print(f"[rule_id={rule_id}] {game_name}")
     print(f"{'='*50}")
+    if progress is not None:
+        progress.set_name(rule_id, game_name)
+
+    # 이번 실행의 스텝 스팬을 run_id 하나로 묶는다
+    with telemetry.run(rule_id, game_name):
+        return _run_steps(rule_id, target_step, progress)
 
+
+def _run_steps(rule_id: int, target_step: str | None, progress: BatchProgress | None) -> bool:
+    """run_pipeline_for_rule 본체: 대상 스텝(없으면 전체)을 순서대로 실행"""
     if target_step:
         # 특정 스텝만 실행
-        run_step_for_rule(rule_id, target_step)
+        return _run_tracked(rule_id, target_step, progress)
     else:
         # 전체 파이프라인 순서대로 실행
+        reused_steps = []
+        upstream_ran = False
         for step in STEPS:
             status = db.get_step_status(rule_id, step)
 
-            # pending이나 error만 실행 (done/skipped은 건너뜀)
+            # done/skipped은 입력이 그대로면 건너뜀 (산출물 재사용)
             if status in ("done", "skipped"):
-                print(f"  [{step}] {status} (건너뜀)")
-                continue
+                if _inputs_unchanged(rule_id, step, upstream_ran):
+                    print(f"  [{step}] {status} - 입력 변경 없음 (재사용)")
+                    reused_steps.append(step)
+                    continue
+                print(f"  [{step}] {status} - 입력 변경 → 증분 재실행")
 
-            success = run_step_for_rule(rule_id, step)
+            success = _run_tracked(rule_id, step, progress, check_status=False)
+            upstream_ran = True
 
             # 실패하면 이후 스텝 중단
             if not success:
                 print(f"  [WARN] {step} 실패로 이후 스텝 중단")
-                break
+                return False
+
+        if reused_steps:
+            print(f"  [재사용] 스텝 {len(reused_steps)}/{len(STEPS)}: {', '.join(reused_steps)}")
+        return True
+
+
+def _run_tracked(
+    rule_id: int, step: str, progress: BatchProgress | None, check_status: bool = True
+) -> bool:
+    """run_step_for_rule(check_status=False면 상태 확인 없이 바로 실행) + 진행 현황 기록"""
+    if progress is not None:
+        progress.node_started(rule_id, step)
+    try:
+        return run_step_for_rule(rule_id, step) if check_status else _run_step(rule_id, step)
+    finally:
+        if progress is not None:
+            progress.node_finished(rule_id, step)
+
+
+def run_batch(rule_ids: list[int], target_step: str | None = None, concurrency: int = BATCH_CONCURRENCY):
+    """
+    여러 rule을 게임 concurrency개씩 동시에 실행
+
+    LLM 호출은 모든 게임이 공용 풀 + RPM/TPM 버킷을 같이 쓴다.
+    게임 하나가 실패해도 나머지는 계속 진행한다 (실패는 마지막 요약에 모아서 출력).
+    """
+    progress = BatchProgress(total=len(rule_ids))
+
+    def _run_one(rule_id: int):
+        progress.start(rule_id)
+        try:
+            ok = run_pipeline_for_rule(rule_id, target_step=target_step, progress=progress)
+            progress.finish(rule_id, ok=ok, error=None if ok else "스텝 실패")
+        except Exception as e:
+            print(f"  [batch] [ERROR] rule_id={rule_id} 실패: {e}")
+            progress.finish(rule_id, ok=False, error=f"{type(e).__name__}: {e}")
+
+    progress.start_reporter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gmjj-rule") as pool:
+            list(pool.map(_run_one, rule_ids))
+    finally:
+        progress.stop_reporter()
+    progress.print_summary()
+    return progress
 
 
 def add_source(rule_id: int, source_type: str, url: str = None, file: str = None):
@@ -134,8 +228,22 @@ def main():
     parser.add_argument("--type", type=str, help="소스 타입 (pdf/namuwiki/youtube/blog)")
     parser.add_argument("--url", type=str, help="소스 URL")
     parser.add_argument("--file", type=str, help="소스 파일 경로")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help=f"동시에 처리할 게임 수 (기본 {BATCH_CONCURRENCY})")
+    parser.add_argument("--llm-cache", choices=CACHE_MODES,
+                        help="LLM 응답 캐시 모드 (rw: 기본, ro: 재생 전용, off: 사용 안 함)")
+    parser.add_argument("--report", action="store_true",
+                        help="텔레메트리 스팬 로그 → 스텝별 게임당 시간/토큰/비용 백분위 (--rule-id로 한 게임만)")
     args = parser.parse_args()
 
+    if args.llm_cache:
+        set_mode(args.llm_cache)
+
+    # 텔레메트리 리포트 (실행 없음)
+    if args.report:
+        telemetry.print_report(telemetry.load_spans(), runner="pipeline", rule_id=args.rule_id)
+        return
+
     # 초기화 모드
     if args.init:
         init_all_pipelines()
@@ -160,12 +268,15 @@ def main():
     if args.step:
         print(f"대상 스텝: {args.step}")
 
-    for rule_id in rule_ids:
-        run_pipeline_for_rule(rule_id, target_step=args.step)
-
-    print(f"\n{'='*50}")
-    print("파이프라인 실행 완료!")
-    print(f"{'='*50}")
+    if len(rule_ids) == 1:
+        run_pipeline_for_rule(rule_ids[0], target_step=args.step)
+        print(f"\n{'='*50}")
+        print("파이프라인 실행 완료!")
+        print(f"{'='*50}")
+    else:
+        print(f"게임 {max(1, args.concurrency)}개씩 동시 실행")
+        run_batch(rule_ids, target_step=args.step, concurrency=max(1, args.concurrency))
+    print_usage_summary()
 
 
 if __name__ == "__main__":
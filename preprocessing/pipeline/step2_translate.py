@@ -5,23 +5,38 @@ language가 'ko'가 아닌 경우에만 실행.
 한국어 룰북은 이 단계를 skip한다.
 """
 
-import os
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from preprocessing.pipeline.config import TRANSLATE_MODEL, TRANSLATE_CHUNK_SIZE
 from preprocessing.pipeline import db
+from preprocessing.pipeline.fingerprints import fingerprint, text_hash
+from preprocessing.pipeline.llm_gateway import chat
 
 load_dotenv()
 
+# 번역 프롬프트 (바뀌면 translate_fingerprint가 달라져 지난 번역을 재사용하지 않는다)
+_SYSTEM_PROMPT = (
+    "당신은 보드게임 룰북 전문 번역가입니다. "
+    "원문의 마크다운 서식(제목, 표, 리스트 등)을 그대로 유지하면서 "
+    "자연스러운 한국어로 번역하세요. "
+    "보드게임 용어는 한국에서 통용되는 표현을 사용하세요."
+)
+_USER_PROMPT = "다음 {source_lang} 텍스트를 한국어로 번역하세요:\n\n{text}"
+_TEMPERATURE = 0.3
 
-def get_openai_client() -> OpenAI:
-    """OpenAI 클라이언트 반환"""
-    api_key = os.getenv("OPENAI_API_KEY", "")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY가 .env에 없습니다.")
-    return OpenAI(api_key=api_key)
+
+def translate_prompt_hash() -> str:
+    """번역 프롬프트 템플릿(시스템 + 사용자) 해시"""
+    return text_hash(_SYSTEM_PROMPT + "\x00" + _USER_PROMPT)
+
+
+def translate_fingerprint(text: str, source_lang: str) -> str:
+    """번역 입력 지문 - 모델, 분할 크기, 원본 언어, 원문, 프롬프트 템플릿"""
+    return fingerprint(
+        TRANSLATE_MODEL, TRANSLATE_CHUNK_SIZE, source_lang, text_hash(text),
+        translate_prompt_hash(), _TEMPERATURE,
+    )
 
 
 def translate_text(text: str, source_lang: str) -> str:
@@ -38,11 +53,9 @@ def translate_text(text: str, source_lang: str) -> str:
     Returns:
         한국어로 번역된 텍스트
     """
-    client = get_openai_client()
-
     # 짧은 텍스트는 한번에 번역
     if len(text) <= TRANSLATE_CHUNK_SIZE:
-        return _translate_chunk(client, text, source_lang)
+        return _translate_chunk(text, source_lang)
 
     # 긴 텍스트는 분할 번역
     # 더블 줄바꿈(\n\n) 기준으로 문단 분리 후, 청크 단위로 묶기
@@ -65,32 +78,22 @@ def translate_text(text: str, source_lang: str) -> str:
     translated_chunks = []
     for i, chunk in enumerate(chunks):
         print(f"    번역 중... ({i + 1}/{len(chunks)})")
-        translated = _translate_chunk(client, chunk, source_lang)
+        translated = _translate_chunk(chunk, source_lang)
         translated_chunks.append(translated)
 
     return "\n\n".join(translated_chunks)
 
 
-def _translate_chunk(client: OpenAI, text: str, source_lang: str) -> str:
+def _translate_chunk(text: str, source_lang: str) -> str:
     """텍스트 1개 청크를 한국어로 번역"""
-    response = client.chat.completions.create(
+    response = chat(
+        label="translate",
         model=TRANSLATE_MODEL,
         messages=[
-            {
-                "role": "system",
-                "content": (
-                    "당신은 보드게임 룰북 전문 번역가입니다. "
-                    "원문의 마크다운 서식(제목, 표, 리스트 등)을 그대로 유지하면서 "
-                    "자연스러운 한국어로 번역하세요. "
-                    "보드게임 용어는 한국에서 통용되는 표현을 사용하세요."
-                ),
-            },
-            {
-                "role": "user",
-                "content": f"다음 {source_lang} 텍스트를 한국어로 번역하세요:\n\n{text}",
-            },
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": _USER_PROMPT.format(source_lang=source_lang, text=text)},
         ],
-        temperature=0.3,
+        temperature=_TEMPERATURE,
     )
     return response.choices[0].message.content.strip()
 
@@ -9,16 +9,23 @@ PDF 소스는 VLM(이미지+텍스트)으로 파싱하여 시각 정보도 활
 
 import base64
 import json
-import os
 import time
 from pathlib import Path
 
 import fitz  # PyMuPDF
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from preprocessing.pipeline.config import PARSE_MODEL, PARSE_VLM_MODEL, PROMPTS_DIR, PROJECT_ROOT
 from preprocessing.pipeline import SECTIONS, db
+from preprocessing.pipeline.fingerprints import (
+    file_hash,
+    fingerprint,
+    request_fingerprint,
+    reusable,
+    summarize_reuse,
+)
+from preprocessing.pipeline.llm_gateway import achat, chat
+from preprocessing.pipeline.rate_limit import map_ordered
 
 load_dotenv()
 
@@ -70,31 +77,23 @@ def _get_section_prompt() -> str:
     )
 
 
-def parse_source_text(client: OpenAI, game_name: str, text: str) -> dict:
-    """텍스트 소스 1개를 12섹션으로 파싱"""
+def _text_request(game_name: str, text: str) -> dict:
+    """텍스트 소스 파싱 요청 (chat/achat 인자)"""
     prompt = (
         _get_section_prompt()
         + f"\n## 게임: {game_name}\n\n## 텍스트:\n\n{text}"
     )
-
-    response = client.chat.completions.create(
-        model=PARSE_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        response_format={"type": "json_object"},
-        temperature=0.2,
-    )
-
-    result = json.loads(response.choices[0].message.content)
-    for section in SECTIONS:
-        if section not in result:
-            result[section] = ""
-    return result
+    return {
+        "label": "parse",
+        "model": PARSE_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.2,
+    }
 
 
-def parse_source_vlm(
-    client: OpenAI, game_name: str, text: str, page_images: list[str]
-) -> dict:
-    """PDF 소스를 VLM으로 파싱 (이미지+텍스트)"""
+def _vlm_request(game_name: str, text: str, page_images: list[str]) -> dict:
+    """PDF VLM 파싱 요청 (chat/achat 인자)"""
     content = []
 
     # VLM 안내
@@ -121,26 +120,98 @@ def parse_source_vlm(
         "text": _get_section_prompt() + f"\n## 게임: {game_name}\n\n## OCR 텍스트:\n\n{text}",
     })
 
-    response = client.chat.completions.create(
-        model=PARSE_VLM_MODEL,
-        messages=[{"role": "user", "content": content}],
-        response_format={"type": "json_object"},
-        temperature=0.2,
-        max_completion_tokens=16000,
-    )
+    return {
+        "label": "parse_vlm",
+        "model": PARSE_VLM_MODEL,
+        "messages": [{"role": "user", "content": content}],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.2,
+        "max_completion_tokens": 16000,
+    }
+
 
-    result = json.loads(response.choices[0].message.content)
+def _parse_sections(content: str) -> dict:
+    """파싱 응답 JSON → 12섹션 dict (없는 섹션은 빈 문자열)"""
+    result = json.loads(content)
     for section in SECTIONS:
         if section not in result:
             result[section] = ""
     return result
 
 
+def parse_source_text(game_name: str, text: str) -> dict:
+    """텍스트 소스 1개를 12섹션으로 파싱"""
+    response = chat(**_text_request(game_name, text))
+    return _parse_sections(response.choices[0].message.content)
+
+
+def parse_source_vlm(
+    game_name: str, text: str, page_images: list[str]
+) -> dict:
+    """PDF 소스를 VLM으로 파싱 (이미지+텍스트)"""
+    response = chat(**_vlm_request(game_name, text, page_images))
+    return _parse_sections(response.choices[0].message.content)
+
+
+async def aparse_source_text(game_name: str, text: str) -> dict:
+    """parse_source_text의 async 버전 (에이전트 parse 노드)"""
+    response = await achat(**_text_request(game_name, text))
+    return _parse_sections(response.choices[0].message.content)
+
+
+async def aparse_source_vlm(
+    game_name: str, text: str, page_images: list[str]
+) -> dict:
+    """parse_source_vlm의 async 버전 (에이전트 parse 노드)"""
+    response = await achat(**_vlm_request(game_name, text, page_images))
+    return _parse_sections(response.choices[0].message.content)
+
+
+def parse_fingerprint(game_name: str, text: str, page_file: str | Path | None = None) -> str:
+    """소스 파싱 입력 지문 - page_file이 있으면 VLM 요청 (페이지 이미지는 렌더링 대신 파일 해시)"""
+    if page_file:
+        return fingerprint(request_fingerprint(_vlm_request(game_name, text, [])), file_hash(page_file))
+    return request_fingerprint(_text_request(game_name, text))
+
+
 # ============================================================
 # 2단계: 섹션별 취합
 # ============================================================
+def _merge_request(game_name: str, section_name: str, valid: list[tuple[str, str]]) -> dict:
+    """섹션 취합 요청 (chat 인자) - valid: 비어있지 않은 [(소스라벨, 텍스트), ...]"""
+    sources_text = ""
+    for i, (label, text) in enumerate(valid):
+        sources_text += f"\n[소스 {i+1} - {label}]\n{text}\n"
+
+    prompt = (
+        f"게임 '{game_name}'의 '{section_name}' 섹션에 대해 여러 소스가 있습니다.\n"
+        f"이 소스들을 하나로 취합하여 가장 완전한 내용을 만들어 주세요.\n\n"
+        f"규칙:\n"
+        f"- 소스 1이 최우선 (공식 룰북). 정보 충돌 시 소스 1 기준.\n"
+        f"- 소스 1에 없는 유용한 정보(팁, 예시, 자주 하는 실수 등)는 하위 소스에서 보충.\n"
+        f"- 최대한 상세하게. 요약하지 말 것.\n"
+        f"- 결과는 마크다운 텍스트로 출력 (JSON 아님).\n"
+        f"{sources_text}"
+    )
+
+    return {
+        "label": "parse_merge",
+        "model": PARSE_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.2,
+    }
+
+
+def merge_fingerprint(game_name: str, section_name: str, source_texts: list[tuple[str, str]]) -> str:
+    """섹션 취합 입력 지문 (소스 1개면 LLM 없이 그대로라 텍스트 해시)"""
+    valid = [(label, text) for label, text in source_texts if text.strip()]
+    if len(valid) <= 1:
+        return fingerprint("single", [text for _, text in valid])
+    return request_fingerprint(_merge_request(game_name, section_name, valid))
+
+
 def merge_section(
-    client: OpenAI, game_name: str, section_name: str, source_texts: list[tuple[str, str]]
+    game_name: str, section_name: str, source_texts: list[tuple[str, str]]
 ) -> str:
     """
     하나의 섹션에 대해 여러 소스를 우선순위대로 취합
@@ -161,26 +232,7 @@ def merge_section(
         return valid[0][1]
 
     # 여러 소스 취합
-    sources_text = ""
-    for i, (label, text) in enumerate(valid):
-        sources_text += f"\n[소스 {i+1} - {label}]\n{text}\n"
-
-    prompt = (
-        f"게임 '{game_name}'의 '{section_name}' 섹션에 대해 여러 소스가 있습니다.\n"
-        f"이 소스들을 하나로 취합하여 가장 완전한 내용을 만들어 주세요.\n\n"
-        f"규칙:\n"
-        f"- 소스 1이 최우선 (공식 룰북). 정보 충돌 시 소스 1 기준.\n"
-        f"- 소스 1에 없는 유용한 정보(팁, 예시, 자주 하는 실수 등)는 하위 소스에서 보충.\n"
-        f"- 최대한 상세하게. 요약하지 말 것.\n"
-        f"- 결과는 마크다운 텍스트로 출력 (JSON 아님).\n"
-        f"{sources_text}"
-    )
-
-    response = client.chat.completions.create(
-        model=PARSE_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-    )
+    response = chat(**_merge_request(game_name, section_name, valid))
 
     return response.choices[0].message.content.strip()
 
@@ -202,6 +254,7 @@ def process_parse(rule_id: int):
 
     1단계: 각 소스를 개별 파싱 (12섹션)
     2단계: 섹션별로 소스 간 취합 (우선순위대로)
+    입력 지문(fingerprints)이 마지막 실행과 같은 소스 파싱/섹션 취합은 rule_artifacts에서 재사용한다.
     """
     db.start_step(rule_id, "parse")
 
@@ -214,8 +267,6 @@ def process_parse(rule_id: int):
         game = sb.table("games").select("name_ko").eq("id", game_id).execute()
         game_name = game.data[0]["name_ko"] if game.data else f"game_{game_id}"
 
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
         # 소스 목록 (우선순위 순)
         sources = db.get_rule_sources(rule_id)
         processed = [s for s in sources if s.get("status") == "processed" and s.get("raw_content")]
@@ -223,48 +274,65 @@ def process_parse(rule_id: int):
         if not processed:
             raise ValueError("수집된 소스가 없음")
 
-        # ---- 1단계: 소스별 개별 파싱 ----
+        # ---- 1단계: 소스별 개별 파싱 (입력 지문이 같은 소스는 재사용) ----
         print(f"  [파싱] {game_name} - 1단계: {len(processed)}개 소스 개별 파싱")
 
-        parsed_by_source = []  # [(소스타입, 파싱결과dict), ...]
-
-        for src in processed:
+        parse_artifacts = db.get_artifacts(rule_id, "parse")
+        merge_artifacts = db.get_artifacts(rule_id, "parse_merge")
+        new_artifacts: dict[str, tuple[str, object]] = {}
+        reused: list[str] = []
+
+        def _page_file(src: dict) -> Path | None:
+            """PDF 소스의 페이지 이미지 원본 (PDF/이미지 파일이 있을 때만)"""
+            source_file = src.get("source_file", "")
+            if src["source_type"] != "pdf" or not source_file:
+                return None
+            file_path = PROJECT_ROOT / source_file
+            if file_path.exists() and file_path.suffix.lower() in (".pdf", ".png", ".jpg", ".jpeg", ".webp"):
+                return file_path
+            return None
+
+        def _parse(src: dict) -> tuple[str, dict]:
             stype = src["source_type"]
-            label = SOURCE_LABELS.get(stype, stype)
             raw_content = src["raw_content"]
-
-            print(f"    {stype} ({len(raw_content)}자)...", end=" ", flush=True)
+            key = f"{stype}:{src['id']}"
 
             # PDF는 VLM 파싱 (이미지 포함)
-            if stype == "pdf":
-                source_file = src.get("source_file", "")
-                page_images = []
-                if source_file:
-                    file_path = PROJECT_ROOT / source_file
-                    if file_path.exists():
-                        ext = file_path.suffix.lower()
-                        if ext == ".pdf":
-                            page_images = pdf_pages_to_images(str(file_path))
-                        elif ext in (".png", ".jpg", ".jpeg", ".webp"):
-                            page_images = [image_file_to_base64(str(file_path))]
-
-                if page_images:
-                    parsed = parse_source_vlm(client, game_name, raw_content, page_images)
+            page_file = _page_file(src)
+            fp = parse_fingerprint(game_name, raw_content, page_file)
+            parsed = reusable(parse_artifacts.get(key), fp)
+            if parsed is not None:
+                print(f"    {stype}: 입력 변경 없음 (재사용)")
+                reused.append(f"parse:{key}")
+                return stype, parsed
+
+            page_images = []
+            if page_file is not None:
+                if page_file.suffix.lower() == ".pdf":
+                    page_images = pdf_pages_to_images(str(page_file))
                 else:
-                    parsed = parse_source_text(client, game_name, raw_content)
+                    page_images = [image_file_to_base64(str(page_file))]
+
+            if page_images:
+                parsed = parse_source_vlm(game_name, raw_content, page_images)
             else:
-                parsed = parse_source_text(client, game_name, raw_content)
+                parsed = parse_source_text(game_name, raw_content)
 
+            new_artifacts[key] = (fp, parsed)
             filled = sum(1 for v in parsed.values() if v.strip())
-            print(f"{filled}/12 [OK]")
-            parsed_by_source.append((stype, parsed))
-            time.sleep(0.5)
+            print(f"    {stype} ({len(raw_content)}자): {filled}/12 [OK]")
+            return stype, parsed
 
-        # ---- 2단계: 섹션별 취합 ----
-        print(f"  [파싱] 2단계: 섹션별 취합")
+        # 소스별 동시 파싱 (RPM/TPM 제한 경유), 결과는 우선순위 순서 유지
+        start = time.perf_counter()
+        parsed_by_source = map_ordered(_parse, processed)  # [(소스타입, 파싱결과dict), ...]
+        db.save_artifacts(rule_id, "parse", new_artifacts)
+        print(f"  [파싱] 1단계 완료 ({time.perf_counter() - start:.1f}s)")
 
-        merged_sections = {}
+        # ---- 2단계: 섹션별 취합 (입력 지문이 같은 섹션은 재사용 - DB 섹션도 건드리지 않음) ----
+        print(f"  [파싱] 2단계: 섹션별 취합")
 
+        section_sources = {}
         for section_name in SECTIONS:
             # 우선순위 순으로 각 소스의 해당 섹션 텍스트 수집
             source_texts = []
@@ -273,26 +341,37 @@ def process_parse(rule_id: int):
                 if text.strip():
                     label = SOURCE_LABELS.get(stype, stype)
                     source_texts.append((label, text))
-
-            if not source_texts:
-                merged_sections[section_name] = ""
-                continue
-
-            print(f"    {section_name} ({len(source_texts)}소스)...", end=" ", flush=True)
-
-            merged = merge_section(client, game_name, section_name, source_texts)
-            merged_sections[section_name] = merged
-            print(f"{len(merged)}자 [OK]")
-            time.sleep(0.3)
-
-        # 결과 저장
+            section_sources[section_name] = source_texts
+
+        merge_fps = {
+            name: merge_fingerprint(game_name, name, texts) for name, texts in section_sources.items()
+        }
+        todo = [name for name in SECTIONS if reusable(merge_artifacts.get(name), merge_fps[name]) is None]
+        reused.extend(f"parse_merge:{name}" for name in SECTIONS if name not in todo and section_sources[name])
+
+        def _merge(section_name: str) -> str:
+            source_texts = section_sources[section_name]
+            merged = merge_section(game_name, section_name, source_texts)
+            print(f"    {section_name} ({len(source_texts)}소스): {len(merged)}자 [OK]")
+            return merged
+
+        start = time.perf_counter()
+        merged_sections = dict(zip(todo, map_ordered(_merge, todo)))
+        db.save_artifacts(rule_id, "parse_merge", {name: (merge_fps[name], merged_sections[name]) for name in todo})
+        print(f"  [파싱] 2단계 완료 ({time.perf_counter() - start:.1f}s)")
+
+        # 결과 저장 (다시 취합한 섹션만 - 재사용 섹션은 다음 스텝 결과가 그대로 남는다)
         filled = sum(1 for v in merged_sections.values() if v.strip())
         total_chars = sum(len(v) for v in merged_sections.values())
 
-        db.update_rule_sections(rule_id, merged_sections)
-        db.update_rule(rule_id, {"status": "parsed"})
+        if merged_sections:
+            db.update_rule_sections(rule_id, merged_sections)
+            db.update_rule(rule_id, {"status": "parsed"})
 
-        log_msg = f"성공: {filled}/12 섹션, {total_chars}자, {len(processed)}소스 취합"
+        log_msg = (
+            f"성공: {len(merged_sections)}개 섹션 취합 ({filled}개 내용 있음, {total_chars}자), "
+            f"{len(processed)}소스 | 재사용: {summarize_reuse(reused)}"
+        )
         print(f"  [파싱] {log_msg}")
         db.finish_step(rule_id, "parse", log_msg)
 
@@ -6,14 +6,20 @@ Step 4: LLM 전처리 - 섹션 정리 + 플레이북 생성
 """
 
 import json
-import os
 import time
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from preprocessing.pipeline.config import PREPROCESS_MODEL, PROMPTS_DIR
-from preprocessing.pipeline import SECTIONS, SECTION_TO_COLUMN, SECTION_TO_EXTRA, db
+from preprocessing.pipeline import SECTIONS, db
+from preprocessing.pipeline.fingerprints import (
+    request_fingerprint,
+    reusable,
+    rule_sections,
+    summarize_reuse,
+)
+from preprocessing.pipeline.llm_gateway import achat, chat
+from preprocessing.pipeline.rate_limit import map_ordered
 
 load_dotenv()
 
@@ -41,7 +47,7 @@ def load_playbook_prompt(game_name: str, player_range: str, sections_json: str)
 
 
 def preprocess_section(
-    client: OpenAI, game_name: str, section_name: str, section_text: str
+    game_name: str, section_name: str, section_text: str
 ) -> dict:
     """
     섹션 1개를 LLM으로 정리
@@ -52,41 +58,61 @@ def preprocess_section(
     if not section_text.strip():
         return {"cleaned": "", "items": []}
 
-    prompt = load_preprocess_prompt(game_name, section_name, section_text)
-
-    response = client.chat.completions.create(
-        model=PREPROCESS_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        response_format={"type": "json_object"},
-        temperature=0.2,
-    )
+    response = chat(**_preprocess_request(game_name, section_name, section_text))
 
     return json.loads(response.choices[0].message.content)
 
 
-def generate_playbook(
-    client: OpenAI, game_name: str, player_range: str, all_sections: dict
-) -> list[dict]:
+def _preprocess_request(game_name: str, section_name: str, section_text: str) -> dict:
+    """섹션 정리 요청 (chat 인자)"""
+    prompt = load_preprocess_prompt(game_name, section_name, section_text)
+
+    return {
+        "label": "preprocess",
+        "model": PREPROCESS_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.2,
+    }
+
+
+def _reused_section(artifact: dict | None, game_name: str, section_name: str, section_text: str) -> dict | None:
     """
-    전체 섹션을 기반으로 플레이북 생성
+    섹션 정리 결과 재사용 (없으면 None)
 
-    Returns:
-        [{"step_order": 1, "phase": "setup", "title": "...", ...}, ...]
+    - 입력 지문이 같으면 (같은 원문) 저장된 결과
+    - 현재 섹션이 저장된 정리 결과 그대로면 (파싱이 이 섹션을 다시 쓰지 않음) 모델/프롬프트가 같을 때 재사용
     """
+    fp = request_fingerprint(_preprocess_request(game_name, section_name, section_text))
+    result = reusable(artifact, fp)
+    if result is None and artifact:
+        output = artifact.get("output") or {}
+        config_fp = request_fingerprint(_preprocess_request(game_name, section_name, ""))
+        if output.get("config") == config_fp and output.get("cleaned") == section_text:
+            result = output
+    return result
+
+
+def _playbook_request(game_name: str, player_range: str, all_sections: dict) -> dict:
+    """플레이북 생성 요청 (chat/achat 인자)"""
     # 빈 섹션 제외하고 JSON으로 전달
     sections_for_prompt = {k: v for k, v in all_sections.items() if v.strip()}
     sections_json = json.dumps(sections_for_prompt, ensure_ascii=False, indent=2)
 
     prompt = load_playbook_prompt(game_name, player_range, sections_json)
 
-    response = client.chat.completions.create(
-        model=PREPROCESS_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        response_format={"type": "json_object"},
-        temperature=0.3,
-    )
+    return {
+        "label": "playbook",
+        "model": PREPROCESS_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.3,
+    }
 
-    result = json.loads(response.choices[0].message.content)
+
+def _parse_playbook(content: str) -> list[dict]:
+    """플레이북 응답 JSON → 단계 리스트"""
+    result = json.loads(content)
 
     # 응답 형태에 따라 처리:
     # 1) [...] 배열 → 그대로 반환
@@ -105,12 +131,39 @@ def generate_playbook(
     return []
 
 
+def playbook_fingerprint(game_name: str, player_range: str, all_sections: dict) -> str:
+    """플레이북 입력 지문 (섹션 + 인원 + 모델 + 프롬프트)"""
+    return request_fingerprint(_playbook_request(game_name, player_range, all_sections))
+
+
+def generate_playbook(
+    game_name: str, player_range: str, all_sections: dict
+) -> list[dict]:
+    """
+    전체 섹션을 기반으로 플레이북 생성
+
+    Returns:
+        [{"step_order": 1, "phase": "setup", "title": "...", ...}, ...]
+    """
+    response = chat(**_playbook_request(game_name, player_range, all_sections))
+    return _parse_playbook(response.choices[0].message.content)
+
+
+async def agenerate_playbook(
+    game_name: str, player_range: str, all_sections: dict
+) -> list[dict]:
+    """generate_playbook의 async 버전 (에이전트 playbook 노드)"""
+    response = await achat(**_playbook_request(game_name, player_range, all_sections))
+    return _parse_playbook(response.choices[0].message.content)
+
+
 def process_llm_preprocess(rule_id: int):
     """
     game_rule 1건에 대해 LLM 전처리 + 플레이북 생성
 
     1. 각 섹션을 LLM으로 정리 → game_rules에 덮어쓰기
     2. 정리된 섹션 기반으로 플레이북 생성 → game_playbooks 테이블
+    입력 지문이 같은 섹션/플레이북은 rule_artifacts에서 재사용한다.
     """
     db.start_step(rule_id, "llm_preprocess")
 
@@ -127,45 +180,69 @@ def process_llm_preprocess(rule_id: int):
         max_p = game_info.get("max_players", 4)
         player_range = f"{min_p}~{max_p}인"
 
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
         # ---- 1단계: 섹션별 정리 ----
         print(f"  [전처리] {game_name} - 섹션 정리 중...")
 
         # 현재 저장된 섹션 데이터 수집
-        current_sections = {}
-        for section_name in SECTIONS:
-            if section_name in SECTION_TO_COLUMN:
-                col = SECTION_TO_COLUMN[section_name]
-                current_sections[section_name] = rule.get(col, "") or ""
-            else:
-                extra = rule.get("extra_sections") or {}
-                current_sections[section_name] = extra.get(section_name, "") or ""
+        current_sections = rule_sections(rule)
+
+        # 섹션별 LLM 전처리 (동시 실행 + RPM/TPM 제한, 결과는 SECTIONS 순서)
+        # 입력이 그대로인 섹션은 저장된 결과 재사용
+        section_artifacts = db.get_artifacts(rule_id, "preprocess")
+        results = {}
+        for name in SECTIONS:
+            if not current_sections[name].strip():
+                continue
+            result = _reused_section(section_artifacts.get(name), game_name, name, current_sections[name])
+            if result is not None:
+                results[name] = result
+        reused = [f"preprocess:{name}" for name in results]
+
+        todo = [name for name in SECTIONS if current_sections[name].strip() and name not in results]
+        start = time.perf_counter()
+
+        def _preprocess(section_name: str) -> dict:
+            result = preprocess_section(game_name, section_name, current_sections[section_name])
+            print(f"    {section_name} [OK]")
+            return result
+
+        new_results = dict(zip(todo, map_ordered(_preprocess, todo)))
+        results.update(new_results)
+        print(f"  [전처리] {len(todo)}개 섹션 정리, {len(reused)}개 재사용 ({time.perf_counter() - start:.1f}s)")
 
-        # 섹션별 LLM 전처리
         cleaned_sections = {}
         preprocessed_items = {}  # items 저장용
 
         for section_name in SECTIONS:
-            text = current_sections.get(section_name, "")
-            if not text.strip():
+            if section_name not in results:
                 cleaned_sections[section_name] = ""
                 continue
 
-            print(f"    {section_name}...", end=" ", flush=True)
-            result = preprocess_section(client, game_name, section_name, text)
-            cleaned_sections[section_name] = result.get("cleaned", text)
+            result = results[section_name]
+            cleaned_sections[section_name] = result.get("cleaned", current_sections[section_name])
 
             # items가 있으면 저장 (구조화 섹션)
             items = result.get("items", [])
             if items:
                 preprocessed_items[section_name] = items
 
-            print("[OK]")
-            time.sleep(0.5)  # API rate limit 방지
-
-        # 정리된 섹션 DB 저장
-        db.update_rule_sections(rule_id, cleaned_sections)
+        # 새로 정리한 섹션 지문 저장 (config: 정리 결과가 섹션에 그대로 남아 있을 때 재사용 판단용)
+        db.save_artifacts(rule_id, "preprocess", {
+            name: (
+                request_fingerprint(_preprocess_request(game_name, name, current_sections[name])),
+                {
+                    "cleaned": cleaned_sections[name],
+                    "items": result.get("items", []),
+                    "config": request_fingerprint(_preprocess_request(game_name, name, "")),
+                },
+            )
+            for name, result in new_results.items()
+        })
+
+        # 정리된 섹션 DB 저장 (바뀐 섹션만)
+        changed = {k: v for k, v in cleaned_sections.items() if v != current_sections[k]}
+        if changed:
+            db.update_rule_sections(rule_id, changed)
 
         # items 정보를 extra_sections에 추가 저장
         if preprocessed_items:
@@ -174,20 +251,27 @@ def process_llm_preprocess(rule_id: int):
             extra["preprocessed_items"] = preprocessed_items
             db.update_rule(rule_id, {"extra_sections": extra})
 
-        # ---- 2단계: 플레이북 생성 ----
-        print(f"  [전처리] 플레이북 생성 중...")
-
-        playbook = generate_playbook(client, game_name, player_range, cleaned_sections)
+        # ---- 2단계: 플레이북 생성 (정리된 섹션/인원/모델/프롬프트가 그대로면 재사용) ----
+        playbook_fp = playbook_fingerprint(game_name, player_range, cleaned_sections)
+        playbook = reusable(db.get_artifact(rule_id, "playbook", "all"), playbook_fp)
 
-        if playbook:
-            db.save_playbook(game_id, rule_id, playbook)
-            print(f"  [전처리] 플레이북 {len(playbook)}단계 생성 완료")
+        if playbook is not None:
+            print(f"  [전처리] 플레이북 입력 변경 없음 (재사용, {len(playbook)}단계)")
+            reused.append("playbook:all")
         else:
-            print(f"  [전처리] [WARN] 플레이북 생성 실패 (빈 결과)")
+            print(f"  [전처리] 플레이북 생성 중...")
+            playbook = generate_playbook(game_name, player_range, cleaned_sections)
+
+            if playbook:
+                db.save_playbook(game_id, rule_id, playbook)
+                db.save_artifacts(rule_id, "playbook", {"all": (playbook_fp, playbook)})
+                print(f"  [전처리] 플레이북 {len(playbook)}단계 생성 완료")
+            else:
+                print(f"  [전처리] [WARN] 플레이북 생성 실패 (빈 결과)")
 
         # 완료
         db.update_rule(rule_id, {"status": "preprocessed"})
-        log_msg = f"성공: 섹션 정리 + 플레이북 {len(playbook)}단계"
+        log_msg = f"성공: 섹션 정리 + 플레이북 {len(playbook)}단계 | 재사용: {summarize_reuse(reused)}"
         db.finish_step(rule_id, "llm_preprocess", log_msg)
 
     except Exception as e:
@@ -6,14 +6,15 @@ Step 5: QA 생성 - 섹션 기반 Q&A 쌍 생성
 """
 
 import json
-import os
 import time
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from preprocessing.pipeline.config import QA_MODEL, PROMPTS_DIR
-from preprocessing.pipeline import SECTIONS, SECTION_TO_COLUMN, db
+from preprocessing.pipeline import db
+from preprocessing.pipeline.fingerprints import request_fingerprint, reusable, rule_sections
+from preprocessing.pipeline.llm_gateway import achat, chat
+from preprocessing.pipeline.rate_limit import map_ordered
 
 load_dotenv()
 
@@ -29,28 +30,22 @@ def load_qa_prompt(game_name: str, section_name: str, section_text: str) -> str:
     )
 
 
-def generate_qa_for_section(
-    client: OpenAI, game_name: str, section_name: str, section_text: str
-) -> list[dict]:
-    """
-    섹션 1개에 대해 Q&A 쌍 생성
-
-    Returns:
-        [{"question": "...", "answer": "..."}, ...]
-    """
-    if not section_text.strip():
-        return []
-
+def _qa_request(game_name: str, section_name: str, section_text: str) -> dict:
+    """QA 생성 요청 (chat/achat 인자)"""
     prompt = load_qa_prompt(game_name, section_name, section_text)
 
-    response = client.chat.completions.create(
-        model=QA_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        response_format={"type": "json_object"},
-        temperature=0.4,
-    )
+    return {
+        "label": "qa",
+        "model": QA_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.4,
+    }
+
 
-    result = json.loads(response.choices[0].message.content)
+def _parse_qa(content: str) -> list[dict]:
+    """QA 응답 JSON → Q&A 리스트"""
+    result = json.loads(content)
 
     # 응답 형태에 따라 처리:
     # 1) [...] 배열
@@ -68,12 +63,45 @@ def generate_qa_for_section(
     return []
 
 
+def qa_fingerprint(game_name: str, section_name: str, section_text: str) -> str:
+    """섹션 QA 입력 지문 (섹션 텍스트 + 모델 + 프롬프트)"""
+    return request_fingerprint(_qa_request(game_name, section_name, section_text))
+
+
+def generate_qa_for_section(
+    game_name: str, section_name: str, section_text: str
+) -> list[dict]:
+    """
+    섹션 1개에 대해 Q&A 쌍 생성
+
+    Returns:
+        [{"question": "...", "answer": "..."}, ...]
+    """
+    if not section_text.strip():
+        return []
+
+    response = chat(**_qa_request(game_name, section_name, section_text))
+    return _parse_qa(response.choices[0].message.content)
+
+
+async def agenerate_qa_for_section(
+    game_name: str, section_name: str, section_text: str
+) -> list[dict]:
+    """generate_qa_for_section의 async 버전 (에이전트 qa_section 워커)"""
+    if not section_text.strip():
+        return []
+
+    response = await achat(**_qa_request(game_name, section_name, section_text))
+    return _parse_qa(response.choices[0].message.content)
+
+
 def process_llm_qa(rule_id: int):
     """
     game_rule 1건에 대해 전체 섹션의 Q&A 쌍 생성
 
     각 섹션별로 Q&A를 생성하고, 전체를 합쳐서
     game_rules.extra_sections.qa_pairs에 저장.
+    입력 지문이 같은 섹션의 QA는 rule_artifacts에서 재사용한다.
     """
     db.start_step(rule_id, "llm_qa")
 
@@ -86,44 +114,49 @@ def process_llm_qa(rule_id: int):
         game = sb.table("games").select("name_ko").eq("id", game_id).execute()
         game_name = game.data[0]["name_ko"] if game.data else f"game_{game_id}"
 
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
         print(f"  [QA] {game_name} - Q&A 쌍 생성 중...")
 
         # 현재 저장된 섹션 데이터 수집
-        all_qa_pairs = []
-        extra = rule.get("extra_sections") or {}
-
-        for section_name in SECTIONS:
-            # 섹션 텍스트 가져오기
-            if section_name in SECTION_TO_COLUMN:
-                col = SECTION_TO_COLUMN[section_name]
-                text = rule.get(col, "") or ""
-            else:
-                text = extra.get(section_name, "") or ""
-
-            if not text.strip():
-                continue
-
-            print(f"    {section_name}...", end=" ", flush=True)
-
-            qa_pairs = generate_qa_for_section(
-                client, game_name, section_name, text
-            )
+        section_texts = [(name, text) for name, text in rule_sections(rule).items() if text.strip()]
+
+        # 섹션 텍스트/모델/프롬프트가 그대로인 섹션은 저장된 QA 재사용
+        qa_artifacts = db.get_artifacts(rule_id, "qa")
+        fps = {
+            name: qa_fingerprint(game_name, name, text) for name, text in section_texts
+        }
+        reused_qa = {}
+        for name, _ in section_texts:
+            qa = reusable(qa_artifacts.get(name), fps[name])
+            if qa is not None:
+                reused_qa[name] = qa
+        todo = [(name, text) for name, text in section_texts if name not in reused_qa]
+
+        def _generate(item: tuple[str, str]) -> list[dict]:
+            section_name, text = item
+            qa_pairs = generate_qa_for_section(game_name, section_name, text)
 
             # 각 QA에 섹션 정보 추가 (나중에 메타데이터로 활용)
             for qa in qa_pairs:
                 qa["section"] = section_name
 
-            all_qa_pairs.extend(qa_pairs)
-            print(f"{len(qa_pairs)}개 [OK]")
-            time.sleep(0.5)  # API rate limit 방지
+            print(f"    {section_name}: {len(qa_pairs)}개 [OK]")
+            return qa_pairs
+
+        # 섹션별 동시 생성 (RPM/TPM 제한 경유), 합칠 때는 SECTIONS 순서 유지
+        start = time.perf_counter()
+        generated = dict(zip((name for name, _ in todo), map_ordered(_generate, todo)))
+        db.save_artifacts(rule_id, "qa", {name: (fps[name], qa) for name, qa in generated.items()})
+        print(f"  [QA] {len(todo)}개 섹션 생성, {len(reused_qa)}개 재사용 ({time.perf_counter() - start:.1f}s)")
+
+        all_qa_pairs = []
+        for name, _ in section_texts:
+            all_qa_pairs.extend(generated.get(name, reused_qa.get(name, [])))
 
         # DB 저장
         db.save_qa_pairs(rule_id, all_qa_pairs)
         db.update_rule(rule_id, {"status": "qa_done"})
 
-        log_msg = f"성공: 총 {len(all_qa_pairs)}개 Q&A 쌍 생성"
+        log_msg = f"성공: 총 {len(all_qa_pairs)}개 Q&A 쌍 생성 (재사용 섹션 {len(reused_qa)}개)"
         print(f"  [QA] {log_msg}")
         db.finish_step(rule_id, "llm_qa", log_msg)
 
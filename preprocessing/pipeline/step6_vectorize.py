@@ -5,37 +5,25 @@ Step 6: 벡터화 - 섹션 청크 + QA 쌍 → ChromaDB 임베딩
 유사도 검색이 가능하도록 한다.
 """
 
-import os
+import hashlib
+import json
 import time
 
-import chromadb
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 from dotenv import load_dotenv
 
-from preprocessing.pipeline.config import CHROMA_DIR, EMBEDDING_MODEL, BATCH_SIZE
+from preprocessing.pipeline.chroma_store import get_or_create_collection, logical_name
 from preprocessing.pipeline import SECTIONS, SECTION_TO_COLUMN, SECTION_TO_EXTRA, db
+from preprocessing.pipeline.embed_pipeline import run_embed_pipeline
+from preprocessing.pipeline.embeddings import embedding_model_id, get_embedding_function
+from preprocessing.pipeline.game_vector_index import invalidate_games
+from preprocessing.pipeline.lexical_index import get_lexical_index
 
 load_dotenv()
 
 
 def get_chroma_collection():
-    """ChromaDB game_rules 컬렉션 반환"""
-    api_key = os.getenv("OPENAI_API_KEY", "")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY가 .env에 없습니다.")
-
-    client = chromadb.PersistentClient(path=CHROMA_DIR)
-    openai_ef = OpenAIEmbeddingFunction(
-        api_key=api_key,
-        model_name=EMBEDDING_MODEL,
-    )
-
-    # 컬렉션 가져오기 (없으면 생성)
-    return client.get_or_create_collection(
-        name="game_rules",
-        embedding_function=openai_ef,
-        metadata={"hnsw:space": "cosine"},
-    )
+    """ChromaDB game_rules 컬렉션 반환 (별칭이 가리키는 현재 컬렉션, 없으면 생성)"""
+    return get_or_create_collection("game_rules", embedding_function=get_embedding_function())
 
 
 def build_section_chunks(
@@ -111,11 +99,17 @@ def build_qa_chunks(
     """
     QA 쌍을 벡터화용 청크로 변환
 
+    청크 ID는 목록 위치가 아니라 (섹션, 질문 해시)로 만든다.
+    한 섹션의 QA가 추가/삭제/재생성돼도 다른 QA 청크의 ID와 내용 해시가 그대로라
+    sync_chunks가 바뀐 QA만 upsert/삭제한다.
+
     Returns:
         [(chunk_id, document, metadata), ...] 리스트
     """
     chunks = []
-    for i, qa in enumerate(qa_pairs):
+    seen: dict[str, int] = {}
+    section_counts: dict[str, int] = {}
+    for qa in qa_pairs:
         q = qa.get("question", "")
         a = qa.get("answer", "")
         section = qa.get("section", "")
@@ -123,7 +117,13 @@ def build_qa_chunks(
         if not q or not a:
             continue
 
-        chunk_id = f"rule_{game_id}_qa_{i}"
+        base_id = f"rule_{game_id}_qa_{section}_{hashlib.sha1(q.encode('utf-8')).hexdigest()[:12]}"
+        # 같은 섹션에 같은 질문이 또 있으면 순번을 붙인다
+        dup = seen.get(base_id, 0)
+        seen[base_id] = dup + 1
+        chunk_id = base_id if dup == 0 else f"{base_id}_{dup}"
+        i = section_counts.get(section, 0)
+        section_counts[section] = i + 1
         document = f"게임: {game_name}\nQ: {q}\nA: {a}"
         metadata = {
             "game_id": game_id,
@@ -141,40 +141,117 @@ def build_qa_chunks(
 def batch_add_to_collection(
     collection, chunks: list[tuple[str, str, dict]], label: str
 ):
-    """배치 단위로 ChromaDB에 추가 (load_to_chroma_v2.py 패턴)"""
+    """
+    ChromaDB에 추가/교체 (upsert, embed_pipeline 경유)
+
+    임베딩은 캐시를 거쳐 여러 요청을 동시에 보내고, 쓰기는 writer 스레드 1개가 한다.
+    game_rules 컬렉션이면 어휘(BM25) 인덱스도 같이 갱신한다.
+    """
     total = len(chunks)
     if total == 0:
         print(f"    {label}: 0개 (건너뜀)")
         return
 
+    lexical = get_lexical_index() if logical_name(collection.name) == "game_rules" else None
     start_time = time.time()
 
-    for i in range(0, total, BATCH_SIZE):
-        batch = chunks[i:i + BATCH_SIZE]
-
-        ids = [c[0] for c in batch]
-        documents = [c[1] for c in batch]
-        metadatas = [c[2] for c in batch]
-
-        collection.add(ids=ids, documents=documents, metadatas=metadatas)
-
-        # 진행률 표시
-        done = min(i + BATCH_SIZE, total)
+    def progress(done: int):
         elapsed = time.time() - start_time
         pct = (done / total) * 100
         print(f"\r    {label}: {done}/{total} ({pct:.0f}%, {elapsed:.1f}s)",
               end="", flush=True)
 
-    print()  # 줄바꿈
+    stats = run_embed_pipeline(
+        collection,
+        chunks,
+        label=label,
+        on_write=lexical.upsert if lexical else None,
+        progress=progress,
+    )
+    print(f" (임베딩 캐시 적중 {stats.cache_hits}/{total}, {stats.docs_per_sec:.0f} docs/s)")
+
+
+# 내용 해시에서 빼는 메타데이터 (순번은 앞 항목이 늘거나 줄면 바뀌지만 내용과는 무관)
+_UNHASHED_META = ("content_hash", "chunk_index")
+
+
+def chunk_content_hash(document: str, metadata: dict, model_id: str | None = None) -> str:
+    """청크 내용 해시 (문서 + 메타데이터 + 임베딩 모델, chunk_index 제외) → 바뀐 청크 판별용"""
+    meta = {k: v for k, v in metadata.items() if k not in _UNHASHED_META}
+    payload = json.dumps(
+        [model_id or embedding_model_id(), document, meta], ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def sync_chunks(collection, game_id: int, chunks: list[tuple[str, str, dict]]) -> dict:
+    """
+    게임 1개의 청크를 기존 인덱스와 비교해서 바뀐 것만 반영 (upsert-by-diff)
+
+    - 메타데이터의 content_hash가 같으면 그대로 둠 (임베딩/HNSW 변경 없음)
+    - 새로 생겼거나 내용이 바뀐 청크만 upsert
+    - 이번에 없어진 청크는 삭제
+
+    Returns:
+        {"added", "updated", "removed", "unchanged"} 청크 수
+    """
+    existing = collection.get(where={"game_id": game_id}, include=["metadatas"])
+    existing_hash = {
+        chunk_id: (meta or {}).get("content_hash")
+        for chunk_id, meta in zip(existing["ids"], existing["metadatas"])
+    }
+
+    to_upsert = []
+    added = updated = 0
+    unchanged_ids = []
+    for chunk_id, document, metadata in chunks:
+        content_hash = chunk_content_hash(document, metadata)
+        if existing_hash.get(chunk_id) == content_hash:
+            unchanged_ids.append(chunk_id)
+            continue
+        if chunk_id in existing_hash:
+            updated += 1
+        else:
+            added += 1
+        to_upsert.append((chunk_id, document, {**metadata, "content_hash": content_hash}))
+
+    new_ids = {c[0] for c in chunks}
+    removed_ids = [chunk_id for chunk_id in existing_hash if chunk_id not in new_ids]
+    lexical = get_lexical_index() if logical_name(collection.name) == "game_rules" else None
+
+    if removed_ids:
+        collection.delete(ids=removed_ids)
+        if lexical:
+            lexical.delete(removed_ids)
+
+    batch_add_to_collection(collection, to_upsert, "변경 청크")
+
+    # 검색 쪽 게임별 벡터 캐시 무효화 (다른 프로세스도 다음 검색 때 다시 읽음)
+    if (to_upsert or removed_ids) and logical_name(collection.name) == "game_rules":
+        invalidate_games([game_id])
+
+    # 어휘 인덱스가 나중에 생긴 경우 등, 바뀌지 않은 청크가 빠져 있으면 채워 넣는다 (임베딩 없음)
+    if lexical and unchanged_ids:
+        indexed = lexical.ids_for_game(game_id)
+        missing = [c for c in chunks if c[0] in set(unchanged_ids) - indexed]
+        if missing:
+            lexical.upsert([c[0] for c in missing], [c[1] for c in missing], [c[2] for c in missing])
+
+    return {
+        "added": added,
+        "updated": updated,
+        "removed": len(removed_ids),
+        "unchanged": len(unchanged_ids),
+    }
 
 
 def process_vectorize(rule_id: int):
     """
     game_rule 1건에 대해 벡터화 실행
 
-    1. 기존 game_id 관련 청크 삭제 (중복 방지)
-    2. 섹션 청크 생성 + 임베딩
-    3. QA 청크 생성 + 임베딩
+    1. 섹션 청크 생성
+    2. QA 청크 생성
+    3. 기존 청크와 비교해서 바뀐 것만 임베딩 (sync_chunks)
     """
     db.start_step(rule_id, "vectorize")
 
@@ -191,17 +268,6 @@ def process_vectorize(rule_id: int):
 
         collection = get_chroma_collection()
 
-        # 기존 해당 game_id 청크 삭제 (중복 방지)
-        try:
-            existing = collection.get(
-                where={"game_id": game_id},
-            )
-            if existing["ids"]:
-                collection.delete(ids=existing["ids"])
-                print(f"    기존 청크 {len(existing['ids'])}개 삭제")
-        except Exception:
-            pass  # 기존 데이터 없으면 무시
-
         # 섹션 청크 생성
         section_chunks = build_section_chunks(game_id, game_name, rule)
 
@@ -210,15 +276,18 @@ def process_vectorize(rule_id: int):
         qa_pairs = extra.get("qa_pairs", [])
         qa_chunks = build_qa_chunks(game_id, game_name, qa_pairs)
 
-        # ChromaDB에 추가
-        batch_add_to_collection(collection, section_chunks, "섹션")
-        batch_add_to_collection(collection, qa_chunks, "QA")
+        # ChromaDB 반영 (바뀐 청크만)
+        counts = sync_chunks(collection, game_id, section_chunks + qa_chunks)
 
         # 상태 업데이트
         db.update_rule(rule_id, {"status": "vectorized"})
 
         total = len(section_chunks) + len(qa_chunks)
-        log_msg = f"성공: 섹션 {len(section_chunks)}청크 + QA {len(qa_chunks)}청크 = 총 {total}청크"
+        log_msg = (
+            f"성공: 섹션 {len(section_chunks)}청크 + QA {len(qa_chunks)}청크 = 총 {total}청크 "
+            f"(추가 {counts['added']} / 변경 {counts['updated']} / "
+            f"삭제 {counts['removed']} / 유지 {counts['unchanged']})"
+        )
         print(f"  [벡터화] {log_msg}")
         db.finish_step(rule_id, "vectorize", log_msg)
 
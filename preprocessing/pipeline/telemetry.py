@@ -0,0 +1,276 @@
+"""
+파이프라인 텔레메트리 (노드/스텝별 비용·지연 스팬)
+
+rule_pipeline에는 스텝별 started_at/finished_at/log만 남고, LangGraph 경로는 그마저 남기지 않는다.
+배치 전체에서 어느 노드(VLM 파싱? 통합? 리뷰 루프?)가 시간과 토큰을 먹는지 보려고
+노드/스텝 실행 1건마다 스팬을 남긴다.
+
+- span(): 노드/스텝 실행 1건 측정. 벽시계 시간 + 그 안에서 나간 LLM 호출 수,
+  입력/출력/캐시된 입력 토큰, 예상 비용(config.LLM_PRICING)을 모은다.
+  현재 스팬은 ContextVar라 async 워커(asyncio 태스크), asyncio.to_thread,
+  map_ordered 풀 스레드에서 부른 호출도 같은 스팬에 쌓인다 (llm_gateway가 record_llm 호출).
+- run(): 게임 1건 실행 범위 (run_id로 같은 실행의 스팬을 묶는다)
+- 스팬은 TELEMETRY_LOG(JSONL)에 한 줄씩 추가
+- print_report(): 스팬 로그 → 노드별 게임당 시간/토큰/비용 백분위 + 게임별 합계
+
+사용법:
+    with telemetry.run(rule_id, game_name):
+        with telemetry.span("pipeline", "parse"):
+            process_parse(rule_id)
+    uv run python -m preprocessing.agents.run --report
+"""
+
+import asyncio
+import json
+import math
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from preprocessing.pipeline.config import LLM_PRICING, TELEMETRY_LOG
+
+
+# ============================================================
+# 비용 추정
+# ============================================================
+def estimate_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+    """
+    호출 1건 예상 비용 (USD)
+
+    prompt_tokens에는 캐시된 입력(cached_tokens)이 포함되어 있으므로 그만큼은 캐시 단가로 계산한다.
+    """
+    price = LLM_PRICING.get(model, LLM_PRICING["default"])
+    fresh = max(0, prompt_tokens - cached_tokens)
+    return (
+        fresh * price["input"]
+        + cached_tokens * price.get("cached_input", price["input"])
+        + completion_tokens * price["output"]
+    ) / 1_000_000
+
+
+# ============================================================
+# 스팬
+# ============================================================
+class Span:
+    """노드/스텝 실행 1건의 측정값 (스레드 안전 - 섹션 호출이 풀 스레드에서 동시에 기록한다)"""
+
+    def __init__(self, runner: str, node: str, rule_id: int | None, game: str, run_id: str | None):
+        self.runner = runner
+        self.node = node
+        self.rule_id = rule_id
+        self.game = game
+        self.run_id = run_id
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.llm_calls = 0
+        self.llm_errors = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cost_usd = 0.0
+
+    def add_llm(self, entry: dict):
+        """게이트웨이 사용량 기록 1건 반영 (응답 캐시 적중은 호출 수/비용에서 제외)"""
+        with self._lock:
+            if entry["status"] == "cache":
+                self.cache_hits += 1
+                return
+            self.llm_calls += 1
+            self.llm_errors += entry["status"] != "ok"
+            self.prompt_tokens += entry["prompt_tokens"]
+            self.completion_tokens += entry["completion_tokens"]
+            self.cached_tokens += entry.get("cached_tokens", 0)
+            self.cost_usd += entry.get("cost_usd", 0.0)
+
+    def to_record(self, status: str) -> dict:
+        with self._lock:
+            return {
+                "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                "started_at": round(self.started_at, 3),
+                "runner": self.runner,
+                "run_id": self.run_id,
+                "rule_id": self.rule_id,
+                "game": self.game,
+                "node": self.node,
+                "status": status,
+                "wall_ms": round((time.perf_counter() - self._start) * 1000, 1),
+                "llm_calls": self.llm_calls,
+                "llm_errors": self.llm_errors,
+                "cache_hits": self.cache_hits,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cost_usd": round(self.cost_usd, 6),
+            }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("gmjj_span", default=None)
+_current_run: ContextVar[dict | None] = ContextVar("gmjj_run", default=None)
+_log_lock = threading.Lock()
+
+
+@contextmanager
+def run(rule_id: int, game: str = ""):
+    """게임 1건 실행 범위 - 안에서 연 스팬은 같은 run_id/rule_id를 쓴다"""
+    token = _current_run.set({"run_id": uuid.uuid4().hex[:12], "rule_id": rule_id, "game": game})
+    try:
+        yield
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def span(runner: str, node: str, rule_id: int | None = None, game: str = ""):
+    """
+    노드/스텝 실행 1건 측정 → 끝나면 TELEMETRY_LOG에 기록 (sync/async 함수 안 어디서나)
+
+    Args:
+        runner: "agent"(LangGraph) | "pipeline"(순차 스텝)
+        rule_id, game: 생략하면 run() 범위의 값
+    """
+    scope = _current_run.get() or {}
+    current = Span(
+        runner, node,
+        rule_id if rule_id is not None else scope.get("rule_id"),
+        game or scope.get("game", ""),
+        scope.get("run_id"),
+    )
+    token = _current_span.set(current)
+    status = "ok"
+    try:
+        yield current
+    except TimeoutError:
+        status = "timeout"
+        raise
+    except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _current_span.reset(token)
+        _write(current.to_record(status))
+
+
+def record_llm(entry: dict):
+    """LLM 호출 1건을 현재 스팬에 반영 (llm_gateway._record_usage에서 호출, 스팬 밖이면 무시)"""
+    current = _current_span.get()
+    if current is not None:
+        current.add_llm(entry)
+
+
+def _write(record: dict):
+    if not TELEMETRY_LOG:
+        return
+    with _log_lock:
+        try:
+            Path(TELEMETRY_LOG).parent.mkdir(parents=True, exist_ok=True)
+            with open(TELEMETRY_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"  [telemetry] 스팬 기록 실패: {e}")
+
+
+# ============================================================
+# 리포트
+# ============================================================
+def load_spans(path: str | Path | None = None) -> list[dict]:
+    """스팬 로그 읽기 (깨진 줄은 건너뜀)"""
+    path = Path(path or TELEMETRY_LOG)
+    if not path.is_file():
+        return []
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _run_key(s: dict) -> tuple:
+    # run_id가 없는 스팬(run() 밖)은 rule 단위로 묶는다
+    return (s.get("rule_id"), s.get("run_id"))
+
+
+def print_report(spans: list[dict], runner: str | None = None, rule_id: int | None = None):
+    """
+    노드별 게임당 시간/토큰/비용 백분위 + 게임별 합계 출력
+
+    섹션 워커(merge_section, qa_section 등)는 게임 1건에 여러 번 돌기 때문에
+    같은 실행(run_id)의 스팬을 노드별로 합친 값(게임당)으로 백분위를 낸다.
+    """
+    spans = [
+        s for s in spans
+        if (runner is None or s.get("runner") == runner) and (rule_id is None or s.get("rule_id") == rule_id)
+    ]
+    if not spans:
+        print("  [telemetry] 기록된 스팬 없음")
+        return
+
+    # (노드, 실행) → 게임당 합계
+    per_run: dict[str, dict[tuple, dict]] = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))
+    for s in spans:
+        agg = per_run[s["node"]][_run_key(s)]
+        agg["spans"] += 1
+        agg["errors"] += s.get("status") != "ok"
+        for field in ("wall_ms", "llm_calls", "prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd"):
+            agg[field] += s.get(field, 0)
+
+    runs = {_run_key(s) for s in spans}
+    total_cost = sum(s.get("cost_usd", 0) for s in spans)
+    print(f"\n  [telemetry] 스팬 {len(spans)}건, 실행 {len(runs)}건 (게임 {len({s.get('rule_id') for s in spans})}개), "
+          f"예상 비용 ${total_cost:.4f}")
+    print(f"\n  {'노드':<16}{'스팬':>6}{'실행':>6}{'실패':>6}  {'시간/게임 p50 / p90 / p99 (s)':>30}  "
+          f"{'호출 p50':>8}  {'토큰/게임 p50 / p90':>20}  {'캐시%':>6}  {'비용/게임 p50 / p90 ($)':>24}  {'비용 합':>9}")
+
+    rows = []
+    for node, by_run in per_run.items():
+        aggs = list(by_run.values())
+        wall = [a["wall_ms"] / 1000 for a in aggs]
+        tokens = [a["prompt_tokens"] + a["completion_tokens"] for a in aggs]
+        cost = [a["cost_usd"] for a in aggs]
+        prompt = sum(a["prompt_tokens"] for a in aggs)
+        cached = sum(a["cached_tokens"] for a in aggs)
+        rows.append((sum(wall), node, aggs, wall, tokens, cost, cached / prompt * 100 if prompt else 0.0))
+
+    # 시간을 많이 쓴 노드부터
+    for _, node, aggs, wall, tokens, cost, cached_pct in sorted(rows, key=lambda r: r[0], reverse=True):
+        print(
+            f"  {node:<16}{int(sum(a['spans'] for a in aggs)):>6}{len(aggs):>6}{int(sum(a['errors'] for a in aggs)):>6}  "
+            f"{_percentile(wall, 50):>10.1f} /{_percentile(wall, 90):>7.1f} /{_percentile(wall, 99):>7.1f}  "
+            f"{_percentile([a['llm_calls'] for a in aggs], 50):>8.0f}  "
+            f"{_percentile(tokens, 50):>9,.0f} /{_percentile(tokens, 90):>9,.0f}  {cached_pct:>5.1f}%  "
+            f"{_percentile(cost, 50):>11.4f} /{_percentile(cost, 90):>10.4f}  {sum(cost):>9.4f}"
+        )
+
+    # 게임(실행)별 합계 - 노드가 병렬로 돌기 때문에 시간은 첫 스팬 시작 ~ 마지막 스팬 끝
+    by_game: dict[tuple, list[dict]] = defaultdict(list)
+    for s in spans:
+        by_game[_run_key(s)].append(s)
+    print(f"\n  {'rule_id':>8}  {'게임':<20}{'시간(s)':>9}{'호출':>7}{'토큰':>11}{'비용($)':>10}  실행 시각")
+    for (rid, _), items in sorted(by_game.items(), key=lambda kv: min(s["started_at"] for s in kv[1])):
+        start = min(s["started_at"] for s in items)
+        end = max(s["started_at"] + s.get("wall_ms", 0) / 1000 for s in items)
+        game = next((s["game"] for s in items if s.get("game")), "")
+        print(
+            f"  {rid!s:>8}  {game[:18]:<20}{end - start:>9.1f}{sum(s.get('llm_calls', 0) for s in items):>7}"
+            f"{sum(s.get('prompt_tokens', 0) + s.get('completion_tokens', 0) for s in items):>11,}"
+            f"{sum(s.get('cost_usd', 0) for s in items):>10.4f}  {min(s['ts'] for s in items)}"
+        )
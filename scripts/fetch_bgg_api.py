@@ -25,18 +25,22 @@ import os
 import sys
 import csv
 
-import chromadb
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 from dotenv import load_dotenv
 
-load_dotenv()
-
 # ============================================================
 # 설정
 # ============================================================
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from preprocessing.pipeline.chroma_store import collection_metadata, get_chroma_client  # noqa: E402
+from preprocessing.pipeline.config import EMBEDDING_PROVIDER  # noqa: E402
+from preprocessing.pipeline.embed_pipeline import run_embed_pipeline  # noqa: E402
+from preprocessing.pipeline.embeddings import get_embedding_function  # noqa: E402
+
+load_dotenv()
+
 DATA_DIR = os.path.join(PROJECT_ROOT, "reference", "archive")
-CHROMA_DIR = os.path.join(PROJECT_ROOT, "chroma_db")
 
 # 체크포인트 파일 (수집 진행 상황 저장)
 CHECKPOINT_DIR = os.path.join(PROJECT_ROOT, "reference", "checkpoint")
@@ -50,9 +54,6 @@ REQUEST_DELAY = 5        # 요청 간 대기 시간(초)
 MAX_RETRIES = 3          # 실패 시 재시도 횟수
 RETRY_DELAY = 30         # 재시도 대기 시간(초) - 202 응답 등
 
-# ChromaDB 배치 크기 (임베딩 API 호출 단위)
-CHROMA_BATCH_SIZE = 100
-
 
 def load_bgg_ids() -> list[int]:
     """CSV에서 BGGId 목록 추출"""
@@ -414,16 +415,13 @@ def save_to_chromadb(all_games: list[dict], mechanics_map: dict, themes_map: dic
     print(f"{'='*60}")
 
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if EMBEDDING_PROVIDER == "openai" and not api_key:
         print("!! OPENAI_API_KEY가 없습니다. .env 파일을 확인하세요.")
         return
 
-    client = chromadb.PersistentClient(path=CHROMA_DIR)
+    client = get_chroma_client()
 
-    openai_ef = OpenAIEmbeddingFunction(
-        api_key=api_key,
-        model_name="text-embedding-3-small"
-    )
+    embedding_fn = get_embedding_function()
 
     # 기존 컬렉션 삭제 후 새로 생성
     try:
@@ -434,8 +432,8 @@ def save_to_chromadb(all_games: list[dict], mechanics_map: dict, themes_map: dic
 
     collection = client.get_or_create_collection(
         name="boardgames",
-        embedding_function=openai_ef,
-        metadata={"hnsw:space": "cosine"}
+        embedding_function=embedding_fn,
+        metadata=collection_metadata(alias="boardgames"),
     )
 
     # 중복 제거 (같은 BGGId가 여러번 캐시에 있을 수 있음)
@@ -451,28 +449,20 @@ def save_to_chromadb(all_games: list[dict], mechanics_map: dict, themes_map: dic
     start_time = time.time()
     print(f"   중복 제거 후: {total}개 게임")
 
-    for i in range(0, total, CHROMA_BATCH_SIZE):
-        batch = unique_games[i:i + CHROMA_BATCH_SIZE]
-
-        ids = []
-        documents = []
-        metadatas = []
-
-        for game in batch:
+    def chunks():
+        for game in unique_games:
             bgg_id = game["bgg_id"]
-            ids.append(f"game_{bgg_id}")
-
             mech_str = mechanics_map.get(bgg_id, "")
             theme_str = themes_map.get(bgg_id, "")
             subcat_str = subcats_map.get(bgg_id, "")
             extra = csv_extras.get(bgg_id, {})
+            yield (
+                f"game_{bgg_id}",
+                build_document(game, mech_str, theme_str),
+                build_metadata(game, extra, mech_str, theme_str, subcat_str),
+            )
 
-            documents.append(build_document(game, mech_str, theme_str))
-            metadatas.append(build_metadata(game, extra, mech_str, theme_str, subcat_str))
-
-        collection.add(ids=ids, documents=documents, metadatas=metadatas)
-
-        done = min(i + CHROMA_BATCH_SIZE, total)
+    def progress(done: int):
         elapsed = time.time() - start_time
         pct = (done / total) * 100
         bar_width = 30
@@ -481,9 +471,13 @@ def save_to_chromadb(all_games: list[dict], mechanics_map: dict, themes_map: dic
         print(f"\r   {bar} {pct:5.1f}% [{done}/{total}] ({elapsed:.1f}s)    ",
               end="", flush=True)
 
+    # 문서 생성 / 동시 임베딩(재실행 시 바뀐 문서만) / 쓰기를 겹쳐서 실행
+    stats = run_embed_pipeline(collection, chunks(), label="boardgames", progress=progress)
+
     print()  # 프로그레스 바 줄바꿈
     elapsed = time.time() - start_time
     print(f"\n   ChromaDB 저장 완료! {collection.count()}개 게임, {elapsed:.1f}s")
+    print(f"   {stats.summary()}")
 
 
 # ============================================================
@@ -4,8 +4,15 @@ Supabase → ChromaDB 동기화 스크립트
 Supabase games 테이블의 데이터를 ChromaDB 벡터 검색 인덱스로 변환합니다.
 3개 컬렉션: game_search, game_rules, game_playbook
 
+증분 동기화(기본)는 games.updated_at 워터마크 이후 바뀐 행만 가져와 upsert하고,
+deleted_at이 채워진 행(tombstone)은 ChromaDB에서 삭제한다.
+전체 재구축(--rebuild)은 새 컬렉션을 채운 뒤 별칭을 원자적으로 교체한다 (blue/green).
+
 사용법:
-    uv run python scripts/load_to_chroma_v2.py                # Supabase에서 동기화
+    uv run python scripts/load_to_chroma_v2.py                # 증분 동기화 (워터마크 이후 변경분)
+    uv run python scripts/load_to_chroma_v2.py --full         # 워터마크 무시, 전체 upsert
+    uv run python scripts/load_to_chroma_v2.py --rebuild      # 전체 재구축 후 별칭 교체
+    uv run python scripts/load_to_chroma_v2.py --rebuild --keep-old  # 이전 컬렉션 남겨두기 (롤백용)
     uv run python scripts/load_to_chroma_v2.py --from-jsonl    # JSONL에서 직접 로드 (Supabase 없이)
     uv run python scripts/load_to_chroma_v2.py --limit 100     # 100개만 테스트
 
@@ -21,28 +28,50 @@ import sys
 import time
 from pathlib import Path
 
-import chromadb
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 from dotenv import load_dotenv
 
-load_dotenv()
-
 # ============================================================
 # 경로 설정
 # ============================================================
 PROJECT_ROOT = Path(__file__).parent.parent
-CHROMA_DIR = str(PROJECT_ROOT / "chroma_db")
-GAMES_JSONL = PROJECT_ROOT / "data" / "boardlife_games.jsonl"
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from preprocessing.pipeline.chroma_store import (  # noqa: E402
+    collection_exists,
+    collection_metadata,
+    drop_collection,
+    get_chroma_client,
+    get_collection,
+    get_or_create_collection,
+    new_physical_name,
+    resolve_collection_name,
+    switch_aliases,
+)
+from preprocessing.pipeline.config import CHROMA_DIR, EMBEDDING_PROVIDER  # noqa: E402
+from preprocessing.pipeline.embed_pipeline import run_embed_pipeline  # noqa: E402
+from preprocessing.pipeline.embeddings import get_embedding_function  # noqa: E402
+
+load_dotenv()
 
-# 임베딩 배치 크기 (OpenAI API 호출 단위)
-BATCH_SIZE = 100
+GAMES_JSONL = PROJECT_ROOT / "data" / "boardlife_games.jsonl"
 
 
 # ============================================================
 # 데이터 소스
 # ============================================================
-def load_from_supabase(limit: int = 0) -> list[dict]:
-    """Supabase games 테이블에서 데이터 로드"""
+# 문서/메타데이터 빌더가 쓰는 컬럼만 가져온다 (select("*") 대비 전송량 절감)
+GAME_COLUMNS = (
+    "id,name_ko,name_en,year_published,min_players,max_players,playtime,"
+    "rating,difficulty,mechanisms,categories,description_ko,one_liner,"
+    "updated_at,deleted_at"
+)
+PAGE_SIZE = 1000
+
+# 증분 동기화 하이워터마크 (마지막으로 반영한 (updated_at, id))
+SYNC_STATE_PATH = Path(CHROMA_DIR) / "sync_state.json"
+
+
+def _supabase_client():
     from supabase import create_client
 
     url = os.getenv("SUPABASE_URL")
@@ -53,21 +82,32 @@ def load_from_supabase(limit: int = 0) -> list[dict]:
 
     sb = create_client(url, key)
     print("   Supabase 연결 완료")
+    return sb
+
+
+def load_from_supabase(limit: int = 0) -> list[dict]:
+    """Supabase games 테이블 전체 로드 (삭제 안 된 행, id 키셋 페이지네이션)"""
+    sb = _supabase_client()
 
-    # 전체 게임 로드 (페이지네이션)
     games = []
-    page_size = 1000
-    offset = 0
+    last_id = 0
 
     while True:
-        query = sb.table("games").select("*").range(offset, offset + page_size - 1)
-        result = query.execute()
+        result = (
+            sb.table("games")
+            .select(GAME_COLUMNS)
+            .is_("deleted_at", "null")
+            .gt("id", last_id)
+            .order("id")
+            .limit(PAGE_SIZE)
+            .execute()
+        )
 
         if not result.data:
             break
 
         games.extend(result.data)
-        offset += page_size
+        last_id = result.data[-1]["id"]
 
         if limit and len(games) >= limit:
             games = games[:limit]
@@ -79,6 +119,70 @@ def load_from_supabase(limit: int = 0) -> list[dict]:
     return games
 
 
+def load_changes_from_supabase(since: dict | None, limit: int = 0) -> list[dict]:
+    """
+    워터마크 이후 바뀐 행만 로드 (삭제 tombstone 포함)
+
+    (updated_at, id) 키셋 페이지네이션: OFFSET 없이 마지막 행 다음부터 이어 읽으므로
+    페이지가 깊어져도 느려지지 않고, 같은 updated_at을 가진 행도 빠짐없이 넘어간다.
+    """
+    sb = _supabase_client()
+
+    changes = []
+    cursor = since
+
+    while True:
+        query = sb.table("games").select(GAME_COLUMNS)
+        if cursor:
+            ts = cursor["updated_at"]
+            query = query.or_(
+                f'updated_at.gt."{ts}",and(updated_at.eq."{ts}",id.gt.{cursor["id"]})'
+            )
+        result = query.order("updated_at").order("id").limit(PAGE_SIZE).execute()
+
+        if not result.data:
+            break
+
+        changes.extend(result.data)
+        cursor = {"updated_at": result.data[-1]["updated_at"], "id": result.data[-1]["id"]}
+
+        if limit and len(changes) >= limit:
+            changes = changes[:limit]
+            break
+
+        print(f"\r   변경분 로드 중: {len(changes)}개", end="", flush=True)
+
+    print(f"\r   Supabase 변경분: {len(changes)}개 게임")
+    return changes
+
+
+def load_sync_state() -> dict | None:
+    """마지막 동기화 워터마크 ({"updated_at", "id", "synced_at"}, 없으면 None)"""
+    if not SYNC_STATE_PATH.exists():
+        return None
+    with open(SYNC_STATE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_sync_state(games: list[dict]):
+    """반영한 행 중 가장 늦은 (updated_at, id)를 워터마크로 저장 (임시 파일 → os.replace)"""
+    stamped = [g for g in games if g.get("updated_at")]
+    if not stamped:
+        return
+    last = max(stamped, key=lambda g: (g["updated_at"], g["id"]))
+    state = {
+        "updated_at": last["updated_at"],
+        "id": last["id"],
+        "synced_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    SYNC_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = SYNC_STATE_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, SYNC_STATE_PATH)
+    print(f"   워터마크: {state['updated_at']} (id={state['id']})")
+
+
 def load_from_jsonl(limit: int = 0) -> list[dict]:
     """JSONL 파일에서 직접 로드 (Supabase 없이 테스트용)"""
     if not GAMES_JSONL.exists():
@@ -211,118 +315,207 @@ def build_rules_document(game: dict) -> str:
 # ============================================================
 # ChromaDB 저장
 # ============================================================
+def _rules_metadata(game: dict) -> dict:
+    return {
+        "game_id": game.get("id", 0) if isinstance(game.get("id"), int) else 0,
+        "game_name": game.get("name_ko", ""),
+        "chunk_type": "description",
+    }
+
+
+# 별칭(논리 이름)별 문서 빌더. game_playbook은 추후 확장용 빈 컬렉션.
+COLLECTION_SPECS = {
+    "game_search": {
+        "id_fn": lambda g: f"game_{g.get('id', 0)}",
+        "doc_fn": build_search_document,
+        "meta_fn": build_search_metadata,
+    },
+    "game_rules": {
+        "id_fn": lambda g: f"rule_{g.get('id', 0)}_0",
+        "doc_fn": build_rules_document,
+        "meta_fn": _rules_metadata,
+    },
+    "game_playbook": None,
+}
+
+
+def _check_api_key():
+    api_key = os.getenv("OPENAI_API_KEY")
+    if EMBEDDING_PROVIDER == "openai" and not api_key:
+        print("OPENAI_API_KEY를 .env에 설정하세요!")
+        sys.exit(1)
+
+
 def sync_to_chromadb(games: list[dict]):
     """
-    게임 데이터를 ChromaDB 3개 컬렉션에 저장
+    바뀐 게임만 ChromaDB 3개 컬렉션에 반영 (증분, upsert)
 
     1. game_search — 게임 검색/추천
     2. game_rules  — 게임 룰 Q&A (RAG)
     3. game_playbook — (추후 확장, 현재는 빈 컬렉션 생성만)
+
+    deleted_at이 채워진 행(tombstone)은 해당 게임의 문서를 삭제한다.
+    컬렉션을 지우지 않으므로 동기화 중에도 검색은 계속 동작한다.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("OPENAI_API_KEY를 .env에 설정하세요!")
-        sys.exit(1)
+    _check_api_key()
+
+    live = [g for g in games if not g.get("deleted_at")]
+    deleted = [g["id"] for g in games if g.get("deleted_at")]
 
     print(f"\n{'=' * 60}")
-    print(f"ChromaDB 동기화 시작 ({len(games)}개 게임)")
+    print(f"ChromaDB 증분 동기화 (변경 {len(live)}개 / 삭제 {len(deleted)}개)")
     print(f"저장 경로: {CHROMA_DIR}")
     print(f"{'=' * 60}")
 
-    client = chromadb.PersistentClient(path=CHROMA_DIR)
-    openai_ef = OpenAIEmbeddingFunction(
-        api_key=api_key,
-        model_name="text-embedding-3-small"
-    )
+    embedding_fn = get_embedding_function()
 
-    # ---- 컬렉션 1: game_search ----
-    print("\n[1/3] game_search 컬렉션")
-    _recreate_collection(client, "game_search", openai_ef)
-    col_search = client.get_collection("game_search", embedding_function=openai_ef)
-
-    _batch_add(
-        collection=col_search,
-        games=games,
-        id_fn=lambda g: f"game_{g.get('id', 0)}",
-        doc_fn=build_search_document,
-        meta_fn=build_search_metadata,
-        label="game_search",
-    )
+    for step, (alias, spec) in enumerate(COLLECTION_SPECS.items(), 1):
+        print(f"\n[{step}/{len(COLLECTION_SPECS)}] {alias} 컬렉션")
+        col = get_or_create_collection(alias, embedding_function=embedding_fn)
+        if spec is None:
+            print(f"   {alias}: 추후 룰북 데이터 추가 시 사용")
+            continue
+        _batch_upsert(col, live, label=alias, **spec)
+        if deleted:
+            _apply_tombstones(col, alias, deleted)
+        if alias == "game_rules":
+            # 검색 쪽 게임별 벡터 캐시 무효화
+            from preprocessing.pipeline.game_vector_index import invalidate_games
+            invalidate_games([g["id"] for g in live] + deleted)
 
-    # ---- 컬렉션 2: game_rules ----
-    print("\n[2/3] game_rules 컬렉션")
-    _recreate_collection(client, "game_rules", openai_ef)
-    col_rules = client.get_collection("game_rules", embedding_function=openai_ef)
-
-    _batch_add(
-        collection=col_rules,
-        games=games,
-        id_fn=lambda g: f"rule_{g.get('id', 0)}_0",
-        doc_fn=build_rules_document,
-        meta_fn=lambda g: {
-            "game_id": g.get("id", 0) if isinstance(g.get("id"), int) else 0,
-            "game_name": g.get("name_ko", ""),
-            "chunk_type": "description",
-        },
-        label="game_rules",
-    )
+    _print_counts()
 
-    # ---- 컬렉션 3: game_playbook (빈 컬렉션, 추후 확장) ----
-    print("\n[3/3] game_playbook 컬렉션 (빈 컬렉션 생성)")
-    _recreate_collection(client, "game_playbook", openai_ef)
-    print("   game_playbook: 추후 룰북 데이터 추가 시 사용")
 
-    # ---- 검증 ----
+def rebuild_chromadb(games: list[dict], keep_old: bool = False):
+    """
+    전체 재구축 (blue/green)
+
+    새 물리 컬렉션을 만들어 채운 뒤 별칭을 한 번에 교체한다.
+    채우는 동안 검색은 기존 컬렉션으로 계속 동작하고,
+    교체는 별칭 파일 os.replace 1회라 중간 상태가 보이지 않는다.
+    game_rules의 룰북 청크(step6, chunk_type != description)는 저장된 벡터째로 옮긴다.
+    """
+    _check_api_key()
+
     print(f"\n{'=' * 60}")
-    print("컬렉션 현황:")
-    for name in ["game_search", "game_rules", "game_playbook"]:
-        col = client.get_collection(name)
-        print(f"   {name}: {col.count()}개")
+    print(f"ChromaDB 전체 재구축 - blue/green ({len(games)}개 게임)")
+    print(f"저장 경로: {CHROMA_DIR}")
     print(f"{'=' * 60}")
 
+    client = get_chroma_client()
+    embedding_fn = get_embedding_function()
+    targets = {alias: new_physical_name(alias) for alias in COLLECTION_SPECS}
+
+    for step, (alias, spec) in enumerate(COLLECTION_SPECS.items(), 1):
+        print(f"\n[{step}/{len(COLLECTION_SPECS)}] {alias} → {targets[alias]}")
+        col = client.create_collection(
+            name=targets[alias],
+            embedding_function=embedding_fn,
+            metadata=collection_metadata(alias=alias),
+        )
+        if spec is None:
+            print(f"   {alias}: 추후 룰북 데이터 추가 시 사용")
+            continue
+        _batch_upsert(col, games, label=alias, **spec)
+        if alias == "game_rules":
+            _carry_over_pipeline_chunks(col)
+
+    previous = switch_aliases(targets)
+    print(f"\n   별칭 교체 완료: {', '.join(f'{a} → {n}' for a, n in targets.items())}")
+
+    # 어휘 인덱스도 새 game_rules 기준으로 다시 만든다
+    from preprocessing.pipeline.lexical_index import rebuild_from_chroma
+    rebuild_from_chroma()
+
+    if keep_old:
+        print(f"   이전 컬렉션 유지: {', '.join(previous.values())}")
+    else:
+        for name in previous.values():
+            if drop_collection(name):
+                print(f"   이전 컬렉션 삭제: {name}")
 
-def _recreate_collection(client, name: str, ef):
-    """기존 컬렉션 삭제 후 재생성"""
-    try:
-        client.delete_collection(name)
-        print(f"   기존 {name} 삭제")
-    except Exception:
-        pass
+    _print_counts()
 
-    client.get_or_create_collection(
-        name=name,
-        embedding_function=ef,
-        metadata={"hnsw:space": "cosine"}
-    )
+
+def _carry_over_pipeline_chunks(new_col, batch_size: int = 500):
+    """현재 game_rules의 룰북 청크를 임베딩째로 새 컬렉션에 복사 (재임베딩 없음)"""
+    if not collection_exists("game_rules"):
+        return
+    old_col = get_collection("game_rules")
+    where = {"chunk_type": {"$ne": "description"}}
+    copied = 0
+    offset = 0
+    while True:
+        batch = old_col.get(
+            where=where, limit=batch_size, offset=offset,
+            include=["documents", "metadatas", "embeddings"],
+        )
+        if not batch["ids"]:
+            break
+        new_col.upsert(
+            ids=batch["ids"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+            embeddings=batch["embeddings"],
+        )
+        copied += len(batch["ids"])
+        offset += batch_size
+    if copied:
+        print(f"   룰북 청크 {copied}개 이전 (기존 벡터 재사용)")
+
+
+def _apply_tombstones(collection, alias: str, game_ids: list[int]):
+    """삭제된 게임의 문서 제거"""
+    if alias == "game_rules":
+        # 설명 청크 + 룰북 청크 모두
+        collection.delete(where={"game_id": {"$in": game_ids}})
+        from preprocessing.pipeline.lexical_index import get_lexical_index
+        index = get_lexical_index()
+        for game_id in game_ids:
+            index.delete_game(game_id)
+    else:
+        collection.delete(ids=[COLLECTION_SPECS[alias]["id_fn"]({"id": gid}) for gid in game_ids])
+    print(f"   삭제(tombstone): {len(game_ids)}개 게임")
 
 
-def _batch_add(collection, games: list[dict], id_fn, doc_fn, meta_fn, label: str):
-    """배치 단위로 ChromaDB에 추가"""
+def _print_counts():
+    print(f"\n{'=' * 60}")
+    print("컬렉션 현황:")
+    for alias in COLLECTION_SPECS:
+        if collection_exists(alias):
+            print(f"   {alias} ({resolve_collection_name(alias)}): {get_collection(alias).count()}개")
+    print(f"{'=' * 60}")
+
+
+def _batch_upsert(collection, games: list[dict], id_fn, doc_fn, meta_fn, label: str):
+    """
+    ChromaDB에 upsert (embed_pipeline 경유)
+
+    문서 생성 / 동시 임베딩 요청(캐시 경유 → 바뀐 문서만 API 호출) / 쓰기가 겹쳐서 돈다.
+    """
     total = len(games)
+    if not total:
+        print("   변경 없음")
+        return
     start_time = time.time()
 
-    for i in range(0, total, BATCH_SIZE):
-        batch = games[i:i + BATCH_SIZE]
+    lexical = None
+    if label == "game_rules":
+        from preprocessing.pipeline.lexical_index import get_lexical_index
+        lexical = get_lexical_index()
 
-        ids = []
-        documents = []
-        metadatas = []
+    emptied = []
 
-        for game in batch:
+    def chunks():
+        for game in games:
             doc = doc_fn(game)
-            # 빈 document는 건너뜀
+            # 빈 document는 건너뜀 (이전에 색인된 문서가 있으면 아래에서 삭제)
             if not doc or len(doc.strip()) < 5:
+                emptied.append(id_fn(game))
                 continue
+            yield id_fn(game), doc, meta_fn(game)
 
-            ids.append(id_fn(game))
-            documents.append(doc)
-            metadatas.append(meta_fn(game))
-
-        if ids:
-            collection.add(ids=ids, documents=documents, metadatas=metadatas)
-
-        # 진행률
-        done = min(i + BATCH_SIZE, total)
+    def progress(done: int):
         elapsed = time.time() - start_time
         pct = (done / total) * 100
         bar_width = 25
@@ -331,7 +524,20 @@ def _batch_add(collection, games: list[dict], id_fn, doc_fn, meta_fn, label: str
         print(f"\r   {bar} {pct:5.1f}% [{done}/{total}] ({elapsed:.1f}s)",
               end="", flush=True)
 
-    print()  # 줄바꿈
+    stats = run_embed_pipeline(
+        collection,
+        chunks(),
+        label=label,
+        on_write=lexical.upsert if lexical else None,
+        progress=progress,
+    )
+
+    if emptied:
+        collection.delete(ids=emptied)
+        if lexical is not None:
+            lexical.delete(emptied)
+
+    print(f"\n   {stats.summary()}")
 
 
 # ============================================================
@@ -340,16 +546,12 @@ def _batch_add(collection, games: list[dict], id_fn, doc_fn, meta_fn, label: str
 def verify_chromadb():
     """ChromaDB 데이터 검증 — 한국어 검색 테스트"""
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if EMBEDDING_PROVIDER == "openai" and not api_key:
         return
 
-    client = chromadb.PersistentClient(path=CHROMA_DIR)
-    openai_ef = OpenAIEmbeddingFunction(
-        api_key=api_key,
-        model_name="text-embedding-3-small"
-    )
+    embedding_fn = get_embedding_function()
 
-    col = client.get_collection("game_search", embedding_function=openai_ef)
+    col = get_collection("game_search", embedding_function=embedding_fn)
 
     print(f"\n{'=' * 60}")
     print("검증: 한국어 유사도 검색 테스트")
@@ -378,6 +580,9 @@ def verify_chromadb():
 # ============================================================
 def main():
     from_jsonl = "--from-jsonl" in sys.argv
+    rebuild = "--rebuild" in sys.argv
+    keep_old = "--keep-old" in sys.argv
+    full = "--full" in sys.argv
     limit = 0
 
     for i, arg in enumerate(sys.argv):
@@ -389,19 +594,32 @@ def main():
     print("=" * 60)
 
     # 데이터 로드
+    since = None
     if from_jsonl:
         print("\n   데이터 소스: JSONL 파일")
         games = load_from_jsonl(limit=limit)
-    else:
-        print("\n   데이터 소스: Supabase")
+    elif rebuild:
+        print("\n   데이터 소스: Supabase (전체)")
         games = load_from_supabase(limit=limit)
+    else:
+        since = None if full else load_sync_state()
+        print(f"\n   데이터 소스: Supabase (워터마크: {since['updated_at'] if since else '없음 → 전체'})")
+        games = load_changes_from_supabase(since, limit=limit)
 
     if not games:
-        print("   데이터 없음!")
+        print("   변경 없음!" if since else "   데이터 없음!")
         return
 
     # ChromaDB 동기화
-    sync_to_chromadb(games)
+    if rebuild:
+        rebuild_chromadb(games, keep_old=keep_old)
+    else:
+        sync_to_chromadb(games)
+
+    # 워터마크는 ChromaDB 반영이 끝난 뒤에만 전진
+    # (전체 재구축을 --limit으로 자른 경우는 id 순 일부라 워터마크로 쓸 수 없음)
+    if not from_jsonl and not (rebuild and limit):
+        save_sync_state(games)
 
     # 검증
     verify_chromadb()
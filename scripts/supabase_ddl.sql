@@ -22,10 +22,14 @@ CREATE TABLE IF NOT EXISTS games (
     publishers      text[],
     description_ko  text,
     one_liner       text,
+    deleted_at      timestamptz,             -- 소프트 삭제(tombstone). 삭제는 이 값을 채운다
     created_at      timestamptz DEFAULT now(),
     updated_at      timestamptz DEFAULT now()
 );
 
+-- 기존 DB 마이그레이션
+ALTER TABLE games ADD COLUMN IF NOT EXISTS deleted_at timestamptz;
+
 -- 2. game_sources: 수집처 매핑
 CREATE TABLE IF NOT EXISTS game_sources (
     id              serial PRIMARY KEY,
@@ -222,9 +226,13 @@ CREATE TABLE IF NOT EXISTS rule_pipeline (
     started_at      timestamptz,
     finished_at     timestamptz,
     log             text,                        -- 에러/결과 로그
+    input_fingerprint text,                      -- 스텝 완료 시 입력 지문 (바뀌면 증분 재실행)
     created_at      timestamptz DEFAULT now()
 );
 
+-- 기존 DB 마이그레이션
+ALTER TABLE rule_pipeline ADD COLUMN IF NOT EXISTS input_fingerprint text;
+
 -- 14. game_rule_sources: 룰 수집 소스 (멀티소스)
 CREATE TABLE IF NOT EXISTS game_rule_sources (
     id              serial PRIMARY KEY,
@@ -240,11 +248,25 @@ CREATE TABLE IF NOT EXISTS game_rule_sources (
     created_at      timestamptz DEFAULT now()
 );
 
+-- 15. rule_artifacts: 전처리 단위 산출물 + 입력 지문 (증분 재계산)
+CREATE TABLE IF NOT EXISTS rule_artifacts (
+    id              serial PRIMARY KEY,
+    game_rule_id    int REFERENCES game_rules(id) ON DELETE CASCADE,
+    stage           text NOT NULL,               -- 'parse' | 'parse_merge' | 'preprocess' | 'translate' | 'merge' | 'review' | 'revise' | 'playbook' | 'qa'
+    unit_key        text NOT NULL,               -- 소스 키('pdf:12') | 섹션 이름 | 'all'
+    fingerprint     text NOT NULL,               -- 입력 지문 (모델 + 프롬프트 + 입력 텍스트 해시)
+    output          jsonb,                       -- 산출물 (파싱 결과/섹션 텍스트/QA 목록 등)
+    updated_at      timestamptz DEFAULT now(),
+    UNIQUE(game_rule_id, stage, unit_key)
+);
+
 -- ============================================================
 -- 인덱스
 -- ============================================================
 CREATE INDEX IF NOT EXISTS idx_games_name_ko ON games(name_ko);
 CREATE INDEX IF NOT EXISTS idx_games_rating ON games(rating DESC);
+-- ChromaDB 증분 동기화 (updated_at, id) 키셋 페이지네이션
+CREATE INDEX IF NOT EXISTS idx_games_updated_at_id ON games(updated_at, id);
 CREATE INDEX IF NOT EXISTS idx_game_sources_source ON game_sources(source, source_id);
 CREATE INDEX IF NOT EXISTS idx_game_sources_game_id ON game_sources(game_id);
 CREATE INDEX IF NOT EXISTS idx_game_images_game_id ON game_images(game_id);
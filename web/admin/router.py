@@ -268,11 +268,14 @@ async def search_test(
     n: int = 5,
     type: str = "all",
     game: str = "all",
+    mode: str = "vector",
 ):
-    """ChromaDB 벡터 검색 테스트 페이지"""
+    """ChromaDB 벡터 / 어휘 / 하이브리드 검색 테스트 페이지"""
     import time as _time
     results = []
     elapsed = 0
+    timings = {}
+    comparison = {}
     total_chunks = 0
     playbook_results = []
     playbook_game_name = ""
@@ -292,18 +295,32 @@ async def search_test(
 
     if q.strip():
         try:
-            from web.admin.search_service import search_chromadb, get_playbook
+            from web.admin.search_service import (
+                compare_search_modes, search_chromadb, get_playbook,
+            )
 
             start = _time.time()
             game_id_filter = int(game) if game != "all" else None
             type_filter = type if type != "all" else None
 
-            results = search_chromadb(
-                query=q,
-                n_results=n,
-                chunk_type=type_filter,
-                game_id=game_id_filter,
-            )
+            if mode == "compare":
+                # 세 방식 나란히 비교 (결과 + 지연시간)
+                comparison = compare_search_modes(
+                    query=q,
+                    n_results=n,
+                    chunk_type=type_filter,
+                    game_id=game_id_filter,
+                )
+                results = comparison["hybrid"]["results"]
+            else:
+                results = search_chromadb(
+                    query=q,
+                    n_results=n,
+                    chunk_type=type_filter,
+                    game_id=game_id_filter,
+                    timings=timings,
+                    mode=mode,
+                )
             elapsed = int((_time.time() - start) * 1000)
 
             # 전체 청크 수
@@ -322,9 +339,12 @@ async def search_test(
                 "n_results": n,
                 "chunk_type": type,
                 "game_filter": game,
+                "search_mode": mode,
                 "games": games_list,
                 "results": [],
+                "comparison": {},
                 "elapsed": 0,
+                "timings": {},
                 "total_chunks": 0,
                 "playbook_results": [],
                 "playbook_game_name": "",
@@ -338,9 +358,12 @@ async def search_test(
         "n_results": n,
         "chunk_type": type,
         "game_filter": game,
+        "search_mode": mode,
         "games": games_list,
         "results": results,
+        "comparison": comparison,
         "elapsed": elapsed,
+        "timings": timings,
         "total_chunks": total_chunks,
         "playbook_results": playbook_results,
         "playbook_game_name": playbook_game_name,
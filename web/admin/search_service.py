@@ -4,29 +4,184 @@ ChromaDB 검색 서비스
 어드민 검색 테스트 페이지에서 사용하는 벡터 검색 함수들.
 """
 
+import math
 import os
+import threading
+import time
 from dataclasses import dataclass
-from pathlib import Path
 
-import chromadb
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+from chromadb.api.types import EmbeddingFunction
+from chromadb.errors import NotFoundError
 from dotenv import load_dotenv
 
+from preprocessing.pipeline.chroma_store import get_chroma_client, resolve_collection_name
+from preprocessing.pipeline.config import (
+    CHROMA_DIR,  # noqa: F401 (startup에서 사용)
+    GAME_VECTOR_INDEX,
+    MIRROR_RERANK_FACTOR,
+    VECTOR_MIRROR,
+    VECTOR_MIRROR_CHECK_SECONDS,
+    VECTOR_MIRROR_DIR,
+)
+from preprocessing.pipeline.embeddings import embedding_model_id, get_embedding_function
+from web.cache import get_cache
+
 load_dotenv()
 
-# ChromaDB 경로
-CHROMA_DIR = str(Path(__file__).parent.parent.parent / "chroma_db")
+COLLECTION_NAME = "game_rules"
+
+# 프로세스 단위로 한 번만 열어두는 핸들
+# (매 검색마다 PersistentClient를 새로 만들면 인덱스를 다시 읽는다)
+_collection = None
+_collection_name: str | None = None  # 핸들을 연 시점의 물리 컬렉션 이름 (별칭 교체 감지)
+_embedding_function: EmbeddingFunction | None = None
+_embedding_model = embedding_model_id()
+_lock = threading.Lock()
+
+# 양자화 미러 (GMJJ_VECTOR_MIRROR 설정 시). (물리 컬렉션 이름, 미러 또는 None, 검증 서명, 확인 시각)
+# upsert-by-diff는 물리 이름을 그대로 둔 채 청크를 바꾸므로 VECTOR_MIRROR_CHECK_SECONDS마다 다시 검증한다.
+_mirror: tuple[str, object, tuple | None, float] | None = None
+
+# game_id 필터 검색을 게임별 NumPy 인덱스(정확 top-k)로 처리할지
+_use_game_index = GAME_VECTOR_INDEX
+
+# 쿼리 임베딩 캐시: (모델, 쿼리) → 벡터. 같은 쿼리는 임베딩 API를 다시 부르지 않는다.
+_query_embeddings = get_cache("query_embeddings")
+_cache_queries = True
+
+
+def _get_embedding_function() -> EmbeddingFunction:
+    """쿼리 임베딩 함수 반환 (싱글톤, config의 제공자 설정)"""
+    global _embedding_function
+    if _embedding_function is None:
+        with _lock:
+            if _embedding_function is None:
+                _embedding_function = get_embedding_function()
+    return _embedding_function
 
 
 def _get_collection():
-    """game_rules ChromaDB 컬렉션 반환"""
-    api_key = os.getenv("OPENAI_API_KEY", "")
-    client = chromadb.PersistentClient(path=CHROMA_DIR)
-    ef = OpenAIEmbeddingFunction(
-        api_key=api_key,
-        model_name="text-embedding-3-small",
-    )
-    return client.get_collection("game_rules", embedding_function=ef)
+    """
+    game_rules ChromaDB 컬렉션 반환 (싱글톤)
+
+    blue/green 재구축으로 별칭이 다른 물리 컬렉션을 가리키게 되면 새로 연다.
+    """
+    global _collection, _collection_name
+    name = resolve_collection_name(COLLECTION_NAME)
+    if _collection is None or (_collection_name is not None and _collection_name != name):
+        client = get_chroma_client()
+        with _lock:
+            if _collection is None or (_collection_name is not None and _collection_name != name):
+                _collection = client.get_collection(
+                    name, embedding_function=_get_embedding_function()
+                )
+                _collection_name = name
+                _check_embedding_model(_collection)
+    return _collection
+
+
+def _check_embedding_model(collection):
+    """컬렉션을 만든 임베딩 공간과 쿼리 임베딩 설정이 다르면 경고 (차원 변경 후 설정 누락 등)"""
+    indexed = (collection.metadata or {}).get("embedding_model")
+    if indexed and indexed != _embedding_model:
+        print(f"  [search] 경고: {collection.name}은 {indexed}로 색인됨, "
+              f"쿼리 임베딩은 {_embedding_model} (GMJJ_EMBEDDING_DIMENSIONS 확인)")
+
+
+def _mirror_signature(collection, base: str) -> tuple:
+    """미러 재검증 서명: (미러 메타 파일 mtime, 컬렉션 청크 수, 청크 마지막 변경 시각)"""
+    from preprocessing.pipeline.game_vector_index import get_game_vector_index
+
+    try:
+        mtime = os.stat(f"{base}.meta.json").st_mtime
+    except FileNotFoundError:
+        mtime = None
+    return mtime, collection.count(), get_game_vector_index().generations.last_updated()
+
+
+def _get_mirror():
+    """
+    양자화 미러 반환 (꺼져 있거나 없거나 오래됐으면 None → HNSW 사용)
+
+    현재 컬렉션과 물리 이름/청크 수가 같고, 미러를 만든 뒤 청크가 바뀌지 않았을 때만 쓴다.
+    결과(None 포함)는 VECTOR_MIRROR_CHECK_SECONDS 동안 재사용하고, 그 뒤에는 서명이
+    달라졌을 때만 미러를 다시 연다 (파이프라인이 청크를 바꾸거나 --build로 미러를 새로 만든 경우).
+    """
+    global _mirror
+    collection = _get_collection()
+    now = time.monotonic()
+    cached = _mirror
+    if cached is not None and cached[0] == collection.name and now - cached[3] < VECTOR_MIRROR_CHECK_SECONDS:
+        return cached[1]
+    if not VECTOR_MIRROR:
+        return None
+
+    from preprocessing.pipeline.quantized_index import QuantizedMirror
+
+    base = QuantizedMirror.base_path(VECTOR_MIRROR_DIR, COLLECTION_NAME, VECTOR_MIRROR)
+    signature = _mirror_signature(collection, base)
+    if cached is not None and cached[0] == collection.name and cached[2] == signature:
+        _mirror = (collection.name, cached[1], signature, now)
+        return cached[1]
+
+    mirror = None
+    _, count, changed_at = signature
+    try:
+        loaded = QuantizedMirror.load(base)
+        if loaded.collection == collection.name and loaded.count == count and loaded.built_ts >= changed_at:
+            mirror = loaded
+        else:
+            print(f"  [search] 미러가 컬렉션과 다름 → HNSW 사용 ({base}, --build로 다시 생성)")
+    except FileNotFoundError:
+        print(f"  [search] 미러 없음 → HNSW 사용 ({base})")
+    _mirror = (collection.name, mirror, signature, now)
+    return mirror
+
+
+def reset_collection():
+    """컬렉션 핸들 폐기 (파이프라인이 컬렉션을 다시 만든 경우 다음 호출 때 재오픈)"""
+    global _collection, _collection_name, _mirror
+    with _lock:
+        _collection = None
+        _collection_name = None
+        _mirror = None
+
+
+def override_backend(collection, embedding_function, model_name: str, cache_queries: bool = False,
+                     mirror=None, game_index: bool = GAME_VECTOR_INDEX):
+    """
+    검색 대상 컬렉션 / 임베딩 함수 / 양자화 미러 / 게임별 인덱스 사용 여부 교체 (오프라인 평가용)
+
+    eval_retrieval이 임시 인덱스 + 로컬 임베딩으로 search_chromadb를 그대로 돌릴 때 쓴다.
+    """
+    global _collection, _collection_name, _embedding_function, _embedding_model, _cache_queries
+    global _mirror, _use_game_index
+    with _lock:
+        _collection = collection
+        _collection_name = None  # 교체된 컬렉션은 별칭을 따라가지 않음
+        _embedding_function = embedding_function
+        _embedding_model = model_name
+        _cache_queries = cache_queries
+        _mirror = (collection.name, mirror, None, math.inf)  # 교체된 미러는 재검증하지 않음
+        _use_game_index = game_index
+
+
+def _embed_query(query: str) -> tuple[list[float], bool]:
+    """
+    쿼리 임베딩 (캐시 우선)
+
+    Returns:
+        (임베딩 벡터, 캐시 적중 여부)
+    """
+    key = f"{_embedding_model}:{query}"
+    if _cache_queries:
+        cached = _query_embeddings.get(key)
+        if cached is not None:
+            return cached, True
+    embedding = [float(x) for x in _get_embedding_function()([query])[0]]
+    if _cache_queries:
+        _query_embeddings.set(key, embedding)
+    return embedding, False
 
 
 @dataclass
@@ -38,6 +193,145 @@ class SearchResult:
     sub_section: str
     chunk_type: str
     similarity: float
+    chunk_id: str = ""
+    score: float = 0.0            # 정렬 점수 (vector=유사도, lexical=BM25, hybrid=RRF)
+    matched_by: str = "vector"    # "vector" | "lexical" | "vector+lexical"
+
+
+# 검색 방식: 벡터(임베딩) / 어휘(문자 n-gram BM25) / 하이브리드(RRF 결합)
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+RRF_K = 60                 # Reciprocal Rank Fusion 상수 (순위 1/(k+rank))
+HYBRID_CANDIDATES = 20     # 하이브리드에서 방식별로 가져올 후보 수
+
+
+def _where_filter(chunk_type: str | None, game_id: int | None) -> dict | None:
+    """ChromaDB where 필터 구성"""
+    conditions = []
+    if chunk_type:
+        conditions.append({"chunk_type": chunk_type})
+    if game_id:
+        conditions.append({"game_id": game_id})
+
+    if len(conditions) == 1:
+        return conditions[0]
+    if len(conditions) > 1:
+        return {"$and": conditions}
+    return None
+
+
+def _to_result(chunk_id: str, document: str, meta: dict, similarity: float,
+               score: float, matched_by: str) -> SearchResult:
+    return SearchResult(
+        document=document,
+        game_name=meta.get("game_name", ""),
+        section=meta.get("section", ""),
+        sub_section=meta.get("sub_section", ""),
+        chunk_type=meta.get("chunk_type", ""),
+        similarity=similarity,
+        chunk_id=chunk_id,
+        score=score,
+        matched_by=matched_by,
+    )
+
+
+def _vector_search(query, n_results, chunk_type, game_id, timings) -> list[SearchResult]:
+    """
+    임베딩 → 벡터 검색
+
+    - game_id 필터: 게임별 NumPy 인덱스로 정확 top-k (청크가 너무 많은 게임은 아래로)
+    - 양자화 미러가 켜져 있으면: 미러 1차 후보 → float32 재정렬
+    - 그 외: ChromaDB HNSW + where 필터
+    """
+    t0 = time.perf_counter()
+    query_embedding, embed_cached = _embed_query(query)
+    t1 = time.perf_counter()
+
+    kwargs = {"query_embeddings": [query_embedding], "n_results": n_results}
+    where_filter = _where_filter(chunk_type, game_id)
+    if where_filter:
+        kwargs["where"] = where_filter
+
+    rerank_ms = 0.0
+    raw = None
+    if game_id and _use_game_index:
+        from preprocessing.pipeline.game_vector_index import get_game_vector_index
+
+        raw = get_game_vector_index().query(
+            _get_collection(), query_embedding, n_results, game_id, chunk_type
+        )
+
+    mirror = _get_mirror() if raw is None else None
+    if raw is not None:
+        timings["vector_index"] = "game"
+    elif mirror is not None:
+        # 양자화 미러 1차 후보 → 원본 float32로 정확 재정렬
+        from preprocessing.pipeline.quantized_index import rerank_exact
+
+        candidates = mirror.search(
+            query_embedding, n_results * MIRROR_RERANK_FACTOR, game_id=game_id, chunk_type=chunk_type
+        )
+        t_ann = time.perf_counter()
+        raw = rerank_exact(_get_collection(), query_embedding, [c[0] for c in candidates], n_results)
+        rerank_ms = (time.perf_counter() - t_ann) * 1000
+        timings["rerank_ms"] = round(rerank_ms, 1)
+    else:
+        try:
+            raw = _get_collection().query(**kwargs)
+        except NotFoundError:
+            # 컬렉션이 재생성되어 핸들이 무효해졌을 수 있음 → 다시 열고 1회 재시도
+            reset_collection()
+            raw = _get_collection().query(**kwargs)
+
+    t2 = time.perf_counter()
+
+    results = []
+    for i in range(len(raw["ids"][0])):
+        similarity = round(1 - raw["distances"][0][i], 3)
+        results.append(_to_result(
+            raw["ids"][0][i], raw["documents"][0][i], raw["metadatas"][0][i],
+            similarity, similarity, "vector",
+        ))
+
+    timings["embed_ms"] = round((t1 - t0) * 1000, 1)
+    timings["ann_ms"] = round((t2 - t1) * 1000 - rerank_ms, 1)
+    timings["post_ms"] = round((time.perf_counter() - t2) * 1000, 1)
+    timings["embed_cached"] = embed_cached
+    return results
+
+
+def _lexical_search(query, n_results, chunk_type, game_id, timings) -> list[SearchResult]:
+    """문자 n-gram BM25 검색"""
+    from preprocessing.pipeline.lexical_index import get_lexical_index
+
+    t0 = time.perf_counter()
+    hits = get_lexical_index().search(query, n_results, game_id=game_id, chunk_type=chunk_type)
+    timings["lexical_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+
+    return [
+        _to_result(h["id"], h["document"], h["metadata"], 0.0, h["score"], "lexical")
+        for h in hits
+    ]
+
+
+def _rrf_fuse(ranked_lists: list[list[SearchResult]], n_results: int) -> list[SearchResult]:
+    """Reciprocal Rank Fusion: 점수 스케일이 다른 결과 목록을 순위만으로 결합"""
+    fused: dict[str, SearchResult] = {}
+    scores: dict[str, float] = {}
+    for ranked in ranked_lists:
+        for rank, r in enumerate(ranked, 1):
+            scores[r.chunk_id] = scores.get(r.chunk_id, 0.0) + 1 / (RRF_K + rank)
+            if r.chunk_id not in fused:
+                fused[r.chunk_id] = r
+            else:
+                # 양쪽에서 찾은 청크 → 벡터 유사도는 살려둔다
+                prev = fused[r.chunk_id]
+                prev.similarity = max(prev.similarity, r.similarity)
+                prev.matched_by = "vector+lexical"
+
+    top = sorted(scores, key=scores.get, reverse=True)[:n_results]
+    for chunk_id in top:
+        fused[chunk_id].score = round(scores[chunk_id], 4)
+    return [fused[chunk_id] for chunk_id in top]
 
 
 def search_chromadb(
@@ -45,65 +339,80 @@ def search_chromadb(
     n_results: int = 5,
     chunk_type: str | None = None,
     game_id: int | None = None,
+    timings: dict | None = None,
+    mode: str = "vector",
 ) -> list[SearchResult]:
     """
-    ChromaDB 벡터 검색
+    룰 청크 검색 (벡터 / 어휘 / 하이브리드)
 
     Args:
         query: 검색 쿼리
         n_results: 반환할 결과 수
         chunk_type: 'section' 또는 'qa' 필터 (None이면 전체)
         game_id: 특정 게임만 필터 (None이면 전체)
+        timings: 넘기면 단계별 소요 시간(ms)을 채워줌
+                 (embed_ms, ann_ms, rerank_ms, lexical_ms, post_ms, embed_cached)
+        mode: 'vector' | 'lexical' | 'hybrid'
 
     Returns:
-        SearchResult 리스트 (유사도 높은 순)
+        SearchResult 리스트 (점수 높은 순)
     """
-    col = _get_collection()
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"알 수 없는 검색 방식: {mode}")
+    if timings is None:
+        timings = {}
 
-    # where 필터 구성
-    where_filter = None
-    conditions = []
-
-    if chunk_type:
-        conditions.append({"chunk_type": chunk_type})
-    if game_id:
-        conditions.append({"game_id": game_id})
+    if mode == "vector":
+        results = _vector_search(query, n_results, chunk_type, game_id, timings)
+    elif mode == "lexical":
+        results = _lexical_search(query, n_results, chunk_type, game_id, timings)
+    else:
+        candidates = max(n_results, HYBRID_CANDIDATES)
+        vector_hits = _vector_search(query, candidates, chunk_type, game_id, timings)
+        lexical_hits = _lexical_search(query, candidates, chunk_type, game_id, timings)
+        t0 = time.perf_counter()
+        results = _rrf_fuse([vector_hits, lexical_hits], n_results)
+        timings["post_ms"] = round(
+            timings.get("post_ms", 0.0) + (time.perf_counter() - t0) * 1000, 1
+        )
 
-    if len(conditions) == 1:
-        where_filter = conditions[0]
-    elif len(conditions) > 1:
-        where_filter = {"$and": conditions}
+    timings.setdefault("post_ms", 0.0)
+    return results
 
-    # 검색 실행
-    kwargs = {"query_texts": [query], "n_results": n_results}
-    if where_filter:
-        kwargs["where"] = where_filter
 
-    raw = col.query(**kwargs)
+def compare_search_modes(
+    query: str,
+    n_results: int = 5,
+    chunk_type: str | None = None,
+    game_id: int | None = None,
+) -> dict[str, dict]:
+    """
+    같은 쿼리를 세 방식으로 실행해서 나란히 비교
 
-    # 결과 변환
-    results = []
-    for i in range(len(raw["ids"][0])):
-        meta = raw["metadatas"][0][i]
-        dist = raw["distances"][0][i]
-        doc = raw["documents"][0][i]
-
-        results.append(SearchResult(
-            document=doc,
-            game_name=meta.get("game_name", ""),
-            section=meta.get("section", ""),
-            sub_section=meta.get("sub_section", ""),
-            chunk_type=meta.get("chunk_type", ""),
-            similarity=round(1 - dist, 3),
-        ))
+    Returns:
+        {mode: {"results", "timings", "elapsed_ms", "overlap"}}
+        overlap: 하이브리드 상위 결과와 겹치는 청크 수
+    """
+    report = {}
+    for mode in SEARCH_MODES:
+        timings = {}
+        start = time.perf_counter()
+        results = search_chromadb(query, n_results, chunk_type, game_id, timings, mode)
+        report[mode] = {
+            "results": results,
+            "timings": timings,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
 
-    return results
+    hybrid_ids = {r.chunk_id for r in report["hybrid"]["results"]}
+    for entry in report.values():
+        entry["overlap"] = sum(r.chunk_id in hybrid_ids for r in entry["results"])
+    return report
 
 
 def get_collection_count() -> int:
     """game_rules 컬렉션의 전체 청크 수"""
-    col = _get_collection()
-    return col.count()
+    return _get_collection().count()
 
 
 def get_playbook(game_id: int) -> tuple[list[dict], str]:
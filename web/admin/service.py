@@ -6,8 +6,13 @@ Supabase 클라이언트를 통해 crawl_sources, crawl_jobs, games 테이블을
 
 import os
 from datetime import datetime
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+# supabase는 어드민 페이지를 처음 열 때 import (프론트엔드 service도 지연 import라 라우터 import에서 빠진다)
+if TYPE_CHECKING:
+    from supabase import Client
 
 # .env에서 Supabase 연결 정보 로드
 load_dotenv()
@@ -16,13 +21,14 @@ SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
 
 
-def _get_client() -> Client:
+def _get_client() -> "Client":
     """Supabase 클라이언트 생성 (매번 새로 만들지 않고 캐싱)"""
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise RuntimeError(
             "SUPABASE_URL 또는 SUPABASE_KEY가 설정되지 않았습니다. "
             ".env 파일을 확인하세요."
         )
+    from supabase import create_client
     return create_client(SUPABASE_URL, SUPABASE_KEY)
 
 
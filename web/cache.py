@@ -0,0 +1,303 @@
+"""
+웹 서버 공용 캐시 백엔드
+
+uvicorn --workers N 으로 띄우면 프로세스마다 메모리 캐시가 따로 생겨
+같은 데이터를 N번 불러오고, 워커가 늘수록 적중률이 떨어진다.
+이 모듈은 외부 서비스 없이 한 호스트의 모든 워커가 공유하는
+SQLite(WAL) 파일 캐시를 제공한다.
+
+- MemoryCache: 프로세스 로컬 LRU (단일 워커 / 테스트용)
+- SqliteCache: 워커 간 공유 (원자적 set, TTL, 용량 기반 LRU 제거)
+
+사용법:
+    cache = get_cache("game_bundles", ttl=300)
+    value = cache.get(key)
+    cache.set(key, value)
+    value = await cache.aget(key)      # async 핸들러에서는 이벤트 루프를 막지 않게
+    await cache.aset(key, value)
+
+백엔드 선택: GMJJ_CACHE_BACKEND=sqlite(기본) | memory
+"""
+
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# ============================================================
+# 설정
+# ============================================================
+PROJECT_ROOT = Path(__file__).parent.parent
+
+CACHE_BACKEND = os.getenv("GMJJ_CACHE_BACKEND", "sqlite")
+CACHE_PATH = os.getenv(
+    "GMJJ_CACHE_PATH", str(PROJECT_ROOT / "data" / "cache" / "web_cache.sqlite3")
+)
+CACHE_MAX_BYTES = int(os.getenv("GMJJ_CACHE_MAX_MB", "512")) * 1024 * 1024
+MEMORY_CACHE_MAX_ITEMS = 2048
+
+# 읽을 때마다 accessed_at을 갱신하면 쓰기 경합이 생기므로 이 간격 이상일 때만 갱신
+_TOUCH_INTERVAL = 60.0
+# set N회마다 전체 용량 확인 → 초과 시 오래된 항목부터 제거
+_EVICT_CHECK_EVERY = 50
+
+
+class CacheBackend:
+    """캐시 백엔드 공통 인터페이스"""
+
+    backend = "base"
+
+    def __init__(self, namespace: str, ttl: float | None = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        """값 조회 (없거나 만료되면 None)"""
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float | None = None):
+        """값 저장 (ttl 미지정 시 네임스페이스 기본 TTL)"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    async def aget(self, key: str):
+        """async 핸들러용 get - 파일 I/O가 이벤트 루프를 막지 않게 실행기 스레드에서 조회"""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value, ttl: float | None = None):
+        """async 핸들러용 set - 실행기 스레드에서 저장"""
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def _expires_at(self, ttl: float | None) -> float | None:
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() + ttl if ttl else None
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# ============================================================
+# 프로세스 로컬 메모리 캐시
+# ============================================================
+class MemoryCache(CacheBackend):
+    """프로세스 로컬 LRU + TTL"""
+
+    backend = "memory"
+
+    def __init__(self, namespace: str, ttl: float | None = None, max_items: int = MEMORY_CACHE_MAX_ITEMS):
+        super().__init__(namespace, ttl)
+        self.max_items = max_items
+        self._items: OrderedDict[str, tuple[float | None, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] is not None and item[0] < time.time():
+                del self._items[key]
+                item = None
+            if item is None:
+                self._record(False)
+                return None
+            self._items.move_to_end(key)
+            self._record(True)
+            return item[1]
+
+    def set(self, key: str, value, ttl: float | None = None):
+        with self._lock:
+            self._items[key] = (self._expires_at(ttl), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._items.pop(key, None)
+
+    # 메모리 조회는 I/O가 없으므로 스레드를 거치지 않는다
+    async def aget(self, key: str):
+        return self.get(key)
+
+    async def aset(self, key: str, value, ttl: float | None = None):
+        self.set(key, value, ttl)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "entries": len(self._items)}
+
+
+# ============================================================
+# 워커 공유 SQLite 캐시
+# ============================================================
+class SqliteCache(CacheBackend):
+    """
+    SQLite(WAL) 파일 기반 공유 캐시
+
+    - WAL 모드라 여러 워커가 동시에 읽어도 막히지 않음
+    - set은 INSERT OR REPLACE 한 문장 → 원자적
+    - 만료 항목은 조회 시 무시, 용량 초과 시 accessed_at 오래된 순으로 제거
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, namespace: str, ttl: float | None = None,
+                 path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        super().__init__(namespace, ttl)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._sets = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션 (sqlite3 커넥션은 스레드 간 공유 불가)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace   TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                value       BLOB NOT NULL,
+                size        INTEGER NOT NULL,
+                expires_at  REAL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn().execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)"
+        )
+
+    def get(self, key: str):
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT value, expires_at, accessed_at FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+
+        if row is None or (row[1] is not None and row[1] < now):
+            self._record(False)
+            return None
+
+        if now - row[2] > _TOUCH_INTERVAL:
+            self._conn().execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+        self._record(True)
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value, ttl: float | None = None):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, size, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.namespace, key, blob, len(blob), self._expires_at(ttl), time.time()),
+        )
+        self._sets += 1
+        if self._sets % _EVICT_CHECK_EVERY == 0:
+            self.evict()
+
+    def delete(self, key: str):
+        self._conn().execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def evict(self) -> int:
+        """만료 항목 삭제 + 용량 초과분을 오래된 순으로 제거 (전체 네임스페이스 대상)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time(),),
+            ).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                # 90%까지 줄여서 매번 제거가 반복되지 않게 함
+                target = total - int(self.max_bytes * 0.9)
+                freed = 0
+                victims = []
+                for ns, k, size in conn.execute(
+                    "SELECT namespace, key, size FROM cache ORDER BY accessed_at"
+                ):
+                    victims.append((ns, k))
+                    freed += size
+                    if freed >= target:
+                        break
+                conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", victims)
+                removed += len(victims)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def stats(self) -> dict:
+        entries, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()
+        return {**super().stats(), "entries": entries, "bytes": size}
+
+
+# ============================================================
+# 팩토리
+# ============================================================
+_caches: dict[str, CacheBackend] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, ttl: float | None = None) -> CacheBackend:
+    """네임스페이스별 캐시 반환 (프로세스당 1개)"""
+    cache = _caches.get(namespace)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(namespace)
+            if cache is None:
+                if CACHE_BACKEND == "memory":
+                    cache = MemoryCache(namespace, ttl)
+                else:
+                    cache = SqliteCache(namespace, ttl)
+                _caches[namespace] = cache
+    return cache
+
+
+def cache_stats() -> dict:
+    """생성된 전체 캐시 지표"""
+    stats = {}
+    for name, cache in list(_caches.items()):
+        try:
+            stats[name] = cache.stats()
+        except Exception as e:
+            stats[name] = {"backend": cache.backend, "error": str(e)}
+    return stats
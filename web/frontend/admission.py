@@ -0,0 +1,295 @@
+"""
+LLM 엔드포인트 입장 제어 (Admission Control)
+
+/api/chat, /api/play 처럼 OpenAI를 호출하는 라우트 앞단에서
+동시 실행 수와 클라이언트별 요청 속도를 제한한다.
+
+- 전역 동시 실행 상한 (세마포어)
+- 클라이언트별 토큰 버킷 (초당 요청 수 + 버스트)
+- 제한된 대기열 + 데드라인 기반 조기 거절 (429 + Retry-After)
+- 대기열 길이 / 대기 시간 지표 (/api/metrics 에서 조회)
+
+과부하 시 요청을 무한정 쌓지 않고 빠르게 거절해서
+이미 처리 중인 요청의 지연이 같이 무너지지 않도록 한다.
+"""
+
+import asyncio
+import ipaddress
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+# ============================================================
+# 설정 (환경변수로 덮어쓰기 가능)
+# ============================================================
+LLM_MAX_CONCURRENT = int(os.getenv("GMJJ_LLM_MAX_CONCURRENT", "8"))      # 전역 동시 LLM 호출 수
+LLM_MAX_QUEUE = int(os.getenv("GMJJ_LLM_MAX_QUEUE", "32"))               # 대기열 최대 길이
+LLM_QUEUE_TIMEOUT = float(os.getenv("GMJJ_LLM_QUEUE_TIMEOUT", "10"))     # 대기 허용 시간(초)
+CLIENT_RATE_PER_SEC = float(os.getenv("GMJJ_CLIENT_RATE", "0.5"))         # 클라이언트별 초당 요청 수
+CLIENT_BURST = int(os.getenv("GMJJ_CLIENT_BURST", "5"))                  # 클라이언트별 버스트 허용량
+# X-Forwarded-For를 믿을 프록시 (IP/CIDR 쉼표 구분). 비어 있으면 헤더를 무시하고 접속 IP를 쓴다
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(p.strip(), strict=False)
+    for p in os.getenv("GMJJ_TRUSTED_PROXIES", "").split(",")
+    if p.strip()
+]
+
+# 지표 계산에 쓰는 최근 샘플 수
+_SAMPLE_SIZE = 500
+# 오래 안 쓴 클라이언트 버킷 정리 기준(초) / 추적할 클라이언트 수 상한 (넘으면 가장 오래 안 쓴 것부터 제거)
+_BUCKET_IDLE_SECONDS = 600
+_MAX_BUCKETS = 10000
+
+
+class AdmissionRejected(Exception):
+    """입장 거절 (429로 응답해야 함)"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """클라이언트 1개의 요청 속도 제한용 토큰 버킷"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        토큰 1개 소비 시도
+
+        Returns:
+            0이면 성공, 양수면 다음 토큰까지 기다려야 하는 시간(초)
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def refund(self):
+        """take()로 쓴 토큰 1개 반환 (전역 과부하로 거절된 요청)"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+def _percentile(samples, pct: float) -> float:
+    """샘플 리스트의 백분위수 (샘플 없으면 0)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+class AdmissionController:
+    """
+    전역 동시성 상한 + 클라이언트별 토큰 버킷 + 제한된 대기열
+
+    사용법:
+        async with controller.slot(client_key):
+            ... LLM 호출 ...
+
+    입장할 수 없으면 AdmissionRejected를 던진다.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = LLM_MAX_CONCURRENT,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        client_rate: float = CLIENT_RATE_PER_SEC,
+        client_burst: int = CLIENT_BURST,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()  # 최근 사용 순 (LRU)
+        self._in_flight = 0
+        self._waiting = 0
+
+        # 지표
+        self._admitted = 0
+        self._rejected: dict[str, int] = {"rate_limited": 0, "queue_full": 0, "deadline": 0}
+        self._max_waiting_seen = 0
+        self._wait_times: deque[float] = deque(maxlen=_SAMPLE_SIZE)
+        self._service_times: deque[float] = deque(maxlen=_SAMPLE_SIZE)
+
+    # --------------------------------------------------------
+    # 내부 헬퍼
+    # --------------------------------------------------------
+    def _bucket(self, client_key: str) -> TokenBucket:
+        """
+        클라이언트 버킷 조회 (없으면 생성)
+
+        버킷은 최근 사용 순으로 두고 앞쪽(가장 오래 안 쓴 것)부터 정리한다:
+        idle 기준을 넘은 버킷과 상한(_MAX_BUCKETS)을 넘는 버킷. 요청당 O(1).
+        """
+        bucket = self._buckets.get(client_key)
+        if bucket is not None:
+            self._buckets.move_to_end(client_key)
+            return bucket
+
+        cutoff = time.monotonic() - _BUCKET_IDLE_SECONDS
+        while self._buckets and (
+            len(self._buckets) >= _MAX_BUCKETS or next(iter(self._buckets.values())).updated < cutoff
+        ):
+            self._buckets.popitem(last=False)
+        bucket = TokenBucket(self.client_rate, self.client_burst)
+        self._buckets[client_key] = bucket
+        return bucket
+
+    def _estimated_wait(self) -> float:
+        """지금 대기열에 들어가면 예상되는 대기 시간(초)"""
+        if self._in_flight < self.max_concurrent and self._waiting == 0:
+            return 0.0
+        avg_service = (
+            sum(self._service_times) / len(self._service_times)
+            if self._service_times else 1.0
+        )
+        # 내 앞의 대기자 + 나 자신이 빈 슬롯을 기다리는 시간
+        return (self._waiting + 1) * avg_service / self.max_concurrent
+
+    def _reject(self, reason: str, retry_after: float):
+        self._rejected[reason] += 1
+        raise AdmissionRejected(reason, max(1.0, retry_after))
+
+    # --------------------------------------------------------
+    # 입장 / 퇴장
+    # --------------------------------------------------------
+    async def acquire(self, client_key: str):
+        """
+        슬롯 1개 획득 (거절 시 AdmissionRejected)
+
+        대기열/데드라인(전역 과부하)으로 거절되면 클라이언트 토큰을 돌려준다.
+        그래야 Retry-After 뒤에 다시 온 요청이 rate_limited로 또 거절되지 않는다.
+        """
+        # 1) 클라이언트별 속도 제한
+        bucket = self._bucket(client_key)
+        wait = bucket.take()
+        if wait > 0:
+            self._reject("rate_limited", wait)
+
+        try:
+            await self._admit()
+        except AdmissionRejected:
+            bucket.refund()
+            raise
+
+    async def _admit(self):
+        """전역 슬롯 획득 (빈 슬롯 → 바로, 아니면 제한된 대기열에서 데드라인까지)"""
+        # 2) 빈 슬롯이 있으면 대기 없이 바로 입장
+        if not self._semaphore.locked() and self._waiting == 0:
+            await self._semaphore.acquire()
+            self._wait_times.append(0.0)
+            self._in_flight += 1
+            self._admitted += 1
+            return
+
+        # 3) 대기열이 꽉 찼으면 즉시 거절
+        if self._waiting >= self.max_queue:
+            self._reject("queue_full", self._estimated_wait())
+
+        # 4) 데드라인 안에 못 들어갈 게 뻔하면 기다리지 않고 거절
+        estimated = self._estimated_wait()
+        if estimated > self.queue_timeout:
+            self._reject("deadline", estimated)
+
+        self._waiting += 1
+        self._max_waiting_seen = max(self._max_waiting_seen, self._waiting)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject("deadline", self._estimated_wait())
+        finally:
+            self._waiting -= 1
+
+        self._wait_times.append(time.monotonic() - start)
+        self._in_flight += 1
+        self._admitted += 1
+
+    def release(self, service_time: float):
+        """슬롯 반납"""
+        self._in_flight -= 1
+        self._service_times.append(service_time)
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, client_key: str):
+        """async with 용 슬롯 (종료 시 자동 반납)"""
+        await self.acquire(client_key)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    # --------------------------------------------------------
+    # 지표
+    # --------------------------------------------------------
+    def stats(self) -> dict:
+        """현재 상태 + 누적 지표"""
+        waits = list(self._wait_times)
+        services = list(self._service_times)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "max_queue": self.max_queue,
+            "max_queue_depth_seen": self._max_waiting_seen,
+            "admitted": self._admitted,
+            "rejected": dict(self._rejected),
+            "wait_ms": {
+                "p50": round(_percentile(waits, 50) * 1000, 1),
+                "p95": round(_percentile(waits, 95) * 1000, 1),
+                "max": round(max(waits, default=0) * 1000, 1),
+            },
+            "service_ms": {
+                "p50": round(_percentile(services, 50) * 1000, 1),
+                "p95": round(_percentile(services, 95) * 1000, 1),
+            },
+            "tracked_clients": len(self._buckets),
+        }
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        addr = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(addr in net for net in TRUSTED_PROXIES)
+
+
+def client_key(request) -> str:
+    """
+    요청 클라이언트 식별 키
+
+    X-Forwarded-For는 아무나 붙일 수 있으므로 접속 IP가 신뢰 프록시(TRUSTED_PROXIES)일 때만 본다.
+    오른쪽(가장 가까운 홉)부터 신뢰 프록시를 건너뛰고 처음 나오는 주소가 클라이언트다.
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(host):
+        return host
+    hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else host
+
+
+# LLM 라우트 공용 컨트롤러 (프로세스당 1개)
+llm_admission = AdmissionController()
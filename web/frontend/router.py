@@ -5,15 +5,27 @@
 홈, 보드게임 목록, 게임 상세 페이지를 포함합니다.
 """
 
+import asyncio
+import hashlib
 import io
 import os
+import time
 
 from fastapi import APIRouter, Request, Query, UploadFile, File
 from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 
+from web.cache import cache_stats, get_cache
 from web.frontend import service
+from web.frontend.admission import AdmissionRejected, client_key, llm_admission
+from web.frontend.upstream import (
+    UpstreamUnavailable,
+    fallback_cache,
+    get_async_client,
+    upstream,
+    upstream_stats,
+)
 
 router = APIRouter(tags=["frontend"])
 
@@ -176,7 +188,7 @@ async def api_mygames(ids: str = Query("")):
         game_ids = [int(x) for x in ids.split(",") if x.strip()]
     except ValueError:
         return []
-    games = service.get_games_by_ids(game_ids)
+    games = await asyncio.to_thread(service.get_games_by_ids, game_ids)
     return games
 
 
@@ -189,7 +201,8 @@ async def games_list(
 ):
     """보드게임 목록 (검색 + 페이지네이션)"""
     try:
-        result = service.list_games_with_images(
+        result = await asyncio.to_thread(
+            service.list_games_with_images,
             page=page,
             search=search,
             per_page=20,
@@ -217,7 +230,7 @@ async def games_list(
 async def game_detail(request: Request, game_id: int):
     """게임 상세 페이지"""
     from_page = request.query_params.get("from", "games")
-    game = service.get_game_detail(game_id)
+    game = await asyncio.to_thread(service.get_game_detail, game_id)
     if not game:
         return HTMLResponse("<h1>게임을 찾을 수 없습니다</h1>", status_code=404)
 
@@ -234,11 +247,11 @@ async def game_detail(request: Request, game_id: int):
 async def game_chat(request: Request, game_id: int):
     """게임마스터 안내 - 룰 채팅 페이지"""
     from_page = request.query_params.get("from", "games")
-    game = service.get_game_detail(game_id)
+    game = await asyncio.to_thread(service.get_game_detail, game_id)
     if not game:
         return HTMLResponse("<h1>게임을 찾을 수 없습니다</h1>", status_code=404)
 
-    rules = service.get_game_rules(game_id)
+    rules = await asyncio.to_thread(service.get_game_rules, game_id)
 
     return templates.TemplateResponse("game_chat.html", {
         "request": request,
@@ -254,11 +267,11 @@ async def game_chat(request: Request, game_id: int):
 async def game_play(request: Request, game_id: int):
     """게임 진행 페이지 - 에이전트와 함께 플레이"""
     from_page = request.query_params.get("from", "games")
-    game = service.get_game_detail(game_id)
+    game = await asyncio.to_thread(service.get_game_detail, game_id)
     if not game:
         return HTMLResponse("<h1>게임을 찾을 수 없습니다</h1>", status_code=404)
 
-    rules = service.get_game_rules(game_id)
+    rules = await asyncio.to_thread(service.get_game_rules, game_id)
 
     return templates.TemplateResponse("game_play.html", {
         "request": request,
@@ -274,12 +287,85 @@ class ChatMessage(BaseModel):
     game_id: int
     message: str
     history: list[dict] = []
+    retrieval: str | None = None  # 룰 청크 검색 방식 (vector / lexical / hybrid), None이면 사용 안 함
+
+
+# 채팅 질문에 붙일 룰 청크 수
+CHAT_RETRIEVAL_TOP_K = 5
+
+
+async def _retrieve_rule_chunks(msg: ChatMessage) -> tuple[list, dict]:
+    """
+    질문과 관련된 룰 청크 검색 (해당 게임만)
+
+    Returns:
+        (SearchResult 리스트, 검색 지표)
+    """
+    from web.admin.search_service import search_chromadb
+
+    timings = {}
+    start = time.perf_counter()
+    try:
+        chunks = await asyncio.to_thread(
+            search_chromadb,
+            msg.message,
+            CHAT_RETRIEVAL_TOP_K,
+            None,
+            msg.game_id,
+            timings,
+            msg.retrieval,
+        )
+    except Exception as e:
+        print(f"[chat] [WARN] 룰 청크 검색 실패 ({msg.retrieval}): {e}")
+        return [], {"mode": msg.retrieval, "error": str(e)}
+
+    return chunks, {
+        "mode": msg.retrieval,
+        "chunks": len(chunks),
+        "ms": round((time.perf_counter() - start) * 1000, 1),
+        "timings": timings,
+    }
+
+
+def _overloaded_response(e: AdmissionRejected) -> JSONResponse:
+    """입장 거절 → 429 + Retry-After (프론트는 reply를 그대로 표시)"""
+    retry_after = int(e.retry_after + 0.999)
+    return JSONResponse(
+        {
+            "reply": f"지금 질문이 많이 몰려 있어요. {retry_after}초 후에 다시 시도해주세요.",
+            "error": e.reason,
+        },
+        status_code=429,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+async def _degraded_response(fallback_key: str, e: UpstreamUnavailable) -> JSONResponse:
+    """업스트림 장애 → 최근 같은 질문의 답변이 있으면 그걸로, 없으면 503 안내"""
+    cached = await fallback_cache.aget(fallback_key)
+    if cached is not None:
+        return JSONResponse({"reply": cached, "degraded": True})
+
+    retry_after = int(e.retry_after + 0.999)
+    return JSONResponse(
+        {
+            "reply": "지금 GM이 잠시 응답할 수 없어요. 조금 뒤에 다시 물어봐주세요.",
+            "error": e.reason,
+        },
+        status_code=504 if e.reason == "timeout" else 503,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def _fallback_key(kind: str, *parts) -> str:
+    """폴백 캐시 키 (입력 텍스트 해시)"""
+    raw = "\x1f".join(str(p) for p in parts)
+    return f"{kind}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
 
 
 @router.post("/api/chat")
-async def api_chat(msg: ChatMessage):
+async def api_chat(msg: ChatMessage, request: Request):
     """게임 룰 Q&A 채팅 API (OpenAI)"""
-    import openai
     from dotenv import load_dotenv
     load_dotenv()
 
@@ -288,8 +374,10 @@ async def api_chat(msg: ChatMessage):
         return JSONResponse({"reply": "OpenAI API 키가 설정되지 않았습니다."})
 
     # 게임 정보 + 룰 데이터로 시스템 프롬프트 구성
-    game = service.get_game_detail(msg.game_id)
-    rules = service.get_game_rules(msg.game_id)
+    game, rules = await asyncio.gather(
+        asyncio.to_thread(service.get_game_detail, msg.game_id),
+        asyncio.to_thread(service.get_game_rules, msg.game_id),
+    )
 
     system_parts = [
         f"당신은 보드게임 '{game['name_ko']}'의 룰 안내 전문가 게임마스터 JJ입니다.",
@@ -313,6 +401,14 @@ async def api_chat(msg: ChatMessage):
             if content:
                 system_parts.append(f"\n## {label}\n{content}")
 
+    # 질문 관련 룰 청크 (요청 시)
+    retrieval = None
+    if msg.retrieval:
+        chunks, retrieval = await _retrieve_rule_chunks(msg)
+        if chunks:
+            excerpts = "\n\n".join(f"[{i}] {c.document}" for i, c in enumerate(chunks, 1))
+            system_parts.append(f"\n## 질문 관련 룰 발췌\n{excerpts}")
+
     system_prompt = "\n".join(system_parts)
 
     # 대화 히스토리 구성
@@ -321,18 +417,33 @@ async def api_chat(msg: ChatMessage):
         messages.append({"role": h.get("role", "user"), "content": h.get("content", "")})
     messages.append({"role": "user", "content": msg.message})
 
+    fallback_key = _fallback_key("chat", msg.game_id, msg.message.strip())
+
     try:
-        client = openai.OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=messages,
-            max_tokens=1000,
-            temperature=0.7,
-        )
+        async with llm_admission.slot(client_key(request)):
+            client = get_async_client()
+            response = await upstream("chat").call(
+                lambda: client.chat.completions.create(
+                    model="gpt-4.1-mini",
+                    messages=messages,
+                    max_tokens=1000,
+                    temperature=0.7,
+                )
+            )
         reply = response.choices[0].message.content
+    except AdmissionRejected as e:
+        return _overloaded_response(e)
+    except UpstreamUnavailable as e:
+        return await _degraded_response(fallback_key, e)
     except Exception as e:
-        reply = f"응답 생성 중 오류가 발생했습니다: {str(e)}"
+        return JSONResponse(
+            {"reply": f"응답 생성 중 오류가 발생했습니다: {str(e)}", "error": "upstream_error"},
+            status_code=502,
+        )
 
+    await fallback_cache.aset(fallback_key, reply)
+    if retrieval is not None:
+        return JSONResponse({"reply": reply, "retrieval": retrieval})
     return JSONResponse({"reply": reply})
 
 
@@ -344,7 +455,7 @@ class PlayMessage(BaseModel):
 
 
 @router.post("/api/play")
-async def api_play(msg: PlayMessage):
+async def api_play(msg: PlayMessage, request: Request):
     """
     게임 진행 채팅 API
 
@@ -353,7 +464,6 @@ async def api_play(msg: PlayMessage):
     - 한 번에 한 단계만 안내
     - 플레이어 행동을 기다린 후 다음 안내
     """
-    import openai
     from dotenv import load_dotenv
     load_dotenv()
 
@@ -361,9 +471,11 @@ async def api_play(msg: PlayMessage):
     if not api_key:
         return JSONResponse({"reply": "OpenAI API 키가 설정되지 않았습니다."})
 
-    game = service.get_game_detail(msg.game_id)
-    rules = service.get_game_rules(msg.game_id)
-    playbook = service.get_game_playbook(msg.game_id)
+    game, rules, playbook = await asyncio.gather(
+        asyncio.to_thread(service.get_game_detail, msg.game_id),
+        asyncio.to_thread(service.get_game_rules, msg.game_id),
+        asyncio.to_thread(service.get_game_playbook, msg.game_id),
+    )
 
     # 플레이북을 텍스트로 구성
     playbook_text = ""
@@ -430,21 +542,51 @@ async def api_play(msg: PlayMessage):
         messages.append({"role": h.get("role", "user"), "content": h.get("content", "")})
     messages.append({"role": "user", "content": msg.message})
 
+    # 진행 모드는 직전 GM 발화에 따라 답이 달라지므로 마지막 히스토리까지 키에 포함
+    last_turn = msg.history[-1].get("content", "") if msg.history else ""
+    fallback_key = _fallback_key(
+        "play", msg.game_id, msg.player_count, last_turn, msg.message.strip()
+    )
+
     try:
-        client = openai.OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=messages,
-            max_tokens=400,  # 짧은 답변 강제
-            temperature=0.7,
-        )
+        async with llm_admission.slot(client_key(request)):
+            client = get_async_client()
+            response = await upstream("play").call(
+                lambda: client.chat.completions.create(
+                    model="gpt-4.1-mini",
+                    messages=messages,
+                    max_tokens=400,  # 짧은 답변 강제
+                    temperature=0.7,
+                )
+            )
         reply = response.choices[0].message.content
+    except AdmissionRejected as e:
+        return _overloaded_response(e)
+    except UpstreamUnavailable as e:
+        return await _degraded_response(fallback_key, e)
     except Exception as e:
-        reply = f"응답 생성 중 오류가 발생했습니다: {str(e)}"
+        return JSONResponse(
+            {"reply": f"응답 생성 중 오류가 발생했습니다: {str(e)}", "error": "upstream_error"},
+            status_code=502,
+        )
 
+    await fallback_cache.aset(fallback_key, reply)
     return JSONResponse({"reply": reply})
 
 
+@router.get("/api/metrics")
+async def api_metrics():
+    """LLM 입장 제어 + 업스트림(헤지/브레이커) + 공유 캐시 + 기동 시간 지표"""
+    from web.startup import startup_report
+
+    return JSONResponse({
+        "startup": startup_report,
+        "admission": llm_admission.stats(),
+        "upstream": upstream_stats(),
+        "caches": cache_stats(),
+    })
+
+
 # ============================================================
 # 음성 API (STT / TTS)
 # ============================================================
@@ -452,7 +594,6 @@ async def api_play(msg: PlayMessage):
 @router.post("/api/stt")
 async def api_stt(audio: UploadFile = File(...)):
     """음성 → 텍스트 변환 (OpenAI gpt-4o-mini-transcribe)"""
-    import openai
     from dotenv import load_dotenv
     load_dotenv()
 
@@ -462,17 +603,30 @@ async def api_stt(audio: UploadFile = File(...)):
 
     try:
         audio_bytes = await audio.read()
-        client = openai.OpenAI(api_key=api_key)
+        client = get_async_client()
 
         # 파일명/MIME으로 OpenAI SDK가 형식을 자동 감지
-        transcription = client.audio.transcriptions.create(
-            model="gpt-4o-mini-transcribe",
-            file=("audio.webm", audio_bytes, audio.content_type or "audio/webm"),
-            language="ko",
+        transcription = await upstream("stt").call(
+            lambda: client.audio.transcriptions.create(
+                model="gpt-4o-mini-transcribe",
+                file=("audio.webm", audio_bytes, audio.content_type or "audio/webm"),
+                language="ko",
+            )
         )
         return JSONResponse({"text": transcription.text})
+    except UpstreamUnavailable as e:
+        return JSONResponse(
+            {"text": "", "error": e.reason},
+            status_code=504 if e.reason == "timeout" else 503,
+            headers={"Retry-After": str(int(e.retry_after + 0.999))},
+        )
     except Exception as e:
-        return JSONResponse({"text": "", "error": str(e)}, status_code=500)
+        return JSONResponse({"text": "", "error": str(e)}, status_code=502)
+
+
+# 합성 음성 캐시 (워커 간 공유)
+TTS_CACHE_TTL = int(os.getenv("GMJJ_TTS_CACHE_TTL", str(7 * 24 * 3600)))
+_tts_cache = get_cache("tts_audio", ttl=TTS_CACHE_TTL)
 
 
 class TtsRequest(BaseModel):
@@ -488,7 +642,6 @@ class TtsRequest(BaseModel):
 @router.post("/api/tts")
 async def api_tts(req: TtsRequest):
     """텍스트 → 음성 변환 (OpenAI gpt-4o-mini-tts)"""
-    import openai
     from dotenv import load_dotenv
     load_dotenv()
 
@@ -496,20 +649,40 @@ async def api_tts(req: TtsRequest):
     if not api_key:
         return JSONResponse({"error": "API key missing"}, status_code=500)
 
-    try:
-        client = openai.OpenAI(api_key=api_key)
-        response = client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice=req.voice,
-            input=req.text,
-            instructions=req.instructions,
-            response_format="mp3",
-        )
-        audio_bytes = response.content
+    # 같은 문장 + 목소리면 합성 결과가 같으므로 워커 공유 캐시에서 바로 응답
+    cache_key = _fallback_key("tts", req.voice, req.instructions, req.text)
+    audio_bytes = await _tts_cache.aget(cache_key)
+    if audio_bytes is not None:
         return StreamingResponse(
             io.BytesIO(audio_bytes),
             media_type="audio/mpeg",
             headers={"Content-Length": str(len(audio_bytes))},
         )
+
+    try:
+        client = get_async_client()
+        response = await upstream("tts").call(
+            lambda: client.audio.speech.create(
+                model="gpt-4o-mini-tts",
+                voice=req.voice,
+                input=req.text,
+                instructions=req.instructions,
+                response_format="mp3",
+            )
+        )
+        audio_bytes = response.content
+        await _tts_cache.aset(cache_key, audio_bytes)
+    except UpstreamUnavailable as e:
+        return JSONResponse(
+            {"error": e.reason},
+            status_code=504 if e.reason == "timeout" else 503,
+            headers={"Retry-After": str(int(e.retry_after + 0.999))},
+        )
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return JSONResponse({"error": str(e)}, status_code=502)
+
+    return StreamingResponse(
+        io.BytesIO(audio_bytes),
+        media_type="audio/mpeg",
+        headers={"Content-Length": str(len(audio_bytes))},
+    )
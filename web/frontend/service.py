@@ -2,23 +2,84 @@
 사용자 프론트엔드 Supabase 서비스
 
 게임 목록, 검색, 이미지 등 사용자 화면에 필요한 데이터를 조회합니다.
+모든 함수는 동기(SQLite 캐시 + Supabase 왕복)이므로 async 라우트에서는 asyncio.to_thread로 부릅니다.
 """
 
 import os
+import threading
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+from web.cache import get_cache
+
+# supabase는 클라이언트를 처음 만들 때 import (어드민 service와 같이).
+# 라우터 import에서 빠지고, 기동 시에는 워밍업의 supabase_client 단계(스레드)에서 로드된다.
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
 
+# 게임 상세/룰/플레이북 캐시 유지 시간(초)
+# 채팅 요청마다 Supabase를 3번씩 왕복하지 않도록 한다.
+BUNDLE_TTL_SECONDS = int(os.getenv("GMJJ_BUNDLE_TTL", "300"))
+
+_client: "Client | None" = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> "Client":
+    """Supabase 클라이언트 반환 (싱글톤)"""
+    global _client
+    if _client is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise RuntimeError("SUPABASE_URL 또는 SUPABASE_KEY가 설정되지 않았습니다.")
+        with _client_lock:
+            if _client is None:
+                from supabase import create_client
+                _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _client
+
+
+# ============================================================
+# 게임 번들 캐시 (상세 + 룰 + 플레이북)
+# ============================================================
+# 워커 간 공유 캐시 → uvicorn --workers N 에서도 게임당 1번만 로드
+_bundle_cache = get_cache("game_bundles", ttl=BUNDLE_TTL_SECONDS)
+
+
+def _cached(kind: str, game_id: int, loader):
+    """(종류, game_id) 단위 TTL 캐시"""
+    key = f"{kind}:{game_id}"
+    value = _bundle_cache.get(key)
+    if value is None:
+        value = loader(game_id)
+        if value is not None:
+            _bundle_cache.set(key, value)
+    return value
+
 
-def _get_client() -> Client:
-    """Supabase 클라이언트 생성"""
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise RuntimeError("SUPABASE_URL 또는 SUPABASE_KEY가 설정되지 않았습니다.")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+def prefetch_hot_games(limit: int) -> int:
+    """
+    룰 데이터가 있는 게임 중 평점 상위 N개의 번들을 미리 캐시에 올린다.
+
+    Returns:
+        캐시에 올린 게임 수
+    """
+    sb = _get_client()
+    resp = sb.table("game_rules").select("game_id, games(rating)").execute()
+    rows = [r for r in (resp.data or []) if r.get("games")]
+    rows.sort(key=lambda r: r["games"].get("rating") or 0, reverse=True)
+
+    for row in rows[:limit]:
+        game_id = row["game_id"]
+        get_game_detail(game_id)
+        get_game_rules(game_id)
+        get_game_playbook(game_id)
+    return min(limit, len(rows))
 
 
 def list_games_with_images(
@@ -110,6 +171,11 @@ def get_games_by_ids(game_ids: list[int]) -> list[dict]:
 
 
 def get_game_rules(game_id: int) -> dict | None:
+    """게임 룰 데이터 조회 (캐시 우선)"""
+    return _cached("rules", game_id, _load_game_rules)
+
+
+def _load_game_rules(game_id: int) -> dict | None:
     """게임 룰 데이터 조회 (game_rules 테이블)"""
     sb = _get_client()
     resp = (
@@ -130,6 +196,11 @@ def get_game_rules(game_id: int) -> dict | None:
 
 
 def get_game_playbook(game_id: int) -> list[dict]:
+    """게임 플레이북 조회 (캐시 우선)"""
+    return _cached("playbook", game_id, _load_game_playbook)
+
+
+def _load_game_playbook(game_id: int) -> list[dict]:
     """게임 플레이북 조회 (단계별 진행 가이드)"""
     sb = _get_client()
     resp = (
@@ -143,6 +214,11 @@ def get_game_playbook(game_id: int) -> list[dict]:
 
 
 def get_game_detail(game_id: int) -> dict | None:
+    """게임 상세 정보 조회 (캐시 우선)"""
+    return _cached("detail", game_id, _load_game_detail)
+
+
+def _load_game_detail(game_id: int) -> dict | None:
     """게임 상세 정보 + 이미지 조회"""
     sb = _get_client()
     resp = (
@@ -0,0 +1,309 @@
+"""
+업스트림(OpenAI) 호출 래퍼
+
+웹 엔드포인트에서 부르는 LLM / TTS / STT 호출을 감싸서
+꼬리 지연(p99)과 장애 전파를 줄인다.
+
+- 엔드포인트별 타임아웃
+- 헤지 요청: 최근 p95 지연만큼 기다려도 응답이 없으면 같은 요청을 한 번 더 보내고,
+  먼저 끝난 쪽을 쓰고 나머지는 취소
+- 서킷 브레이커: 연속 실패 시 일정 시간 동안 바로 실패시켜
+  캐시된 답변이나 안내 메시지(degraded)로 응답하게 함
+- 헤지 비율 / 브레이커 상태 지표 (/api/metrics 에서 조회)
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+import openai
+
+from web.cache import get_cache
+
+# ============================================================
+# 설정
+# ============================================================
+# 엔드포인트별 설정: 타임아웃(초), 헤지 여부, 샘플 부족 시 기본 헤지 지연(초)
+UPSTREAM_SETTINGS = {
+    "chat": {"timeout": 30.0, "hedge": True, "hedge_delay": 6.0},
+    "play": {"timeout": 20.0, "hedge": True, "hedge_delay": 4.0},
+    "tts": {"timeout": 30.0, "hedge": True, "hedge_delay": 5.0},
+    "stt": {"timeout": 30.0, "hedge": False, "hedge_delay": 0.0},  # 업로드가 커서 헤지 안 함
+}
+
+HEDGE_MIN_DELAY = 0.5        # 헤지 지연 하한(초)
+HEDGE_MIN_SAMPLES = 20       # p95를 믿기 위한 최소 샘플 수
+HEDGE_MAX_RATIO = 0.15       # 전체 호출 대비 헤지 비율 상한 (비용 폭증 방지)
+
+BREAKER_FAILURE_THRESHOLD = 5    # 연속 실패 N회 → open
+BREAKER_OPEN_SECONDS = 30.0      # open 유지 시간 → 이후 half-open 탐색 1건
+
+_SAMPLE_SIZE = 200
+
+# 서버 상태 문제로 보는 예외 (브레이커 실패로 집계)
+# 400 같은 요청 오류는 제공자 장애가 아니므로 제외한다.
+_UPSTREAM_FAILURES = (
+    asyncio.TimeoutError,
+    openai.APIConnectionError,   # APITimeoutError 포함
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class UpstreamUnavailable(Exception):
+    """업스트림을 지금 쓸 수 없음 (폴백 응답으로 대체해야 함)"""
+
+    def __init__(self, endpoint: str, reason: str, retry_after: float):
+        super().__init__(f"{endpoint}: {reason}")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _percentile(samples, pct: float) -> float:
+    """샘플 리스트의 백분위수 (샘플 없으면 0)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+# ============================================================
+# 서킷 브레이커
+# ============================================================
+class CircuitBreaker:
+    """
+    연속 실패 기반 서킷 브레이커
+
+    closed    → 정상
+    open      → 바로 실패 (BREAKER_OPEN_SECONDS 동안)
+    half_open → 탐색 요청 1건만 통과, 성공하면 closed / 실패하면 다시 open
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """이번 요청을 보내도 되는지"""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self.state = "half_open"
+            self._probe_in_flight = False
+        # half_open: 탐색 1건만 통과
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def retry_after(self) -> float:
+        """open 상태가 풀리기까지 남은 시간(초)"""
+        if self.state != "open":
+            return 1.0
+        return max(1.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.open_count += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def record_neutral(self):
+        """제공자 상태와 무관한 실패 (요청 오류 등) → 탐색 슬롯만 반납"""
+        self._probe_in_flight = False
+
+
+# ============================================================
+# 엔드포인트 래퍼
+# ============================================================
+class UpstreamEndpoint:
+    """엔드포인트 1개의 타임아웃 + 헤지 + 브레이커 + 지표"""
+
+    def __init__(self, name: str, timeout: float, hedge: bool, hedge_delay: float):
+        self.name = name
+        self.timeout = timeout
+        self.hedge = hedge
+        self.default_hedge_delay = hedge_delay
+        self.breaker = CircuitBreaker()
+        self._latencies: deque[float] = deque(maxlen=_SAMPLE_SIZE)
+
+        # 지표
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    def hedge_delay(self) -> float:
+        """헤지 요청을 보내기 전 기다릴 시간 (최근 p95 기반)"""
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            delay = self.default_hedge_delay
+        else:
+            delay = _percentile(self._latencies, 95)
+        return min(max(delay, HEDGE_MIN_DELAY), self.timeout / 2)
+
+    def _hedge_allowed(self) -> bool:
+        if not self.hedge:
+            return False
+        return self.hedged < max(1, self.calls) * HEDGE_MAX_RATIO
+
+    async def _hedged(self, factory):
+        """primary 요청 → p95 지나도 미완료면 backup 요청 → 먼저 성공한 쪽 사용"""
+        primary = asyncio.ensure_future(factory())
+        tasks = [primary]
+        try:
+            if not self._hedge_allowed():
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay())
+            if done:
+                return primary.result()
+
+            self.hedged += 1
+            backup = asyncio.ensure_future(factory())
+            tasks.append(backup)
+
+            pending = set(tasks)
+            last_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            # 진 쪽(또는 타임아웃으로 남은 요청) 취소
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def call(self, factory):
+        """
+        업스트림 호출
+
+        Args:
+            factory: 호출할 때마다 새 코루틴을 만드는 함수 (헤지 시 2번 호출됨)
+        Raises:
+            UpstreamUnavailable: 브레이커 open, 타임아웃, 제공자 장애 (연결 끊김/429/5xx)
+        """
+        if not self.breaker.allow():
+            self.short_circuited += 1
+            raise UpstreamUnavailable(self.name, "circuit_open", self.breaker.retry_after())
+
+        self.calls += 1
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self._hedged(factory), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.breaker.record_failure()
+            raise UpstreamUnavailable(self.name, "timeout", self.breaker.retry_after())
+        except _UPSTREAM_FAILURES as e:
+            # 제공자 장애(연결 끊김/429/5xx)도 폴백 응답으로 넘기도록 UpstreamUnavailable로 바꾼다
+            self.failures += 1
+            self.breaker.record_failure()
+            raise UpstreamUnavailable(self.name, "upstream_error", self.breaker.retry_after()) from e
+        except BaseException:
+            # 요청 오류, 클라이언트 연결 끊김/바깥 타임아웃으로 인한 취소(CancelledError) 포함.
+            # 탐색 슬롯을 반납하지 않으면 half_open 브레이커가 계속 요청을 막는다.
+            self.breaker.record_neutral()
+            raise
+
+        self._latencies.append(time.monotonic() - start)
+        self.breaker.record_success()
+        return result
+
+    def stats(self) -> dict:
+        latencies = list(self._latencies)
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.calls, 3) if self.calls else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_ms": round(self.hedge_delay() * 1000) if self.hedge else None,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 50) * 1000, 1),
+                "p95": round(_percentile(latencies, 95) * 1000, 1),
+                "p99": round(_percentile(latencies, 99) * 1000, 1),
+            },
+            "breaker": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.consecutive_failures,
+                "open_count": self.breaker.open_count,
+            },
+        }
+
+
+UPSTREAMS = {
+    name: UpstreamEndpoint(name, **settings)
+    for name, settings in UPSTREAM_SETTINGS.items()
+}
+
+
+def upstream(name: str) -> UpstreamEndpoint:
+    """엔드포인트 이름으로 래퍼 조회"""
+    return UPSTREAMS[name]
+
+
+def upstream_stats() -> dict:
+    """전체 엔드포인트 지표"""
+    return {name: ep.stats() for name, ep in UPSTREAMS.items()}
+
+
+# ============================================================
+# 공용 비동기 클라이언트
+# ============================================================
+_async_client: openai.AsyncOpenAI | None = None
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """
+    AsyncOpenAI 클라이언트 반환 (싱글톤, 커넥션 풀 재사용)
+
+    재시도는 SDK가 아니라 헤지/브레이커가 담당하므로 max_retries=0.
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = openai.AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY", ""),
+            max_retries=0,
+        )
+    return _async_client
+
+
+# ============================================================
+# 폴백 캐시 (최근 성공 응답)
+# ============================================================
+# 워커 간 공유 → 다른 워커가 받아둔 답변도 장애 시 폴백으로 쓸 수 있음
+# 용량은 web.cache의 전체 크기 상한으로 관리된다.
+fallback_cache = get_cache("upstream_fallback")
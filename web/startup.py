@@ -0,0 +1,154 @@
+"""
+서버 기동 워밍업
+
+첫 사용자 요청이 import / 클라이언트 생성 / 인덱스 로드 비용을 떠안지 않도록
+lifespan 단계에서 미리 처리한다.
+
+1. 공용 클라이언트 생성 (AsyncOpenAI, Supabase)
+2. ChromaDB 컬렉션 열기 + HNSW 인덱스 로드 (더미 쿼리 1회)
+3. 검색 서비스 준비 (game_rules 컬렉션 핸들 + 쿼리 임베딩 함수 + 양자화 미러, 어휘 BM25 인덱스 쿼리 1회)
+4. 인기 게임 번들(상세/룰/플레이북) 미리 캐시
+
+각 단계 소요 시간은 startup_report에 기록되고 /api/metrics 에서 조회할 수 있다.
+워밍업 실패는 서버 기동을 막지 않는다 (에러만 기록).
+"""
+
+import asyncio
+import os
+import time
+
+# 워밍업 설정
+WARMUP_ENABLED = os.getenv("GMJJ_WARMUP", "1") != "0"
+WARMUP_HOT_GAMES = int(os.getenv("GMJJ_WARMUP_GAMES", "20"))   # 미리 캐시할 게임 수
+WARMUP_COLLECTIONS = ["game_rules", "game_search"]              # HNSW 미리 로드할 컬렉션
+
+# 기동 시간 리포트 (main.py의 import 시간 + 워밍업 단계별 시간)
+startup_report: dict = {
+    "imports_ms": {},
+    "phases_ms": {},
+    "errors": {},
+    "total_ms": 0.0,
+}
+
+
+def _timed(name: str, fn, *args):
+    """단계 1개 실행 + 소요 시간 기록 (실패해도 예외를 올리지 않음)"""
+    start = time.perf_counter()
+    result = None
+    try:
+        result = fn(*args)
+    except Exception as e:
+        startup_report["errors"][name] = str(e)
+    startup_report["phases_ms"][name] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def _build_openai_client():
+    """공용 AsyncOpenAI 클라이언트 생성"""
+    from web.frontend.upstream import get_async_client
+    get_async_client()
+
+
+def _build_supabase_client():
+    """공용 Supabase 클라이언트 생성"""
+    from web.frontend import service
+    service._get_client()
+
+
+def _load_chroma_indexes():
+    """
+    ChromaDB 컬렉션을 열고 저장된 벡터로 쿼리 1회 → HNSW 인덱스를 메모리에 올림
+
+    PersistentClient는 같은 경로면 내부 시스템을 공유하므로,
+    이후 검색 요청은 이미 로드된 인덱스를 그대로 쓴다.
+    임베딩 API는 호출하지 않는다.
+    """
+    from preprocessing.pipeline.chroma_store import resolve_collection_name
+    from web.admin.search_service import CHROMA_DIR, get_chroma_client
+
+    if not os.path.isdir(CHROMA_DIR):
+        return {}
+
+    client = get_chroma_client()
+    existing = {c.name for c in client.list_collections()}
+
+    loaded = {}
+    for name in WARMUP_COLLECTIONS:
+        physical = resolve_collection_name(name)
+        if physical not in existing:
+            continue
+        col = client.get_collection(physical)
+        sample = col.peek(limit=1)
+        embeddings = sample.get("embeddings")
+        if embeddings is not None and len(embeddings):
+            col.query(query_embeddings=[list(embeddings[0])], n_results=1)
+        loaded[name] = col.count()
+    return loaded
+
+
+def _load_search_indexes():
+    """
+    검색 서비스 싱글톤 준비 + 어휘(BM25) 인덱스 쿼리 1회
+
+    _load_chroma_indexes는 컬렉션을 직접 열 뿐이라 search_service의 컬렉션 핸들 / 임베딩 함수 /
+    미러는 첫 검색 때 만들어진다. 여기서 미리 만들고, 어휘 인덱스 SQLite도 한 번 읽어 둔다.
+    임베딩 API는 호출하지 않는다.
+    """
+    from chromadb.errors import NotFoundError
+
+    from preprocessing.pipeline.config import LEXICAL_INDEX_PATH
+    from preprocessing.pipeline.lexical_index import get_lexical_index
+    from web.admin import search_service
+
+    loaded = {}
+    if os.path.isdir(search_service.CHROMA_DIR):
+        try:
+            loaded["collection"] = search_service._get_collection().name
+            loaded["mirror"] = search_service._get_mirror() is not None
+        except NotFoundError:
+            pass  # 아직 game_rules를 만들기 전
+    # 어휘 인덱스 파일이 없으면 (아직 색인 전) 빈 파일을 만들지 않는다
+    if os.path.isfile(LEXICAL_INDEX_PATH):
+        lexical = get_lexical_index()
+        lexical.search("게임 규칙", n_results=1)
+        loaded["lexical_docs"] = lexical.count()
+    return loaded
+
+
+def _prefetch_games():
+    """인기 게임 번들 미리 캐시"""
+    from web.frontend import service
+    return service.prefetch_hot_games(WARMUP_HOT_GAMES)
+
+
+async def _timed_in_thread(name: str, fn):
+    """_timed를 스레드에서 실행 (이벤트 루프 블로킹 방지)"""
+    return await asyncio.to_thread(_timed, name, fn)
+
+
+async def warm_up(import_times_ms: dict | None = None):
+    """lifespan 시작 시 호출. 블로킹 작업은 스레드에서 실행한다."""
+    start = time.perf_counter()
+    startup_report["imports_ms"] = dict(import_times_ms or {})
+
+    if WARMUP_ENABLED:
+        await _timed_in_thread("openai_client", _build_openai_client)
+        await _timed_in_thread("supabase_client", _build_supabase_client)
+        # 인덱스 로드와 게임 프리페치는 서로 독립이라 동시에 진행
+        chroma, search, games = await asyncio.gather(
+            _timed_in_thread("chroma_index", _load_chroma_indexes),
+            _timed_in_thread("search_index", _load_search_indexes),
+            _timed_in_thread("prefetch_games", _prefetch_games),
+        )
+        startup_report["chroma_collections"] = chroma or {}
+        startup_report["search_index"] = search or {}
+        startup_report["prefetched_games"] = games or 0
+
+    startup_report["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    imports = ", ".join(f"{k}={v}ms" for k, v in startup_report["imports_ms"].items())
+    phases = ", ".join(f"{k}={v}ms" for k, v in startup_report["phases_ms"].items())
+    print(f"[startup] import: {imports or '-'}")
+    print(f"[startup] warm-up: {phases or '(비활성)'} / 총 {startup_report['total_ms']}ms")
+    for name, err in startup_report["errors"].items():
+        print(f"[startup] [WARN] {name} 실패: {err}")